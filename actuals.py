@@ -0,0 +1,355 @@
+# -----------------------------------------------------------------------------
+# REALIZADO (SETTLEMENT / PEDIDOS) x PLANEJADO
+# -----------------------------------------------------------------------------
+# Lê os relatórios exportados do Seller Central (TSV com milhões de linhas)
+# em blocos: cada bloco é reduzido com groupby em colunas tipadas (categorias)
+# para (SKU, mês, tipo de lançamento) e só esses parciais, pequenos, ficam em
+# memória. No fim, cada tipo de lançamento vira uma medida (receita, comissão,
+# FBA, devoluções, ads...) e o resultado é uma tabela por SKU x mês.
+#
+# Relatórios aceitos (detectados pelo cabeçalho):
+# - Settlement (flat file V2): transaction-type, amount-type,
+#   amount-description, amount, posted-date, sku, quantity-purchased
+# - Pedidos (All Orders): purchase-date, order-status, sku, quantity,
+#   item-price; pedidos cancelados são ignorados
+#
+# Ads e armazenagem vêm no settlement sem SKU: são rateados entre os SKUs do
+# mês pela receita. O realizado por unidade é comparado com
+# calculate_financials (mesmas métricas de METRIC_COLUMNS); imposto e CMV,
+# que não aparecem nos relatórios, vêm do plano.
+
+import os
+
+import numpy as np
+
+from engine import METRIC_COLUMNS, calculate_financials_batch
+
+# Bytes de texto lidos por bloco (~400 mil lançamentos do settlement)
+BLOCK_BYTES = 32 << 20
+
+# Medidas do realizado. Custos ficam positivos (o relatório traz débitos
+# negativos); `other` é o saldo de reembolsos e ajustes (negativo = crédito).
+MEASURES = (
+    "units", "revenue", "referral_fee", "fixed_fee", "fba_fee", "other_fees", "promotions",
+    "refunds", "units_returned", "ad_spend", "storage_fee", "other", "ordered_units", "ordered_revenue",
+)
+
+# Medidas sem SKU no settlement, rateadas pela receita do mês
+SHARED_MEASURES = ("ad_spend", "storage_fee")
+
+NO_SKU = "(sem SKU)"
+
+_SETTLEMENT_COLUMNS = {
+    "transaction-type": "ttype",
+    "amount-type": "atype",
+    "amount-description": "desc",
+    "amount": "amount",
+    "posted-date": "date",
+    "posted-date-time": "date",
+    "sku": "sku",
+    "quantity-purchased": "quantity",
+}
+_ORDER_COLUMNS = {
+    "purchase-date": "date",
+    "order-status": "status",
+    "sku": "sku",
+    "quantity": "quantity",
+    "item-price": "amount",
+}
+_KEYS = ["sku", "month", "ttype", "atype", "desc"]
+
+
+# -----------------------------------------------------------------------------
+# LEITURA EM BLOCOS
+# -----------------------------------------------------------------------------
+
+def _header(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8-sig", errors="replace") as f:
+            header = f.readline()
+    else:
+        position = source.tell()
+        header = source.readline()
+        source.seek(position)
+        if isinstance(header, bytes):
+            header = header.decode("utf-8-sig", errors="replace")
+    return header.rstrip("\r\n").split("\t")
+
+
+def detect_report(source):
+    """'settlement' ou 'orders', pelo cabeçalho do arquivo."""
+    columns = {name.strip().lower() for name in _header(source)}
+    if {"transaction-type", "amount-description", "amount"} <= columns:
+        return "settlement"
+    if {"purchase-date", "sku", "quantity", "item-price"} <= columns:
+        return "orders"
+    raise ValueError("Relatório não reconhecido: esperado settlement (flat file V2) ou pedidos (All Orders) em TSV.")
+
+
+def _read_chunks(source, columns, block_bytes, decimal):
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    # Só as colunas usadas; posted-date tem prioridade sobre posted-date-time
+    names = {}
+    for name in _header(source):
+        key = columns.get(name.strip().lower())
+        if key is not None and key not in names.values():
+            names[name] = key
+    numeric = [name for name, key in names.items() if key in ("amount", "quantity")]
+
+    # Leitor em streaming do Arrow: texto repetitivo já sai como dicionário
+    # (categoria no pandas, groupby por códigos). Relatórios da Amazon não usam
+    # aspas: desligá-las evita que uma aspa solta num nome de produto engula linhas.
+    reader = pa_csv.open_csv(
+        source,
+        read_options=pa_csv.ReadOptions(block_size=block_bytes),
+        parse_options=pa_csv.ParseOptions(delimiter="\t", quote_char=False),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=list(names),
+            column_types={name: pa.float64() if decimal == "." else pa.string() for name in numeric},
+            strings_can_be_null=True,
+            auto_dict_encode=True,
+            auto_dict_max_cardinality=1 << 20,
+        ),
+    )
+    for batch in reader:
+        chunk = batch.to_pandas().rename(columns=names)
+        if decimal != ".":
+            for key in ("amount", "quantity"):
+                if key in chunk:
+                    chunk[key] = pd.to_numeric(chunk[key].astype(str).str.replace(decimal, ".", regex=False), errors="coerce")
+        yield chunk
+
+
+def _months(dates, dayfirst):
+    import pandas as pd
+
+    # Datas repetem muito: converte só os valores distintos
+    codes, uniques = pd.factorize(dates)
+    parsed = pd.to_datetime(pd.Index(uniques), format="mixed", dayfirst=dayfirst, utc=True, errors="coerce")
+    labels = np.append(parsed.strftime("%Y-%m").to_numpy(dtype=object), None)
+    return pd.Categorical(labels[codes])
+
+
+def _partials(source, kind, block_bytes, decimal, dayfirst):
+    columns = _SETTLEMENT_COLUMNS if kind == "settlement" else _ORDER_COLUMNS
+    for chunk in _read_chunks(source, columns, block_bytes, decimal):
+        if len(chunk) == 0:
+            continue
+        if kind == "orders":
+            status = chunk["status"].astype(str).str.casefold() if "status" in chunk else None
+            if status is not None:
+                chunk = chunk[status != "cancelled"]
+            chunk = chunk.assign(ttype="pedido", atype="", desc="")
+        else:
+            # Primeira linha do settlement é o resumo do período (sem transaction-type)
+            chunk = chunk[chunk["ttype"].notna()]
+        if "quantity" not in chunk:
+            chunk = chunk.assign(quantity=np.nan)
+        chunk = chunk.assign(month=_months(chunk["date"], dayfirst))
+        for key in _KEYS:
+            if key != "month" and chunk[key].dtype != "category":
+                chunk[key] = chunk[key].astype("category")
+        yield (
+            chunk.groupby(_KEYS, observed=True, dropna=False)
+            .agg(amount=("amount", "sum"), quantity=("quantity", "sum"), lines=("amount", "size"))
+            .reset_index()
+        )
+
+
+# -----------------------------------------------------------------------------
+# CLASSIFICAÇÃO DOS LANÇAMENTOS
+# -----------------------------------------------------------------------------
+
+def _measure(ttype, atype, desc):
+    # Medida de um tipo de lançamento (uma chamada por combinação distinta, não por linha)
+    ttype, atype, desc = (str(value).strip().casefold() if isinstance(value, str) else "" for value in (ttype, atype, desc))
+    if ttype == "pedido":
+        return "ordered_revenue"
+    if ttype == "refund":
+        return "refunds"
+    if atype == "itemprice":
+        return "revenue"
+    if atype == "promotion":
+        return "promotions"
+    if atype == "itemfees":
+        if desc == "commission":
+            return "referral_fee"
+        if desc.startswith("fba"):
+            return "fba_fee"
+        if "closingfee" in desc:
+            return "fixed_fee"
+        return "other_fees"
+    if "advertising" in atype or "advertising" in desc:
+        return "ad_spend"
+    if "storage" in atype or "storage" in desc:
+        return "storage_fee"
+    return "other"
+
+
+def _classify(totals):
+    import pandas as pd
+
+    combos = totals[["ttype", "atype", "desc"]].drop_duplicates()
+    combos["measure"] = [_measure(*row) for row in combos.itertuples(index=False)]
+    totals = totals.merge(combos, on=["ttype", "atype", "desc"], how="left")
+
+    # Receita e pedidos a crédito; o resto é custo (débito negativo -> custo positivo)
+    sign = np.where(totals["measure"].isin(["revenue", "ordered_revenue"]), 1.0, -1.0)
+    wide = totals.assign(value=totals["amount"] * sign).pivot_table(
+        index=["sku", "month"], columns="measure", values="value", aggfunc="sum", fill_value=0.0, observed=True)
+
+    # Unidades: quantidade das linhas de principal (vendas) e pedidos; devoluções por linha de principal
+    principal = totals["desc"].astype(str).str.casefold() == "principal"
+    counted = {
+        "units": totals[principal & (totals["measure"] == "revenue")],
+        "units_returned": totals[principal & (totals["measure"] == "refunds")],
+        "ordered_units": totals[totals["measure"] == "ordered_revenue"],
+    }
+    for name, rows in counted.items():
+        units = np.where(rows["quantity"] > 0, rows["quantity"], rows["lines"])
+        wide[name] = pd.Series(units, index=pd.MultiIndex.from_frame(rows[["sku", "month"]])).groupby(level=[0, 1]).sum()
+    return wide.reindex(columns=list(MEASURES)).fillna(0.0)
+
+
+def _allocate_shared(frame):
+    # Ads/armazenagem sem SKU: rateio pela receita de cada SKU no mês
+    if NO_SKU not in frame.index.get_level_values("sku"):
+        return frame
+    shared = frame.xs(NO_SKU, level="sku")[list(SHARED_MEASURES)]
+    skus = frame.drop(index=NO_SKU, level="sku")
+    revenue_by_month = skus["revenue"].groupby(level="month").transform("sum")
+    share = (skus["revenue"] / revenue_by_month.where(revenue_by_month > 0)).fillna(0.0)
+    months = skus.index.get_level_values("month")
+    for name in SHARED_MEASURES:
+        pool = shared[name].reindex(months).fillna(0.0).to_numpy()
+        skus[name] = skus[name].to_numpy() + pool * share.to_numpy()
+    # Meses sem receita: o valor fica na linha sem SKU
+    allocated = set(revenue_by_month[revenue_by_month > 0].index.get_level_values("month"))
+    leftover = frame.loc[[NO_SKU]]
+    leftover = leftover[~leftover.index.get_level_values("month").isin(allocated)]
+    return skus if leftover.empty else skus.combine_first(leftover).sort_index()
+
+
+def load_actuals(sources, block_bytes=BLOCK_BYTES, decimal=".", dayfirst=False, allocate=True):
+    """Realizado por SKU x mês a partir de um ou mais relatórios (settlement e/ou pedidos).
+
+    `sources`: caminho ou arquivo aberto, ou uma lista deles. `decimal=","`
+    para arquivos com vírgula decimal; `dayfirst=True` para datas DD.MM.AAAA.
+    Devolve um DataFrame com índice (sku, month "AAAA-MM") e as colunas de
+    MEASURES.
+    """
+    import pandas as pd
+
+    if isinstance(sources, (str, os.PathLike)) or hasattr(sources, "read"):
+        sources = [sources]
+    partials = []
+    for source in sources:
+        kind = detect_report(source)
+        partials.extend(_partials(source, kind, block_bytes, decimal, dayfirst))
+    if not partials:
+        raise ValueError("Relatório vazio: nenhum lançamento encontrado.")
+
+    # Parciais de todos os blocos: mesmas chaves somadas de novo
+    totals = pd.concat(partials, ignore_index=True)
+    for key in _KEYS:
+        totals[key] = totals[key].astype(object)
+    totals["sku"] = totals["sku"].where(totals["sku"].notna(), NO_SKU)
+    totals = totals.groupby(_KEYS, dropna=False, sort=False)[["amount", "quantity", "lines"]].sum().reset_index()
+    totals = totals[totals["month"].notna()]
+    frame = _classify(totals)
+    return _allocate_shared(frame) if allocate else frame
+
+
+# -----------------------------------------------------------------------------
+# PLANEJADO x REALIZADO
+# -----------------------------------------------------------------------------
+
+def catalog_plan(catalog, skus):
+    """Entradas planejadas do catálogo para cada SKU de `skus` (NaN se o SKU não está no catálogo)."""
+    import pandas as pd
+
+    index = pd.Index(np.asarray(catalog.skus).astype(str)).get_indexer(np.asarray(skus).astype(str))
+    found = index >= 0
+    plan = {}
+    for name, values in catalog.inputs.items():
+        column = np.full(len(index), np.nan)
+        column[found] = np.asarray(values)[index[found]]
+        plan[name] = column
+    return plan
+
+
+def realized_metrics(actuals, plan):
+    """Métricas por unidade do realizado, nas mesmas chaves de calculate_financials.
+
+    `actuals` tem as colunas de MEASURES (linhas = SKU x mês); `plan` são as
+    entradas planejadas (escalares ou arrays alinhados às linhas), de onde
+    saem imposto, CMV e outros custos, que os relatórios não trazem.
+    """
+    units = actuals["units"].to_numpy(dtype=np.float64)
+    per_unit = lambda name: np.divide(  # noqa: E731
+        actuals[name].to_numpy(dtype=np.float64), units, out=np.full(len(units), np.nan), where=units > 0)
+    price = per_unit("revenue")
+    cogs = np.asarray(plan["cost_product"]) + np.asarray(plan["cost_inbound"]) + np.asarray(plan["cost_prep"])
+    result = {
+        "gross_revenue": price,
+        "val_tax": price * np.asarray(plan["tax_rate"]),
+        "val_comm": per_unit("referral_fee"),
+        "val_fixed": per_unit("fixed_fee"),
+        "val_fba": per_unit("fba_fee"),
+        "val_storage": per_unit("storage_fee"),
+        "val_ads": per_unit("ad_spend"),
+        "cogs_total": np.broadcast_to(cogs, units.shape).astype(np.float64),
+        "val_returns": per_unit("refunds"),
+        "val_misc": np.asarray(plan["misc_costs"]) + per_unit("other_fees") + per_unit("promotions") + per_unit("other"),
+    }
+    result["total_costs"] = sum(result[name] for name in METRIC_COLUMNS[1:10])
+    result["net_profit"] = price - result["total_costs"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result["margin_net"] = np.where(price > 0, result["net_profit"] / price * 100, 0.0)
+        result["roi"] = np.where(cogs > 0, result["net_profit"] / cogs * 100, 0.0)
+        result["markup"] = np.where(cogs > 0, price / cogs, 0.0)
+    result["break_even"] = np.full(len(units), np.nan)
+    return result
+
+
+def plan_vs_actual(actuals, plan, fixed_fee_rule=None):
+    """Uma linha por SKU x mês: TACOS, custo de devolução, vazamento de tarifas e lucro, plano x real.
+
+    O vazamento compara as tarifas cobradas (comissão + taxa fixa + FBA) com
+    as do plano no preço médio realizado, em R$ no período. Com
+    `fixed_fee_rule` (p.ex. RateCard.fixed_fee), a taxa fixa do plano segue a
+    faixa do preço realizado: mudar de faixa não conta como vazamento.
+    """
+    import pandas as pd
+
+    real = realized_metrics(actuals, plan)
+    planned = calculate_financials_batch({name: np.broadcast_to(np.asarray(value, dtype=np.float64), len(actuals))
+                                          for name, value in plan.items()})
+    units = actuals["units"].to_numpy(dtype=np.float64)
+    price = real["gross_revenue"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plan_fixed = np.asarray(plan["fixed_fee"]) if fixed_fee_rule is None else fixed_fee_rule(np.nan_to_num(price))
+        plan_fees_at_price = price * np.asarray(plan["commission_rate"]) + plan_fixed + np.asarray(plan["fba_fee"])
+        real_fees = real["val_comm"] + real["val_fixed"] + real["val_fba"]
+        frame = {
+            "units": units,
+            "revenue": actuals["revenue"].to_numpy(dtype=np.float64),
+            "avg_price": price,
+            "tacos_plan": np.broadcast_to(np.asarray(plan["tacos_target"]) * 100, units.shape),
+            "tacos_real": real["val_ads"] / price * 100,
+            "returns_plan": np.broadcast_to(np.asarray(plan["return_rate"]) * 100, units.shape),
+            "returns_real": real["val_returns"] / price * 100,
+            "return_units_pct": np.divide(actuals["units_returned"].to_numpy(dtype=np.float64), units,
+                                          out=np.full(len(units), np.nan), where=units > 0) * 100,
+            "fees_plan_unit": plan_fees_at_price,
+            "fees_real_unit": real_fees,
+            "fee_leakage": (real_fees - plan_fees_at_price) * units,
+            "profit_plan_unit": planned["net_profit"],
+            "profit_real_unit": real["net_profit"],
+            "margin_plan": planned["margin_net"],
+            "margin_real": real["margin_net"],
+        }
+    return pd.DataFrame(frame, index=actuals.index)
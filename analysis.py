@@ -0,0 +1,196 @@
+# -----------------------------------------------------------------------------
+# ANÁLISES DERIVADAS (CENÁRIOS, PREÇO REVERSO, SENSIBILIDADE, CAIXA, DIAGNÓSTICO)
+# -----------------------------------------------------------------------------
+# Tudo aqui depende só da tupla de parâmetros de calculate_financials (na
+# mesma ordem posicional) e de poucos extras, então é memoizado: um rerun que
+# muda apenas, p.ex., o tamanho do lote não recalcula nada disso.
+
+import numpy as np
+
+from cashflow import Q4_STORAGE_MULTIPLIER, monthly_summary, project_cashflow
+from diagnosis import load_rules
+from engine import INPUT_COLUMNS, calculate_financials_cached, calculate_financials_exact_cached
+from memo import memoize
+from sensitivity import grid_2d, tornado
+from pricing import (
+    PSYCHOLOGICAL_ENDINGS, constant_elasticity_demand, fit_demand, optimize_price, solve_target_prices,
+)
+
+
+def _financials(money_mode):
+    # "cents": cada componente arredondado ao centavo (engine.calculate_financials_exact)
+    return calculate_financials_exact_cached if money_mode == "cents" else calculate_financials_cached
+
+
+@memoize(maxsize=128)
+def scenario_rows(params, money_mode="float"):
+    """Linhas formatadas da matriz Pessimista / Realista / Otimista."""
+    (price_sale, cost_product, cost_inbound, cost_prep, tax_rate, commission_rate,
+     fba_fee, storage_fee, tacos_target, return_rate, fixed_fee, misc_costs) = params
+
+    # Definição dos Cenários
+    scenarios = {
+        "Pessimista 🌧️": {
+            "price": price_sale * 0.90, # Vender 10% mais barato
+            "cost": cost_product * 1.10, # Custo sobe 10%
+            "ads": tacos_target * 1.20 # Ads sobem 20%
+        },
+        "Realista (Atual) ☁️": {
+            "price": price_sale,
+            "cost": cost_product,
+            "ads": tacos_target
+        },
+        "Otimista ☀️": {
+            "price": price_sale * 1.10, # Vender 10% mais caro
+            "cost": cost_product * 0.95, # Negociou 5% desconto
+            "ads": tacos_target * 0.80 # Otimizou ads
+        }
+    }
+
+    financials = _financials(money_mode)
+    rows = []
+    for name, scenario in scenarios.items():
+        res = financials(
+            scenario['price'], scenario['cost'], cost_inbound, cost_prep,
+            tax_rate, commission_rate, fba_fee, storage_fee,
+            scenario['ads'], return_rate, fixed_fee, misc_costs
+        )
+        # Formatando valores como strings para exibição segura e bonita
+        rows.append({
+            "Cenário": name,
+            "Preço Venda": f"R$ {scenario['price']:.2f}",
+            "Lucro Líquido": f"R$ {res['net_profit']:.2f}",
+            "Margem %": f"{res['margin_net']:.1f}%",
+            "ROI %": f"{res['roi']:.1f}%"
+        })
+    return tuple(rows)
+
+
+@memoize(maxsize=128)
+def reverse_price(params, target_margin_percent, fee_rule=True):
+    """Preço matemático para a margem alvo e opções psicológicas (.90 / .99 / .97).
+
+    Com `fee_rule`, a taxa fixa segue a regra < R$79 no preço resolvido (em
+    vez da taxa do preço atual). Retorna None quando os custos variáveis já
+    consomem a margem inteira.
+    """
+    inputs = dict(zip(INPUT_COLUMNS, params))
+    if fee_rule:
+        del inputs["fixed_fee"]
+
+    solved = solve_target_prices(inputs, [target_margin_percent])
+    suggested_price = float(solved["price"][0])
+    if np.isnan(suggested_price):
+        return None
+
+    labels = {0.90: "Padrão Brasileiro", 0.99: "Agressivo", 0.97: "Alternativo"}
+    options = tuple(
+        {"price": float(price), "profit": float(profit), "margin": float(margin), "label": labels[ending]}
+        for ending, price, profit, margin in zip(
+            PSYCHOLOGICAL_ENDINGS, solved["candidates"][0], solved["candidate_profit"][0], solved["candidate_margin"][0]
+        )
+    )
+
+    return {
+        "suggested_price": suggested_price,
+        "profit_check": suggested_price * (target_margin_percent/100),
+        "options": options,
+        "best_price": float(solved["psych_price"][0]),
+    }
+
+
+@memoize(maxsize=32)
+def price_optimum(params, demand_spec, price_range=(0.5, 2.0), fee_rule=True):
+    """Preço que maximiza o lucro total do produto atual e a curva de lucro.
+
+    `demand_spec` é ("elasticity", unidades_no_preço_atual, elasticidade) ou
+    ("history", preços, unidades) com tuplas do histórico.
+    """
+    inputs = dict(zip(INPUT_COLUMNS, params))
+    if fee_rule:
+        del inputs["fixed_fee"]
+
+    kind, first, second = demand_spec
+    if kind == "elasticity":
+        demand = constant_elasticity_demand(params[0], first, second)
+    else:
+        demand = fit_demand(first, second)
+        if np.isnan(demand["elasticity"][0]):
+            return None
+
+    result = optimize_price(inputs, demand, price_range=price_range, return_curves=True)
+    current_units = float(demand["scale"].ravel()[0] * params[0] ** demand["elasticity"].ravel()[0])
+    return {
+        "elasticity": float(np.ravel(demand["elasticity"])[0]),
+        "best_price": float(result["best_price"][0]),
+        "best_units": float(result["best_units"][0]),
+        "best_profit": float(result["best_profit"][0]),
+        "current_units": current_units,
+        "current_profit": current_units * calculate_financials_cached(*params)["net_profit"],
+        "grid": result["grid"][0],
+        "profit_curve": result["profit_curve"][0],
+    }
+
+
+@memoize(maxsize=64)
+def tornado_rows(params, bump=0.10, metric="net_profit", fee_rule=True):
+    """Tornado do produto atual: (entrada, métrica com -bump, com +bump, swing), do maior swing ao menor.
+
+    Com `fee_rule`, a taxa fixa é a da regra < R$79 no preço atual.
+    """
+    inputs = dict(zip(INPUT_COLUMNS, params))
+    if fee_rule:
+        del inputs["fixed_fee"]
+    result = tornado(inputs, bump, metric)
+    order = np.argsort(-result["swing"], kind="stable")
+    rows = tuple(
+        (INPUT_COLUMNS[j], float(result["low"][j]), float(result["high"][j]), float(result["swing"][j]),
+         float(result["elasticity"][j]))
+        for j in order
+    )
+    return float(result["base"]), rows
+
+
+@memoize(maxsize=32)
+def sensitivity_grid(params, x_name, y_name, x_values, y_values, metric="net_profit", fee_rule=True):
+    """Matriz da métrica para a grade x_values x y_values (tuplas), demais entradas fixas."""
+    inputs = dict(zip(INPUT_COLUMNS, params))
+    if fee_rule:
+        del inputs["fixed_fee"]
+    return grid_2d(inputs, x_name, y_name, x_values, y_values, metric)
+
+
+@memoize(maxsize=32)
+def cash_projection(params, lot_qty, daily_units, lead_time_days=30, horizon_days=365, start_date=None,
+                    restock=True, q4_multiplier=Q4_STORAGE_MULTIPLIER, fee_rule=True):
+    """Fluxo de caixa diário do produto atual: séries, payback e totais por mês."""
+    inputs = dict(zip(INPUT_COLUMNS, params))
+    if fee_rule:
+        del inputs["fixed_fee"]
+    result = project_cashflow(
+        inputs, lot_qty, daily_units, lead_time_days=lead_time_days, horizon_days=horizon_days,
+        start_date=start_date, restock=restock, q4_multiplier=q4_multiplier,
+    )
+    payback_date = result["payback_date"][0]
+    return {
+        "dates": result["dates"],
+        "cumulative_cash": result["cumulative_cash"][0],
+        "stock": result["stock"][0],
+        "payback_date": None if np.isnat(payback_date) else payback_date.astype(object),
+        "max_cash_tied": float(result["max_cash_tied"][0]),
+        "final_cash": float(result["final_cash"][0]),
+        "ending_inventory_value": float(result["ending_inventory_value"][0]),
+        "storage_total": float(result["storage"][0].sum()),
+        "ads_total": float(result["ad_spend"][0].sum()),
+        "monthly": monthly_summary(result),
+    }
+
+
+@memoize(maxsize=128)
+def diagnose(params, rules=None, money_mode="float"):
+    """Nota de 0 a 100 com alertas (nível, mensagem) e pontos fortes, pelas regras de diagnosis.py."""
+    rules = load_rules(rules)
+    metrics = _financials(money_mode)(*params)
+    result = rules.evaluate({**dict(zip(INPUT_COLUMNS, params)), **metrics})
+    warnings, successes = rules.findings(result["hits"][:, 0])
+    return float(result["score"][0]), warnings, successes
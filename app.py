@@ -1,9 +1,31 @@
+import datetime
+import io
+import json
+import os
+import tempfile
+import time
+
+# Partida a frio: no 1º rerun do processo as importações abaixo são a maior parte da espera
+imports_started = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 import numpy as np
 
+from analysis import sensitivity_grid
+from diagnosis import CRITICAL_LEVELS, RULE_COLUMNS, RULE_FIELDS, RULE_OPERATORS, TOP_SELLERS_BR, diagnose_catalog, load_rules
+import instrument
+from engine import INPUT_COLUMNS, INPUT_LABELS, METRIC_COLUMNS
+from export import EXPORT_FORMATS, available_formats, export_results
+from fees import load_rate_card
+from figures import (
+    COLOR_DANGER, COLOR_DARK_BLUE, COLOR_LIGHT_GREY, COLOR_ORANGE, COLOR_SUCCESS, SCATTER_MAX_POINTS, SCORE_CRITICAL,
+    SCORE_WARNING, WEBGL_MIN_POINTS, cashflow_figure, catalog_profit_figure, catalog_scatter_figure, catalog_score_figure,
+    catalog_waterfall_figure, heatmap_figure, marketplace_heatmap_figure, montecarlo_figure, profit_curve_figure, tornado_figure,
+)
+from memo import cache_stats
+from product_graph import build_product_graph
+from shared import DEFAULT_WORKERS, background_jobs, catalogs
+
 # -----------------------------------------------------------------------------
 # 1. CONFIGURAÇÃO DA PÁGINA E ESTILO VISUAL (UI/UX)
 # -----------------------------------------------------------------------------
@@ -14,14 +36,21 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Paleta de Cores Amazon Pro
-COLOR_DARK_BLUE = "#232f3e"
-COLOR_ORANGE = "#ff9900"
-COLOR_LIGHT_GREY = "#f0f2f6"
-COLOR_SUCCESS = "#2ecc71"
-COLOR_DANGER = "#e74c3c"
-COLOR_WARNING = "#f1c40f"
-COLOR_TEXT = "#111111"
+# Instrumentação: ligada pelo painel "📈 Performance", só para esta sessão
+instrument.begin_run(st.session_state.get("perf_enabled"))
+instrument.count("app.reruns")
+instrument.record("app.imports", time.perf_counter() - imports_started)
+rerun_started = instrument.start()
+
+# Cache em disco e pool de fundo compartilhados por todas as sessões do processo.
+# Os módulos de catálogo, marketplaces, simulação e cache em disco só são
+# importados no modo e na seção que os usam: o modo Produto Único não paga por eles.
+def disk_cache():
+    from store import default_cache
+
+    return default_cache()
+
+jobs = background_jobs()
 
 # Custom CSS para Estética "Wall Street" / Amazon
 st.markdown(f"""
@@ -74,48 +103,562 @@ st.markdown(f"""
 # -----------------------------------------------------------------------------
 # 2. SIDEBAR - INPUTS DE DADOS (DADOS DE ENTRADA)
 # -----------------------------------------------------------------------------
+# Valores iniciais dos widgets (taxas em %, como nos sliders)
+product_defaults = {
+    "product_name": "Fone Bluetooth Pro X",
+    "price_sale": 129.90,
+    "cost_product": 35.00,
+    "cost_inbound": 1.50,
+    "cost_prep": 1.00,
+    "tax_rate": 6.0,
+    "commission_rate": 16.0,
+    "fba_fee": 14.50,
+    "storage_fee": 0.50,
+    "tacos_target": 10.0,
+    "return_rate": 3.0,
+    "fixed_fee": None,
+    "misc_costs": 0.0,
+}
+
+# Logo empacotado com o app: sem requisição externa (funciona offline)
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "logo.svg")
+
+# Limites dos sliders de taxa, para encaixar valores vindos do catálogo
+RATE_SLIDER_MAX = {"tax_rate": 30.0, "commission_rate": 30.0, "tacos_target": 50.0, "return_rate": 20.0}
+
+widgets_started = instrument.start()
+with st.sidebar:
+    st.image(LOGO_PATH, width=150)
+    st.markdown("### 🗂️ Fonte de Dados")
+    data_mode = st.radio(
+        "Modo de Análise",
+        ["Produto Único", "Catálogo (Upload)"],
+        horizontal=True,
+        help="Produto Único: preencha os parâmetros abaixo. Catálogo: envie um CSV/Parquet com um SKU por linha."
+    )
+    lazy_tabs = st.toggle(
+        "Renderizar abas sob demanda",
+        value=True,
+        help="Constrói apenas a seção aberta. Desligado, todas as abas (e seus gráficos) são montadas e enviadas ao navegador a cada interação."
+    )
+    sim_workers = st.number_input(
+        "Processos para Simulações",
+        min_value=1, max_value=64, value=DEFAULT_WORKERS, step=1,
+        help="Número de processos (núcleos de CPU) usados pelo Monte Carlo. Padrão: variável FBA_WORKERS ou todos os núcleos."
+    )
+    background_mode = st.toggle(
+        "Simulações em segundo plano",
+        value=True,
+        help="Roda simulações longas num pool de threads do servidor, compartilhado entre sessões: a página continua respondendo e pedidos idênticos de usuários diferentes viram uma só execução."
+    )
+    money_exact = st.toggle(
+        "Centavos exatos",
+        value=False,
+        help="Calcula o dinheiro em centavos inteiros, arredondando cada componente (imposto, comissão, ads, devoluções) "
+             "uma vez: totais de lote e de catálogo fecham centavo a centavo. Desligado, usa ponto flutuante."
+    )
+    # A tabela (e o pandas que ela exige) só é montada com o painel aberto; as
+    # regras editadas ficam na sessão enquanto ele está fechado
+    rules_records = st.session_state.get("diagnosis_rules_records", TOP_SELLERS_BR["rules"])
+    rules_box = st.expander("🩺 Regras do Diagnóstico", key="diagnosis_rules_box", on_change="rerun")
+    if rules_box.open:
+        import pandas as pd
+
+        with rules_box:
+            st.caption("Cada regra desconta pontos da nota (100) quando dispara. Regras do mesmo grupo são exclusivas: "
+                       "vale a primeira da lista que disparar. Limite com \"Relativo a\" é uma fração daquela coluna.")
+            # Base fixa enquanto o painel está aberto: o editor guarda as edições sobre ela
+            rules_base = st.session_state.setdefault("diagnosis_rules_base", rules_records)
+            rules_table = st.data_editor(
+                pd.DataFrame(rules_base, columns=RULE_FIELDS),
+                num_rows="dynamic",
+                hide_index=True,
+                key="diagnosis_rules_table",
+                column_config={
+                    "group": st.column_config.TextColumn("Grupo"),
+                    "metric": st.column_config.SelectboxColumn("Métrica", options=RULE_COLUMNS, required=True),
+                    "op": st.column_config.SelectboxColumn("Operador", options=list(RULE_OPERATORS), required=True),
+                    "threshold": st.column_config.NumberColumn("Limite", required=True),
+                    "relative_to": st.column_config.SelectboxColumn("Relativo a", options=RULE_COLUMNS),
+                    "penalty": st.column_config.NumberColumn("Penalidade", min_value=0, required=True),
+                    "level": st.column_config.TextColumn("Nível", required=True),
+                    "message": st.column_config.TextColumn("Mensagem"),
+                    "success": st.column_config.TextColumn("Ponto Forte"),
+                }
+            )
+        rules_records = st.session_state["diagnosis_rules_records"] = rules_table.to_dict("records")
+    else:
+        st.session_state.pop("diagnosis_rules_base", None)
+    try:
+        diagnosis_rules = load_rules({**TOP_SELLERS_BR, "rules": rules_records})
+    except ValueError as exc:
+        st.warning(f"⚠️ {exc} Usando as regras padrão.")
+        diagnosis_rules = load_rules()
+    catalog_file = None
+    if data_mode == "Catálogo (Upload)":
+        catalog_file = st.file_uploader(
+            "Arquivo do Catálogo",
+            type=["csv", "tsv", "parquet"],
+            help="Colunas: sku, product_name, price_sale, cost_product, cost_inbound, cost_prep, tax_rate, "
+                 "commission_rate, fba_fee, storage_fee, tacos_target, return_rate (fixed_fee e misc_costs opcionais). "
+                 "Taxas como fração (0.16 = 16%). Sem commission_rate ou fba_fee, informe category e/ou "
+                 "length_cm, width_cm, height_cm, weight_kg: as tarifas saem da tabela Amazon BR."
+        )
+
+# -----------------------------------------------------------------------------
+# 2.1 MODO CATÁLOGO - RANKING MULTI-SKU
+# -----------------------------------------------------------------------------
+
+def load_uploaded_catalog(uploaded):
+    # A sessão guarda só uma referência ao catálogo do processo (shared.catalogs):
+    # quem envia o mesmo conteúdo recebe o mesmo objeto, com arrays somente leitura.
+    # O hash do arquivo roda uma vez por upload, não a cada rerun.
+    from catalog import catalog_key, load_catalog
+
+    ref = st.session_state.get("catalog_ref")
+    if ref is None or ref[0] != uploaded.file_id:
+        with st.spinner("Processando catálogo..."):
+            uploaded.seek(0)
+            key = catalog_key(uploaded)
+            catalog = catalogs.get_or_load(key, lambda: load_catalog(uploaded, cache=disk_cache(), key=key).freeze())
+        ref = st.session_state["catalog_ref"] = (uploaded.file_id, catalog)
+    return ref[1]
+
+@st.cache_resource(max_entries=8, show_spinner="Montando gráfico do catálogo...")
+def catalog_view_figure(content_key, view, per_end, exact, _catalog):
+    # Uma figura por (conteúdo, visão), compartilhada entre sessões: reruns só reenviam a figura pronta
+    if view == "scatter":
+        return catalog_scatter_figure(_catalog.metrics["margin_net"], _catalog.metrics["roi"], _catalog.skus)
+    if view == "profit":
+        return catalog_profit_figure(_catalog.metrics["net_profit"])
+    order = _catalog.order("net_profit")
+    picked = order if len(order) <= 2 * per_end else np.r_[order[:per_end], order[-per_end:]]
+    results = _catalog.results_at(picked, exact)
+    totals = _catalog.metric_totals(exact=exact)
+    labels = ["Catálogo (média)", *(f"{sku} · {name}"[:40] for sku, name in zip(_catalog.skus[picked], _catalog.names[picked]))]
+    results = {col: np.r_[totals[col] / len(_catalog), results[col]] for col in METRIC_COLUMNS}
+    return catalog_waterfall_figure(labels, results)
+
+@st.cache_resource(max_entries=2, show_spinner="Agregando relatórios...")
+def load_uploaded_actuals(file_ids, decimal, dayfirst, _reports):
+    # Mesma lógica do catálogo: chave pelos file_ids, leitura em blocos
+    from actuals import load_actuals
+
+    for report in _reports:
+        report.seek(0)
+    return load_actuals(list(_reports), decimal=decimal, dayfirst=dayfirst)
+
+def plotly_chart(fig):
+    # Serialização da figura (JSON + protobuf) para o navegador
+    with instrument.timer("render.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+def submit_job(name, run_key, job_key, label, compute):
+    # Com o modo de fundo, só submete: o resultado entra na sessão em collect_job.
+    # Sessões que pedem a mesma chave compartilham a mesma execução
+    work = lambda: disk_cache().get_or_compute(job_key, compute)  # noqa: E731
+    if background_mode:
+        jobs.submit(job_key, work)
+        st.session_state[f"{name}_job"] = (run_key, job_key)
+    else:
+        with st.spinner(f"{label}..."):
+            st.session_state[name] = work()
+        st.session_state[f"{name}_key"] = run_key
+
+def collect_job(name, label):
+    # Tarefa pronta: resultado vai para a sessão; em andamento: aviso que se atualiza sozinho
+    pending = st.session_state.get(f"{name}_job")
+    if pending is None:
+        return
+    run_key, job_key = pending
+    future = jobs.future(job_key)
+    if future is not None and not future.done():
+        watch_job(job_key, label)
+        return
+    del st.session_state[f"{name}_job"]
+    if future is None:
+        return
+    try:
+        st.session_state[name] = future.result()
+        st.session_state[f"{name}_key"] = run_key
+    except Exception as exc:
+        st.error(f"⚠️ {label} falhou: {exc}")
+
+@st.fragment(run_every=1.0)
+def watch_job(job_key, label):
+    # Só este bloco reexecuta a cada segundo; ao terminar, um rerun completo mostra o resultado
+    future = jobs.future(job_key)
+    if future is None or future.done():
+        st.rerun()
+    st.info(f"⏳ {label} em segundo plano. O painel continua disponível enquanto isso.")
+
+instrument.stop("app.widgets", widgets_started)
+selected_sku = None
+if data_mode == "Catálogo (Upload)":
+    import pandas as pd
+
+    from marketplaces import MARKETPLACES, compare_marketplaces, load_fx, load_profiles
+    from montecarlo import DEFAULT_SPREADS
+    from parallel import CATALOG_STATS, rank_inputs_parallel, simulate_catalog
+
+    catalog_started = instrument.start()
+    if catalog_file is None:
+        st.info("📂 Envie um arquivo de catálogo na barra lateral para gerar o ranking de SKUs.")
+        st.stop()
+
+    try:
+        catalog = load_uploaded_catalog(catalog_file)
+    except ValueError as exc:
+        st.error(f"⚠️ Não foi possível ler o catálogo: {exc}")
+        st.stop()
+
+    # Centavos exigem números finitos: com células vazias, o catálogo fica no float
+    missing_inputs = [col for col in INPUT_COLUMNS if not np.isfinite(catalog.inputs[col]).all()] if money_exact else []
+    if missing_inputs:
+        st.warning(f"⚠️ Valores ausentes em {', '.join(missing_inputs)}: centavos exatos desligados para este catálogo.")
+        money_exact = False
+
+    st.subheader(f"🗂️ Ranking do Catálogo ({len(catalog):,} SKUs)")
+    rank_options = {"Lucro Líquido": "net_profit", "Margem Líquida": "margin_net", "ROI": "roi"}
+
+    c_sort, c_order, c_size, c_page = st.columns(4)
+    with c_sort:
+        sort_label = st.selectbox("Ordenar por", list(rank_options))
+    with c_order:
+        ascending = st.radio("Ordem", ["Maior → Menor", "Menor → Maior"], horizontal=True) == "Menor → Maior"
+    with c_size:
+        page_size = st.selectbox("Linhas por página", [25, 50, 100, 250], index=1)
+    n_pages = max(1, -(-len(catalog) // page_size))
+    with c_page:
+        page = st.number_input(f"Página (de {n_pages:,})", min_value=1, max_value=n_pages, value=1, step=1)
+
+    # Só a página visível vira DataFrame; a ordenação fica em cache no catálogo
+    page_df = catalog.ranking_page(rank_options[sort_label], ascending, page - 1, page_size)
+    ranking_event = st.dataframe(
+        page_df,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        column_config={
+            "net_profit": st.column_config.NumberColumn("Lucro Líquido", format="R$ %.2f"),
+            "margin_net": st.column_config.NumberColumn("Margem %", format="%.2f%%"),
+            "roi": st.column_config.NumberColumn("ROI %", format="%.2f%%"),
+            "break_even": st.column_config.NumberColumn("Break-even", format="R$ %.2f"),
+        }
+    )
+
+    with st.expander("📊 Visão do Catálogo (Gráficos)"):
+        views = {"Margem x ROI": "scatter", "Distribuição do Lucro": "profit", "Comparativo de SKUs": "waterfall"}
+        c_view, c_ends = st.columns([3, 1])
+        with c_view:
+            view = views[st.radio("Gráfico", list(views), horizontal=True, key="catalog_view")]
+        with c_ends:
+            per_end = st.number_input("SKUs por ponta", min_value=1, max_value=25, value=10, key="catalog_per_end",
+                                      disabled=view != "waterfall", help="Mais e menos lucrativos no comparativo")
+        if view == "scatter" and len(catalog) > SCATTER_MAX_POINTS:
+            st.caption(f"{len(catalog):,} SKUs: densidade calculada no servidor; pontos só para os SKUs fora da faixa P0,5–P99,5.")
+        elif view == "scatter" and len(catalog) > WEBGL_MIN_POINTS:
+            st.caption(f"{len(catalog):,} SKUs desenhados em WebGL.")
+        plotly_chart(catalog_view_figure(catalog.key, view, per_end if view == "waterfall" else 0, money_exact and view == "waterfall", catalog))
+
+    with st.expander("🩺 Diagnóstico do Catálogo (SKUs em Risco)"):
+        st.caption("Aplica as regras do diagnóstico a todos os SKUs de uma vez. Ajuste limites e penalidades em \"🩺 Regras do Diagnóstico\", na barra lateral.")
+        with instrument.timer("catalog.diagnosis"):
+            diagnosis = diagnose_catalog(catalog, diagnosis_rules)
+        scores, hits = diagnosis["score"], diagnosis["hits"]
+        c_avg, c_critical, c_healthy = st.columns(3)
+        c_avg.metric("Nota Média", f"{scores.mean():.1f}")
+        c_critical.metric(f"SKUs com Nota < {SCORE_CRITICAL}", f"{np.count_nonzero(scores < SCORE_CRITICAL):,}")
+        c_healthy.metric(f"SKUs com Nota ≥ {SCORE_WARNING}", f"{np.count_nonzero(scores >= SCORE_WARNING):,}")
+        plotly_chart(catalog_score_figure(scores, diagnosis_rules.base_score))
+
+        rule_labels = diagnosis_rules.labels()
+        c_limit, c_rules, c_rows = st.columns([1, 2, 1])
+        with c_limit:
+            score_limit = st.slider("Nota abaixo de", 0, 100, SCORE_CRITICAL, step=5, key="diagnosis_score_limit")
+        with c_rules:
+            picked_rules = st.multiselect("Com as regras", range(len(rule_labels)), format_func=rule_labels.__getitem__,
+                                          key="diagnosis_rules_filter", help="Vazio: qualquer regra. Vários: SKUs que dispararam ao menos uma.")
+        with c_rows:
+            risk_rows = st.selectbox("Linhas", [50, 100, 500], key="diagnosis_rows")
+        at_risk = scores < score_limit
+        if picked_rules:
+            at_risk &= hits[picked_rules].any(axis=0)
+        # Menor nota primeiro; empate pelo menor lucro
+        idx = np.flatnonzero(at_risk)
+        idx = idx[np.lexsort((catalog.metrics["net_profit"][idx], scores[idx]))][:risk_rows]
+        levels = np.array(diagnosis_rules.levels, dtype=object)
+        at_risk_df = pd.DataFrame({
+            "SKU": catalog.skus[idx],
+            "Produto": catalog.names[idx],
+            "Nota": scores[idx],
+            "Alertas": [" · ".join(levels[column]) for column in hits[:, idx].T],
+            **{name: catalog.metrics[name][idx] for name in ("net_profit", "margin_net", "roi", "break_even")},
+        })
+        st.caption(f"{np.count_nonzero(at_risk):,} SKUs no filtro; mostrando os {len(idx):,} de menor nota.")
+        st.dataframe(at_risk_df, use_container_width=True, hide_index=True, column_config={
+            "Nota": st.column_config.ProgressColumn("Nota", min_value=0, max_value=float(diagnosis_rules.base_score), format="%.0f"),
+            "net_profit": st.column_config.NumberColumn("Lucro Líquido", format="R$ %.2f"),
+            "margin_net": st.column_config.NumberColumn("Margem %", format="%.2f%%"),
+            "roi": st.column_config.NumberColumn("ROI %", format="%.2f%%"),
+            "break_even": st.column_config.NumberColumn("Break-even", format="R$ %.2f"),
+        })
+
+    with st.expander("🌎 Comparativo de Marketplaces"):
+        st.caption("Calcula cada SKU em vários perfis de marketplace (tabela de tarifas, moeda e imposto próprios). "
+                   "Preços e custos do arquivo estão em R$: o preço local sai pelo câmbio e as tarifas locais voltam a R$. "
+                   "Comissão e FBA vêm da tabela de cada perfil quando o arquivo tem category e as dimensões.")
+        c_profiles_file, c_fx_file = st.columns(2)
+        with c_profiles_file:
+            profiles_file = st.file_uploader("Perfis de Marketplace (JSON)", type=["json"], key="marketplace_profiles_file",
+                                             help="{\"profiles\": [{\"id\", \"name\", \"currency\", \"tax_rate\", \"rate_card\", \"price_factor\"}, ...]}. "
+                                                  "Sem arquivo: Amazon BR (Simples e Lucro Presumido), México e EUA de referência.")
+        with c_fx_file:
+            fx_file = st.file_uploader("Câmbio (JSON ou CSV)", type=["json", "csv"], key="marketplace_fx_file",
+                                       help="CSV com as colunas currency,rate (R$ por unidade da moeda) ou JSON {\"rates\": {\"USD\": 5.40}}. "
+                                            "Sem arquivo: câmbio de referência embutido.")
+        try:
+            for uploaded in (profiles_file, fx_file):
+                if uploaded is not None:
+                    uploaded.seek(0)
+            profiles = load_profiles(json.load(profiles_file) if profiles_file else MARKETPLACES)
+            fx = load_fx(fx_file)
+        except (ValueError, KeyError, TypeError) as exc:
+            st.error(f"⚠️ Perfis ou câmbio inválidos: {exc}")
+            profiles = None
+        if profiles is not None:
+            by_id = {profile.id: profile for profile in profiles}
+            c_picked, c_run_mkt = st.columns([3, 1])
+            with c_picked:
+                picked_ids = st.multiselect("Marketplaces", list(by_id), default=list(by_id), key="marketplace_profiles",
+                                            format_func=lambda pid: f"{by_id[pid].name} ({by_id[pid].currency})")
+            with c_run_mkt:
+                run_marketplaces = st.button("▶️ Comparar Marketplaces", disabled=not picked_ids)
+            picked = [by_id[pid] for pid in picked_ids]
+            # Perfis e câmbio entram pelo conteúdo: outro arquivo com os mesmos ids é outro resultado
+            mkt_disk_key = disk_cache().key("catalog_marketplaces", catalog.key, [p.spec for p in picked], fx, money_exact)
+            mkt_key = (catalog.key, mkt_disk_key)
+            if run_marketplaces:
+                # Cópia do upload: a tarefa pode rodar em outra thread enquanto a sessão reexecuta
+                source = io.BytesIO(catalog_file.getvalue())
+                source.name = catalog_file.name
+                submit_job("catalog_marketplaces", mkt_key, mkt_disk_key, f"Comparando {len(catalog):,} SKUs em {len(picked)} marketplaces",
+                           lambda: compare_marketplaces(source, picked, fx, exact=money_exact))
+            elif st.session_state.get("catalog_marketplaces_key") != mkt_key and (cached := disk_cache().get(mkt_disk_key)) is not None:
+                st.session_state["catalog_marketplaces"] = cached
+                st.session_state["catalog_marketplaces_key"] = mkt_key
+            collect_job("catalog_marketplaces", "Comparativo de marketplaces")
+            if st.session_state.get("catalog_marketplaces_key") == mkt_key:
+                mkt = st.session_state["catalog_marketplaces"]
+                profit, margin, best = mkt["net_profit"], mkt["margin_net"], mkt["best"]
+                st.dataframe(pd.DataFrame({
+                    "Marketplace": mkt["profile_names"],
+                    "Moeda": mkt["currencies"],
+                    "Câmbio (R$)": mkt["fx"],
+                    "SKUs onde é o Melhor": np.bincount(best, minlength=len(picked)),
+                    "Lucro Médio": np.nanmean(profit, axis=0),
+                    "Margem Média %": np.nanmean(margin, axis=0),
+                    "SKUs no Prejuízo": np.count_nonzero(profit < 0, axis=0),
+                }), use_container_width=True, hide_index=True, column_config={
+                    "Câmbio (R$)": st.column_config.NumberColumn(format="%.4f"),
+                    "Lucro Médio": st.column_config.NumberColumn(format="R$ %.2f"),
+                    "Margem Média %": st.column_config.NumberColumn(format="%.2f%%"),
+                })
+
+                mkt_orders = {"Maior diferença entre marketplaces": -mkt["best_gap"],
+                              "Maior lucro no melhor": -profit[np.arange(len(best)), best],
+                              "Menor lucro no melhor": profit[np.arange(len(best)), best]}
+                c_mkt_order, c_mkt_rows = st.columns([3, 1])
+                with c_mkt_order:
+                    mkt_order = st.selectbox("SKUs no mapa", list(mkt_orders), key="marketplace_order")
+                with c_mkt_rows:
+                    mkt_rows = st.number_input("Linhas", min_value=5, max_value=100, value=25, step=5, key="marketplace_rows")
+                # Só as linhas mostradas são ordenadas
+                sort_by = mkt_orders[mkt_order]
+                shown = np.argpartition(sort_by, mkt_rows - 1)[:mkt_rows] if len(sort_by) > mkt_rows else np.arange(len(sort_by))
+                shown = shown[np.argsort(sort_by[shown], kind="stable")]
+                labels = [f"{sku} · {name}"[:40] for sku, name in zip(mkt["skus"][shown], mkt["names"][shown])]
+                plotly_chart(marketplace_heatmap_figure(labels, mkt["profiles"], profit[shown], best[shown]))
+
+                best_names = np.asarray(mkt["profile_names"], dtype=object)
+                mkt_df = pd.DataFrame({"SKU": mkt["skus"][shown], "Produto": mkt["names"][shown]})
+                for j, profile_id in enumerate(mkt["profiles"]):
+                    mkt_df[profile_id] = profit[shown, j]
+                mkt_df["Melhor Marketplace"] = best_names[best[shown]]
+                mkt_df["Vantagem (R$)"] = mkt["best_gap"][shown]
+                st.dataframe(mkt_df, use_container_width=True, hide_index=True, column_config={
+                    **{profile_id: st.column_config.NumberColumn(profile_id, format="R$ %.2f") for profile_id in mkt["profiles"]},
+                    "Vantagem (R$)": st.column_config.NumberColumn(format="R$ %.2f", help="Lucro no melhor menos o lucro no segundo melhor"),
+                })
+                st.caption("Catálogo inteiro por marketplace (CSV/Parquet): python cli.py catalogo.csv --marketplaces perfis.json --fx cambio.csv")
+
+    with st.expander("🎲 Risco do Catálogo (Monte Carlo por SKU)"):
+        st.caption("Sorteia preço, custo, TACOS e devoluções em torno dos valores de cada SKU e ordena pelo risco de prejuízo.")
+        c_samples, c_run = st.columns([3, 1])
+        with c_samples:
+            risk_samples = st.select_slider("Sorteios por SKU", options=[10_000, 50_000, 100_000], value=10_000, format_func=lambda n: f"{n:,}")
+        with c_run:
+            run_risk = st.button("▶️ Simular Catálogo")
+        risk_key = (catalog.key, risk_samples)
+        # Resultado independe do número de processos: fica fora da chave em disco
+        # Taxa fixa re-derivada pelas faixas da tabela só nos SKUs sem fixed_fee no arquivo
+        risk_rate_card = load_rate_card().spec
+        risk_disk_key = disk_cache().key("catalog_risk", catalog.key, DEFAULT_SPREADS, risk_samples, 42, risk_rate_card)
+        if run_risk:
+            submit_job("catalog_risk", risk_key, risk_disk_key, f"Simulando {len(catalog):,} SKUs em {sim_workers} processo(s)", lambda: simulate_catalog(
+                catalog.inputs, DEFAULT_SPREADS, n_samples=risk_samples, seed=42, workers=sim_workers,
+                fee_rule=catalog.fee_rule, rate_card=risk_rate_card))
+        elif st.session_state.get("catalog_risk_key") != risk_key and (cached := disk_cache().get(risk_disk_key)) is not None:
+            # Já simulado antes (nesta ou em outra sessão): mostra sem precisar do botão
+            st.session_state["catalog_risk"] = cached
+            st.session_state["catalog_risk_key"] = risk_key
+        collect_job("catalog_risk", "Simulação do catálogo")
+        if st.session_state.get("catalog_risk_key") == risk_key:
+            risk = st.session_state["catalog_risk"]
+            riskiest = np.argsort(-risk["p_loss"], kind="stable")[:20]
+            risk_df = pd.DataFrame({"SKU": catalog.skus[riskiest], "Produto": catalog.names[riskiest]})
+            for stat in CATALOG_STATS:
+                risk_df[stat] = risk[stat][riskiest]
+            st.dataframe(risk_df, use_container_width=True, hide_index=True, column_config={
+                "p_loss": st.column_config.ProgressColumn("P(Prejuízo)", min_value=0.0, max_value=1.0, format="percent"),
+            })
+
+    with st.expander("🌪️ Motores de Lucro do Catálogo (Sensibilidade)"):
+        st.caption("Varia cada entrada de cada SKU para cima e para baixo e mostra quais mais movem o lucro líquido no catálogo inteiro.")
+        c_bump, c_drivers = st.columns([3, 1])
+        with c_bump:
+            drivers_bump = st.slider("Variação por Entrada ±%", 1, 50, 10, key="catalog_drivers_bump")
+        with c_drivers:
+            run_drivers = st.button("▶️ Calcular Motores")
+        drivers_key = (catalog.key, drivers_bump)
+        # Soma na ordem dos blocos: o resultado independe do número de processos
+        drivers_disk_key = disk_cache().key("catalog_drivers", catalog.key, drivers_bump)
+        if run_drivers:
+            submit_job("catalog_drivers", drivers_key, drivers_disk_key,
+                       f"Avaliando {len(catalog) * (1 + 2 * len(INPUT_COLUMNS)):,} cenários em {sim_workers} processo(s)",
+                       lambda: rank_inputs_parallel(catalog.inputs, drivers_bump / 100, workers=sim_workers))
+        elif st.session_state.get("catalog_drivers_key") != drivers_key and (cached := disk_cache().get(drivers_disk_key)) is not None:
+            st.session_state["catalog_drivers"] = cached
+            st.session_state["catalog_drivers_key"] = drivers_key
+        collect_job("catalog_drivers", "Cálculo dos motores de lucro")
+        if st.session_state.get("catalog_drivers_key") == drivers_key:
+            drivers = st.session_state["catalog_drivers"]
+            drivers_df = pd.DataFrame({
+                "Entrada": [INPUT_LABELS[name] for name in INPUT_COLUMNS],
+                "Swing Médio (R$)": drivers["mean_swing"],
+                "SKUs onde é o Maior Motor": drivers["top_driver_count"],
+            }).sort_values("Swing Médio (R$)", ascending=False)
+            st.dataframe(drivers_df, use_container_width=True, hide_index=True, column_config={
+                "Swing Médio (R$)": st.column_config.NumberColumn(format="R$ %.2f"),
+            })
+
+    with st.expander("📤 Exportar Catálogo"):
+        st.caption("Gera o arquivo em blocos a partir do catálogo carregado: só é montado quando você clica em baixar.")
+        c_fmt, c_prec = st.columns(2)
+        with c_fmt:
+            export_fmt = st.selectbox("Formato", available_formats(), key="export_fmt")
+        with c_prec:
+            export_precision = st.selectbox("Casas Decimais", ["Completa", 0, 2, 4, 6], index=2, key="export_precision")
+        all_columns = ["sku", "product_name", *INPUT_COLUMNS, *METRIC_COLUMNS]
+        export_columns = st.multiselect("Colunas", all_columns, default=all_columns, key="export_columns")
+
+        def build_export(fmt=export_fmt, columns=tuple(export_columns), precision=export_precision, exact=money_exact):
+            # Arquivo temporário em disco: a memória fica limitada a um bloco
+            out = tempfile.TemporaryFile()
+            export_results(catalog.iter_results(exact=exact), out, fmt, columns, None if precision == "Completa" else precision)
+            out.seek(0)
+            return out
+
+        mime, ext = EXPORT_FORMATS[export_fmt]
+        st.download_button(
+            label=f"📥 Baixar {len(catalog):,} SKUs ({export_fmt.upper()})",
+            data=build_export,
+            file_name=f"fba_catalogo{ext}",
+            mime=mime,
+            disabled=not export_columns,
+        )
+        if "xlsx" not in available_formats():
+            st.caption("XLSX indisponível: instale o pacote xlsxwriter.")
+
+    selected_rows = ranking_event.selection.rows
+    if not selected_rows:
+        st.caption("👆 Selecione uma linha do ranking para abrir a análise detalhada do SKU.")
+        st.stop()
+
+    # Linha selecionada vira o valor inicial dos parâmetros da barra lateral
+    selected_index = int(page_df.index[selected_rows[0]])
+    row = catalog.row_inputs(selected_index)
+    product_defaults["product_name"] = str(catalog.names[selected_index])
+    selected_sku = str(catalog.skus[selected_index])
+    for key, value in row.items():
+        if key in RATE_SLIDER_MAX:
+            value = min(max(value * 100, 0.0), RATE_SLIDER_MAX[key])
+        product_defaults[key] = value
+    st.markdown("---")
+    instrument.stop("app.catalog", catalog_started)
+
+widgets_started = instrument.start()
 with st.sidebar:
-    st.image("https://upload.wikimedia.org/wikipedia/commons/a/a9/Amazon_logo.svg", width=150)
     st.markdown("### ⚙️ Parâmetros do Produto")
     
-    product_name = st.text_input("Nome do Produto", "Fone Bluetooth Pro X", help="Nome interno para identificação no relatório.")
+    product_name = st.text_input("Nome do Produto", product_defaults["product_name"], help="Nome interno para identificação no relatório.")
     
     st.markdown("---")
     st.markdown("#### 💰 Precificação e Receita")
     price_sale = st.number_input(
         "Preço de Venda (Buybox) R$", 
-        min_value=0.0, value=129.90, step=1.0, format="%.2f",
+        min_value=0.0, value=product_defaults["price_sale"], step=1.0, format="%.2f",
         help="O preço final que o cliente paga na Amazon. É a base para cálculo de todas as taxas percentuais."
     )
     
     st.markdown("#### 📦 Custos do Produto (CMV)")
     cost_product = st.number_input(
         "Custo Unitário (Fornecedor) R$", 
-        min_value=0.0, value=35.00, step=0.5, format="%.2f",
+        min_value=0.0, value=product_defaults["cost_product"], step=0.5, format="%.2f",
         help="Quanto você paga por unidade para o fabricante/fornecedor."
     )
     cost_inbound = st.number_input(
         "Frete Inbound (Unitário) R$", 
-        min_value=0.0, value=1.50, step=0.1, format="%.2f",
+        min_value=0.0, value=product_defaults["cost_inbound"], step=0.1, format="%.2f",
         help="Custo rateado para enviar o produto do fornecedor (ou sua casa) até o Centro de Distribuição (CD) da Amazon."
     )
     cost_prep = st.number_input(
         "Embalagem/Prep (Unitário) R$", 
-        min_value=0.0, value=1.00, step=0.1, format="%.2f",
+        min_value=0.0, value=product_defaults["cost_prep"], step=0.1, format="%.2f",
         help="Custo de etiquetas, polybags, caixas de envio ou serviço de preparação terceirizado."
     )
     
+    rate_card = load_rate_card()
+    with st.expander("📐 Tarifas pela Tabela (Amazon BR)"):
+        st.caption("Preenche comissão e tarifa FBA pela categoria, dimensões e peso. Valores de referência: confira a tabela vigente no Seller Central.")
+        fee_category = st.selectbox("Categoria", ["Manual", *rate_card.categories], key="fee_category")
+        c_len, c_wid = st.columns(2)
+        fee_length = c_len.number_input("Comprimento (cm)", min_value=0.0, value=0.0, step=1.0, key="fee_length")
+        fee_width = c_wid.number_input("Largura (cm)", min_value=0.0, value=0.0, step=1.0, key="fee_width")
+        c_hei, c_kg = st.columns(2)
+        fee_height = c_hei.number_input("Altura (cm)", min_value=0.0, value=0.0, step=1.0, key="fee_height")
+        fee_weight = c_kg.number_input("Peso (kg)", min_value=0.0, value=0.0, step=0.1, key="fee_weight")
+        if fee_category != "Manual":
+            referral = float(rate_card.referral_rate(fee_category, price_sale)) * 100
+            product_defaults["commission_rate"] = min(round(referral, 2), RATE_SLIDER_MAX["commission_rate"])
+        if min(fee_length, fee_width, fee_height, fee_weight) > 0:
+            dims = (fee_length, fee_width, fee_height, fee_weight)
+            tier = int(rate_card.size_tier(*dims))
+            product_defaults["fba_fee"] = round(float(rate_card.fba_fee(*dims)), 2)
+            st.caption(f"Faixa **{rate_card.tiers[tier]}** · peso faturável {float(rate_card.billable_weight(*dims)):.2f} kg "
+                       f"→ FBA R$ {product_defaults['fba_fee']:.2f}")
+
     st.markdown("#### 🏦 Taxas e Impostos")
     tax_rate_input = st.slider(
         "Imposto (Simples/Presumido) %", 
-        0.0, 30.0, 6.0, step=0.5,
+        0.0, 30.0, product_defaults["tax_rate"], step=0.5,
         help="Alíquota efetiva de imposto sobre a nota fiscal de venda (DAS). Consulte seu contador."
     )
     tax_rate = tax_rate_input / 100
     
     commission_rate_input = st.slider(
         "Comissão Amazon (Referral) %", 
-        0.0, 30.0, 16.0, step=0.5,
+        0.0, 30.0, product_defaults["commission_rate"], step=0.5,
         help="Taxa de referência da categoria (geralmente entre 12% e 16% + impostos sobre comissão se aplicável)."
     )
     commission_rate = commission_rate_input / 100
@@ -123,44 +666,45 @@ with st.sidebar:
     st.markdown("#### 🚚 Logística FBA")
     fba_fee = st.number_input(
         "Tarifa de Saída FBA (Peso/Dim) R$", 
-        min_value=0.0, value=14.50, step=0.5, format="%.2f",
+        min_value=0.0, value=product_defaults["fba_fee"], step=0.5, format="%.2f",
         help="Taxa fixa cobrada pela Amazon para pegar (pick), embalar (pack) e enviar (ship) o produto ao cliente. Baseado no peso e dimensões."
     )
     storage_fee = st.number_input(
         "Armazenagem Mensal Est. R$", 
-        min_value=0.0, value=0.50, step=0.1, format="%.2f",
+        min_value=0.0, value=product_defaults["storage_fee"], step=0.1, format="%.2f",
         help="Custo estimado de ocupação de espaço no CD. Aumenta no Q4 (out/nov/dez)."
     )
     
     st.markdown("#### 📉 Marketing e Riscos")
     tacos_target_input = st.slider(
         "TACOS Alvo (Ads Total) %", 
-        0.0, 50.0, 10.0, step=1.0,
+        0.0, 50.0, product_defaults["tacos_target"], step=1.0,
         help="Total Advertising Cost of Sales. É o quanto do faturamento total você aceita gastar em anúncios (PPC) para manter as vendas girando."
     )
     tacos_target = tacos_target_input / 100
     
     return_rate_input = st.slider(
         "Taxa de Devolução Estimada %", 
-        0.0, 20.0, 3.0, step=0.5,
+        0.0, 20.0, product_defaults["return_rate"], step=0.5,
         help="Porcentagem de vendas que retornam. O custo é calculado estimando a perda das taxas de envio e danos ao produto."
     )
     return_rate = return_rate_input / 100
 
-    # Lógica de Taxa Fixa (Regra < R$79)
-    is_low_price = price_sale < 79.00
-    fixed_fee_default = 5.00 if is_low_price else 0.00
+    # Taxa fixa pela faixa de preço da tabela de tarifas
+    fixed_fee_default = float(rate_card.fixed_fee(price_sale))
+    if product_defaults["fixed_fee"] is not None:
+        fixed_fee_default = product_defaults["fixed_fee"]
     
     with st.expander("🛠️ Configurações Avançadas de Taxas"):
         st.caption("Ajuste fino para custos ocultos.")
         fixed_fee = st.number_input(
-            "Taxa Fixa (Regra < R$79)", 
+            "Taxa Fixa (Faixa de Preço)", 
             value=fixed_fee_default,
-            help="Taxa administrativa extra que a Amazon cobra para itens abaixo de R$79,00."
+            help="Taxa por item que a Amazon cobra conforme a faixa de preço (na tabela padrão, R$5,00 abaixo de R$79,00)."
         )
         misc_costs = st.number_input(
             "Outros Custos Variáveis R$", 
-            value=0.0,
+            value=product_defaults["misc_costs"],
             help="Custos extras como adesivagem extra ou brindes inclusos."
         )
 
@@ -168,67 +712,23 @@ with st.sidebar:
 # 3. NÚCLEO LÓGICO (CALCULATION ENGINE)
 # -----------------------------------------------------------------------------
 
-def calculate_financials(p_sale, p_cost, p_inbound, p_prep, p_tax, p_comm, p_fba, p_storage, p_tacos, p_return, p_fixed, p_misc):
-    # Receita Bruta
-    gross_revenue = p_sale
-    
-    # Custos Diretos de Venda (Deduções da Receita)
-    val_tax = gross_revenue * p_tax
-    val_comm = gross_revenue * p_comm
-    val_fixed = p_fixed
-    val_fba = p_fba
-    val_storage = p_storage
-    val_ads = gross_revenue * p_tacos
-    
-    # Custo de Mercadoria Vendida (CMV Total)
-    cogs_total = p_cost + p_inbound + p_prep
-    
-    # Provisionamento de Perdas (Devoluções)
-    # Estima-se que na devolução perde-se as taxas de ida e volta e as vezes o produto não volta vendável.
-    # Simplificação: % da Venda como perda financeira direta
-    val_returns = gross_revenue * p_return
-    
-    total_costs = val_tax + val_comm + val_fixed + val_fba + val_storage + val_ads + cogs_total + val_returns + p_misc
-    
-    net_profit = gross_revenue - total_costs
-    
-    # Métricas
-    margin_gross = (gross_revenue - cogs_total) / gross_revenue if gross_revenue > 0 else 0
-    margin_net = net_profit / gross_revenue if gross_revenue > 0 else 0
-    roi = net_profit / cogs_total if cogs_total > 0 else 0 # ROI sobre investimento no produto
-    markup = (p_sale / cogs_total) if cogs_total > 0 else 0
-    
-    # Break-even Point calculation
-    # Fixed costs here refer to per-unit fixed values (FBA, Product Cost, Fixed Fee, Misc)
-    # Variable costs here refer to percentages (Tax, Comm, Tacos, Return)
-    # Price * (1 - Variable%) = FixedPerUnit
-    denominator = (1 - p_tax - p_comm - p_tacos - p_return)
-    break_even = (cogs_total + val_fixed + val_fba + val_storage + p_misc) / denominator if denominator > 0 else 999999
-
-    return {
-        "gross_revenue": gross_revenue,
-        "val_tax": val_tax,
-        "val_comm": val_comm,
-        "val_fixed": val_fixed,
-        "val_fba": val_fba,
-        "val_storage": val_storage,
-        "val_ads": val_ads,
-        "cogs_total": cogs_total,
-        "val_returns": val_returns,
-        "val_misc": p_misc,
-        "total_costs": total_costs,
-        "net_profit": net_profit,
-        "margin_net": margin_net * 100,
-        "roi": roi * 100,
-        "break_even": break_even,
-        "markup": markup
-    }
-
-metrics = calculate_financials(
+instrument.stop("app.widgets", widgets_started)
+
+# Tupla de parâmetros: chave de todos os caches (cálculo, cenários, figuras)
+params = (
     price_sale, cost_product, cost_inbound, cost_prep, tax_rate, commission_rate, 
     fba_fee, storage_fee, tacos_target, return_rate, fixed_fee, misc_costs
 )
 
+# Grafo por sessão: só recalcula os nós a jusante das entradas alteradas
+if "product_graph" not in st.session_state:
+    st.session_state["product_graph"] = build_product_graph()
+graph = st.session_state["product_graph"]
+graph.begin_run()
+graph.set_inputs(**dict(zip(INPUT_COLUMNS, params)), fee_rule=fixed_fee == fixed_fee_default,
+                 money_mode="cents" if money_exact else "float")
+metrics = graph.get("metrics")
+
 # -----------------------------------------------------------------------------
 # 4. DASHBOARD & VISUALIZAÇÃO
 # -----------------------------------------------------------------------------
@@ -236,17 +736,8 @@ metrics = calculate_financials(
 st.title(f"📊 FBA Command Center: {product_name}")
 st.markdown(f"**Análise Financeira de Precisão** | Status: {'🟢 **LUCRATIVO**' if metrics['net_profit'] > 0 else '🔴 **PREJUÍZO**'}")
 
-# --- TABS ---
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "💼 Dashboard Executivo", 
-    "📉 Análise de Cascata (P&L)", 
-    "🎯 Simulador & Psicologia de Preços", 
-    "🔮 Cenários Futuros (Corrigido)",
-    "❓ Glossário & Ajuda"
-])
-
 # --- TAB 1: DASHBOARD EXECUTIVO ---
-with tab1:
+def render_dashboard_tab():
     # KPI ROW
     col1, col2, col3, col4 = st.columns(4)
     
@@ -284,36 +775,22 @@ with tab1:
     
     with c_chart1:
         st.subheader("Para onde vai o dinheiro?")
-        # Donut Chart with better colors
-        labels = ['CMV (Produto+Frete)', 'Comissão Amazon', 'Logística FBA', 'Impostos', 'Marketing (Ads)', 'Outros (Dev/Arm)']
-        values = [
-            metrics['cogs_total'], 
-            metrics['val_comm'] + metrics['val_fixed'], 
-            metrics['val_fba'], 
-            metrics['val_tax'], 
-            metrics['val_ads'], 
-            metrics['val_returns'] + metrics['val_storage'] + metrics['val_misc']
-        ]
-        colors = ['#2c3e50', '#f39c12', '#e67e22', '#e74c3c', '#3498db', '#95a5a6']
-        
-        fig_donut = go.Figure(data=[go.Pie(labels=labels, values=values, hole=.6, marker=dict(colors=colors))])
-        fig_donut.update_layout(
-            margin=dict(t=20, b=20, l=20, r=20), 
-            height=350,
-            showlegend=True,
-            legend=dict(orientation="h", yanchor="bottom", y=-0.1, xanchor="center", x=0.5)
-        )
-        fig_donut.update_traces(textposition='outside', textinfo='percent+label')
-        st.plotly_chart(fig_donut, use_container_width=True)
+        fig_donut = graph.get("donut_chart")
+        plotly_chart(fig_donut)
         
     with c_chart2:
         st.subheader("Projeção de Lote")
         
-        lote_qty = st.number_input("Tamanho do Lote (unidades)", value=100, step=50)
+        # Valor guardado fora do widget: no modo sob demanda a aba some da
+        # página e o Streamlit descartaria o estado do widget
+        lote_qty = st.number_input("Tamanho do Lote (unidades)", value=st.session_state.get("lote_qty", 100), step=50)
+        st.session_state["lote_qty"] = lote_qty
+        graph.set_inputs(lote_qty=lote_qty)
         
-        total_inv = metrics['cogs_total'] * lote_qty
-        total_profit = metrics['net_profit'] * lote_qty
-        total_rev = metrics['gross_revenue'] * lote_qty
+        lot = graph.get("lot_projection")
+        total_inv = lot['total_inv']
+        total_profit = lot['total_profit']
+        total_rev = lot['total_rev']
         
         st.markdown(f"""
         <div class="metric-card">
@@ -335,196 +812,380 @@ with tab1:
         """, unsafe_allow_html=True)
         
         # Add Export Button
-        csv_data = pd.DataFrame([metrics]).to_csv(index=False).encode('utf-8')
+        # Mesmo pipeline da exportação do catálogo, com um bloco de uma linha
+        # Gerado só no clique: o CSV (e o pandas) não pesam na renderização do painel
         st.download_button(
             label="📥 Baixar Relatório CSV",
-            data=csv_data,
+            data=lambda: graph.get("report_csv"),
             file_name=f'fba_analise_{product_name.replace(" ","_")}.csv',
             mime='text/csv',
         )
 
 # --- TAB 2: WATERFALL (CASCATA) ---
-with tab2:
+def render_waterfall_tab():
     st.subheader("Fluxo de Erosão do Lucro (Waterfall)")
     st.markdown("Este gráfico mostra **exatamente** em qual etapa você está perdendo margem. Ideal para identificar gargalos.")
     
-    fig_waterfall = go.Figure(go.Waterfall(
-        name = "20", orientation = "v",
-        measure = ["relative", "relative", "relative", "relative", "relative", "relative", "relative", "relative", "total"],
-        x = ["Preço Venda", "Impostos", "Comissão Amazon", "Taxa FBA", "CMV (Produto)", "Ads (TACOS)", "Armazenagem", "Perdas/Dev", "LUCRO LÍQUIDO"],
-        textposition = "outside",
-        text = [f"R${metrics['gross_revenue']:.2f}", f"-{metrics['val_tax']:.2f}", f"-{metrics['val_comm']+metrics['val_fixed']:.2f}", 
-                f"-{metrics['val_fba']:.2f}", f"-{metrics['cogs_total']:.2f}", f"-{metrics['val_ads']:.2f}", 
-                f"-{metrics['val_storage']:.2f}", f"-{metrics['val_returns']:.2f}", f"R${metrics['net_profit']:.2f}"],
-        y = [metrics['gross_revenue'], -metrics['val_tax'], -(metrics['val_comm']+metrics['val_fixed']), 
-             -metrics['val_fba'], -metrics['cogs_total'], -metrics['val_ads'], 
-             -metrics['val_storage'], -metrics['val_returns'], metrics['net_profit']],
-        connector = {"line":{"color":"rgb(63, 63, 63)"}},
-        decreasing = {"marker":{"color":COLOR_DANGER}},
-        increasing = {"marker":{"color":COLOR_SUCCESS}},
-        totals = {"marker":{"color":COLOR_ORANGE}}
-    ))
-    
-    fig_waterfall.update_layout(
-        title = "DRE Visual (Cascata)",
-        showlegend = False,
-        height=550,
-        waterfallgap = 0.3
+    fig_waterfall = graph.get("waterfall_chart")
+    plotly_chart(fig_waterfall)
+    render_plan_vs_actual()
+
+def render_plan_vs_actual():
+    from actuals import plan_vs_actual, realized_metrics
+
+    st.markdown("### 📑 Planejado x Realizado")
+    reports = st.file_uploader(
+        "Relatórios do Seller Central (TSV)",
+        type=["tsv", "txt"],
+        accept_multiple_files=True,
+        key="actuals_files",
+        help="Settlement (flat file V2) e/ou relatório de pedidos (All Orders). Arquivos grandes são lidos em blocos."
     )
-    st.plotly_chart(fig_waterfall, use_container_width=True)
+    if not reports:
+        st.caption("Envie o settlement para comparar TACOS, devoluções e tarifas realizados com o plano acima.")
+        return
+    c_dec, c_day = st.columns(2)
+    decimal = c_dec.radio("Separador Decimal", [".", ","], horizontal=True, key="actuals_decimal")
+    dayfirst = c_day.toggle("Datas no formato DD/MM/AAAA", key="actuals_dayfirst")
+    try:
+        actuals = load_uploaded_actuals(tuple(report.file_id for report in reports), decimal, dayfirst, tuple(reports))
+    except (ValueError, KeyError) as exc:
+        st.error(f"⚠️ Não foi possível ler os relatórios: {exc}")
+        return
+
+    # SKUs por receita; no modo catálogo, abre no SKU selecionado no ranking
+    revenue_by_sku = actuals["revenue"].groupby(level="sku").sum().sort_values(ascending=False)
+    skus = list(revenue_by_sku.index)
+    c_sku, c_month = st.columns(2)
+    sku = c_sku.selectbox("SKU", skus, index=skus.index(selected_sku) if selected_sku in skus else 0, key="actuals_sku")
+    sku_rows = actuals.xs(sku, level="sku")
+    months = ["Todos os meses", *sku_rows.index]
+    month = c_month.selectbox("Período", months, key="actuals_month")
+    period = sku_rows.sum().to_frame().T if month == months[0] else sku_rows.loc[[month]]
+    if period["units"].iloc[0] <= 0:
+        st.warning("Sem unidades vendidas no settlement para este SKU/período.")
+        return
+
+    plan = dict(zip(INPUT_COLUMNS, params))
+    # Taxa fixa pela regra: no preço realizado, mudar de faixa não é vazamento
+    fixed_fee_rule = rate_card.fixed_fee if fixed_fee == fixed_fee_default else None
+    row = plan_vs_actual(period, plan, fixed_fee_rule).iloc[0]
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("TACOS Realizado", f"{row['tacos_real']:.1f}%", delta=f"{row['tacos_real'] - row['tacos_plan']:+.1f} p.p. vs plano", delta_color="inverse")
+    k2.metric("Custo de Devoluções", f"{row['returns_real']:.1f}%", delta=f"{row['returns_real'] - row['returns_plan']:+.1f} p.p. vs plano", delta_color="inverse",
+              help=f"{row['return_units_pct']:.1f}% das unidades devolvidas")
+    k3.metric("Vazamento de Tarifas", f"R$ {row['fee_leakage']:,.2f}", delta=f"R$ {row['fees_real_unit'] - row['fees_plan_unit']:+.2f}/un.", delta_color="inverse",
+              help="Comissão + taxa fixa + FBA cobradas a mais que o plano, no preço médio realizado.")
+    k4.metric("Lucro Unitário Realizado", f"R$ {row['profit_real_unit']:.2f}", delta=f"R$ {row['profit_real_unit'] - row['profit_plan_unit']:+.2f} vs plano")
+
+    real = realized_metrics(period, plan)
+    compare = {col: np.r_[metrics[col], real[col]] for col in METRIC_COLUMNS}
+    plotly_chart(catalog_waterfall_figure(["Planejado", f"Realizado ({'todos os meses' if month == months[0] else month})"], compare))
+    st.caption(f"{int(row['units']):,} unidades · preço médio R$ {row['avg_price']:.2f}. Imposto e CMV vêm do plano; "
+               "ads e armazenagem sem SKU são rateados pela receita do mês.")
+
+    if len(sku_rows) > 1:
+        st.dataframe(plan_vs_actual(sku_rows, plan, fixed_fee_rule), use_container_width=True, column_config={
+            "units": st.column_config.NumberColumn("Unidades", format="%d"),
+            "revenue": st.column_config.NumberColumn("Receita", format="R$ %.2f"),
+            "avg_price": st.column_config.NumberColumn("Preço Médio", format="R$ %.2f"),
+            "tacos_plan": st.column_config.NumberColumn("TACOS Plano", format="%.1f%%"),
+            "tacos_real": st.column_config.NumberColumn("TACOS Real", format="%.1f%%"),
+            "returns_plan": st.column_config.NumberColumn("Dev. Plano", format="%.1f%%"),
+            "returns_real": st.column_config.NumberColumn("Dev. Real", format="%.1f%%"),
+            "return_units_pct": st.column_config.NumberColumn("Unid. Devolvidas", format="%.1f%%"),
+            "fees_plan_unit": st.column_config.NumberColumn("Tarifas Plano/un.", format="R$ %.2f"),
+            "fees_real_unit": st.column_config.NumberColumn("Tarifas Real/un.", format="R$ %.2f"),
+            "fee_leakage": st.column_config.NumberColumn("Vazamento", format="R$ %.2f"),
+            "profit_plan_unit": st.column_config.NumberColumn("Lucro Plano/un.", format="R$ %.2f"),
+            "profit_real_unit": st.column_config.NumberColumn("Lucro Real/un.", format="R$ %.2f"),
+            "margin_plan": st.column_config.NumberColumn("Margem Plano", format="%.1f%%"),
+            "margin_real": st.column_config.NumberColumn("Margem Real", format="%.1f%%"),
+        })
 
 # --- TAB 3: SIMULAÇÃO REVERSA & PSICOLOGIA ---
-with tab3:
+def render_pricing_tab():
+    import pandas as pd
+
     col_rev, col_psy = st.columns([1, 1])
     
     with col_rev:
         st.markdown("### 🎯 Calculadora Reversa")
         st.info("Digite quanto você quer de margem, e o sistema calcula o preço de venda necessário.")
         
-        target_margin_percent = st.number_input("Margem Líquida Alvo (%)", min_value=1.0, max_value=60.0, value=20.0, step=1.0)
+        target_margin_percent = st.number_input("Margem Líquida Alvo (%)", min_value=1.0, max_value=60.0, value=st.session_state.get("target_margin_percent", 20.0), step=1.0)
+        st.session_state["target_margin_percent"] = target_margin_percent
+        graph.set_inputs(target_margin_percent=target_margin_percent)
         
-        var_rates = tax_rate + commission_rate + tacos_target + return_rate
-        total_fixed_costs = cost_product + cost_inbound + cost_prep + fba_fee + fixed_fee + storage_fee + misc_costs
+        # Taxa fixa no padrão: a regra < R$79 é aplicada ao preço resolvido
+        reverse = graph.get("reverse")
+        st.caption(f"Custos variáveis: {graph.get('var_rates') * 100:.1f}% do preço | Custos por unidade: R$ {graph.get('total_fixed_costs'):.2f}")
         
-        denominator = 1 - var_rates - (target_margin_percent/100)
-        
-        if denominator <= 0:
+        if reverse is None:
             st.error("⚠️ Impossível! Seus custos variáveis (Imposto + Amazon + Ads) já são maiores que o que sobra para a margem.")
         else:
-            suggested_price = total_fixed_costs / denominator
             st.markdown(f"""
             <div style="background-color: #e8f4f8; padding: 20px; border-radius: 10px; text-align: center; border: 1px solid #b3d7e8;">
                 <span style="font-size: 14px; color: #555; text-transform: uppercase; letter-spacing: 1px;">Preço Matemático</span><br>
-                <span style="font-size: 32px; font-weight: bold; color: {COLOR_DARK_BLUE};">R$ {suggested_price:.2f}</span>
+                <span style="font-size: 32px; font-weight: bold; color: {COLOR_DARK_BLUE};">R$ {reverse['suggested_price']:.2f}</span>
             </div>
             """, unsafe_allow_html=True)
             
-            new_profit_check = suggested_price * (target_margin_percent/100)
-            st.caption(f"Lucro projetado nesse preço: R$ {new_profit_check:.2f}")
+            st.caption(f"Lucro projetado nesse preço: R$ {reverse['profit_check']:.2f}")
 
     with col_psy:
         st.markdown("### 🧠 Psicologia de Preços (Novo)")
         st.markdown("Preços matemáticos vendem menos. Use preços psicológicos para aumentar a conversão.")
         
-        if denominator > 0:
-            base_price = int(suggested_price)
-            
-            # Opções Psicológicas
-            opt_90 = float(base_price) + 0.90
-            if opt_90 < suggested_price: opt_90 += 1.0 # Ensure we don't drop too much
-            
-            opt_99 = float(base_price) + 0.99
-            if opt_99 < suggested_price: opt_99 += 1.0
-            
-            opt_97 = float(base_price) + 0.97
-            
-            # Recalcular lucro para essas opções
-            def quick_calc_profit(p):
-                res = calculate_financials(p, cost_product, cost_inbound, cost_prep, tax_rate, commission_rate, fba_fee, storage_fee, tacos_target, return_rate, fixed_fee, misc_costs)
-                return res['net_profit'], res['margin_net']
-
-            p90, m90 = quick_calc_profit(opt_90)
-            p99, m99 = quick_calc_profit(opt_99)
-            
+        if reverse is not None:
             st.markdown("**Sugestões Inteligentes:**")
             
-            # Card 1
-            st.markdown(f"""
-            <div class="metric-card" style="margin-bottom: 10px; display: flex; justify-content: space-between; align-items: center;">
-                <div>
-                    <span style="font-size: 22px; font-weight: bold;">R$ {opt_90:.2f}</span> <span style="color: #666; font-size: 12px;">(Padrão Brasileiro)</span>
+            for i, opt in enumerate(reverse["options"]):
+                spacing = "margin-bottom: 10px; " if i < len(reverse["options"]) - 1 else ""
+                best_tag = " ⭐" if opt["price"] == reverse["best_price"] else ""
+                st.markdown(f"""
+                <div class="metric-card" style="{spacing}display: flex; justify-content: space-between; align-items: center;">
+                    <div>
+                        <span style="font-size: 22px; font-weight: bold;">R$ {opt['price']:.2f}{best_tag}</span> <span style="color: #666; font-size: 12px;">({opt['label']})</span>
+                    </div>
+                    <div style="text-align: right;">
+                        <span style="font-size: 14px; color: {COLOR_SUCCESS if opt['margin'] >= target_margin_percent else COLOR_DANGER}">Margem: {opt['margin']:.1f}%</span><br>
+                        <small>Lucro: R$ {opt['profit']:.2f}</small>
+                    </div>
                 </div>
-                <div style="text-align: right;">
-                    <span style="font-size: 14px; color: {COLOR_SUCCESS if m90 >= target_margin_percent else COLOR_DANGER}">Margem: {m90:.1f}%</span><br>
-                    <small>Lucro: R$ {p90:.2f}</small>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-
-            # Card 2
-            st.markdown(f"""
-            <div class="metric-card" style="display: flex; justify-content: space-between; align-items: center;">
-                <div>
-                    <span style="font-size: 22px; font-weight: bold;">R$ {opt_99:.2f}</span> <span style="color: #666; font-size: 12px;">(Agressivo)</span>
-                </div>
-                <div style="text-align: right;">
-                    <span style="font-size: 14px; color: {COLOR_SUCCESS if m99 >= target_margin_percent else COLOR_DANGER}">Margem: {m99:.1f}%</span><br>
-                    <small>Lucro: R$ {p99:.2f}</small>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+                """, unsafe_allow_html=True)
             
+            st.caption("⭐ Menor preço psicológico que ainda atinge a margem alvo (já considerando a regra da taxa fixa abaixo de R$79).")
             st.caption("Nota: Preços terminados em .90 tendem a performar melhor no e-commerce brasileiro do que números quebrados como R$ 134,52.")
 
+    st.markdown("---")
+    st.markdown("### 📈 Preço Ótimo por Elasticidade")
+    st.markdown("O volume muda com o preço. Informe a curva de demanda e o sistema varre milhares de preços para achar o que maximiza o **lucro total**.")
+
+    demand_source = st.radio("Curva de Demanda", ["Elasticidade Constante", "Ajustar ao Histórico"], horizontal=True, key="demand_source")
+    c_dem1, c_dem2 = st.columns(2)
+    if demand_source == "Elasticidade Constante":
+        with c_dem1:
+            elasticity = st.slider(
+                "Elasticidade-Preço", -5.0, -0.1, st.session_state.get("elasticity", -1.5), step=0.1,
+                help="Variação % nas vendas para cada 1% de variação no preço. -1,5 = subir 10% o preço derruba 15% as vendas."
+            )
+            st.session_state["elasticity"] = elasticity
+        with c_dem2:
+            ref_units = st.number_input("Vendas/mês no Preço Atual", min_value=1.0, value=st.session_state.get("ref_units", 100.0), step=10.0)
+            st.session_state["ref_units"] = ref_units
+        demand_spec = ("elasticity", ref_units, elasticity)
+    else:
+        with c_dem1:
+            history = st.data_editor(
+                st.session_state.get("price_history", pd.DataFrame({"Preço": [109.90, 119.90, 129.90, 139.90], "Unidades": [160, 130, 100, 85]})),
+                num_rows="dynamic", use_container_width=True, key="price_history_editor"
+            )
+            st.session_state["price_history"] = history
+        demand_spec = ("history", tuple(history["Preço"].astype(float)), tuple(history["Unidades"].astype(float)))
+
+    price_range_pct = st.slider("Faixa de Busca (% do preço atual)", 10, 400, (50, 200), step=10)
+    graph.set_inputs(demand_spec=demand_spec, price_range=(price_range_pct[0] / 100, price_range_pct[1] / 100))
+    optimum = graph.get("optimum")
+
+    if optimum is None:
+        st.error("⚠️ Histórico insuficiente: informe ao menos dois preços diferentes com vendas positivas.")
+    else:
+        if demand_source == "Ajustar ao Histórico":
+            with c_dem2:
+                st.metric("Elasticidade Ajustada", f"{optimum['elasticity']:.2f}")
+        k_opt1, k_opt2, k_opt3 = st.columns(3)
+        k_opt1.metric("Preço Ótimo", f"R$ {optimum['best_price']:.2f}", delta=f"{(optimum['best_price'] / price_sale - 1) * 100:+.1f}% vs atual")
+        k_opt2.metric("Lucro Total no Ótimo", f"R$ {optimum['best_profit']:,.2f}", delta=f"R$ {optimum['best_profit'] - optimum['current_profit']:+,.2f} vs atual")
+        k_opt3.metric("Vendas no Ótimo", f"{optimum['best_units']:,.0f} un.", help=f"No preço atual: {optimum['current_units']:,.0f} un.")
+        plotly_chart(profit_curve_figure(optimum["grid"], optimum["profit_curve"], optimum["best_price"], price_sale))
+
 # --- TAB 4: CENÁRIOS FUTUROS (CORRIGIDO) ---
-with tab4:
+def render_scenarios_tab():
+    from montecarlo import DEFAULT_SPREADS, simulate_profit, spec_around
+    from parallel import simulate_profit_parallel
+
     st.subheader("🔮 Matriz de Cenários Automática")
     st.markdown("Não confie apenas no plano A. Veja o que acontece nos cenários Otimista e Pessimista.")
     
-    # Definição dos Cenários
-    scenarios = {
-        "Pessimista 🌧️": {
-            "price": price_sale * 0.90, # Vender 10% mais barato
-            "cost": cost_product * 1.10, # Custo sobe 10%
-            "ads": tacos_target * 1.20 # Ads sobem 20%
-        },
-        "Realista (Atual) ☁️": {
-            "price": price_sale,
-            "cost": cost_product,
-            "ads": tacos_target
-        },
-        "Otimista ☀️": {
-            "price": price_sale * 1.10, # Vender 10% mais caro
-            "cost": cost_product * 0.95, # Negociou 5% desconto
-            "ads": tacos_target * 0.80 # Otimizou ads
-        }
-    }
-    
-    scenario_display_data = []
-    
-    for name, params in scenarios.items():
-        res = calculate_financials(
-            params['price'], params['cost'], cost_inbound, cost_prep, 
-            tax_rate, commission_rate, fba_fee, storage_fee, 
-            params['ads'], return_rate, fixed_fee, misc_costs
-        )
-        # Formatando valores como strings para exibição segura e bonita
-        scenario_display_data.append({
-            "Cenário": name,
-            "Preço Venda": f"R$ {params['price']:.2f}",
-            "Lucro Líquido": f"R$ {res['net_profit']:.2f}",
-            "Margem %": f"{res['margin_net']:.1f}%",
-            "ROI %": f"{res['roi']:.1f}%"
-        })
+    # Cenários e tabela ficam em cache: só recalculam quando os parâmetros mudam
+    fig_table = graph.get("scenario_table")
     
-    # Convertendo para DataFrame apenas para estrutura, mas usando Plotly Table para renderizar
-    df_display = pd.DataFrame(scenario_display_data)
-
-    # Tabela Profissional usando Plotly (Substitui o st.dataframe com style que estava quebrando)
-    fig_table = go.Figure(data=[go.Table(
-        header=dict(values=list(df_display.columns),
-                    fill_color=COLOR_DARK_BLUE,
-                    font=dict(color='white', size=14),
-                    align='left',
-                    height=40),
-        cells=dict(values=[df_display[k].tolist() for k in df_display.columns],
-                   fill_color=[[COLOR_LIGHT_GREY if i % 2 == 0 else 'white' for i in range(len(df_display))]],
-                   align='left',
-                   font=dict(color=[COLOR_TEXT], size=13),
-                   height=30)
-    )])
-    
-    fig_table.update_layout(
-        margin=dict(l=0, r=0, t=0, b=0),
-        height=200
-    )
-    
-    st.plotly_chart(fig_table, use_container_width=True)
+    plotly_chart(fig_table)
     
     st.info("💡 **Dica:** A tabela acima agora usa renderização gráfica para garantir 100% de estabilidade e visual profissional.")
 
-# --- TAB 5: GLOSSÁRIO (NOVO) ---
-with tab5:
+    st.markdown("---")
+    st.subheader("🎲 Simulação de Risco (Monte Carlo)")
+    st.markdown("Em vez de 3 cenários fixos, sorteia milhões de combinações de preço, custo, ads e devoluções e mostra a distribuição do lucro.")
+
+    with st.form("montecarlo_form"):
+        mc_labels = {"price_sale": "Preço de Venda", "cost_product": "Custo Unitário", "tacos_target": "TACOS", "return_rate": "Devoluções"}
+        mc_dists = ["normal", "uniform", "triangular", "fixed"]
+        mc_specs = {}
+        mc_cols = st.columns(len(mc_labels))
+        for col, (name, label) in zip(mc_cols, mc_labels.items()):
+            dist_default, spread_default = DEFAULT_SPREADS[name]
+            with col:
+                st.markdown(f"**{label}**")
+                dist = st.selectbox("Distribuição", mc_dists, index=mc_dists.index(dist_default), key=f"mc_dist_{name}")
+                spread = st.number_input("Dispersão ±%", min_value=0.0, max_value=100.0, value=spread_default * 100, step=1.0, key=f"mc_spread_{name}")
+                mc_specs[name] = spec_around(dist, params[INPUT_COLUMNS.index(name)], spread / 100)
+
+        c_n, c_seed = st.columns(2)
+        with c_n:
+            mc_samples = st.select_slider("Número de Sorteios", options=[100_000, 1_000_000, 5_000_000, 10_000_000], value=1_000_000, format_func=lambda n: f"{n:,}")
+        with c_seed:
+            mc_seed = st.number_input("Semente (reprodutibilidade)", min_value=0, value=42, step=1)
+        mc_submitted = st.form_submit_button("▶️ Rodar Simulação")
+
+    # Taxa fixa: se o usuário não alterou o padrão, segue a regra < R$79 em cada preço sorteado
+    mc_base = dict(zip(INPUT_COLUMNS, params))
+    if fixed_fee == fixed_fee_default:
+        del mc_base["fixed_fee"]
+    mc_key = (params, repr(mc_specs), mc_samples, mc_seed)
+
+    if mc_submitted:
+        # Sequencial e paralelo usam fluxos aleatórios diferentes: o modo entra na chave
+        mc_disk_key = disk_cache().key("montecarlo", mc_base, mc_specs, mc_samples, int(mc_seed), sim_workers > 1)
+        if sim_workers > 1:
+            mc_compute = lambda: simulate_profit_parallel(mc_base, mc_specs, n_samples=mc_samples, seed=int(mc_seed), workers=sim_workers)  # noqa: E731
+        else:
+            mc_compute = lambda: simulate_profit(mc_base, mc_specs, n_samples=mc_samples, seed=int(mc_seed))  # noqa: E731
+        submit_job("mc_result", mc_key, mc_disk_key, "Simulando", mc_compute)
+    collect_job("mc_result", "Simulação de Monte Carlo")
+
+    mc_result = st.session_state.get("mc_result")
+    if mc_result is not None:
+        if st.session_state.get("mc_result_key") != mc_key:
+            st.caption("⚠️ Parâmetros alterados desde a última simulação. Rode novamente para atualizar.")
+        k1, k2, k3, k4 = st.columns(4)
+        k1.metric("Lucro Médio", f"R$ {mc_result['mean']:.2f}", help=f"Desvio padrão: R$ {mc_result['std']:.2f}")
+        k2.metric("P(Prejuízo)", f"{mc_result['p_loss'] * 100:.1f}%", help="Fração dos sorteios com lucro líquido negativo.")
+        k3.metric("VaR 95%", f"R$ {mc_result['var']:.2f}", help="Em 95% dos casos o lucro unitário fica acima deste valor.")
+        k4.metric("CVaR 95%", f"R$ {mc_result['cvar']:.2f}", help="Lucro médio nos 5% piores casos.")
+        plotly_chart(montecarlo_figure(mc_result))
+        st.caption(f"{mc_result['n_samples']:,} sorteios | Faixa interquartil (P25–P75) destacada em laranja.")
+
+# --- TAB 5: SENSIBILIDADE (TORNADO) ---
+def render_sensitivity_tab():
+    import pandas as pd
+
+    from montecarlo import RATE_INPUTS
+
+    st.subheader("🌪️ Análise de Sensibilidade")
+    st.markdown("Quais entradas mais mexem no resultado? Cada uma é variada para cima e para baixo, mantendo as demais fixas.")
+
+    metric_options = {"Lucro Líquido (R$)": "net_profit", "Margem Líquida (%)": "margin_net", "ROI (%)": "roi"}
+    c_metric, c_bump = st.columns(2)
+    with c_metric:
+        metric_label = st.selectbox("Métrica", list(metric_options), index=list(metric_options).index(st.session_state.get("sens_metric", "Lucro Líquido (R$)")))
+        st.session_state["sens_metric"] = metric_label
+    with c_bump:
+        bump_pct = st.slider("Variação por Entrada ±%", 1, 50, st.session_state.get("sens_bump", 10))
+        st.session_state["sens_bump"] = bump_pct
+    metric = metric_options[metric_label]
+    fee_rule = fixed_fee == fixed_fee_default
+
+    # Base + 24 perturbações avaliadas numa única chamada vetorizada
+    graph.set_inputs(sens_bump=bump_pct / 100, sens_metric=metric)
+    base, rows = graph.get("tornado")
+    plotly_chart(tornado_figure(base, rows, bump_pct / 100, metric_label))
+
+    rows_df = pd.DataFrame(rows, columns=["Entrada", f"-{bump_pct}%", f"+{bump_pct}%", "Swing", "Elasticidade"])
+    rows_df["Entrada"] = rows_df["Entrada"].map(INPUT_LABELS)
+    st.dataframe(rows_df, use_container_width=True, hide_index=True, column_config={
+        "Elasticidade": st.column_config.NumberColumn(format="%.2f", help="Variação % da métrica para cada 1% de variação na entrada."),
+    })
+
+    st.markdown("---")
+    st.markdown("#### 🗺️ Mapa de Calor (Duas Entradas)")
+    c_x, c_y, c_range = st.columns(3)
+    with c_x:
+        x_name = st.selectbox("Eixo X", INPUT_COLUMNS, index=INPUT_COLUMNS.index(st.session_state.get("sens_x", "price_sale")), format_func=INPUT_LABELS.get)
+        st.session_state["sens_x"] = x_name
+    with c_y:
+        y_name = st.selectbox("Eixo Y", INPUT_COLUMNS, index=INPUT_COLUMNS.index(st.session_state.get("sens_y", "cost_product")), format_func=INPUT_LABELS.get)
+        st.session_state["sens_y"] = y_name
+    with c_range:
+        range_pct = st.slider("Faixa ±%", 5, 90, st.session_state.get("sens_range", 30), step=5)
+        st.session_state["sens_range"] = range_pct
+
+    if x_name == y_name:
+        st.warning("Escolha duas entradas diferentes.")
+        return
+    steps = np.linspace(1 - range_pct / 100, 1 + range_pct / 100, 41)
+    x_values = tuple(params[INPUT_COLUMNS.index(x_name)] * steps)
+    y_values = tuple(params[INPUT_COLUMNS.index(y_name)] * steps)
+    z = sensitivity_grid(params, x_name, y_name, x_values, y_values, metric, fee_rule=fee_rule)
+
+    # Taxas exibidas em %, como nos sliders
+    x_axis = np.array(x_values) * (100 if x_name in RATE_INPUTS else 1)
+    y_axis = np.array(y_values) * (100 if y_name in RATE_INPUTS else 1)
+    plotly_chart(heatmap_figure(x_axis, y_axis, z, INPUT_LABELS[x_name], INPUT_LABELS[y_name], metric_label))
+    if x_values[0] == x_values[-1] or y_values[0] == y_values[-1]:
+        st.caption("ℹ️ Entradas com valor zero não variam com a faixa percentual.")
+
+# --- TAB 6: FLUXO DE CAIXA DO LOTE ---
+def render_cashflow_tab():
+    import pandas as pd
+
+    st.subheader("💸 Fluxo de Caixa do Lote")
+    st.markdown("Vende o lote no ritmo informado, cobra armazenagem sobre o estoque parado (com pico no Q4), recebe os repasses a cada 14 dias e repõe o estoque respeitando o lead time.")
+
+    c1, c2, c3, c4 = st.columns(4)
+    with c1:
+        cf_lot = st.number_input("Unidades por Lote", min_value=1, value=st.session_state.get("cf_lot", st.session_state.get("lote_qty", 100)), step=50)
+        st.session_state["cf_lot"] = cf_lot
+    with c2:
+        cf_daily = st.number_input("Vendas por Dia (un.)", min_value=0.0, value=st.session_state.get("cf_daily", 3.0), step=0.5)
+        st.session_state["cf_daily"] = cf_daily
+    with c3:
+        cf_lead = st.number_input("Lead Time de Reposição (dias)", min_value=1, value=st.session_state.get("cf_lead", 30), step=5,
+                                  help="Dias entre o pedido ao fornecedor e o estoque disponível no CD da Amazon.")
+        st.session_state["cf_lead"] = cf_lead
+    with c4:
+        cf_start = st.date_input("Início", value=st.session_state.get("cf_start", datetime.date.today()))
+        st.session_state["cf_start"] = cf_start
+
+    c5, c6, c7 = st.columns(3)
+    with c5:
+        cf_horizon = st.select_slider("Horizonte", options=[90, 180, 365, 540, 730], value=st.session_state.get("cf_horizon", 365), format_func=lambda d: f"{d} dias")
+        st.session_state["cf_horizon"] = cf_horizon
+    with c6:
+        cf_q4 = st.slider("Multiplicador da Armazenagem no Q4", 1.0, 5.0, st.session_state.get("cf_q4", 3.0), step=0.5)
+        st.session_state["cf_q4"] = cf_q4
+    with c7:
+        cf_restock = st.toggle("Repor Estoque Automaticamente", value=st.session_state.get("cf_restock", True))
+        st.session_state["cf_restock"] = cf_restock
+
+    graph.set_inputs(cash_settings=(cf_lot, cf_daily, cf_lead, cf_horizon, cf_start, cf_restock, cf_q4))
+    projection = graph.get("cash_flow")
+
+    k1, k2, k3, k4 = st.columns(4)
+    payback = projection["payback_date"]
+    k1.metric("Payback", payback.strftime("%d/%m/%Y") if payback else "Não atinge", help="Primeiro dia em que o caixa acumulado volta a ser positivo.")
+    k2.metric("Caixa Máximo Empatado", f"R$ {projection['max_cash_tied']:,.2f}", help="Maior saldo negativo do caixa acumulado no período.")
+    k3.metric("Caixa no Fim do Horizonte", f"R$ {projection['final_cash']:,.2f}", help=f"Mais R$ {projection['ending_inventory_value']:,.2f} em estoque (a custo).")
+    k4.metric("Armazenagem Total", f"R$ {projection['storage_total']:,.2f}", help=f"Ads no período: R$ {projection['ads_total']:,.2f}")
+
+    plotly_chart(cashflow_figure(projection["dates"], projection["cumulative_cash"], projection["stock"], payback))
+
+    with st.expander("📅 Resumo Mensal"):
+        st.dataframe(pd.DataFrame(projection["monthly"]), use_container_width=True, hide_index=True, column_config={
+            "month": "Mês",
+            "units_sold": st.column_config.NumberColumn("Vendas (un.)", format="%.0f"),
+            "settlement": st.column_config.NumberColumn("Repasses", format="R$ %.2f"),
+            "ad_spend": st.column_config.NumberColumn("Ads", format="R$ %.2f"),
+            "storage": st.column_config.NumberColumn("Armazenagem", format="R$ %.2f"),
+            "purchases": st.column_config.NumberColumn("Compras", format="R$ %.2f"),
+            "net_cash": st.column_config.NumberColumn("Caixa do Mês", format="R$ %.2f"),
+            "stock_end": st.column_config.NumberColumn("Estoque Final", format="%.0f"),
+            "cumulative_cash": st.column_config.NumberColumn("Caixa Acumulado", format="R$ %.2f"),
+        })
+
+# --- TAB 7: GLOSSÁRIO (NOVO) ---
+def render_glossary_tab():
     st.markdown("### 📚 Dicionário do Amazon Seller")
     st.markdown("Termos essenciais para entender a saúde do seu negócio.")
     
@@ -551,64 +1212,161 @@ with tab5:
         """)
 
 # --- AI DIAGNOSIS ---
-st.markdown("---")
-st.subheader("🤖 Diagnóstico Inteligente")
-
-score = 100
-warnings = []
-successes = []
-
-# Logic Heuristics
-if metrics['margin_net'] < 10:
-    score -= 25
-    warnings.append(("CRÍTICO", "Margem líquida perigosamente baixa (<10%). Qualquer aumento no custo de ads vai gerar prejuízo."))
-elif metrics['margin_net'] < 15:
-    score -= 10
-    warnings.append(("ATENÇÃO", "Margem abaixo de 15%. Volume de vendas precisa ser muito alto para compensar."))
-else:
-    successes.append("Margem Líquida saudável (>15%).")
-    
-if metrics['roi'] < 30:
-    score -= 25
-    warnings.append(("BAIXO GIRO", "ROI < 30%. O risco de capital empatado é alto. Tente negociar custo ou aumentar preço."))
-else:
-    successes.append("ROI excelente para Private Label (>30%).")
-    
-if metrics['break_even'] > (price_sale * 0.85):
-    score -= 15
-    warnings.append(("FRAGILIDADE", "Seu Break-even está muito próximo do preço atual. Você tem pouca margem para fazer promoções."))
-
-col_score, col_text = st.columns([1, 3])
-
-with col_score:
-    fig_gauge = go.Figure(go.Indicator(
-        mode = "gauge+number",
-        value = score,
-        domain = {'x': [0, 1], 'y': [0, 1]},
-        gauge = {
-            'axis': {'range': [0, 100]},
-            'bar': {'color': COLOR_ORANGE},
-            'steps': [
-                {'range': [0, 60], 'color': "#ffe0e0"},
-                {'range': [60, 85], 'color': "#fff3cd"},
-                {'range': [85, 100], 'color': "#e0f7fa"}]
-        }
-    ))
-    fig_gauge.update_layout(height=180, margin=dict(t=30, b=30, l=30, r=30))
-    st.plotly_chart(fig_gauge, use_container_width=True)
-
-with col_text:
-    for level, msg in warnings:
-        if level == "CRÍTICO":
-            st.error(f"**{level}:** {msg}")
-        else:
-            st.warning(f"**{level}:** {msg}")
+def render_diagnosis():
+    st.markdown("---")
+    st.subheader("🤖 Diagnóstico Inteligente")
+
+    graph.set_inputs(diagnosis_rules=diagnosis_rules)
+    score, warnings, successes = graph.get("diagnosis")
+
+    col_score, col_text = st.columns([1, 3])
+
+    with col_score:
+        fig_gauge = graph.get("gauge_chart")
+        plotly_chart(fig_gauge)
+
+    with col_text:
+        for level, msg in warnings:
+            if level in CRITICAL_LEVELS:
+                st.error(f"**{level}:** {msg}")
+            else:
+                st.warning(f"**{level}:** {msg}")
             
-    if not warnings:
-        st.success("🎉 Produto com saúde financeira excelente! Sinal verde para investir.")
+        if not warnings:
+            st.success("🎉 Produto com saúde financeira excelente! Sinal verde para investir.")
     
-    st.caption("Nota baseada em benchmarks de Top Sellers da Amazon Brasil.")
+        if diagnosis_rules == load_rules():
+            st.caption("Nota baseada em benchmarks de Top Sellers da Amazon Brasil.")
+        else:
+            st.caption("Nota pelas regras personalizadas em \"🩺 Regras do Diagnóstico\", na barra lateral.")
+
+# --- NAVEGAÇÃO ---
+TABS = {
+    "💼 Dashboard Executivo": render_dashboard_tab,
+    "📉 Análise de Cascata (P&L)": render_waterfall_tab,
+    "🎯 Simulador & Psicologia de Preços": render_pricing_tab,
+    "🔮 Cenários Futuros (Corrigido)": render_scenarios_tab,
+    "🌪️ Sensibilidade": render_sensitivity_tab,
+    "💸 Fluxo de Caixa": render_cashflow_tab,
+    "❓ Glossário & Ajuda": render_glossary_tab,
+}
+
+if lazy_tabs:
+    # Só a seção ativa executa: as demais não constroem nem serializam figuras.
+    # Ao voltar a uma seção, as figuras vêm do cache enquanto os insumos não mudam.
+    sections = {**TABS, "🤖 Diagnóstico Inteligente": render_diagnosis}
+    active_section = st.radio("Seção", list(sections), horizontal=True, label_visibility="collapsed", key="active_section")
+    render = sections[active_section]
+    with instrument.timer(f"section.{render.__name__}"):
+        render()
+else:
+    for tab, render in zip(st.tabs(list(TABS)), TABS.values()):
+        with tab, instrument.timer(f"section.{render.__name__}"):
+            render()
+    with instrument.timer("section.render_diagnosis"):
+        render_diagnosis()
 
 # Footer
 st.markdown("---")
 st.markdown("<div style='text-align: center; color: #888; font-size: 12px;'>Amazon FBA Command Center v3.1 | Ultimate Edition</div>", unsafe_allow_html=True)
+
+instrument.stop("app.rerun", rerun_started)
+# Tempo até a 1ª página completa de cada sessão (na partida a frio, com as importações)
+if not st.session_state.get("first_render_done"):
+    st.session_state["first_render_done"] = True
+    instrument.record("app.first_render", time.perf_counter() - imports_started)
+
+# Painel de cache (renderizado por último para já contar os acessos deste rerun)
+with st.sidebar:
+    # Montados só quando abertos: fechados, não custam o pandas nem a serialização das tabelas
+    cache_box = st.expander("⚡ Cache de Cálculo", key="cache_box", on_change="rerun")
+    if cache_box.open:
+        import pandas as pd
+
+        with cache_box:
+            stats = cache_stats()
+            total_hits = sum(item["hits"] for item in stats)
+            total_calls = total_hits + sum(item["misses"] for item in stats)
+            st.metric("Taxa de Acerto Global", f"{(total_hits / total_calls * 100) if total_calls else 0:.1f}%")
+            st.dataframe(
+                pd.DataFrame(stats).set_index("function"),
+                use_container_width=True,
+                column_config={"hit_rate": st.column_config.ProgressColumn("Acerto", min_value=0.0, max_value=1.0, format="percent")}
+            )
+            st.caption("Cache LRU por processo: reruns só recalculam o que depende dos parâmetros alterados.")
+
+            disk = disk_cache().stats()
+            st.markdown("**Cache em Disco (entre sessões)**")
+            d1, d2, d3 = st.columns(3)
+            d1.metric("Entradas", f"{disk['entries']:,}")
+            d2.metric("Ocupação", f"{disk['bytes'] / 2**20:,.1f} MB", help=f"Limite: {disk['max_bytes'] / 2**20:,.0f} MB (FBA_CACHE_MAX_MB)")
+            d3.metric("Acertos", f"{disk['hits']:,} / {disk['hits'] + disk['misses']:,}")
+            if st.button("🗑️ Limpar Cache em Disco", disabled=not disk["entries"]):
+                disk_cache().clear()
+                st.rerun()
+            st.caption(f"Catálogos e simulações por hash do conteúdo em `{disk['root'] or 'desligado (FBA_CACHE=0)'}`; "
+                       "as entradas menos usadas saem ao passar do limite.")
+
+            shared_catalogs = catalogs.items()
+            job_stats = jobs.stats()
+            st.markdown("**Processo (todas as sessões)**")
+            p1, p2, p3 = st.columns(3)
+            p1.metric("Catálogos em Memória", len(shared_catalogs),
+                      help=f"{sum(item.nbytes for _, item in shared_catalogs) / 2**20:,.1f} MB, uma cópia somente leitura por conteúdo")
+            p2.metric("Tarefas Rodando", job_stats["running"], help=f"{job_stats['queued']} na fila · {job_stats['threads']} threads (FBA_JOB_THREADS)")
+            p3.metric("Tarefas Concluídas", job_stats["done"])
+
+    graph_box = st.expander("🧮 Grafo de Recálculo", key="graph_box", on_change="rerun")
+    if graph_box.open:
+        import pandas as pd
+
+        with graph_box:
+            status_labels = {"computed": "🔄 recalculado", "hit": "♻️ reaproveitado", "idle": "⏸️ não usado"}
+            graph_report = pd.DataFrame(graph.report())
+            graph_report["status"] = graph_report["status"].map(status_labels)
+            st.metric("Nós Recalculados Neste Rerun", f"{(graph_report['status'] == status_labels['computed']).sum()} de {len(graph_report)}")
+            st.dataframe(
+                graph_report[["node", "status", "last_ms", "computes", "hits", "deps"]].set_index("node"),
+                use_container_width=True,
+                column_config={
+                    "status": "Status",
+                    "last_ms": st.column_config.NumberColumn("Último (ms)", format="%.2f"),
+                    "computes": "Recálculos",
+                    "hits": "Reaproveitados",
+                    "deps": "Depende de",
+                }
+            )
+            st.caption("Cada valor derivado declara suas dependências: mudar uma entrada só recalcula os nós a jusante dela, e só quando são lidos.")
+
+    with st.expander("📈 Performance"):
+        st.toggle("Instrumentação Ativa", value=instrument.is_enabled(), key="perf_enabled",
+                  help="Mede widgets, nós do grafo, construção e serialização das figuras desta sessão (os totais do processo somam as sessões com a medição ligada). Desligada, o custo é desprezível.")
+        if instrument.is_enabled():
+            import pandas as pd
+
+            run = instrument.last_run()
+            if run:
+                st.markdown("**Este rerun**")
+                st.dataframe(
+                    pd.DataFrame({"Etapa": list(run), "ms": [seconds * 1000 for seconds in run.values()]}).sort_values("ms", ascending=False),
+                    use_container_width=True, hide_index=True,
+                    column_config={"ms": st.column_config.NumberColumn(format="%.2f")}
+                )
+            snap = instrument.snapshot()
+            st.markdown("**Acumulado no processo**")
+            st.dataframe(
+                pd.DataFrame([
+                    {"Etapa": name, "Chamadas": stat["count"], "Média ms": stat["mean_s"] * 1000, "Máx ms": stat["max_s"] * 1000, "Total ms": stat["total_s"] * 1000}
+                    for name, stat in snap["timers"].items()
+                ]),
+                use_container_width=True, hide_index=True,
+                column_config={name: st.column_config.NumberColumn(format="%.2f") for name in ("Média ms", "Máx ms", "Total ms")}
+            )
+            st.caption(" | ".join(f"{name}: {value:,}" for name, value in snap["counters"].items()))
+            c_json, c_prom = st.columns(2)
+            c_json.download_button("JSON", instrument.to_json(), file_name="fba_performance.json", mime="application/json")
+            c_prom.download_button("Prometheus", instrument.to_prometheus(), file_name="fba_performance.prom", mime="text/plain")
+            if st.button("Zerar Métricas"):
+                instrument.reset()
+        else:
+            st.caption("Ligue a instrumentação e interaja com o app para ver o tempo de cada etapa.")
@@ -0,0 +1,119 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: INGESTÃO DO SETTLEMENT EM BLOCOS
+# -----------------------------------------------------------------------------
+# Gera um settlement sintético (flat file V2, TSV) com N lançamentos e mede a
+# agregação por SKU x mês (load_actuals) e o pico de memória do processo.
+# Confere os totais contra uma agregação direta do arquivo inteiro.
+#
+#   python benchmarks/bench_actuals.py [--lines 2000000] [--skus 5000] [--block-mb 32]
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from actuals import load_actuals  # noqa: E402
+
+HEADER = (
+    "settlement-id", "settlement-start-date", "settlement-end-date", "deposit-date", "total-amount", "currency",
+    "transaction-type", "order-id", "merchant-order-id", "adjustment-id", "shipment-id", "marketplace-name",
+    "amount-type", "amount-description", "amount", "fulfillment-id", "posted-date", "posted-date-time",
+    "order-item-code", "merchant-order-item-id", "merchant-adjustment-item-id", "sku", "quantity-purchased",
+    "promotion-id",
+)
+
+# (transaction-type, amount-type, amount-description, fração do preço ou valor fixo)
+ORDER_LINES = (
+    ("Order", "ItemPrice", "Principal", 1.0),
+    ("Order", "ItemFees", "Commission", -0.15),
+    ("Order", "ItemFees", "FBAPerUnitFulfillmentFee", -14.5),
+    ("Order", "ItemFees", "FixedClosingFee", -5.0),
+)
+
+
+def write_settlement(path, n_lines, n_skus, seed=0):
+    """Settlement sintético: pedidos (4 linhas cada), ~3% de devoluções e ads/armazenagem mensais sem SKU."""
+    rng = np.random.default_rng(seed)
+    n_orders = n_lines // len(ORDER_LINES)
+    sku = rng.integers(0, n_skus, n_orders)
+    price = 40 + (sku % 200) * 1.5
+    day = rng.integers(0, 180, n_orders)
+    dates = (np.datetime64("2024-01-01") + day).astype(str)
+    qty = rng.integers(1, 3, n_orders)
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\t".join(HEADER) + "\n")
+        f.write("\t".join(["123", "2024-01-01", "2024-06-30", "2024-07-02", "0", "BRL"] + [""] * (len(HEADER) - 6)) + "\n")
+        empty = [""] * len(HEADER)
+        for start in range(0, n_orders, 100_000):
+            block = slice(start, start + 100_000)
+            rows = []
+            for ttype, atype, desc, value in ORDER_LINES:
+                amount = price[block] * qty[block] * value if atype == "ItemPrice" or desc == "Commission" else value * qty[block]
+                for s, a, d, q in zip(sku[block], amount, dates[block], qty[block]):
+                    row = list(empty)
+                    row[6], row[12], row[13], row[14], row[16], row[21] = ttype, atype, desc, f"{a:.2f}", d, f"SKU{s}"
+                    row[22] = str(q) if desc == "Principal" else ""
+                    rows.append("\t".join(row))
+            refunds = np.flatnonzero(rng.random(len(sku[block])) < 0.03)
+            for i in refunds:
+                row = list(empty)
+                row[6], row[12], row[13], row[14], row[16], row[21] = "Refund", "ItemPrice", "Principal", f"{-price[block][i]:.2f}", dates[block][i], f"SKU{sku[block][i]}"
+                rows.append("\t".join(row))
+            f.write("\n".join(rows) + "\n")
+        for month in range(1, 7):
+            for atype, desc, amount in (("Cost of Advertising", "TransactionTotalAmount", -25_000.0), ("other-transaction", "Storage Fee", -3_000.0)):
+                row = list(empty)
+                row[6], row[12], row[13], row[14], row[16] = "ServiceFee", atype, desc, f"{amount:.2f}", f"2024-{month:02d}-28"
+                f.write("\t".join(row) + "\n")
+    return n_orders
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestão do settlement em blocos: tempo e memória.")
+    parser.add_argument("--lines", type=int, default=2_000_000)
+    parser.add_argument("--skus", type=int, default=5_000)
+    parser.add_argument("--block-mb", type=int, default=32, help="MB de texto por bloco")
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "settlement.tsv")
+        start = time.perf_counter()
+        write_settlement(path, args.lines, args.skus)
+        size_mb = os.path.getsize(path) / 2**20
+        print(f"Settlement sintético: {size_mb:.0f} MB em {time.perf_counter() - start:.1f} s")
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        start = time.perf_counter()
+        actuals = load_actuals(path, block_bytes=args.block_mb << 20)
+        elapsed = time.perf_counter() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        raw = pd.read_csv(path, sep="\t", usecols=["transaction-type", "amount-type", "amount"])
+        raw = raw[raw["transaction-type"].notna()]
+        expected = {
+            "revenue": raw.loc[(raw["transaction-type"] == "Order") & (raw["amount-type"] == "ItemPrice"), "amount"].sum(),
+            "refunds": -raw.loc[raw["transaction-type"] == "Refund", "amount"].sum(),
+            "ad_spend": -raw.loc[raw["amount-type"] == "Cost of Advertising", "amount"].sum(),
+        }
+    for name, value in expected.items():
+        if not np.isclose(actuals[name].sum(), value, rtol=1e-9):
+            raise AssertionError(f"{name}: {actuals[name].sum():.2f} != {value:.2f}")
+
+    print(f"{args.lines:,} lançamentos -> {len(actuals):,} linhas SKU x mês em {elapsed:.2f} s "
+          f"({args.lines / elapsed / 1e6:.2f} M linhas/s)")
+    print(f"Pico de memória do processo: {rss_after:.0f} MB (antes da ingestão: {rss_before:.0f} MB)")
+    return {"lines": args.lines, "seconds": elapsed, "rows": len(actuals), "peak_rss_mb": rss_after}
+
+
+if __name__ == "__main__":
+    main()
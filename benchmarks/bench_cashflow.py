@@ -0,0 +1,48 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: PROJEÇÃO DE FLUXO DE CAIXA (SKUs x DIAS)
+# -----------------------------------------------------------------------------
+# Mede project_cashflow para catálogos sintéticos com lote, ritmo de vendas e
+# lead time diferentes por SKU, com e sem reposição automática.
+#
+#   python benchmarks/bench_cashflow.py [--skus 1000 10000] [--days 365]
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from benchmarks.bench_parallel import synthetic_catalog  # noqa: E402
+from cashflow import project_cashflow  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo da projeção de fluxo de caixa vetorizada.")
+    parser.add_argument("--skus", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args(argv)
+
+    print(f"{'SKUs':>8}{'dias':>6}{'reposição s':>13}{'sem repor s':>13}")
+    results = []
+    for n_skus in args.skus:
+        rng = np.random.default_rng(0)
+        inputs = synthetic_catalog(n_skus)
+        lots = rng.integers(50, 1_000, n_skus)
+        daily = rng.uniform(0.5, 20, n_skus)
+        lead = rng.integers(15, 60, n_skus)
+        timings = []
+        for restock in (True, False):
+            start = time.perf_counter()
+            project_cashflow(inputs, lots, daily, lead_time_days=lead, horizon_days=args.days, restock=restock)
+            timings.append(time.perf_counter() - start)
+        results.append({"skus": n_skus, "days": args.days, "restock_s": timings[0], "no_restock_s": timings[1]})
+        print(f"{n_skus:>8}{args.days:>6}{timings[0]:>13.3f}{timings[1]:>13.3f}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: FIGURAS DO CATÁLOGO (TEMPO DE CONSTRUÇÃO E PAYLOAD POR Nº DE SKUs)
+# -----------------------------------------------------------------------------
+# Constrói o scatter margem x ROI, o histograma de lucro e o comparativo de
+# SKUs para catálogos sintéticos de tamanhos crescentes e mede o tempo e o
+# tamanho do JSON de cada figura (o que vai para o navegador), conferindo o
+# limite de CATALOG_PAYLOAD_BUDGET. Termina com código 1 se algum passar.
+#
+#   python benchmarks/bench_catalog_figures.py [--sizes 1000 10000 100000 1000000]
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from benchmarks.bench_parallel import synthetic_catalog  # noqa: E402
+from engine import calculate_financials_batch  # noqa: E402
+from figures import (  # noqa: E402
+    CATALOG_PAYLOAD_BUDGET, SCATTER_MAX_POINTS, WEBGL_MIN_POINTS, catalog_profit_figure, catalog_scatter_figure,
+    catalog_waterfall_figure,
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo e payload das figuras do catálogo.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    args = parser.parse_args(argv)
+
+    # Aquecimento: o Plotly importa as classes de trace na primeira figura de cada tipo
+    warm = calculate_financials_batch(synthetic_catalog(SCATTER_MAX_POINTS + 1))
+    catalog_scatter_figure(warm["margin_net"][:10], warm["roi"][:10])
+    catalog_scatter_figure(warm["margin_net"][:WEBGL_MIN_POINTS + 1], warm["roi"][:WEBGL_MIN_POINTS + 1])
+    catalog_scatter_figure(warm["margin_net"], warm["roi"])
+
+    print(f"{'SKUs':>10}  {'figura':<20}{'construção ms':>15}{'payload KB':>12}")
+    results = []
+    for n in args.sizes:
+        result = calculate_financials_batch(synthetic_catalog(n, seed=1))
+        labels = np.char.add("SKU-", np.arange(n).astype(str))
+        order = np.argsort(-result["net_profit"])
+        picked = np.r_[order[:10], order[-10:]] if n > 20 else order
+        builders = {
+            "catalog_scatter": lambda: catalog_scatter_figure(result["margin_net"], result["roi"], labels),
+            "catalog_profit": lambda: catalog_profit_figure(result["net_profit"]),
+            "catalog_waterfall": lambda: catalog_waterfall_figure(
+                labels[picked], {name: values[picked] for name, values in result.items()}),
+        }
+        for name, build in builders.items():
+            start = time.perf_counter()
+            fig = build()
+            elapsed = (time.perf_counter() - start) * 1000
+            payload = len(fig.to_json().encode("utf-8"))
+            results.append({"skus": n, "figure": name, "build_ms": elapsed, "payload_bytes": payload})
+            flag = "  << ACIMA DO LIMITE" if payload > CATALOG_PAYLOAD_BUDGET else ""
+            print(f"{n:>10,}  {name:<20}{elapsed:>15.1f}{payload / 1024:>12.1f}{flag}")
+
+    over = [r for r in results if r["payload_bytes"] > CATALOG_PAYLOAD_BUDGET]
+    if over:
+        print(f"{len(over)} figura(s) acima de {CATALOG_PAYLOAD_BUDGET / 1024:.0f} KB.", file=sys.stderr)
+    return results, 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main()[1])
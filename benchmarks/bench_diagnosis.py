@@ -0,0 +1,60 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: DIAGNÓSTICO POR REGRAS (MÁSCARAS x LAÇO POR SKU)
+# -----------------------------------------------------------------------------
+# Avalia as regras do diagnóstico num catálogo sintético de uma vez (uma
+# máscara booleana por regra) e com o diagnose escalar, um SKU por vez,
+# conferindo que notas e alertas batem.
+#
+#   python benchmarks/bench_diagnosis.py [--skus 100000] [--loop-skus 5000]
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from analysis import diagnose  # noqa: E402
+from benchmarks.bench_parallel import synthetic_catalog  # noqa: E402
+from diagnosis import load_rules  # noqa: E402
+from engine import INPUT_COLUMNS, calculate_financials_batch  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diagnóstico por regras: vetorizado x laço por SKU.")
+    parser.add_argument("--skus", type=int, default=100_000)
+    parser.add_argument("--loop-skus", type=int, default=5_000, help="SKUs avaliados no laço (o tempo é extrapolado)")
+    args = parser.parse_args(argv)
+
+    rules = load_rules()
+    inputs = synthetic_catalog(args.skus, seed=3)
+    columns = {**inputs, **calculate_financials_batch(inputs)}
+
+    rules.evaluate(columns)
+    start = time.perf_counter()
+    repeats = 20
+    for _ in range(repeats):
+        result = rules.evaluate(columns)
+    vector_s = (time.perf_counter() - start) / repeats
+
+    n_loop = min(args.loop_skus, args.skus)
+    scalar = getattr(diagnose, "__wrapped__", diagnose)
+    start = time.perf_counter()
+    for i in range(n_loop):
+        score, warnings, _ = scalar(tuple(float(inputs[name][i]) for name in INPUT_COLUMNS))
+        if score != result["score"][i] or [level for level, _ in warnings] != [rules.levels[r] for r in np.flatnonzero(result["hits"][:, i])]:
+            raise AssertionError(f"SKU {i}: diagnóstico escalar difere do vetorizado")
+    loop_s = (time.perf_counter() - start) / n_loop * args.skus
+
+    print(f"{len(rules)} regras x {args.skus:,} SKUs")
+    print(f"  vetorizado:    {vector_s * 1e3:8.2f} ms")
+    print(f"  laço por SKU:  {loop_s * 1e3:8.0f} ms (extrapolado de {n_loop:,})  -> {loop_s / vector_s:.0f}x")
+    print(f"  nota média {result['score'].mean():.1f}; {np.count_nonzero(result['score'] < 60):,} SKUs abaixo de 60")
+    return {"skus": args.skus, "vector_s": vector_s, "loop_s": loop_s}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: TARIFAS POR TABELA (SEARCHSORTED x IF/ELSE POR LINHA)
+# -----------------------------------------------------------------------------
+# Resolve comissão, taxa fixa e tarifa FBA de um catálogo sintético com a
+# tabela compilada (uma busca vetorizada por tarifa) e com o laço por linha
+# equivalente (if/else sobre as faixas), conferindo que os valores batem.
+#
+#   python benchmarks/bench_fees.py [--skus 1000000] [--loop-skus 100000]
+
+import argparse
+import math
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from fees import AMAZON_BR, load_rate_card  # noqa: E402
+
+
+def synthetic_items(n, categories, seed=0):
+    rng = np.random.default_rng(seed)
+    items = {
+        "category": np.array(categories, dtype=object)[rng.integers(0, len(categories), n)],
+        "price_sale": np.round(rng.uniform(5, 400, n), 2),
+        "length_cm": rng.uniform(5, 120, n),
+        "width_cm": rng.uniform(2, 60, n),
+        "height_cm": rng.uniform(0.5, 50, n),
+        "weight_kg": rng.exponential(3, n),
+    }
+    # ~30% de itens pequenos (envelope / padrão leve)
+    small = rng.random(n) < 0.3
+    for name, factor in (("length_cm", 4), ("width_cm", 3), ("height_cm", 20), ("weight_kg", 10)):
+        items[name][small] /= factor
+    return items
+
+
+def fees_per_row(category, price, length, width, height, weight, card=AMAZON_BR):
+    """O mesmo cálculo com if/else sobre as faixas, uma linha por vez."""
+    categories = {name.casefold(): bands for name, bands in card["referral"]["categories"].items()}
+    bands = categories.get(str(category).strip().casefold(), categories[card["referral"]["default"].casefold()])
+    rate = 0.0
+    for lower, value in bands:
+        if price >= lower:
+            rate = value
+    if price > 0:
+        rate = max(rate, card["referral"]["min_fee"] / price)
+    fixed = 0.0
+    for lower, value in card["fixed_fee"]:
+        if price >= lower:
+            fixed = value
+
+    dims = sorted((length, width, height), reverse=True)
+    tiers = card["fba"]["tiers"]
+    for tier in tiers:
+        limits = sorted(tier.get("max_dims_cm") or [math.inf] * 3, reverse=True)
+        if tier is tiers[-1] or (all(d <= m for d, m in zip(dims, limits)) and weight <= tier.get("max_weight_kg", math.inf)):
+            break
+    billable = weight
+    if tier.get("volumetric", True):
+        billable = max(weight, length * width * height / card["fba"]["volumetric_divisor"])
+    for bound, value in zip(tier["weights_kg"], tier["fees"]):
+        if billable <= bound:
+            fba = value
+            break
+    else:
+        fba = tier["fees"][-1] + math.ceil(max(billable - tier["weights_kg"][-1], 0.0)) * tier.get("extra_per_kg", 0.0)
+    return rate, fixed, fba
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tarifas por tabela: busca vetorizada x laço por linha.")
+    parser.add_argument("--skus", type=int, default=1_000_000)
+    parser.add_argument("--loop-skus", type=int, default=100_000, help="SKUs no laço por linha (extrapolado)")
+    args = parser.parse_args(argv)
+
+    card = load_rate_card()
+    items = synthetic_items(args.skus, card.categories + ["Sem Categoria"])
+    card.resolve({name: values[:10] for name, values in items.items()})  # aquece o import do pandas
+
+    start = time.perf_counter()
+    fees = card.resolve(items)
+    fees["fba_fee"] = card.fba_fee(items["length_cm"], items["width_cm"], items["height_cm"], items["weight_kg"])
+    vectorized = time.perf_counter() - start
+
+    n_loop = min(args.loop_skus, args.skus)
+    columns = [items[name][:n_loop] for name in ("category", "price_sale", "length_cm", "width_cm", "height_cm", "weight_kg")]
+    start = time.perf_counter()
+    reference = np.array([fees_per_row(*row) for row in zip(*columns)])
+    loop = (time.perf_counter() - start) * args.skus / n_loop
+
+    for i, name in enumerate(("commission_rate", "fixed_fee", "fba_fee")):
+        diff = np.abs(fees[name][:n_loop] - reference[:, i]).max()
+        if diff > 1e-12:
+            raise AssertionError(f"{name}: diferença de {diff} entre tabela compilada e laço")
+
+    print(f"{args.skus:,} SKUs")
+    print(f"  searchsorted: {vectorized:8.3f} s")
+    print(f"  if/else:      {loop:8.3f} s (extrapolado de {n_loop:,})  -> {loop / vectorized:.0f}x")
+    return {"skus": args.skus, "vectorized_s": vectorized, "loop_s": loop}
+
+
+if __name__ == "__main__":
+    main()
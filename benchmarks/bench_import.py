@@ -0,0 +1,70 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: TEMPO DE IMPORTAÇÃO DO NÚCLEO X INTERFACE
+# -----------------------------------------------------------------------------
+# Cada módulo é importado num interpretador novo (`python -X importtime`), e
+# o tempo cumulativo do próprio módulo é a mediana de algumas repetições.
+# Também confere que `import engine` não carrega NumPy, pandas, Plotly nem
+# Streamlit, e que os módulos que o app importa na partida não carregam
+# pandas nem Plotly (só quando uma tabela ou figura é montada).
+#
+#   python benchmarks/bench_import.py [--repeat 7]
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ("engine", "cli", "catalog", "analysis", "figures", "streamlit")
+HEAVY_MODULES = ("numpy", "pandas", "plotly", "streamlit")
+
+# Importados no topo de app.py (catálogo, marketplaces, simulação e cache em
+# disco ficam nos ramos que os usam: ver COLD_START_DEFERRED em suite.py)
+STARTUP_MODULES = ("analysis", "diagnosis", "export", "fees", "figures", "memo", "product_graph", "sensitivity", "shared")
+STARTUP_DEFERRED = ("pandas", "plotly")
+
+
+def import_time_ms(module):
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    # Linhas "import time: self | cumulative | nome"; a do módulo pedido vem por último
+    for line in reversed(out.splitlines()):
+        match = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)$", line)
+        if match and match.group(2) == module:
+            return int(match.group(1)) / 1000
+    raise RuntimeError(f"Tempo de importação de {module} não encontrado.")
+
+
+def loaded_heavy_modules(module):
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return [name for name in out.strip().split(",") if name]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo de importação do núcleo e dos módulos de interface.")
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    heavy = loaded_heavy_modules("engine")
+    if heavy:
+        raise AssertionError(f"`import engine` carregou módulos pesados: {', '.join(heavy)}")
+    deferred = [name for name in loaded_heavy_modules(", ".join(STARTUP_MODULES)) if name in STARTUP_DEFERRED]
+    if deferred:
+        raise AssertionError(f"Módulos da partida do app carregaram {', '.join(deferred)} na importação")
+
+    print(f"{'módulo':<12}{'import ms':>10}")
+    results = {}
+    for module in MODULES:
+        results[module] = statistics.median(import_time_ms(module) for _ in range(args.repeat))
+        print(f"{module:<12}{results[module]:>10.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
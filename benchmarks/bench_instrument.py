@@ -0,0 +1,58 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: CUSTO DA INSTRUMENTAÇÃO (DESLIGADA X LIGADA)
+# -----------------------------------------------------------------------------
+# Mede, por chamada, o custo de `timer`, `timed` e `count` desligados e
+# ligados, comparado com a chamada sem instrumentação.
+#
+#   python benchmarks/bench_instrument.py [--calls 1000000]
+
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import instrument  # noqa: E402
+
+
+def work():
+    return None
+
+
+timed_work = instrument.timed("bench.work")(work)
+
+
+def with_timer():
+    with instrument.timer("bench.block"):
+        work()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Custo por chamada da instrumentação.")
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    cases = {
+        "chamada direta": work,
+        "timed": timed_work,
+        "with timer": with_timer,
+        "count": lambda: instrument.count("bench.events"),
+    }
+    print(f"{'caso':<16}{'desligada ns':>14}{'ligada ns':>12}")
+    results = {}
+    for label, func in cases.items():
+        row = []
+        for enabled in (False, True):
+            instrument.set_enabled(enabled)
+            row.append(min(timeit.repeat(func, number=args.calls, repeat=3)) / args.calls * 1e9)
+        results[label] = {"disabled_ns": row[0], "enabled_ns": row[1]}
+        print(f"{label:<16}{row[0]:>14.1f}{row[1]:>12.1f}")
+    instrument.set_enabled(False)
+    instrument.reset()
+    return results
+
+
+if __name__ == "__main__":
+    main()
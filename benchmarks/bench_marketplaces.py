@@ -0,0 +1,96 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: COMPARATIVO DE MARKETPLACES (BROADCASTING x UM PERFIL POR VEZ)
+# -----------------------------------------------------------------------------
+# Catálogo sintético com categoria e dimensões avaliado nos perfis padrão de
+# marketplaces.py: a matriz SKUs x perfis numa chamada do motor (entradas do
+# SKU num eixo, perfil no outro) e o mesmo cálculo com uma chamada do motor por
+# perfil, conferindo que o lucro bate. Mede também a leitura do CSV de ponta
+# a ponta (compare_marketplaces).
+#
+#   python benchmarks/bench_marketplaces.py [--skus 200000]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from benchmarks.bench_parallel import synthetic_catalog  # noqa: E402
+from engine import calculate_financials_batch  # noqa: E402
+from fees import AMAZON_BR  # noqa: E402
+from marketplaces import _profile_fees, compare_marketplaces, evaluate_chunk, fx_rates, load_fx, load_profiles  # noqa: E402
+
+
+def catalog_columns(n, seed=5):
+    rng = np.random.default_rng(seed)
+    columns = synthetic_catalog(n, seed=seed)
+    for name in ("commission_rate", "fba_fee", "fixed_fee"):
+        columns.pop(name, None)
+    columns["category"] = rng.choice(list(AMAZON_BR["referral"]["categories"]), n).astype(object)
+    columns["length_cm"] = rng.uniform(5, 60, n)
+    columns["width_cm"] = rng.uniform(5, 40, n)
+    columns["height_cm"] = rng.uniform(1, 30, n)
+    columns["weight_kg"] = rng.uniform(0.05, 15, n)
+    return columns
+
+
+def per_profile(columns, profiles, rates):
+    # Referência: tarifas e motor chamados uma vez por perfil, em 1-D
+    profit = np.empty((len(columns["price_sale"]), len(profiles)))
+    for j, profile in enumerate(profiles):
+        price_local = columns["price_sale"] / rates[j] * profile.price_factor
+        commission, fba, fixed = _profile_fees(profile, columns, price_local)
+        inputs = {name: values for name, values in columns.items() if values.dtype != object}
+        inputs.update(price_sale=price_local * rates[j], tax_rate=profile.tax_rate, commission_rate=commission,
+                      fba_fee=fba * rates[j], fixed_fee=fixed * rates[j])
+        profit[:, j] = calculate_financials_batch(inputs)["net_profit"]
+    return profit
+
+
+def best_of(func, repeats=5):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        value = func()
+        times.append(time.perf_counter() - start)
+    return value, min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Comparativo de marketplaces: broadcasting x um perfil por vez.")
+    parser.add_argument("--skus", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    profiles = load_profiles()
+    rates = fx_rates(profiles, load_fx())
+    columns = catalog_columns(args.skus)
+
+    matrix, matrix_s = best_of(lambda: evaluate_chunk(columns, profiles, rates))
+    looped, loop_s = best_of(lambda: per_profile(columns, profiles, rates))
+    if not np.allclose(matrix["net_profit"], looped, rtol=0, atol=1e-9):
+        raise AssertionError("Matriz por broadcasting difere do cálculo por perfil")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.csv")
+        frame = pd.DataFrame(columns)
+        frame.insert(0, "sku", [f"SKU{i}" for i in range(args.skus)])
+        frame.to_csv(path, index=False)
+        result, file_s = best_of(lambda: compare_marketplaces(path, profiles), repeats=2)
+
+    wins = np.bincount(result["best"], minlength=len(profiles))
+    print(f"{args.skus:,} SKUs x {len(profiles)} marketplaces")
+    print(f"  broadcasting SKUs x perfis:   {matrix_s * 1e3:8.1f} ms")
+    print(f"  um perfil por vez:            {loop_s * 1e3:8.1f} ms")
+    print(f"  CSV de ponta a ponta:         {file_s * 1e3:8.1f} ms")
+    print("  melhor marketplace: " + ", ".join(f"{p.id} {w:,}" for p, w in zip(profiles, wins)))
+    return {"skus": args.skus, "matrix_s": matrix_s, "loop_s": loop_s, "file_s": file_s}
+
+
+if __name__ == "__main__":
+    main()
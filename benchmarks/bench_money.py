@@ -0,0 +1,108 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: DINHEIRO EM FLOAT x CENTAVOS INT64 x DECIMAL
+# -----------------------------------------------------------------------------
+# Catálogo sintético com preços e custos em centavos e um lote por SKU. Mede
+# o motor em float (calculate_financials_batch), em centavos int64
+# (calculate_financials_cents) e o mesmo cálculo com decimal.Decimal, uma
+# linha por vez (tempo extrapolado). Confere que centavos e Decimal dão o
+# mesmo resultado SKU a SKU e mostra o resíduo do float no total dos lotes.
+#
+#   python benchmarks/bench_money.py [--skus 1000000] [--decimal-skus 20000]
+
+import argparse
+import decimal
+import os
+import sys
+import time
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from benchmarks.bench_parallel import synthetic_catalog  # noqa: E402
+from engine import COMPONENT_ROUNDING, calculate_financials_batch, calculate_financials_cents  # noqa: E402
+
+DECIMAL_ROUNDING = {
+    "half_up": decimal.ROUND_HALF_UP, "half_even": decimal.ROUND_HALF_EVEN, "down": decimal.ROUND_DOWN,
+    "up": decimal.ROUND_UP, "floor": decimal.ROUND_FLOOR, "ceiling": decimal.ROUND_CEILING,
+}
+CENT = Decimal("0.01")
+RATE_STEP = Decimal("0.000001")
+
+
+def net_profit_decimal(row, modes=COMPONENT_ROUNDING):
+    """Lucro líquido em Decimal, com o mesmo arredondamento por componente do modo centavos."""
+    money = {name: Decimal(repr(row[name])).quantize(CENT, DECIMAL_ROUNDING[modes["inputs"]])
+             for name in ("price_sale", "cost_product", "cost_inbound", "cost_prep", "fba_fee", "storage_fee",
+                          "fixed_fee", "misc_costs")}
+    price = money["price_sale"]
+
+    def share(rate_name, component):
+        rate = Decimal(repr(row[rate_name])).quantize(RATE_STEP, decimal.ROUND_HALF_EVEN)
+        return (price * rate).quantize(CENT, DECIMAL_ROUNDING[modes[component]])
+
+    total_costs = (share("tax_rate", "val_tax") + share("commission_rate", "val_comm") + money["fixed_fee"]
+                   + money["fba_fee"] + money["storage_fee"] + share("tacos_target", "val_ads")
+                   + money["cost_product"] + money["cost_inbound"] + money["cost_prep"]
+                   + share("return_rate", "val_returns") + money["misc_costs"])
+    return price - total_costs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dinheiro em float x centavos int64 x Decimal.")
+    parser.add_argument("--skus", type=int, default=1_000_000)
+    parser.add_argument("--decimal-skus", type=int, default=20_000, help="SKUs no laço Decimal (o tempo é extrapolado)")
+    args = parser.parse_args(argv)
+
+    inputs = synthetic_catalog(args.skus, seed=4)
+    # Catálogo real: preços e custos em centavos
+    for name in ("price_sale", "cost_product"):
+        inputs[name] = np.round(inputs[name], 2)
+    lots = np.random.default_rng(4).integers(1, 500, args.skus)
+
+    calculate_financials_batch(inputs)
+    start = time.perf_counter()
+    floats = calculate_financials_batch(inputs)
+    float_s = time.perf_counter() - start
+
+    calculate_financials_cents(inputs)
+    start = time.perf_counter()
+    cents = calculate_financials_cents(inputs)
+    cents_s = time.perf_counter() - start
+
+    n_dec = min(args.decimal_skus, args.skus)
+    rows = [{name: float(values[i]) for name, values in inputs.items()} for i in range(n_dec)]
+    start = time.perf_counter()
+    exact = [net_profit_decimal(row) for row in rows]
+    decimal_s = (time.perf_counter() - start) / n_dec * args.skus
+
+    for i, value in enumerate(exact):
+        if int(value * 100) != cents["net_profit"][i]:
+            raise AssertionError(f"SKU {i}: centavos {cents['net_profit'][i]} != Decimal {value}")
+    exact_total = sum(value * int(lot) for value, lot in zip(exact, lots[:n_dec]))
+    cents_total = int(np.sum(cents["net_profit"][:n_dec] * lots[:n_dec]))
+    if Decimal(cents_total) / 100 != exact_total:
+        raise AssertionError(f"Total dos lotes: centavos {cents_total} != Decimal {exact_total}")
+
+    # Os mesmos valores de 2 casas somados em float, um a um (como numa planilha):
+    # só o resíduo da aritmética binária
+    rounded = cents["net_profit"] / 100
+    float_total = float(np.cumsum(rounded * lots)[-1])
+    int_total = int(np.sum(cents["net_profit"] * lots))
+    drift = abs(Decimal(repr(float_total)) - Decimal(int_total) / 100)
+    unrounded = float(np.sum(floats["net_profit"] * lots))
+
+    print(f"{args.skus:,} SKUs")
+    print(f"  float:               {float_s * 1e3:9.1f} ms")
+    print(f"  centavos int64:      {cents_s * 1e3:9.1f} ms  ({cents_s / float_s:.1f}x o float)")
+    print(f"  Decimal (por linha): {decimal_s * 1e3:9.0f} ms  (extrapolado de {n_dec:,}; {decimal_s / cents_s:.0f}x os centavos)")
+    print(f"Lucro dos lotes: R$ {int_total / 100:,.2f} em centavos; mesmos valores somados em float erram "
+          f"R$ {drift:.6f}; float sem arredondar componentes dá R$ {unrounded:,.6f}")
+    print(f"Centavos = Decimal em {n_dec:,} SKUs e no total dos lotes")
+    return {"skus": args.skus, "float_s": float_s, "cents_s": cents_s, "decimal_s": decimal_s, "float_drift": float(drift)}
+
+
+if __name__ == "__main__":
+    main()
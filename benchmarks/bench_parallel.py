@@ -0,0 +1,84 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: ESCALABILIDADE DO POOL DE PROCESSOS (1, 2, 4, 8 WORKERS)
+# -----------------------------------------------------------------------------
+# Mede o Monte Carlo de catálogo (SKUs x sorteios por SKU) e o de um único SKU
+# dividido em blocos e o ranking de sensibilidade do catálogo, para cada número
+# de processos. Também confere que o resultado é idêntico entre as contagens
+# de workers (fluxos RNG por tarefa, soma na ordem dos blocos).
+#
+#   python benchmarks/bench_parallel.py [--skus 500] [--samples 100000] [--draws 20000000] [--rank-skus 400000]
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from parallel import rank_inputs_parallel, shutdown_pools, simulate_catalog, simulate_profit_parallel  # noqa: E402
+
+BASE = {
+    "price_sale": 129.90, "cost_product": 35.00, "cost_inbound": 1.50, "cost_prep": 1.00,
+    "tax_rate": 0.06, "commission_rate": 0.16, "fba_fee": 14.50, "storage_fee": 0.50,
+    "tacos_target": 0.10, "return_rate": 0.03, "fixed_fee": 0.0, "misc_costs": 0.0,
+}
+SPREADS = {"price_sale": ("normal", 0.05), "cost_product": ("triangular", 0.10),
+           "tacos_target": ("normal", 0.20), "return_rate": ("uniform", 0.50)}
+
+
+def synthetic_catalog(n_skus, seed=0):
+    rng = np.random.default_rng(seed)
+    inputs = {name: np.full(n_skus, value) for name, value in BASE.items()}
+    inputs["price_sale"] = rng.uniform(40, 300, n_skus)
+    inputs["cost_product"] = inputs["price_sale"] * rng.uniform(0.15, 0.45, n_skus)
+    return inputs
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Escalabilidade do Monte Carlo paralelo.")
+    parser.add_argument("--skus", type=int, default=500)
+    parser.add_argument("--samples", type=int, default=100_000, help="sorteios por SKU no catálogo")
+    parser.add_argument("--draws", type=int, default=20_000_000, help="sorteios do Monte Carlo de um SKU")
+    parser.add_argument("--rank-skus", type=int, default=400_000, help="SKUs no ranking de sensibilidade")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    catalog = synthetic_catalog(args.skus)
+    rank_catalog = synthetic_catalog(args.rank_skus, seed=1)
+    distributions = {"price_sale": {"dist": "normal", "mean": 129.90, "std": 10.0}}
+    print(f"CPUs disponíveis: {len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()}")
+    print(f"{'workers':>8}{'catálogo s':>12}{'speedup':>9}{'1 SKU s':>10}{'speedup':>9}{'ranking s':>11}{'speedup':>9}")
+
+    results = []
+    reference = None
+    for workers in args.workers:
+        # Aquece o pool (subida dos processos não entra na medição)
+        simulate_profit_parallel(BASE, distributions, n_samples=1000, seed=0, workers=workers)
+        t_cat, stats = timed(simulate_catalog, catalog, SPREADS, n_samples=args.samples, seed=1, workers=workers)
+        t_one, summary = timed(simulate_profit_parallel, BASE, distributions, n_samples=args.draws, seed=1, workers=workers)
+        t_rank, drivers = timed(rank_inputs_parallel, rank_catalog, 0.10, workers=workers)
+        if reference is None:
+            reference = (stats["p_loss"], summary["var"], drivers["mean_swing"])
+        elif not (np.array_equal(reference[0], stats["p_loss"]) and reference[1] == summary["var"]
+                  and np.array_equal(reference[2], drivers["mean_swing"])):
+            raise AssertionError(f"Resultado com {workers} workers difere do resultado com {args.workers[0]}.")
+        results.append({"workers": workers, "catalog_s": t_cat, "single_s": t_one, "rank_s": t_rank})
+        base_cat, base_one, base_rank = results[0]["catalog_s"], results[0]["single_s"], results[0]["rank_s"]
+        print(f"{workers:>8}{t_cat:>12.2f}{base_cat / t_cat:>8.2f}x{t_one:>10.2f}{base_one / t_one:>8.2f}x"
+              f"{t_rank:>11.2f}{base_rank / t_rank:>8.2f}x")
+
+    shutdown_pools()
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: CATÁLOGO COMPARTILHADO x CÓPIA POR SESSÃO
+# -----------------------------------------------------------------------------
+# Simula N sessões abrindo o mesmo catálogo: cada uma com a sua cópia
+# (load_catalog por sessão) e pelo registro do processo (shared.catalogs).
+# Mede a memória alocada (tracemalloc, que também rastreia arrays NumPy) e a
+# latência de um cálculo curto enquanto uma simulação longa roda no pool de
+# fundo.
+#
+#   python benchmarks/bench_shared.py [--skus 200000] [--sessions 8] [--risk-skus 500]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+from benchmarks.bench_parallel import synthetic_catalog  # noqa: E402
+from catalog import catalog_key, load_catalog  # noqa: E402
+from engine import calculate_financials_batch  # noqa: E402
+from montecarlo import DEFAULT_SPREADS  # noqa: E402
+from parallel import simulate_catalog  # noqa: E402
+from shared import BackgroundJobs, SharedRegistry  # noqa: E402
+
+
+def allocated(func):
+    tracemalloc.start()
+    value = func()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current / 2**20
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Catálogo compartilhado x cópia por sessão.")
+    parser.add_argument("--skus", type=int, default=200_000)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--risk-skus", type=int, default=500, help="SKUs da simulação de fundo")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.csv")
+        frame = pd.DataFrame(synthetic_catalog(args.skus, seed=2))
+        frame.insert(0, "sku", [f"SKU{i}" for i in range(args.skus)])
+        frame.to_csv(path, index=False)
+        load_catalog(path)  # aquece imports e caches de leitura
+
+        copies, copies_mb = allocated(lambda: [load_catalog(path) for _ in range(args.sessions)])
+        del copies
+        registry = SharedRegistry()
+        key = catalog_key(path)
+        views, shared_mb = allocated(lambda: [registry.get_or_load(key, lambda: load_catalog(path).freeze())
+                                              for _ in range(args.sessions)])
+
+    print(f"{args.sessions} sessões x catálogo de {args.skus:,} SKUs")
+    print(f"  cópia por sessão: {copies_mb:8.1f} MB")
+    print(f"  compartilhado:    {shared_mb:8.1f} MB  ({len({id(view) for view in views})} objeto)")
+
+    # Cálculo interativo curto com e sem uma simulação longa no pool de fundo
+    small = {name: values[:1000] for name, values in views[0].inputs.items()}
+    interactive = lambda: min(  # noqa: E731
+        (lambda start: (calculate_financials_batch(small), time.perf_counter() - start)[1])(time.perf_counter()) for _ in range(200))
+    idle = interactive()
+    risk = {name: values[:args.risk_skus] for name, values in views[0].inputs.items()}
+    jobs = BackgroundJobs(threads=1)
+    future = jobs.submit("risk", lambda: simulate_catalog(risk, DEFAULT_SPREADS, n_samples=10_000, seed=1, workers=1))
+    busy = interactive()
+    future.result()
+    print(f"Cálculo curto (1.000 SKUs): {idle * 1e3:.2f} ms ocioso, {busy * 1e3:.2f} ms com simulação no pool de fundo")
+    return {"copies_mb": copies_mb, "shared_mb": shared_mb, "idle_ms": idle * 1e3, "busy_ms": busy * 1e3}
+
+
+if __name__ == "__main__":
+    main()
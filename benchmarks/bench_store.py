@@ -0,0 +1,73 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: CACHE EM DISCO (CÁLCULO FRIO x REABERTURA)
+# -----------------------------------------------------------------------------
+# Grava um catálogo sintético em CSV e mede: carga fria (lê + calcula + grava
+# no cache), reabertura pelo cache (hash do arquivo + memory-map dos .npy) e
+# o mesmo para o Monte Carlo por SKU. Usa um diretório temporário próprio.
+#
+#   python benchmarks/bench_store.py [--skus 200000] [--risk-skus 2000] [--samples 10000]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from benchmarks.bench_parallel import synthetic_catalog  # noqa: E402
+from catalog import load_catalog  # noqa: E402
+from montecarlo import DEFAULT_SPREADS  # noqa: E402
+from parallel import simulate_catalog  # noqa: E402
+from store import DiskCache  # noqa: E402
+
+
+def timed(func):
+    start = time.perf_counter()
+    value = func()
+    return value, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cache em disco: cálculo frio x reabertura.")
+    parser.add_argument("--skus", type=int, default=200_000)
+    parser.add_argument("--risk-skus", type=int, default=2_000)
+    parser.add_argument("--samples", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.csv")
+        frame = pd.DataFrame(synthetic_catalog(args.skus, seed=1))
+        frame.insert(0, "sku", [f"SKU{i}" for i in range(args.skus)])
+        frame.to_csv(path, index=False)
+        cache = DiskCache(os.path.join(tmp, "cache"))
+
+        cold, cold_s = timed(lambda: load_catalog(path, cache=cache))
+        warm, warm_s = timed(lambda: load_catalog(path, cache=cache))
+        for name in cold.metrics:
+            if not np.array_equal(cold.metrics[name], warm.metrics[name]):
+                raise AssertionError(f"{name}: valores do cache diferem do cálculo")
+
+        inputs = {name: values[:args.risk_skus] for name, values in cold.inputs.items()}
+        key = cache.key("catalog_risk", cold.key, args.risk_skus, DEFAULT_SPREADS, args.samples, 42)
+        compute = lambda: simulate_catalog(inputs, DEFAULT_SPREADS, n_samples=args.samples, seed=42, workers=1)  # noqa: E731
+        _, risk_cold_s = timed(lambda: cache.get_or_compute(key, compute))
+        _, risk_warm_s = timed(lambda: cache.get_or_compute(key, compute))
+        stats = cache.stats()
+
+    print(f"Catálogo {args.skus:,} SKUs (CSV)")
+    print(f"  frio:       {cold_s:8.3f} s")
+    print(f"  reabertura: {warm_s:8.3f} s  -> {cold_s / warm_s:.0f}x")
+    print(f"Risco {args.risk_skus:,} SKUs x {args.samples:,} sorteios")
+    print(f"  frio:       {risk_cold_s:8.3f} s")
+    print(f"  reabertura: {risk_warm_s * 1000:8.2f} ms -> {risk_cold_s / risk_warm_s:.0f}x")
+    print(f"Cache: {stats['entries']} entradas, {stats['bytes'] / 2**20:.1f} MB")
+    return {"catalog_cold_s": cold_s, "catalog_warm_s": warm_s, "risk_cold_s": risk_cold_s, "risk_warm_s": risk_warm_s}
+
+
+if __name__ == "__main__":
+    main()
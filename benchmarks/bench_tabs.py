@@ -0,0 +1,88 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: ABAS SOB DEMANDA vs. TODAS AS ABAS (TEMPO DE SERVIDOR E PAYLOAD)
+# -----------------------------------------------------------------------------
+# Executa o app.py no harness headless do Streamlit (AppTest) nos dois modos
+# de renderização e mede, por rerun, o tempo de servidor e os bytes dos
+# elementos enviados ao navegador (soma dos protos serializados).
+#
+#   python benchmarks/bench_tabs.py [--reruns 10]
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from memo import clear_caches  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "app.py")
+
+
+def payload_bytes(at):
+    """Bytes dos protos de todos os elementos renderizados neste rerun."""
+    total = 0
+    stack = [at._tree]
+    while stack:
+        node = stack.pop()
+        proto = getattr(node, "proto", None)
+        if proto is not None and hasattr(proto, "ByteSize"):
+            total += proto.ByteSize()
+        children = getattr(node, "children", {})
+        stack.extend(children.values() if isinstance(children, dict) else children)
+    return total
+
+
+def _widget(at, kind, label_prefix):
+    return next(w for w in getattr(at, kind) if w.label.startswith(label_prefix))
+
+
+def run_mode(lazy, reruns):
+    clear_caches()
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.run()
+    if not lazy:
+        _widget(at, "toggle", "Renderizar abas").set_value(False)
+
+    timings, sizes = [], []
+    for i in range(reruns):
+        # Alterna entre mudar o preço (cache miss) e o lote (só o card depende dele)
+        if i % 2 == 0:
+            _widget(at, "number_input", "Preço de Venda").set_value(100.0 + i)
+        else:
+            lote = next((w for w in at.number_input if w.label.startswith("Tamanho do Lote")), None)
+            if lote is not None:
+                lote.set_value(100 + 50 * i)
+        start = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - start) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        sizes.append(payload_bytes(at))
+
+    return {
+        "mode": "sob demanda" if lazy else "todas as abas",
+        "server_ms_median": statistics.median(timings),
+        "server_ms_mean": statistics.fmean(timings),
+        "payload_bytes_mean": statistics.fmean(sizes),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara renderização sob demanda vs. todas as abas.")
+    parser.add_argument("--reruns", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    results = [run_mode(False, args.reruns), run_mode(True, args.reruns)]
+    print(f"{'modo':<16}{'mediana ms':>12}{'média ms':>12}{'payload (bytes)':>18}")
+    for r in results:
+        print(f"{r['mode']:<16}{r['server_ms_median']:>12.1f}{r['server_ms_mean']:>12.1f}{r['payload_bytes_mean']:>18,.0f}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: SUÍTE DE REGRESSÃO (MOTOR, LOTES, CENÁRIOS, APP DE PONTA A PONTA)
+# -----------------------------------------------------------------------------
+# Quatro grupos de casos, sempre com as mesmas entradas (catálogo sintético
+# com semente fixa):
+#   scalar    calculate_financials, uma chamada por produto
+#   batch     calculate_financials_batch / _cents / net_profit_batch de 1 a 1M linhas
+#   workload  cenários, preço reverso, ótimo, tornado, grade, Monte Carlo, caixa
+#   app       app.py no harness headless do Streamlit (AppTest): partida a
+#             frio num interpretador novo (importações e primeira página),
+#             primeiro run, rerun sem mudança, rerun com preço novo, cada
+#             seção aberta a frio e o tempo de construção de cada figura
+#             (instrumentação ligada)
+#
+# Cada caso guarda `seconds` (melhor de N repetições por chamada; melhor dos
+# reruns do app) e vai para um relatório JSON. Com --baseline, os casos em
+# comum são comparados: qualquer um acima de baseline * (1 + tolerância) é
+# uma regressão, a lista sai no stderr e o processo termina com código 1.
+#
+#   python benchmarks/suite.py [--quick] [--output relatorio.json]
+#   python benchmarks/suite.py --baseline benchmarks/baseline.json [--tolerance 0.30] [--app-tolerance 0.60]
+#   python benchmarks/suite.py --save-baseline benchmarks/baseline.json
+#
+# A baseline vale para a máquina em que foi gerada: ao trocar de máquina (ou
+# depois de uma melhora intencional), gere outra com --save-baseline.
+
+import argparse
+import datetime
+import functools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+import instrument  # noqa: E402
+from benchmarks.bench_parallel import BASE, synthetic_catalog  # noqa: E402
+from memo import clear_caches  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "app.py")
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+REPORT_VERSION = 1
+
+BATCH_SIZES = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+QUICK_MAX_ROWS = 100_000
+PARAMS = tuple(BASE.values())
+
+
+def measure(func, repeat=5):
+    """Segundos por chamada: melhor e mediana de `repeat` rodadas de ~0,2 s cada."""
+    number, _ = timeit.Timer(func).autorange()
+    times = [t / number for t in timeit.repeat(func, number=number, repeat=repeat)]
+    return {"seconds": min(times), "median_s": statistics.median(times), "calls": number * repeat}
+
+
+def uncached(func):
+    # As análises são memoizadas; a suíte mede o cálculo, não o acerto de cache
+    return getattr(func, "__wrapped__", func)
+
+
+# -----------------------------------------------------------------------------
+# GRUPOS
+# -----------------------------------------------------------------------------
+# Cada grupo devolve {caso: (função sem argumentos, itens por chamada)}
+def scalar_cases():
+    from engine import calculate_financials
+
+    return {"scalar.calculate_financials": (lambda: calculate_financials(*PARAMS), 1)}
+
+
+def batch_cases(max_rows):
+    from engine import calculate_financials_batch, calculate_financials_cents, net_profit_batch
+
+    cases = {}
+    for size in (n for n in BATCH_SIZES if n <= max_rows):
+        inputs = synthetic_catalog(size)
+        for func in (calculate_financials_batch, calculate_financials_cents, net_profit_batch):
+            cases[f"batch.{func.__name__}[{size}]"] = (functools.partial(func, inputs), size)
+    return cases
+
+
+def workload_cases(quick):
+    from analysis import price_optimum, reverse_price, scenario_rows, sensitivity_grid, tornado_rows
+    from cashflow import project_cashflow
+    from diagnosis import load_rules
+    from engine import calculate_financials_batch
+    from marketplaces import evaluate_chunk, fx_rates, load_fx, load_profiles
+    from montecarlo import simulate_profit
+    from pricing import solve_target_prices
+
+    catalog = synthetic_catalog(10_000)
+    samples = 200_000 if quick else 1_000_000
+    distributions = {"price_sale": {"dist": "normal", "mean": 129.90, "std": 10.0},
+                     "cost_product": {"dist": "triangular", "low": 30.0, "mode": 35.0, "high": 40.0}}
+    grid = np.linspace(0.5, 1.5, 50)
+    demand = ("elasticity", 30.0, -1.8)
+    diagnosis_columns = {**catalog, **calculate_financials_batch(catalog)}
+    profiles = load_profiles()
+    rates = fx_rates(profiles, load_fx())
+    cases = {
+        "workload.scenario_rows": (lambda: uncached(scenario_rows)(PARAMS), 1),
+        "workload.reverse_price": (lambda: uncached(reverse_price)(PARAMS, 20.0), 1),
+        "workload.price_optimum": (lambda: uncached(price_optimum)(PARAMS, demand), 1),
+        "workload.tornado_rows": (lambda: uncached(tornado_rows)(PARAMS), 1),
+        "workload.sensitivity_grid[50x50]": (
+            lambda: uncached(sensitivity_grid)(PARAMS, "price_sale", "cost_product", 129.90 * grid, 35.0 * grid), 2_500),
+        "workload.solve_target_prices[10000x5]": (
+            lambda: solve_target_prices(catalog, [0.05, 0.10, 0.15, 0.20, 0.25]), 50_000),
+        "workload.diagnosis_rules[10000]": (lambda: load_rules().evaluate(diagnosis_columns), 10_000),
+        f"workload.marketplaces[10000x{len(profiles)}]": (
+            lambda: evaluate_chunk(catalog, profiles, rates), 10_000 * len(profiles)),
+        f"workload.simulate_profit[{samples}]": (lambda: simulate_profit(BASE, distributions, samples, seed=0), samples),
+        "workload.project_cashflow[1000x365]": (
+            lambda: project_cashflow({k: v[:1_000] for k, v in catalog.items()}, 500, 5.0,
+                                     start_date=datetime.date(2025, 1, 1)), 1_000),
+    }
+    return cases
+
+
+def run_cases(cases, repeat):
+    return {name: {**measure(func, repeat), "items": items} for name, (func, items) in cases.items()}
+
+
+# Módulos de catálogo, simulação e cache em disco: a primeira página do modo
+# Produto Único não deve importá-los. (O pandas não entra na lista: a partida
+# roda instrumentada e o painel de performance monta tabelas.)
+COLD_START_DEFERRED = ("actuals", "catalog", "marketplaces", "montecarlo", "parallel", "store")
+
+# Filho da partida a frio: primeiro run do app num processo sem nada importado
+_COLD_START = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+import instrument
+at = AppTest.from_file({app!r}, default_timeout=120)
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+timers = instrument.snapshot()["timers"]
+print(json.dumps({{"first_run": elapsed, "imports": timers["app.imports"]["max_s"],
+                  "first_render": timers["app.first_render"]["max_s"],
+                  "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+
+def cold_start(repeat=3):
+    """Partida a frio: melhor de `repeat` processos novos (importações do app e primeira página completa)."""
+    code = _COLD_START.format(root=ROOT, app=APP_PATH, deferred=COLD_START_DEFERRED)
+    env = {**os.environ, "FBA_INSTRUMENT": "1"}
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    if loaded:
+        raise AssertionError(f"A partida a frio do modo Produto Único importou {', '.join(loaded)}")
+    best = min(runs, key=lambda run: run["first_render"])
+    return {
+        "app.cold_start": {"seconds": best["first_run"], "items": 1},
+        "app.cold_start.imports": {"seconds": best["imports"], "items": 1},
+        "app.cold_start.first_render": {"seconds": best["first_render"], "items": 1},
+    }
+
+
+def bench_app(reruns):
+    from streamlit.testing.v1 import AppTest
+
+    def run(at):
+        start = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        return elapsed
+
+    was_enabled = instrument.is_enabled()
+    instrument.set_enabled(True)
+    instrument.reset()
+    clear_caches()
+    results = cold_start()
+    try:
+        at = AppTest.from_file(APP_PATH, default_timeout=120)
+        results["app.first_run"] = {"seconds": run(at), "items": 1}
+
+        unchanged = [run(at) for _ in range(reruns)]
+        results["app.rerun_unchanged"] = {"seconds": min(unchanged), "items": 1}
+
+        price = next(w for w in at.number_input if w.label.startswith("Preço de Venda"))
+        changed = []
+        for i in range(reruns):
+            price.set_value(100.0 + i)
+            changed.append(run(at))
+        results["app.rerun_price_change"] = {"seconds": min(changed), "items": 1}
+
+        # Cada seção aberta com os caches vazios: inclui construir as figuras
+        for label in at.radio(key="active_section").options:
+            clear_caches()
+            # O elemento é trocado a cada run: buscar o rádio de novo antes de mudar
+            at.radio(key="active_section").set_value(label)
+            name = label.split(" ", 1)[-1].strip()
+            results[f"app.section[{name}]"] = {"seconds": run(at), "items": 1}
+
+        for name, stat in instrument.snapshot()["timers"].items():
+            if name.startswith("figure."):
+                results[name] = {"seconds": stat["mean_s"], "max_s": stat["max_s"], "builds": stat["count"], "items": 1}
+    finally:
+        instrument.set_enabled(was_enabled)
+        instrument.reset()
+    return results
+
+
+# -----------------------------------------------------------------------------
+# RELATÓRIO E COMPARAÇÃO
+# -----------------------------------------------------------------------------
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    import pandas
+    import streamlit
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pandas.__version__,
+        "streamlit": streamlit.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpus": len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count(),
+        "commit": _commit(),
+    }
+
+
+def compare(report, baseline, tolerance, app_tolerance):
+    """Linhas (caso, baseline_s, atual_s, razão) dos casos em comum e a lista das regressões.
+
+    Casos do app e das figuras (uma medida só, com o Streamlit no meio) usam
+    `app_tolerance`, mais folgada.
+    """
+    rows, regressions = [], []
+    for name, result in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None or base["seconds"] <= 0:
+            continue
+        ratio = result["seconds"] / base["seconds"]
+        rows.append((name, base["seconds"], result["seconds"], ratio))
+        limit = app_tolerance if name.startswith(("app.", "figure.")) else tolerance
+        if ratio > 1 + limit:
+            regressions.append(name)
+    return rows, regressions
+
+
+def _fmt_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def print_results(results):
+    print(f"{'caso':<48}{'tempo':>12}{'itens/s':>16}")
+    for name, result in results.items():
+        rate = "-" if name.startswith(("app.", "figure.")) else f"{result['items'] / result['seconds']:,.0f}"
+        print(f"{name:<48}{_fmt_seconds(result['seconds']):>12}{rate:>16}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks do motor e do app, com comparação contra baseline.")
+    parser.add_argument("--quick", action="store_true", help=f"lotes até {QUICK_MAX_ROWS:,} linhas e Monte Carlo menor")
+    parser.add_argument("--groups", nargs="+", default=["scalar", "batch", "workload", "app"],
+                        choices=["scalar", "batch", "workload", "app"])
+    parser.add_argument("--repeat", type=int, default=5, help="repetições por caso (vale o melhor tempo)")
+    parser.add_argument("--reruns", type=int, default=5, help="reruns do app por medida (vale o melhor)")
+    parser.add_argument("--output", help="grava o relatório JSON neste arquivo ('-' para stdout)")
+    parser.add_argument("--baseline", help=f"compara com esta baseline (p.ex. {os.path.relpath(DEFAULT_BASELINE)})")
+    parser.add_argument("--tolerance", type=float, default=0.30, help="piora relativa aceita antes de falhar")
+    parser.add_argument("--app-tolerance", type=float, default=0.60, help="idem, para os casos do app e das figuras")
+    parser.add_argument("--confirm", type=int, default=3,
+                        help="novas medições de um caso do motor acima da tolerância antes de declarar regressão")
+    parser.add_argument("--save-baseline", metavar="PATH", help="grava o relatório como nova baseline")
+    args = parser.parse_args(argv)
+
+    cases = {}
+    if "scalar" in args.groups:
+        cases.update(scalar_cases())
+    if "batch" in args.groups:
+        cases.update(batch_cases(QUICK_MAX_ROWS if args.quick else BATCH_SIZES[-1]))
+    if "workload" in args.groups:
+        cases.update(workload_cases(args.quick))
+    results = run_cases(cases, args.repeat)
+    if "app" in args.groups:
+        results.update(bench_app(args.reruns))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        # Ruído da máquina (outro processo, frequência da CPU) derruba um caso
+        # isolado: antes de acusar, o caso é medido de novo e vale o melhor
+        for _ in range(args.confirm):
+            _, suspects = compare({"results": results}, baseline, args.tolerance, args.app_tolerance)
+            suspects = [name for name in suspects if name in cases]
+            if not suspects:
+                break
+            for name, result in run_cases({name: cases[name] for name in suspects}, args.repeat).items():
+                if result["seconds"] < results[name]["seconds"]:
+                    results[name] = result
+
+    report = {
+        "version": REPORT_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "config": {"quick": args.quick, "groups": args.groups, "repeat": args.repeat, "reruns": args.reruns},
+        "results": results,
+    }
+    print_results(results)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(text)
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+        print(f"Baseline gravada em {args.save_baseline}")
+
+    if baseline is not None:
+        rows, regressions = compare(report, baseline, args.tolerance, args.app_tolerance)
+        print(f"\n{'caso':<48}{'baseline':>12}{'atual':>12}{'razão':>8}")
+        for name, base_s, current_s, ratio in rows:
+            flag = "  << REGRESSÃO" if name in regressions else ""
+            print(f"{name:<48}{_fmt_seconds(base_s):>12}{_fmt_seconds(current_s):>12}{ratio:>8.2f}{flag}")
+        if regressions:
+            print(f"\nREGRESSÃO: {len(regressions)} caso(s) acima da tolerância em relação à baseline:", file=sys.stderr)
+            for name in regressions:
+                print(f"  {name}", file=sys.stderr)
+            return 1
+        print(f"\nSem regressões ({len(rows)} casos comparados).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# -----------------------------------------------------------------------------
+# PROJEÇÃO DE FLUXO DE CAIXA POR LOTE (SKUs x PERÍODOS)
+# -----------------------------------------------------------------------------
+# A "Projeção de Lote" multiplica o lucro unitário pelo tamanho do lote, como
+# se tudo vendesse no mesmo dia. Aqui o lote é vendido no ritmo informado
+# (unidades por dia), a armazenagem incide sobre o estoque parado de cada mês
+# (com o pico do Q4), os repasses da Amazon chegam em ciclos e as reposições
+# são pagas no pedido e chegam após o lead time.
+#
+# Todas as grandezas são arrays (n_skus, n_períodos). O laço percorre só os
+# períodos (reposição depende do estoque do dia anterior); cada passo é uma
+# operação NumPy sobre todos os SKUs de uma vez.
+
+import datetime
+
+import numpy as np
+
+from engine import calculate_financials_batch
+
+# Multiplicador da armazenagem em outubro, novembro e dezembro
+Q4_STORAGE_MULTIPLIER = 3.0
+Q4_MONTHS = (10, 11, 12)
+
+# Ciclo de repasse da Amazon (dias entre liquidações)
+PAYOUT_DAYS = 14
+
+# Dias de estoque de segurança no ponto de reposição
+SAFETY_DAYS = 7
+
+# Séries devolvidas por project_cashflow, todas (n_skus, n_períodos)
+CASHFLOW_SERIES = ("units_sold", "stock", "settlement", "ad_spend", "storage", "purchases", "net_cash", "cumulative_cash")
+
+
+def _per_sku(value, n_skus, dtype=np.float64):
+    return np.broadcast_to(np.asarray(value, dtype=dtype), (n_skus,))
+
+
+def project_cashflow(inputs, lot_qty, daily_units, lead_time_days=30, horizon_days=365, start_date=None,
+                     step_days=1, restock=True, safety_days=SAFETY_DAYS, q4_multiplier=Q4_STORAGE_MULTIPLIER,
+                     payout_days=PAYOUT_DAYS):
+    """Fluxo de caixa período a período de um lote (e reposições) por SKU.
+
+    `inputs` segue INPUT_COLUMNS (escalares ou arrays de SKUs; sem
+    `fixed_fee`, vale a regra < R$79). `storage_fee` é o custo mensal por
+    unidade em estoque e substitui a estimativa por unidade vendida do
+    cálculo unitário. `daily_units` é o ritmo de vendas: por SKU (n_skus,) ou
+    por SKU e período (n_skus, n_períodos), p.ex. com sazonalidade.
+
+    O lote inicial é pago e está disponível no primeiro dia. Com `restock`,
+    um novo lote é pedido (e pago) quando estoque + pedidos em trânsito caem
+    abaixo do consumo do lead time (pelo menos 1 dia; menos levanta
+    ValueError) + `safety_days`. Vendas viram caixa no repasse seguinte (a
+    cada `payout_days`); ads são pagos no período.
+
+    Retorna dict com `dates` (n_períodos,), as séries de CASHFLOW_SERIES e,
+    por SKU: payback_period (índice do 1º período com caixa acumulado >= 0,
+    -1 se não houver), payback_date, max_cash_tied (maior saldo negativo),
+    final_cash, ending_units e ending_inventory_value.
+    """
+    unit = calculate_financials_batch(inputs)
+    daily = np.asarray(daily_units, dtype=np.float64)
+    n_skus = np.broadcast(
+        np.atleast_1d(unit["net_profit"]), np.atleast_1d(lot_qty), np.atleast_1d(daily if daily.ndim < 2 else daily[:, 0])
+    ).shape[0]
+    n_periods = -(-int(horizon_days) // step_days)
+    start = np.datetime64(start_date or datetime.date.today(), "D")
+    dates = start + np.arange(n_periods) * step_days
+
+    # Valores por unidade vendida: o repasse desconta Amazon, impostos,
+    # devoluções e outros custos; ads saem à parte; CMV entra só na compra
+    unit_settlement = _per_sku(
+        unit["gross_revenue"] - unit["val_tax"] - unit["val_comm"] - unit["val_fixed"] - unit["val_fba"]
+        - unit["val_returns"] - unit["val_misc"], n_skus)
+    unit_ads = _per_sku(unit["val_ads"], n_skus)
+    unit_cost = _per_sku(unit["cogs_total"], n_skus)
+    lot = _per_sku(lot_qty, n_skus)
+    velocity = np.broadcast_to(daily[..., None] if daily.ndim < 2 else daily, (n_skus, n_periods)) * step_days
+    lead_days = _per_sku(lead_time_days, n_skus, np.int64)
+    if (lead_days < 1).any():
+        # O pedido sai no fim do período: com lead time 0 ele chegaria num período já fechado
+        raise ValueError("Lead time de reposição deve ser de pelo menos 1 dia.")
+    lead_periods = -(-lead_days // step_days)
+
+    # Armazenagem por unidade-período, com o pico do Q4 pelo mês de cada data
+    months = dates.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    season = np.where(np.isin(months, Q4_MONTHS), q4_multiplier, 1.0)
+    storage_rate = _per_sku(unit["val_storage"], n_skus)[:, None] * (season * step_days / 30)
+
+    units_sold = np.empty((n_skus, n_periods))
+    stock = np.empty((n_skus, n_periods))
+    purchases = np.zeros((n_skus, n_periods))
+    arrivals = np.zeros((n_skus, n_periods))
+    purchases[:, 0] = lot * unit_cost
+
+    on_hand = lot.copy()
+    on_order = np.zeros(n_skus)
+    rows = np.arange(n_skus)
+    for t in range(n_periods):
+        on_hand += arrivals[:, t]
+        on_order -= arrivals[:, t]
+        sold = np.minimum(velocity[:, t], on_hand)
+        on_hand -= sold
+        units_sold[:, t] = sold
+        stock[:, t] = on_hand
+        if restock:
+            reorder_point = velocity[:, t] * ((lead_periods * step_days + safety_days) / step_days)
+            order = (on_hand + on_order <= reorder_point) & (lot > 0)
+            if order.any():
+                purchases[order, t] += lot[order] * unit_cost[order]
+                on_order[order] += lot[order]
+                # Pedidos que chegariam depois do horizonte são pagos, mas não entram no estoque
+                arrive = t + lead_periods
+                lands = order & (arrive < n_periods)
+                arrivals[rows[lands], arrive[lands]] += lot[lands]
+
+    # Armazenagem acumulada no mês e cobrada no último período do mês
+    accrued = stock * storage_rate
+    month_starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    month_ends = np.r_[month_starts[1:] - 1, n_periods - 1]
+    storage = np.zeros((n_skus, n_periods))
+    storage[:, month_ends] = np.add.reduceat(accrued, month_starts, axis=1)
+
+    # Repasses: vendas acumuladas até cada dia de liquidação (e no último período)
+    earned = np.cumsum(units_sold * unit_settlement[:, None], axis=1)
+    days = np.arange(n_periods) * step_days
+    payout = (days + step_days) // payout_days > days // payout_days
+    payout[-1] = True
+    paid = np.where(payout, earned, 0.0)
+    paid_idx = np.flatnonzero(payout)
+    settlement = np.zeros((n_skus, n_periods))
+    settlement[:, paid_idx] = np.diff(paid[:, paid_idx], axis=1, prepend=0.0)
+
+    ad_spend = units_sold * unit_ads[:, None]
+    net_cash = settlement - ad_spend - storage - purchases
+    cumulative_cash = np.cumsum(net_cash, axis=1)
+
+    recovered = cumulative_cash >= 0
+    payback_period = np.where(recovered.any(axis=1), recovered.argmax(axis=1), -1)
+    return {
+        "dates": dates,
+        "units_sold": units_sold,
+        "stock": stock,
+        "settlement": settlement,
+        "ad_spend": ad_spend,
+        "storage": storage,
+        "purchases": purchases,
+        "net_cash": net_cash,
+        "cumulative_cash": cumulative_cash,
+        "payback_period": payback_period,
+        "payback_date": np.where(payback_period >= 0, dates[np.maximum(payback_period, 0)], np.datetime64("NaT")),
+        "max_cash_tied": -np.minimum(cumulative_cash.min(axis=1), 0.0),
+        "final_cash": cumulative_cash[:, -1],
+        "ending_units": stock[:, -1],
+        "ending_inventory_value": stock[:, -1] * unit_cost,
+    }
+
+
+def monthly_summary(result, sku=0):
+    """Totais por mês de um SKU da projeção: dict de listas (mês, vendas, caixa...)."""
+    months = result["dates"].astype("datetime64[M]")
+    starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    summary = {"month": [str(m) for m in months[starts]]}
+    for name in ("units_sold", "settlement", "ad_spend", "storage", "purchases", "net_cash"):
+        summary[name] = np.add.reduceat(result[name][sku], starts).tolist()
+    summary["stock_end"] = result["stock"][sku][np.r_[starts[1:] - 1, len(months) - 1]].tolist()
+    summary["cumulative_cash"] = result["cumulative_cash"][sku][np.r_[starts[1:] - 1, len(months) - 1]].tolist()
+    return summary
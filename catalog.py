@@ -0,0 +1,324 @@
+# -----------------------------------------------------------------------------
+# CATÁLOGO MULTI-SKU (CSV / PARQUET)
+# -----------------------------------------------------------------------------
+# Lê arquivos de catálogo em blocos (CSV) ou via memory-map (Parquet), calcula
+# as métricas de cada bloco com o motor vetorizado e guarda apenas arrays
+# NumPy: entradas (para reabrir um SKU nas abas) e as métricas de ranking.
+# O arquivo bruto nunca é carregado inteiro em memória.
+
+import os
+import threading
+
+import numpy as np
+
+from engine import (
+    INPUT_COLUMNS, METRIC_COLUMNS, MONEY_METRICS, calculate_financials_batch, calculate_financials_cents,
+    calculate_financials_exact_batch,
+)
+from fees import DIMENSION_COLUMNS, FEE_COLUMNS, load_rate_card
+
+# Colunas de identificação (opcionais; sem `sku` usa-se o número da linha)
+ID_COLUMNS = ("sku", "product_name")
+
+# Métricas mantidas para o ranking; as demais são recalculadas sob demanda
+RANK_COLUMNS = ("net_profit", "margin_net", "roi", "break_even")
+
+CHUNK_ROWS = 100_000
+
+# Entradas opcionais e a métrica de onde vem o valor resolvido pelo motor
+_OPTIONAL_SOURCES = {"fixed_fee": "val_fixed", "misc_costs": "val_misc"}
+
+
+def _detect_format(source, fmt):
+    if fmt:
+        return fmt.lower()
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+    ext = os.path.splitext(str(name))[1].lower()
+    if ext in (".parquet", ".pq"):
+        return "parquet"
+    if ext == ".tsv":
+        return "tsv"
+    return "csv"
+
+
+def iter_catalog_chunks(source, fmt=None, chunk_rows=CHUNK_ROWS):
+    """Gera DataFrames de até `chunk_rows` linhas com as colunas conhecidas.
+
+    `source` pode ser um caminho, um arquivo aberto ou um UploadedFile do
+    Streamlit. Colunas fora de ID_COLUMNS/INPUT_COLUMNS/FEE_COLUMNS são
+    ignoradas já na leitura, para não ocupar memória.
+    """
+    wanted = set(ID_COLUMNS) | set(INPUT_COLUMNS) | set(FEE_COLUMNS)
+    fmt = _detect_format(source, fmt)
+
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if isinstance(source, (str, os.PathLike)):
+            buffer = pa.memory_map(str(source), "r")
+        elif hasattr(source, "getbuffer"):
+            # Upload já está em memória: embrulha sem copiar
+            buffer = pa.BufferReader(pa.py_buffer(source.getbuffer()))
+        else:
+            buffer = source
+        parquet = pq.ParquetFile(buffer)
+        columns = [name for name in parquet.schema_arrow.names if name in wanted]
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    import pandas as pd
+
+    sep = "\t" if fmt == "tsv" else ","
+    dtypes = {name: "float64" for name in (*INPUT_COLUMNS, *DIMENSION_COLUMNS)}
+    dtypes.update({name: "str" for name in (*ID_COLUMNS, "category")})
+    reader = pd.read_csv(
+        source,
+        sep=sep,
+        usecols=lambda name: name in wanted,
+        dtype=dtypes,
+        chunksize=chunk_rows,
+    )
+    with reader:
+        yield from reader
+
+
+def _chunk_ids(chunk, offset):
+    n = len(chunk)
+    if "sku" in chunk:
+        sku = chunk["sku"].to_numpy(dtype=object)
+    else:
+        sku = np.arange(offset, offset + n).astype(str).astype(object)
+    name = chunk["product_name"].to_numpy(dtype=object) if "product_name" in chunk else sku
+    return sku, name
+
+
+def _chunk_columns(chunk):
+    # Entradas e colunas de tarifa (categoria, dimensões e peso) presentes no bloco
+    columns = {col: chunk[col].to_numpy(dtype=np.float64) for col in (*INPUT_COLUMNS, *DIMENSION_COLUMNS) if col in chunk}
+    if "category" in chunk:
+        columns["category"] = chunk["category"].to_numpy(dtype=object)
+    return columns
+
+
+def _chunk_values(chunk, rate_card=None):
+    fee_source = _chunk_columns(chunk)
+    values = {col: fee_source[col] for col in INPUT_COLUMNS if col in fee_source}
+    # Tarifas ausentes no arquivo saem da tabela (categoria, dimensões e peso)
+    values.update(load_rate_card(rate_card).resolve(fee_source))
+    return values
+
+
+def iter_catalog_columns(source, fmt=None, chunk_rows=CHUNK_ROWS):
+    """Gera (sku, product_name, colunas) por bloco, sem resolver tarifas.
+
+    `colunas` tem arrays NumPy das entradas e de FEE_COLUMNS presentes no
+    arquivo: serve para aplicar outras tabelas de tarifas ao mesmo catálogo
+    (ver marketplaces.py).
+    """
+    offset = 0
+    for chunk in iter_catalog_chunks(source, fmt=fmt, chunk_rows=chunk_rows):
+        if len(chunk) == 0:
+            continue
+        sku, name = _chunk_ids(chunk, offset)
+        yield sku, name, _chunk_columns(chunk)
+        offset += len(chunk)
+
+
+def _resolved_inputs(values, result):
+    # Colunas opcionais ausentes: usa o valor já resolvido pelo motor
+    return {col: values[col] if col in values else result[_OPTIONAL_SOURCES[col]] for col in INPUT_COLUMNS}
+
+
+def _engine(exact):
+    # exact: dinheiro arredondado ao centavo por componente (engine.calculate_financials_cents)
+    return calculate_financials_exact_batch if exact else calculate_financials_batch
+
+
+def iter_catalog_results(source, fmt=None, chunk_rows=CHUNK_ROWS, rate_card=None, exact=False):
+    """Gera, bloco a bloco, DataFrames com sku, product_name, entradas e todas as métricas.
+
+    Nada além do bloco atual fica em memória: serve para exportar ou
+    transmitir catálogos de qualquer tamanho. `rate_card` (caminho, dict ou
+    None para a tabela padrão) preenche as tarifas que faltarem no arquivo;
+    `exact` calcula o dinheiro em centavos inteiros.
+    """
+    offset = 0
+    for chunk in iter_catalog_chunks(source, fmt=fmt, chunk_rows=chunk_rows):
+        if len(chunk) == 0:
+            continue
+        values = _chunk_values(chunk, rate_card)
+        result = _engine(exact)(values)
+        sku, name = _chunk_ids(chunk, offset)
+        yield _results_frame(sku, name, _resolved_inputs(values, result), result, offset)
+        offset += len(chunk)
+
+
+def _results_frame(sku, name, inputs, result, offset):
+    import pandas as pd
+
+    frame = {"sku": sku, "product_name": name}
+    frame.update(inputs)
+    frame.update((col, result[col]) for col in METRIC_COLUMNS)
+    return pd.DataFrame(frame, index=pd.RangeIndex(offset, offset + len(sku)))
+
+
+class Catalog:
+    """Catálogo carregado: arrays NumPy por coluna, uma posição por SKU."""
+
+    def __init__(self, skus, names, inputs, metrics, key=None, fee_rule=None):
+        self.skus = skus
+        self.names = names
+        self.inputs = inputs
+        self.metrics = metrics
+        # True onde fixed_fee veio das faixas da tabela de tarifas (não do arquivo):
+        # simulações que sorteiam o preço recalculam a taxa só nesses SKUs
+        self.fee_rule = np.zeros(len(skus), dtype=bool) if fee_rule is None else fee_rule
+        # Chave do conteúdo no cache em disco (None se carregado sem cache)
+        self.key = key
+        # Memos preenchidos sob demanda: o catálogo congelado é compartilhado
+        # entre sessões (shared.py), então cada um tem a sua trava
+        self._orders = {}
+        self._orders_lock = threading.Lock()
+        self._totals = {}
+        self._totals_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.skus)
+
+    def freeze(self):
+        """Arrays somente leitura, para compartilhar o catálogo entre sessões. Devolve o próprio catálogo."""
+        for array in (self.skus, self.names, self.fee_rule, *self.inputs.values(), *self.metrics.values()):
+            array.flags.writeable = False
+        return self
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.skus, self.names, *self.inputs.values(), *self.metrics.values()))
+
+    def order(self, sort_by="net_profit", ascending=False):
+        # Ordenação completa é O(n log n); guarda por chave para reruns
+        key = (sort_by, ascending)
+        with self._orders_lock:
+            if key not in self._orders:
+                values = self.metrics[sort_by]
+                idx = np.argsort(values if ascending else -values, kind="stable")
+                idx.flags.writeable = False
+                self._orders[key] = idx
+            return self._orders[key]
+
+    def ranking_page(self, sort_by="net_profit", ascending=False, page=0, page_size=50):
+        """DataFrame apenas com as linhas da página pedida, já ordenadas."""
+        import pandas as pd
+
+        idx = self.order(sort_by, ascending)[page * page_size:(page + 1) * page_size]
+        frame = {"SKU": self.skus[idx], "Produto": self.names[idx]}
+        for name in RANK_COLUMNS:
+            frame[name] = self.metrics[name][idx]
+        return pd.DataFrame(frame, index=idx)
+
+    def iter_results(self, chunk_rows=CHUNK_ROWS, exact=False):
+        """Mesmos blocos de iter_catalog_results, recalculados a partir dos arrays já carregados."""
+        for start in range(0, len(self), chunk_rows):
+            sl = slice(start, start + chunk_rows)
+            inputs = {name: values[sl] for name, values in self.inputs.items()}
+            result = _engine(exact)(inputs)
+            yield _results_frame(self.skus[sl], self.names[sl], inputs, result, start)
+
+    def results_at(self, index, exact=False):
+        """Todas as métricas (METRIC_COLUMNS) dos SKUs em `index`, recalculadas."""
+        return _engine(exact)({name: values[index] for name, values in self.inputs.items()})
+
+    def metric_totals(self, chunk_rows=CHUNK_ROWS, exact=False):
+        """Soma de cada métrica no catálogo (uma unidade de cada SKU), calculada em blocos.
+
+        Com `exact`, o dinheiro é somado em centavos int64: o total não
+        acumula o resíduo do float, por maior que seja o catálogo.
+        """
+        with self._totals_lock:
+            if exact not in self._totals:
+                totals = dict.fromkeys(METRIC_COLUMNS, 0.0)
+                for start in range(0, len(self), chunk_rows):
+                    sl = slice(start, start + chunk_rows)
+                    if exact:
+                        result = calculate_financials_cents({name: values[sl] for name, values in self.inputs.items()})
+                    else:
+                        result = self.results_at(sl)
+                    for col in METRIC_COLUMNS:
+                        totals[col] += float(np.sum(result[col]))
+                if exact:
+                    totals.update((col, totals[col] / 100) for col in MONEY_METRICS)
+                self._totals[exact] = totals
+            return self._totals[exact]
+
+    def columns(self, names):
+        """Arrays de entradas e métricas pedidos por nome; métricas fora de RANK_COLUMNS são recalculadas."""
+        missing = [name for name in names if name not in self.inputs and name not in self.metrics]
+        result = self.results_at(slice(None)) if missing else {}
+        return {name: self.inputs.get(name, self.metrics.get(name, result.get(name))) for name in names}
+
+    def row_inputs(self, index):
+        """Entradas de um SKU como dict (mesmos nomes de INPUT_COLUMNS)."""
+        return {name: float(self.inputs[name][index]) for name in INPUT_COLUMNS}
+
+
+def catalog_key(source, fmt=None, rate_card=None):
+    """Chave de conteúdo do catálogo: hash do arquivo + formato + tabela de tarifas."""
+    from store import content_key, file_digest
+
+    return content_key("catalog", file_digest(source), _detect_format(source, fmt), load_rate_card(rate_card).spec)
+
+
+def load_catalog(source, fmt=None, chunk_rows=CHUNK_ROWS, rate_card=None, cache=None, key=None):
+    """Lê o catálogo em blocos e calcula as métricas de ranking de todos os SKUs.
+
+    Com `cache` (store.DiskCache), o resultado fica em disco sob catalog_key
+    (ou `key`, se já calculada): reabrir o mesmo arquivo, em qualquer sessão,
+    só mapeia os arrays já calculados.
+    """
+    if cache is not None:
+        key = key or catalog_key(source, fmt, rate_card)
+        cached = cache.get(key)
+        # Entradas gravadas antes de fee_rule existir são recalculadas
+        if cached is not None and "fee_rule" in cached:
+            return Catalog(**cached, key=key)
+
+    skus, names, fee_rule = [], [], []
+    inputs = {name: [] for name in INPUT_COLUMNS}
+    metrics = {name: [] for name in RANK_COLUMNS}
+    offset = 0
+
+    for chunk in iter_catalog_chunks(source, fmt=fmt, chunk_rows=chunk_rows):
+        n = len(chunk)
+        if n == 0:
+            continue
+        values = _chunk_values(chunk, rate_card)
+        result = calculate_financials_batch(values)
+        sku, name = _chunk_ids(chunk, offset)
+
+        skus.append(sku)
+        names.append(name)
+        fee_rule.append(np.full(n, "fixed_fee" not in chunk))
+        for col, column in _resolved_inputs(values, result).items():
+            inputs[col].append(column)
+        for col in RANK_COLUMNS:
+            metrics[col].append(result[col])
+        offset += n
+
+    if offset == 0:
+        raise ValueError("Catálogo vazio: nenhuma linha encontrada no arquivo.")
+
+    catalog = Catalog(
+        np.concatenate(skus),
+        np.concatenate(names),
+        {col: np.concatenate(parts) for col, parts in inputs.items()},
+        {col: np.concatenate(parts) for col, parts in metrics.items()},
+        key=key,
+        fee_rule=np.concatenate(fee_rule),
+    )
+    if cache is not None:
+        cache.put(key, {"skus": catalog.skus, "names": catalog.names, "inputs": catalog.inputs, "metrics": catalog.metrics,
+                        "fee_rule": catalog.fee_rule})
+    return catalog
+
@@ -0,0 +1,109 @@
+# -----------------------------------------------------------------------------
+# CLI HEADLESS (LOTE SEM STREAMLIT)
+# -----------------------------------------------------------------------------
+# Calcula as métricas de um catálogo inteiro sem subir o Streamlit: lê o
+# arquivo (ou stdin) em blocos, passa cada bloco pelo motor vetorizado e
+# escreve o resultado bloco a bloco (CSV, CSV.GZ, JSONL, Parquet ou XLSX). A
+# memória fica limitada ao tamanho do bloco, não ao do catálogo.
+#
+#   python cli.py catalogo.csv -o resultado.parquet
+#   cat catalogo.csv | python cli.py -t jsonl > resultado.jsonl
+#   python cli.py catalogo.csv -o ranking.csv.gz --columns sku,net_profit,roi --precision 2
+#   python cli.py catalogo.csv -o conciliar.csv --exact-cents
+#   python cli.py catalogo.csv --actuals settlement.tsv --actuals pedidos.tsv -o conciliacao.csv
+#   python cli.py catalogo.csv --marketplaces perfis.json --fx cambio.csv -o marketplaces.csv
+
+import argparse
+import io
+import os
+import sys
+import time
+
+from export import EXPORT_FORMATS, export_format, export_results
+
+
+def _open_source(path, fmt):
+    if path and path != "-":
+        return path
+    # Parquet precisa de acesso aleatório: o stdin é lido inteiro para a memória
+    if fmt == "parquet":
+        return io.BytesIO(sys.stdin.buffer.read())
+    return sys.stdin.buffer
+
+
+def _reconciliation(args, source, fmt):
+    # Planejado (catálogo) x realizado (relatórios): uma tabela pequena, SKU x mês
+    from actuals import catalog_plan, load_actuals, plan_vs_actual
+    from catalog import CHUNK_ROWS, load_catalog
+
+    catalog = load_catalog(source, fmt=fmt, chunk_rows=args.chunk_rows or CHUNK_ROWS, rate_card=args.rate_card)
+    actuals = load_actuals(args.actuals, decimal=args.decimal, dayfirst=args.dayfirst)
+    plan = catalog_plan(catalog, actuals.index.get_level_values("sku"))
+    return plan_vs_actual(actuals, plan).reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Métricas financeiras FBA para um catálogo inteiro, sem interface.")
+    parser.add_argument("input", nargs="?", default="-", help="CSV/TSV/Parquet do catálogo ('-' ou ausente: stdin)")
+    parser.add_argument("-f", "--input-format", choices=("csv", "tsv", "parquet"), help="formato da entrada (padrão: pela extensão; stdin: csv)")
+    parser.add_argument("-o", "--output", default="-", help="arquivo de saída ('-' ou ausente: stdout)")
+    parser.add_argument("-t", "--to", choices=list(EXPORT_FORMATS), help="formato da saída (padrão: pela extensão; stdout: csv)")
+    parser.add_argument("--columns", help="colunas da saída, separadas por vírgula (padrão: todas)")
+    parser.add_argument("--precision", type=int, default=None, help="casas decimais dos valores numéricos (padrão: completa)")
+    parser.add_argument("--chunk-rows", type=int, default=None, help="linhas por bloco")
+    parser.add_argument("--rate-card", help="JSON com a tabela de tarifas (padrão: Amazon BR embutida); "
+                                            "preenche comissão, FBA e taxa fixa ausentes pela categoria e dimensões")
+    parser.add_argument("--exact-cents", action="store_true",
+                        help="dinheiro em centavos inteiros, com arredondamento definido por componente "
+                             "(engine.COMPONENT_ROUNDING): totais somam exatamente")
+    parser.add_argument("--actuals", action="append", metavar="TSV",
+                        help="settlement/relatório de pedidos (repetível): a saída vira o planejado x realizado por SKU x mês, "
+                             "com o catálogo como plano")
+    parser.add_argument("--marketplaces", nargs="?", const="default", metavar="JSON",
+                        help="compara cada SKU nos perfis de marketplace do JSON (sem valor: perfis embutidos); "
+                             "a saída vira lucro e margem por marketplace e o melhor de cada SKU")
+    parser.add_argument("--fx", help="câmbio para --marketplaces, JSON ou CSV currency,rate (padrão: referência embutida)")
+    parser.add_argument("--decimal", default=".", help="separador decimal dos relatórios de --actuals (padrão: .)")
+    parser.add_argument("--dayfirst", action="store_true", help="datas DD/MM/AAAA nos relatórios de --actuals")
+    args = parser.parse_args(argv)
+
+    from catalog import CHUNK_ROWS, iter_catalog_results
+
+    in_fmt = args.input_format or ("csv" if args.input == "-" else None)
+    out_path = None if args.output == "-" else args.output
+    out_fmt = args.to or export_format(out_path)
+    columns = [name.strip() for name in args.columns.split(",")] if args.columns else None
+
+    start = time.perf_counter()
+    try:
+        if args.actuals:
+            chunks = [_reconciliation(args, _open_source(args.input, in_fmt), in_fmt)]
+        elif args.marketplaces:
+            from marketplaces import iter_marketplace_frames
+
+            profiles = None if args.marketplaces == "default" else args.marketplaces
+            chunks = iter_marketplace_frames(_open_source(args.input, in_fmt), profiles, args.fx, fmt=in_fmt,
+                                             chunk_rows=args.chunk_rows or CHUNK_ROWS, exact=args.exact_cents)
+        else:
+            chunks = iter_catalog_results(_open_source(args.input, in_fmt), fmt=in_fmt, chunk_rows=args.chunk_rows or CHUNK_ROWS,
+                                          rate_card=args.rate_card, exact=args.exact_cents)
+        if out_path is None:
+            rows = export_results(chunks, sys.stdout.buffer, out_fmt, columns, args.precision)
+        else:
+            with open(out_path, "wb") as out:
+                rows = export_results(chunks, out, out_fmt, columns, args.precision)
+    except BrokenPipeError:
+        # Leitor fechou a saída (p.ex. `| head`): encerra sem traceback
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (ValueError, OSError) as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 1
+
+    unit = "linhas SKU x mês" if args.actuals else "SKUs"
+    print(f"{rows:,} {unit} processados em {time.perf_counter() - start:.2f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
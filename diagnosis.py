@@ -0,0 +1,189 @@
+# -----------------------------------------------------------------------------
+# DIAGNÓSTICO POR REGRAS (VETORIZADO NO CATÁLOGO)
+# -----------------------------------------------------------------------------
+# Um conjunto de regras é um dict (ou arquivo JSON com o mesmo formato) com a
+# nota inicial e a lista de regras. Cada regra tem:
+#   metric       métrica do motor (METRIC_COLUMNS) ou entrada (INPUT_COLUMNS)
+#   op           "<", "<=", ">" ou ">="
+#   threshold    limite; com `relative_to`, fração dessa coluna (0.85 x preço)
+#   penalty      pontos descontados da nota quando a regra dispara
+#   level        rótulo do alerta ("CRÍTICO", "ATENÇÃO", ...) e `message`
+#   group        regras do mesmo grupo são exclusivas: vale a primeira que
+#                disparar, na ordem da lista (como um if/elif)
+#   success      ponto forte mostrado quando nenhuma regra do grupo dispara
+#
+# Cada regra vira uma máscara booleana sobre todos os SKUs de uma vez, e a
+# nota é a inicial menos a soma das penalidades disparadas (um produto
+# matricial penalidades x máscaras). O produto único é um catálogo de 1 SKU.
+
+import json
+import os
+
+import numpy as np
+
+from engine import INPUT_COLUMNS, METRIC_COLUMNS
+from memo import memoize
+
+# Colunas que uma regra pode usar (em `metric` ou `relative_to`)
+RULE_COLUMNS = (*METRIC_COLUMNS, *INPUT_COLUMNS)
+
+# Campos de uma regra, na ordem da tabela editável do app
+RULE_FIELDS = ("group", "metric", "op", "threshold", "relative_to", "penalty", "level", "message", "success")
+
+RULE_OPERATORS = {"<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal}
+
+# Níveis mostrados como erro; os demais viram aviso
+CRITICAL_LEVELS = ("CRÍTICO",)
+
+# Benchmarks de Top Sellers da Amazon Brasil (as heurísticas originais do app)
+TOP_SELLERS_BR = {
+    "name": "Top Sellers Amazon BR (referência)",
+    "base_score": 100,
+    "rules": [
+        {"group": "Margem", "metric": "margin_net", "op": "<", "threshold": 10, "penalty": 25, "level": "CRÍTICO",
+         "message": "Margem líquida perigosamente baixa (<10%). Qualquer aumento no custo de ads vai gerar prejuízo."},
+        {"group": "Margem", "metric": "margin_net", "op": "<", "threshold": 15, "penalty": 10, "level": "ATENÇÃO",
+         "message": "Margem abaixo de 15%. Volume de vendas precisa ser muito alto para compensar.",
+         "success": "Margem Líquida saudável (>15%)."},
+        {"group": "ROI", "metric": "roi", "op": "<", "threshold": 30, "penalty": 25, "level": "BAIXO GIRO",
+         "message": "ROI < 30%. O risco de capital empatado é alto. Tente negociar custo ou aumentar preço.",
+         "success": "ROI excelente para Private Label (>30%)."},
+        {"group": "Break-even", "metric": "break_even", "op": ">", "threshold": 0.85, "relative_to": "price_sale",
+         "penalty": 15, "level": "FRAGILIDADE",
+         "message": "Seu Break-even está muito próximo do preço atual. Você tem pouca margem para fazer promoções."},
+    ],
+}
+
+
+def _optional(value):
+    # Campos vazios vindos de JSON ou de uma tabela editada (None, "", NaN)
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value == "":
+        return None
+    return value
+
+
+class RuleSet:
+    """Regras compiladas: limites e penalidades em arrays, uma posição por regra.
+
+    Dois conjuntos com as mesmas regras são iguais (e têm o mesmo hash), para
+    servirem de chave nos caches de memoize e no grafo do produto.
+    """
+
+    def __init__(self, spec):
+        try:
+            self._compile(spec)
+        except (KeyError, TypeError, IndexError, AttributeError) as exc:
+            raise ValueError(f"Regras de diagnóstico inválidas: {exc!r}") from None
+
+    def _compile(self, spec):
+        self.spec = spec
+        self.name = spec.get("name", "")
+        self.base_score = float(spec.get("base_score", 100))
+        rules = list(spec["rules"])
+        for i, rule in enumerate(rules, 1):
+            for field in ("metric", "relative_to"):
+                column = _optional(rule.get(field))
+                if (column is not None or field == "metric") and column not in RULE_COLUMNS:
+                    raise ValueError(f"Regra {i}: coluna desconhecida '{column}'.")
+            if rule["op"] not in RULE_OPERATORS:
+                raise ValueError(f"Regra {i}: operador '{rule['op']}' (use {', '.join(RULE_OPERATORS)}).")
+
+        self.metrics = tuple(rule["metric"] for rule in rules)
+        self.ops = tuple(rule["op"] for rule in rules)
+        self.relative_to = tuple(_optional(rule.get("relative_to")) for rule in rules)
+        self.thresholds = np.array([float(rule["threshold"]) for rule in rules], dtype=np.float64)
+        self.penalties = np.array([float(rule["penalty"]) for rule in rules], dtype=np.float64)
+        self.levels = tuple(str(rule["level"]) for rule in rules)
+        self.messages = tuple(str(_optional(rule.get("message")) or "") for rule in rules)
+        # Sem grupo, a regra é um grupo próprio
+        names = [str(_optional(rule.get("group")) or f"Regra {i}") for i, rule in enumerate(rules, 1)]
+        self.groups = tuple(dict.fromkeys(names))
+        self._group_ids = np.array([self.groups.index(name) for name in names], dtype=np.int64)
+        self.successes = {}
+        for name, rule in zip(names, rules):
+            success = _optional(rule.get("success"))
+            if success is not None:
+                self.successes.setdefault(name, str(success))
+        # Igualdade pelo conteúdo compilado: o nome e tipos (int, float, NumPy) não contam
+        self._key = (self.base_score, self.metrics, self.ops, self.relative_to, tuple(self.thresholds.tolist()),
+                     tuple(self.penalties.tolist()), self.levels, self.messages, tuple(names),
+                     tuple(self.successes.items()))
+
+    def __eq__(self, other):
+        return isinstance(other, RuleSet) and self._key == other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __len__(self):
+        return len(self.metrics)
+
+    @property
+    def columns(self):
+        """Colunas necessárias para avaliar as regras."""
+        return tuple(dict.fromkeys([*self.metrics, *(name for name in self.relative_to if name)]))
+
+    def labels(self):
+        """Descrição curta de cada regra ("CRÍTICO: margin_net < 10")."""
+        return [
+            f"{level}: {metric} {op} {threshold:g}" + (f" x {relative}" if relative else "")
+            for level, metric, op, threshold, relative in zip(self.levels, self.metrics, self.ops, self.thresholds, self.relative_to)
+        ]
+
+    def evaluate(self, columns, size=None):
+        """Nota e regras disparadas de cada SKU.
+
+        `columns` mapeia nomes de RULE_COLUMNS para arrays alinhados (ou
+        escalares); `size` é o número de SKUs quando não há regras. Devolve
+        {"score": (n,), "hits": (regras, n) bool}. Valores NaN não disparam regra.
+        """
+        values = {name: np.atleast_1d(np.asarray(columns[name], dtype=np.float64)) for name in self.columns}
+        n = max((len(array) for array in values.values()), default=size or 1)
+        hits = np.zeros((len(self), n), dtype=bool)
+        # Grupo já disparado por uma regra anterior (o "elif")
+        taken = np.zeros((len(self.groups), n), dtype=bool)
+        for i, (metric, op, relative) in enumerate(zip(self.metrics, self.ops, self.relative_to)):
+            limit = self.thresholds[i] * values[relative] if relative else self.thresholds[i]
+            group = self._group_ids[i]
+            np.logical_and(RULE_OPERATORS[op](values[metric], limit), ~taken[group], out=hits[i])
+            taken[group] |= hits[i]
+        score = self.base_score - self.penalties @ hits
+        np.maximum(score, 0.0, out=score)
+        return {"score": score, "hits": hits}
+
+    def findings(self, hits):
+        """Alertas (nível, mensagem) e pontos fortes de um SKU, a partir da sua coluna de `hits`."""
+        hits = np.asarray(hits, dtype=bool)
+        warnings = tuple((self.levels[i], self.messages[i]) for i in np.flatnonzero(hits))
+        fired = set(self._group_ids[hits].tolist())
+        successes = tuple(message for name, message in self.successes.items() if self.groups.index(name) not in fired)
+        return warnings, successes
+
+
+@memoize(maxsize=8)
+def _load_path(path, mtime):
+    with open(path, encoding="utf-8") as fh:
+        return RuleSet(json.load(fh))
+
+
+def load_rules(source=None):
+    """Regras compiladas: None = TOP_SELLERS_BR; caminho de JSON; dict no mesmo formato; ou um RuleSet."""
+    if source is None:
+        return _default_rules()
+    if isinstance(source, RuleSet):
+        return source
+    if isinstance(source, dict):
+        return RuleSet(source)
+    path = os.fspath(source)
+    return _load_path(path, os.path.getmtime(path))
+
+
+@memoize(maxsize=1)
+def _default_rules():
+    return RuleSet(TOP_SELLERS_BR)
+
+
+def diagnose_catalog(catalog, rules=None):
+    """Nota e regras disparadas de todos os SKUs do catálogo, numa passada."""
+    rules = load_rules(rules)
+    return rules.evaluate(catalog.columns(rules.columns), size=len(catalog))
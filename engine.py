@@ -0,0 +1,413 @@
+# -----------------------------------------------------------------------------
+# NÚCLEO LÓGICO (CALCULATION ENGINE)
+# -----------------------------------------------------------------------------
+# `calculate_financials` calcula um produto; `calculate_financials_batch`
+# aplica a mesma matemática a catálogos inteiros: uma linha por SKU, todas as
+# métricas calculadas em uma única passada NumPy em vez de uma chamada Python
+# (e um dict) por produto.
+#
+# O módulo não importa NumPy, pandas, Plotly nem Streamlit no carregamento:
+# jobs em lote e a CLI importam só o núcleo. O NumPy é importado dentro das
+# funções vetorizadas, na primeira chamada.
+
+from instrument import timed
+from memo import memoize
+
+# Colunas de entrada, na mesma ordem posicional de calculate_financials.
+# Taxas (tax, commission, tacos, return) são frações (0.16 = 16%), não %.
+INPUT_COLUMNS = (
+    "price_sale",
+    "cost_product",
+    "cost_inbound",
+    "cost_prep",
+    "tax_rate",
+    "commission_rate",
+    "fba_fee",
+    "storage_fee",
+    "tacos_target",
+    "return_rate",
+    "fixed_fee",
+    "misc_costs",
+)
+
+# Rótulos das entradas para gráficos e tabelas
+INPUT_LABELS = {
+    "price_sale": "Preço de Venda",
+    "cost_product": "Custo Unitário",
+    "cost_inbound": "Frete Inbound",
+    "cost_prep": "Embalagem/Prep",
+    "tax_rate": "Imposto",
+    "commission_rate": "Comissão Amazon",
+    "fba_fee": "Tarifa FBA",
+    "storage_fee": "Armazenagem",
+    "tacos_target": "TACOS",
+    "return_rate": "Devoluções",
+    "fixed_fee": "Taxa Fixa",
+    "misc_costs": "Outros Custos",
+}
+
+# Colunas de saída, na mesma ordem das chaves do dict escalar.
+METRIC_COLUMNS = (
+    "gross_revenue",
+    "val_tax",
+    "val_comm",
+    "val_fixed",
+    "val_fba",
+    "val_storage",
+    "val_ads",
+    "cogs_total",
+    "val_returns",
+    "val_misc",
+    "total_costs",
+    "net_profit",
+    "margin_net",
+    "roi",
+    "break_even",
+    "markup",
+)
+
+# Métricas que repetem uma entrada sem cálculo
+_PASSTHROUGH_METRICS = ("gross_revenue", "val_fixed", "val_fba", "val_storage", "val_misc")
+
+# Versão das fórmulas: entra na chave do cache em disco (store.py). Aumente
+# sempre que uma mudança no motor alterar algum resultado.
+ENGINE_VERSION = 1
+
+# Valor devolvido quando os custos variáveis consomem 100% do preço
+BREAK_EVEN_SENTINEL = 999999
+
+# Regra da Taxa Fixa: itens abaixo de R$79 pagam R$5,00 por unidade
+LOW_PRICE_THRESHOLD = 79.00
+LOW_PRICE_FIXED_FEE = 5.00
+
+
+def calculate_financials(p_sale, p_cost, p_inbound, p_prep, p_tax, p_comm, p_fba, p_storage, p_tacos, p_return, p_fixed, p_misc):
+    # Receita Bruta
+    gross_revenue = p_sale
+    
+    # Custos Diretos de Venda (Deduções da Receita)
+    val_tax = gross_revenue * p_tax
+    val_comm = gross_revenue * p_comm
+    val_fixed = p_fixed
+    val_fba = p_fba
+    val_storage = p_storage
+    val_ads = gross_revenue * p_tacos
+    
+    # Custo de Mercadoria Vendida (CMV Total)
+    cogs_total = p_cost + p_inbound + p_prep
+    
+    # Provisionamento de Perdas (Devoluções)
+    # Estima-se que na devolução perde-se as taxas de ida e volta e as vezes o produto não volta vendável.
+    # Simplificação: % da Venda como perda financeira direta
+    val_returns = gross_revenue * p_return
+    
+    total_costs = val_tax + val_comm + val_fixed + val_fba + val_storage + val_ads + cogs_total + val_returns + p_misc
+    
+    net_profit = gross_revenue - total_costs
+    
+    # Métricas
+    margin_gross = (gross_revenue - cogs_total) / gross_revenue if gross_revenue > 0 else 0
+    margin_net = net_profit / gross_revenue if gross_revenue > 0 else 0
+    roi = net_profit / cogs_total if cogs_total > 0 else 0 # ROI sobre investimento no produto
+    markup = (p_sale / cogs_total) if cogs_total > 0 else 0
+    
+    # Break-even Point calculation
+    # Fixed costs here refer to per-unit fixed values (FBA, Product Cost, Fixed Fee, Misc)
+    # Variable costs here refer to percentages (Tax, Comm, Tacos, Return)
+    # Price * (1 - Variable%) = FixedPerUnit
+    denominator = (1 - p_tax - p_comm - p_tacos - p_return)
+    break_even = (cogs_total + val_fixed + val_fba + val_storage + p_misc) / denominator if denominator > 0 else 999999
+
+    return {
+        "gross_revenue": gross_revenue,
+        "val_tax": val_tax,
+        "val_comm": val_comm,
+        "val_fixed": val_fixed,
+        "val_fba": val_fba,
+        "val_storage": val_storage,
+        "val_ads": val_ads,
+        "cogs_total": cogs_total,
+        "val_returns": val_returns,
+        "val_misc": p_misc,
+        "total_costs": total_costs,
+        "net_profit": net_profit,
+        "margin_net": margin_net * 100,
+        "roi": roi * 100,
+        "break_even": break_even,
+        "markup": markup
+    }
+
+
+# Versão memoizada para a UI: a chave é a tupla dos 12 parâmetros. O dict
+# devolvido é compartilhado entre reruns e não deve ser modificado.
+calculate_financials_cached = memoize(maxsize=1024)(calculate_financials)
+
+
+def default_fixed_fee(price_sale):
+    """Taxa fixa padrão (regra < R$79) para um preço ou array de preços."""
+    import numpy as np
+
+    return np.where(np.asarray(price_sale, dtype=np.float64) < LOW_PRICE_THRESHOLD, LOW_PRICE_FIXED_FEE, 0.0)
+
+
+def _resolve_inputs(data, columns):
+    # Aceita: DataFrame/mapping com as colunas de INPUT_COLUMNS, array 2-D
+    # (n_skus x 12) na ordem posicional, ou arrays/escalares nomeados.
+    import numpy as np
+
+    if data is None:
+        source = dict(columns)
+    elif hasattr(data, "columns") or isinstance(data, dict):
+        source = {name: data[name] for name in INPUT_COLUMNS if name in data}
+        source.update(columns)
+    else:
+        matrix = np.asarray(data, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[1] != len(INPUT_COLUMNS):
+            raise ValueError(
+                f"Array de entrada deve ter formato (n_skus, {len(INPUT_COLUMNS)}); recebido {matrix.shape}."
+            )
+        source = {name: matrix[:, i] for i, name in enumerate(INPUT_COLUMNS)}
+        source.update(columns)
+
+    # Colunas opcionais: taxa fixa segue a regra < R$79, outros custos = 0
+    if "fixed_fee" not in source and "price_sale" in source:
+        source["fixed_fee"] = default_fixed_fee(source["price_sale"])
+    source.setdefault("misc_costs", 0.0)
+
+    missing = [name for name in INPUT_COLUMNS if name not in source]
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(missing)}")
+
+    # Escalares ficam 0-d: o broadcasting do NumPy resolve o formato sem
+    # materializar 12 arrays completos
+    return {name: np.asarray(source[name], dtype=np.float64) for name in INPUT_COLUMNS}
+
+
+@timed("engine.net_profit_batch")
+def net_profit_batch(data=None, **columns):
+    """Só o lucro líquido unitário, com as mesmas entradas de calculate_financials_batch.
+
+    Caminho enxuto para laços quentes (simulações, grades de preço): mesma
+    ordem de soma do caminho completo, sem materializar as outras 15 métricas.
+    """
+    cols = _resolve_inputs(data, columns)
+    p_sale = cols["price_sale"]
+    total_costs = (
+        p_sale * cols["tax_rate"] + p_sale * cols["commission_rate"] + cols["fixed_fee"] + cols["fba_fee"]
+        + cols["storage_fee"] + p_sale * cols["tacos_target"]
+        + (cols["cost_product"] + cols["cost_inbound"] + cols["cost_prep"])
+        + p_sale * cols["return_rate"] + cols["misc_costs"]
+    )
+    return p_sale - total_costs
+
+
+@timed("engine.calculate_financials_batch")
+def calculate_financials_batch(data=None, **columns):
+    """Versão vetorizada de calculate_financials.
+
+    `data` pode ser um DataFrame (uma linha por SKU), um dict de arrays ou um
+    array 2-D na ordem de INPUT_COLUMNS; colunas também podem ser passadas por
+    nome. Retorna um DataFrame com METRIC_COLUMNS quando a entrada é um
+    DataFrame e, caso contrário, um dict de arrays NumPy.
+    """
+    import numpy as np
+
+    cols = _resolve_inputs(data, columns)
+
+    p_sale = cols["price_sale"]
+    p_tax = cols["tax_rate"]
+    p_comm = cols["commission_rate"]
+    p_tacos = cols["tacos_target"]
+    p_return = cols["return_rate"]
+    p_misc = cols["misc_costs"]
+
+    # Receita Bruta e deduções (mesma ordem de soma do caminho escalar)
+    gross_revenue = p_sale
+    val_tax = gross_revenue * p_tax
+    val_comm = gross_revenue * p_comm
+    val_fixed = cols["fixed_fee"]
+    val_fba = cols["fba_fee"]
+    val_storage = cols["storage_fee"]
+    val_ads = gross_revenue * p_tacos
+
+    cogs_total = cols["cost_product"] + cols["cost_inbound"] + cols["cost_prep"]
+    val_returns = gross_revenue * p_return
+
+    total_costs = val_tax + val_comm + val_fixed + val_fba + val_storage + val_ads + cogs_total + val_returns + p_misc
+    net_profit = gross_revenue - total_costs
+
+    # Guardas de divisão por zero: onde o denominador não é positivo o
+    # caminho escalar devolve 0 (ou o sentinela, no break-even)
+    has_revenue = gross_revenue > 0
+    has_cogs = cogs_total > 0
+    margin_net = np.divide(net_profit, gross_revenue, out=np.zeros_like(net_profit), where=has_revenue)
+    roi = np.divide(net_profit, cogs_total, out=np.zeros_like(net_profit), where=has_cogs)
+    markup = np.divide(p_sale, cogs_total, out=np.zeros_like(net_profit), where=has_cogs)
+
+    denominator = (1 - p_tax - p_comm - p_tacos - p_return)
+    break_even = np.divide(
+        cogs_total + val_fixed + val_fba + val_storage + p_misc,
+        denominator,
+        out=np.full_like(net_profit, BREAK_EVEN_SENTINEL),
+        where=denominator > 0,
+    )
+
+    result = {
+        "gross_revenue": gross_revenue,
+        "val_tax": val_tax,
+        "val_comm": val_comm,
+        "val_fixed": val_fixed,
+        "val_fba": val_fba,
+        "val_storage": val_storage,
+        "val_ads": val_ads,
+        "cogs_total": cogs_total,
+        "val_returns": val_returns,
+        "val_misc": p_misc,
+        "total_costs": total_costs,
+        "net_profit": net_profit,
+        "margin_net": margin_net * 100,
+        "roi": roi * 100,
+        "break_even": break_even,
+        "markup": markup,
+    }
+
+    # Todas as saídas no formato completo; as de passagem (ex.: val_fba) são
+    # copiadas para não compartilhar memória com a entrada do chamador
+    shape = net_profit.shape
+    for key, value in result.items():
+        if key in _PASSTHROUGH_METRICS or value.shape != shape:
+            result[key] = np.array(np.broadcast_to(value, shape))
+
+    if hasattr(data, "columns"):
+        import pandas as pd
+        return pd.DataFrame(result, index=data.index, columns=list(METRIC_COLUMNS))
+    return result
+
+
+# -----------------------------------------------------------------------------
+# MODO CENTAVOS EXATOS (INT64)
+# -----------------------------------------------------------------------------
+# Mesma matemática do caminho vetorizado, com dinheiro em centavos int64 e
+# taxas em milionésimos (money.py): cada componente é arredondado uma vez,
+# no modo abaixo, e somas e multiplicações por lote ficam exatas.
+
+# Arredondamento por componente ("inputs": preços e custos com mais de 2 casas)
+COMPONENT_ROUNDING = {
+    "inputs": "half_up",
+    "val_tax": "half_even",   # ABNT NBR 5891, como na nota fiscal
+    "val_comm": "half_up",
+    "val_ads": "half_up",
+    "val_returns": "half_up",
+    "break_even": "ceiling",  # menor preço, em centavos, que cobre os custos
+}
+
+# Métricas em dinheiro (centavos no modo exato); as demais são razões
+RATIO_METRICS = ("margin_net", "roi", "markup")
+MONEY_METRICS = tuple(name for name in METRIC_COLUMNS if name not in RATIO_METRICS)
+
+# Entradas que são frações do preço
+_RATE_COLUMNS = ("tax_rate", "commission_rate", "tacos_target", "return_rate")
+
+
+def _uniform(values):
+    # Coluna com um valor só (imposto, TACOS iguais no catálogo todo): converte
+    # um escalar e deixa o broadcasting fazer o resto
+    if values.ndim and values.size and values.min() == values.max():
+        return values.reshape(-1)[0]
+    return values
+
+
+@timed("engine.calculate_financials_cents")
+def calculate_financials_cents(data=None, rounding=None, **columns):
+    """calculate_financials_batch em centavos: MONEY_METRICS em int64, razões em float64.
+
+    Mesmas entradas de calculate_financials_batch (reais e frações).
+    `rounding` sobrescreve modos de COMPONENT_ROUNDING ({"val_comm": "ceiling"}).
+    Sempre devolve um dict de arrays.
+    """
+    import numpy as np
+
+    from money import CENTS, RATE_SCALE, apply_rate, divide_rounded, to_cents, to_rate_units
+
+    modes = {**COMPONENT_ROUNDING, **(rounding or {})}
+    cols = _resolve_inputs(data, columns)
+    shape = np.broadcast_shapes(*(values.shape for values in cols.values()))
+    cols = {name: _uniform(values) for name, values in cols.items()}
+    money = {name: to_cents(cols[name], modes["inputs"], name) for name in INPUT_COLUMNS if name not in _RATE_COLUMNS}
+    rates = {name: to_rate_units(cols[name], name) for name in _RATE_COLUMNS}
+
+    gross_revenue = money["price_sale"]
+    val_tax = apply_rate(gross_revenue, rates["tax_rate"], modes["val_tax"])
+    val_comm = apply_rate(gross_revenue, rates["commission_rate"], modes["val_comm"])
+    val_fixed = money["fixed_fee"]
+    val_fba = money["fba_fee"]
+    val_storage = money["storage_fee"]
+    val_ads = apply_rate(gross_revenue, rates["tacos_target"], modes["val_ads"])
+    cogs_total = money["cost_product"] + money["cost_inbound"] + money["cost_prep"]
+    val_returns = apply_rate(gross_revenue, rates["return_rate"], modes["val_returns"])
+    p_misc = money["misc_costs"]
+
+    total_costs = val_tax + val_comm + val_fixed + val_fba + val_storage + val_ads + cogs_total + val_returns + p_misc
+    net_profit = gross_revenue - total_costs
+
+    # Razões a partir dos centavos já arredondados: batem com os valores exibidos
+    profit = np.broadcast_to(net_profit, shape).astype(np.float64)
+    margin_net = np.divide(profit, gross_revenue, out=np.zeros(shape), where=gross_revenue > 0)
+    roi = np.divide(profit, cogs_total, out=np.zeros(shape), where=cogs_total > 0)
+    markup = np.divide(gross_revenue, cogs_total, out=np.zeros(shape), where=cogs_total > 0, dtype=np.float64)
+
+    # Break-even: custos por unidade / (1 - taxas), com o denominador inteiro
+    denominator = RATE_SCALE - (rates["tax_rate"] + rates["commission_rate"] + rates["tacos_target"] + rates["return_rate"])
+    positive = denominator > 0
+    fixed = cogs_total + val_fixed + val_fba + val_storage + p_misc
+    break_even = np.where(
+        positive,
+        divide_rounded(fixed * RATE_SCALE, np.where(positive, denominator, 1), modes["break_even"]),
+        BREAK_EVEN_SENTINEL * CENTS,
+    )
+
+    result = {
+        "gross_revenue": gross_revenue,
+        "val_tax": val_tax,
+        "val_comm": val_comm,
+        "val_fixed": val_fixed,
+        "val_fba": val_fba,
+        "val_storage": val_storage,
+        "val_ads": val_ads,
+        "cogs_total": cogs_total,
+        "val_returns": val_returns,
+        "val_misc": p_misc,
+        "total_costs": total_costs,
+        "net_profit": net_profit,
+        "margin_net": margin_net * 100,
+        "roi": roi * 100,
+        "break_even": break_even,
+        "markup": markup,
+    }
+    for key, value in result.items():
+        if np.shape(value) != shape:
+            result[key] = np.array(np.broadcast_to(value, shape))
+    return result
+
+
+def calculate_financials_exact_batch(data=None, rounding=None, **columns):
+    """calculate_financials_cents com o dinheiro de volta em reais: mesmo formato de calculate_financials_batch."""
+    from money import from_cents
+
+    result = calculate_financials_cents(data, rounding, **columns)
+    for key in MONEY_METRICS:
+        result[key] = from_cents(result[key])
+    if hasattr(data, "columns"):
+        import pandas as pd
+        return pd.DataFrame(result, index=data.index, columns=list(METRIC_COLUMNS))
+    return result
+
+
+def calculate_financials_exact(p_sale, p_cost, p_inbound, p_prep, p_tax, p_comm, p_fba, p_storage, p_tacos, p_return, p_fixed, p_misc):
+    """calculate_financials no modo centavos: mesmo dict, com cada componente arredondado ao centavo."""
+    params = (p_sale, p_cost, p_inbound, p_prep, p_tax, p_comm, p_fba, p_storage, p_tacos, p_return, p_fixed, p_misc)
+    result = calculate_financials_exact_batch(dict(zip(INPUT_COLUMNS, params)))
+    return {key: float(result[key]) for key in METRIC_COLUMNS}
+
+
+calculate_financials_exact_cached = memoize(maxsize=1024)(calculate_financials_exact)
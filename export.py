@@ -0,0 +1,185 @@
+# -----------------------------------------------------------------------------
+# EXPORTAÇÃO EM STREAMING (CSV, CSV.GZ, JSONL, PARQUET, XLSX)
+# -----------------------------------------------------------------------------
+# Recebe os resultados em blocos (DataFrames de iter_catalog_results ou
+# Catalog.iter_results) e escreve cada bloco assim que ele chega: o arquivo
+# inteiro nunca existe em memória, só o bloco atual e o buffer do escritor.
+# Um único produto é só o caso de um bloco com uma linha.
+
+import gzip
+import io
+
+from engine import INPUT_COLUMNS, METRIC_COLUMNS
+
+# formato -> (MIME, extensão)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "csv.gz": ("application/gzip", ".csv.gz"),
+    "jsonl": ("application/x-ndjson", ".jsonl"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+}
+
+# extensão -> formato (inclui apelidos comuns)
+_EXTENSIONS = {
+    ".csv.gz": "csv.gz", ".gz": "csv.gz", ".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl",
+    ".parquet": "parquet", ".pq": "parquet", ".xlsx": "xlsx",
+}
+
+# Nível 1: o zlib é o gargalo do CSV compactado; níveis altos custam ~3x o
+# tempo para arquivos só ~10% menores
+GZIP_LEVEL = 1
+
+# Linhas por chamada de to_json no JSONL
+_JSONL_ROWS = 10_000
+
+# Linhas de dados por planilha do Excel (limite do formato, menos o cabeçalho)
+XLSX_MAX_ROWS = 1_048_575
+
+# Tipos fixos no CSV/Parquet: identificação como texto, entradas e métricas
+# do motor como float64
+_TEXT_COLUMNS = frozenset(("sku", "product_name"))
+_FLOAT_COLUMNS = frozenset((*INPUT_COLUMNS, *METRIC_COLUMNS))
+
+
+def available_formats():
+    """Formatos exportáveis neste ambiente (XLSX depende do xlsxwriter, opcional)."""
+    from importlib.util import find_spec
+
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "xlsx" or find_spec("xlsxwriter") is not None]
+
+
+def export_format(path, default="csv"):
+    """Formato de exportação a partir da extensão do arquivo."""
+    name = str(path or "").lower()
+    for ext, fmt in _EXTENSIONS.items():
+        if name.endswith(ext):
+            return fmt
+    return default
+
+
+def _prepare(chunk, columns, precision):
+    if columns is not None:
+        missing = [name for name in columns if name not in chunk]
+        if missing:
+            raise ValueError(f"Colunas desconhecidas: {', '.join(missing)}")
+        chunk = chunk[list(columns)]
+    if precision is not None:
+        floats = chunk.select_dtypes("float64").columns
+        if len(floats):
+            chunk = chunk.copy()
+            chunk[floats] = chunk[floats].round(precision)
+    return chunk
+
+
+def _arrow_schema(chunk):
+    # Esquema declarado pelas colunas, não inferido dos valores do 1º bloco:
+    # um bloco com nomes todos vazios (tipo null) ou métricas inteiras não
+    # pode fixar o tipo do arquivo inteiro
+    import pyarrow as pa
+
+    fields = []
+    for name, dtype in chunk.dtypes.items():
+        if name in _FLOAT_COLUMNS:
+            arrow_type = pa.float64()
+        elif name not in _TEXT_COLUMNS and dtype.kind in "biufM":
+            arrow_type = pa.from_numpy_dtype(dtype)
+        else:
+            # SKUs numéricos também viram texto
+            arrow_type = pa.large_string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def _arrow_table(chunk, schema):
+    import pyarrow as pa
+
+    # Cada bloco é convertido para o esquema do arquivo
+    arrays = [pa.array(chunk[field.name], from_pandas=True).cast(field.type) for field in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _write_arrow(chunks, out, fmt):
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    writer = None
+    rows = 0
+    for chunk in chunks:
+        if writer is None:
+            schema = _arrow_schema(chunk)
+            if fmt == "parquet":
+                writer = pq.ParquetWriter(out, schema)
+            else:
+                writer = pa_csv.CSVWriter(out, schema)
+        writer.write_table(_arrow_table(chunk, schema))
+        rows += len(chunk)
+    if writer is not None:
+        writer.close()
+    return rows
+
+
+def _write_jsonl(chunks, out):
+    rows = 0
+    for chunk in chunks:
+        # to_json monta o texto inteiro em memória: fatias menores que o bloco
+        for start in range(0, len(chunk), _JSONL_ROWS):
+            part = chunk.iloc[start:start + _JSONL_ROWS]
+            out.write(part.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n").encode("utf-8") + b"\n")
+        rows += len(chunk)
+    return rows
+
+
+def _write_xlsx(chunks, out):
+    try:
+        import xlsxwriter
+    except ImportError:
+        raise ValueError("Exportar XLSX requer o pacote xlsxwriter (pip install xlsxwriter).") from None
+
+    # constant_memory: cada linha vai para disco assim que é escrita
+    workbook = xlsxwriter.Workbook(out, {"constant_memory": True, "nan_inf_to_errors": True})
+    sheet = None
+    sheet_rows = 0
+    rows = 0
+    for chunk in chunks:
+        header = list(chunk.columns)
+        for record in chunk.itertuples(index=False, name=None):
+            if sheet is None or sheet_rows == XLSX_MAX_ROWS:
+                sheet = workbook.add_worksheet(f"SKUs {rows // XLSX_MAX_ROWS + 1}")
+                sheet.write_row(0, 0, header)
+                sheet_rows = 0
+            sheet_rows += 1
+            sheet.write_row(sheet_rows, 0, record)
+            rows += 1
+    if sheet is None:
+        workbook.add_worksheet("SKUs 1")
+    workbook.close()
+    return rows
+
+
+def export_results(chunks, out, fmt="csv", columns=None, precision=None):
+    """Escreve os blocos de resultados em `out` (arquivo binário); devolve o nº de linhas.
+
+    `columns` seleciona (e ordena) as colunas; `precision` arredonda as
+    colunas numéricas para esse número de casas decimais.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato desconhecido: {fmt}. Use um de {', '.join(EXPORT_FORMATS)}.")
+    chunks = (_prepare(chunk, columns, precision) for chunk in chunks)
+
+    if fmt == "csv.gz":
+        with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=GZIP_LEVEL) as compressed:
+            return _write_arrow(chunks, compressed, "csv")
+    if fmt in ("csv", "parquet"):
+        return _write_arrow(chunks, out, fmt)
+    if fmt == "jsonl":
+        return _write_jsonl(chunks, out)
+    return _write_xlsx(chunks, out)
+
+
+def export_bytes(chunks, fmt="csv", columns=None, precision=None):
+    """Atalho para resultados pequenos (p.ex. um produto): o arquivo como bytes."""
+    buffer = io.BytesIO()
+    export_results(chunks, buffer, fmt, columns, precision)
+    return buffer.getvalue()
+
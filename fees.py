@@ -0,0 +1,261 @@
+# -----------------------------------------------------------------------------
+# TABELAS DE TARIFAS AMAZON BR (COMISSÃO, TAXA FIXA, FBA) VETORIZADAS
+# -----------------------------------------------------------------------------
+# Uma tabela de tarifas é um dict (ou arquivo JSON com o mesmo formato) com:
+#   referral   comissão por categoria, em faixas de preço, com tarifa mínima
+#   fixed_fee  taxa fixa por faixa de preço
+#   fba        faixas de tamanho (dimensões e peso máximos) e, em cada uma,
+#              a tarifa por peso faturável ("até X kg"), com R$/kg excedente
+#
+# Ao carregar, cada tabela vira um índice de intervalos ordenados: os limites
+# de todas as categorias (ou faixas de tamanho) num único array ordenado e
+# uma tabela (grupo, posição) -> faixa. Um np.searchsorted mais uma indexação
+# resolvem 1M de SKUs de uma vez, sem if/else por linha e sem arredondamento
+# nos limites.
+
+import json
+import os
+
+import numpy as np
+
+from engine import LOW_PRICE_FIXED_FEE, LOW_PRICE_THRESHOLD
+from memo import memoize
+
+# Colunas do catálogo usadas para derivar as tarifas
+FEE_COLUMNS = ("category", "length_cm", "width_cm", "height_cm", "weight_kg")
+DIMENSION_COLUMNS = FEE_COLUMNS[1:]
+
+# Valores de referência (Amazon.com.br). Confira a tabela vigente no Seller
+# Central e carregue-a com load_rate_card("tarifas.json") quando mudar.
+AMAZON_BR = {
+    "name": "Amazon.com.br (referência)",
+    "referral": {
+        "default": "Outros",
+        "min_fee": 1.00,
+        # categoria -> [[a partir de R$, comissão], ...]
+        "categories": {
+            "Acessórios de Eletrônicos": [[0, 0.15], [100, 0.10]],
+            "Alimentos e Bebidas": [[0, 0.10]],
+            "Automotivo": [[0, 0.12]],
+            "Bebês": [[0, 0.12]],
+            "Beleza": [[0, 0.13]],
+            "Brinquedos e Jogos": [[0, 0.12]],
+            "Casa": [[0, 0.12]],
+            "Celulares": [[0, 0.11]],
+            "Computadores": [[0, 0.12]],
+            "Cozinha": [[0, 0.12]],
+            "Eletrônicos": [[0, 0.10]],
+            "Esportes e Aventura": [[0, 0.12]],
+            "Ferramentas e Construção": [[0, 0.11]],
+            "Livros": [[0, 0.15]],
+            "Moda": [[0, 0.14]],
+            "Móveis": [[0, 0.15]],
+            "Pet Shop": [[0, 0.12]],
+            "Saúde e Cuidados Pessoais": [[0, 0.12]],
+            "Videogames": [[0, 0.11]],
+            "Outros": [[0, 0.15]],
+        },
+    },
+    # [[a partir de R$, taxa fixa], ...]: mesma regra do motor (< R$79)
+    "fixed_fee": [[0, LOW_PRICE_FIXED_FEE], [LOW_PRICE_THRESHOLD, 0.0]],
+    "fba": {
+        # Peso cúbico (kg) = C x L x A (cm) / divisor
+        "volumetric_divisor": 6000,
+        # Da menor para a maior; a última não tem limite
+        "tiers": [
+            {"name": "Envelope", "max_dims_cm": [33, 23, 2.5], "max_weight_kg": 0.5, "volumetric": False,
+             "weights_kg": [0.1, 0.25, 0.5], "fees": [9.45, 10.45, 11.45]},
+            {"name": "Padrão", "max_dims_cm": [45, 34, 26], "max_weight_kg": 12,
+             "weights_kg": [0.25, 0.5, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 12],
+             "fees": [12.45, 13.45, 14.50, 16.45, 18.45, 20.45, 22.45, 24.45, 26.45, 28.45, 30.45, 32.45, 36.45],
+             "extra_per_kg": 2.00},
+            {"name": "Grande", "max_dims_cm": [100, 60, 60], "max_weight_kg": 30,
+             "weights_kg": [5, 10, 15, 20, 25, 30], "fees": [28.45, 38.45, 48.45, 58.45, 68.45, 78.45],
+             "extra_per_kg": 2.50},
+            {"name": "Volumoso", "weights_kg": [30], "fees": [90.00], "extra_per_kg": 3.00},
+        ],
+    },
+}
+
+
+class _IntervalIndex:
+    """Faixas [limite, valor] de vários grupos, consultadas por (grupo, x) de uma vez.
+
+    Com `lower`, o limite é "a partir de" (vale a última faixa com limite <=
+    x); sem, é "até" (vale a primeira com limite >= x, e acima do último
+    limite o resultado é NaN). Entre dois limites consecutivos da união de
+    todos os grupos a faixa de cada grupo é constante, então basta a posição
+    de x nessa união.
+    """
+
+    def __init__(self, groups, lower, name):
+        bounds, values = [], []
+        for bands in groups:
+            group_bounds = np.asarray([bound for bound, _ in bands], dtype=np.float64)
+            if len(group_bounds) == 0 or np.any(np.diff(group_bounds) <= 0):
+                raise ValueError(f"Faixas de '{name}' devem ser não vazias e em ordem crescente.")
+            bounds.append(group_bounds)
+            values.append(np.asarray([value for _, value in bands], dtype=np.float64))
+        self.lower = lower
+        self.bounds = np.unique(np.concatenate(bounds))
+        # table[g, p]: valor da faixa do grupo g para x na posição p da união
+        self.table = np.empty((len(bounds), len(self.bounds) + 1))
+        for group, (group_bounds, group_values) in enumerate(zip(bounds, values)):
+            covered = np.r_[0, np.searchsorted(group_bounds, self.bounds, side="right")]
+            if lower:
+                self.table[group] = group_values[np.maximum(covered - 1, 0)]
+            else:
+                self.table[group] = np.append(group_values, np.nan)[covered]
+        self.last_bound = np.array([b[-1] for b in bounds])
+        self.last_value = np.array([v[-1] for v in values])
+
+    def lookup(self, group, x):
+        return self.table[group, np.searchsorted(self.bounds, x, side="right" if self.lower else "left")]
+
+
+class RateCard:
+    """Tabela de tarifas compilada em índices de intervalos ordenados."""
+
+    def __init__(self, spec):
+        try:
+            self._compile(spec)
+        except (KeyError, TypeError, IndexError, AttributeError) as exc:
+            raise ValueError(f"Tabela de tarifas inválida: {exc!r}") from None
+
+    def _compile(self, spec):
+        # Guardada para a chave do cache em disco: outra tabela, outro resultado
+        self.spec = spec
+        self.name = spec.get("name", "")
+        referral = spec["referral"]
+        self.categories = list(referral["categories"])
+        self._category_ids = {name.casefold(): i for i, name in enumerate(self.categories)}
+        default = referral.get("default", self.categories[-1])
+        if default.casefold() not in self._category_ids:
+            raise ValueError(f"Categoria padrão '{default}' não está na tabela.")
+        self.default_category = default
+        self.min_referral_fee = float(referral.get("min_fee", 0.0))
+        for name, bands in referral["categories"].items():
+            if bands[0][0] != 0:
+                raise ValueError(f"Comissão de '{name}' deve começar em R$0.")
+        self._referral = _IntervalIndex(referral["categories"].values(), True, "referral")
+
+        fixed = spec["fixed_fee"]
+        if fixed[0][0] != 0:
+            raise ValueError("Taxa fixa deve começar em R$0.")
+        self._fixed = _IntervalIndex([fixed], True, "fixed_fee")
+
+        fba = spec["fba"]
+        tiers = fba["tiers"]
+        self.tiers = [tier["name"] for tier in tiers]
+        self._divisor = float(fba.get("volumetric_divisor", 6000))
+        # Limites por faixa (dimensões em ordem decrescente); a última aceita tudo
+        self._max_dims = np.array([sorted(t.get("max_dims_cm") or [np.inf] * 3, reverse=True) for t in tiers])
+        self._max_weight = np.array([t.get("max_weight_kg", np.inf) for t in tiers], dtype=np.float64)
+        self._max_dims[-1], self._max_weight[-1] = np.inf, np.inf
+        self._volumetric = np.array([t.get("volumetric", True) for t in tiers])
+        self._extra_per_kg = np.array([t.get("extra_per_kg", 0.0) for t in tiers], dtype=np.float64)
+        self._fba = _IntervalIndex([list(zip(t["weights_kg"], t["fees"])) for t in tiers], False, "fba")
+
+    # -------------------------------------------------------------------------
+    def category_ids(self, category):
+        """Índice de cada categoria (sem diferenciar maiúsculas); desconhecidas vão para a padrão."""
+        import pandas as pd
+
+        values = np.asarray(category, dtype=object)
+        # factorize é por hash: só os nomes distintos passam pelo dicionário
+        codes, uniques = pd.factorize(values.ravel())
+        default = self._category_ids[self.default_category.casefold()]
+        ids = np.array([self._category_ids.get(str(name).strip().casefold(), default) for name in uniques] + [default],
+                       dtype=np.int64)
+        # Código -1 (categoria ausente/NaN) cai no último item: a padrão
+        return ids[codes].reshape(values.shape)
+
+    def referral_rate(self, category, price_sale, ids=None):
+        """Comissão efetiva (fração do preço), já com a tarifa mínima por item.
+
+        `ids` (de category_ids) dispensa `category`: quem consulta a mesma
+        coluna várias vezes resolve as categorias uma vez só.
+        """
+        price = np.asarray(price_sale, dtype=np.float64)
+        rate = self._referral.lookup(self.category_ids(category) if ids is None else ids, price)
+        if self.min_referral_fee > 0:
+            minimum = np.divide(self.min_referral_fee, price, out=np.zeros_like(price), where=price > 0)
+            rate = np.maximum(rate, minimum)
+        return rate
+
+    def fixed_fee(self, price_sale):
+        return self._fixed.lookup(0, np.asarray(price_sale, dtype=np.float64))
+
+    def size_tier(self, length_cm, width_cm, height_cm, weight_kg):
+        """Índice da menor faixa de tamanho (em self.tiers) em que o item cabe."""
+        a, b, c = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (length_cm, width_cm, height_cm)))
+        longest = np.maximum(np.maximum(a, b), c)
+        shortest = np.minimum(np.minimum(a, b), c)
+        middle = a + b + c - longest - shortest
+        weight = np.asarray(weight_kg, dtype=np.float64)
+        # Da maior para a menor: a menor faixa que couber sobrescreve as outras
+        tier = np.full(np.broadcast_shapes(longest.shape, weight.shape), len(self.tiers) - 1)
+        for i in range(len(self.tiers) - 2, -1, -1):
+            max_long, max_mid, max_short = self._max_dims[i]
+            fits = (longest <= max_long) & (middle <= max_mid) & (shortest <= max_short) & (weight <= self._max_weight[i])
+            tier[fits] = i
+        return tier
+
+    def billable_weight(self, length_cm, width_cm, height_cm, weight_kg, tier=None):
+        """Maior entre peso real e cúbico (faixas sem peso cúbico, como envelope, usam o real)."""
+        if tier is None:
+            tier = self.size_tier(length_cm, width_cm, height_cm, weight_kg)
+        weight = np.asarray(weight_kg, dtype=np.float64)
+        volume = np.asarray(length_cm, dtype=np.float64) * width_cm * height_cm / self._divisor
+        return np.where(self._volumetric[tier], np.maximum(weight, volume), weight)
+
+    def fba_fee(self, length_cm, width_cm, height_cm, weight_kg):
+        """Tarifa de saída FBA pela faixa de tamanho e peso faturável."""
+        tier = self.size_tier(length_cm, width_cm, height_cm, weight_kg)
+        weight = np.maximum(self.billable_weight(length_cm, width_cm, height_cm, weight_kg, tier), 0.0)
+        fee = self._fba.lookup(tier, weight)
+        # Acima da última faixa de peso: última tarifa + R$/kg excedente (kg iniciado)
+        above = np.isnan(fee)
+        if above.any():
+            excess = np.ceil(weight - self._fba.last_bound[tier])
+            fee = np.where(above, self._fba.last_value[tier] + excess * self._extra_per_kg[tier], fee)
+        return fee
+
+    def resolve(self, columns):
+        """Tarifas que faltam em `columns` (mapping de arrays), derivadas das colunas de FEE_COLUMNS.
+
+        commission_rate vem de `category` + preço; fba_fee das dimensões e do
+        peso; fixed_fee só do preço. Colunas já presentes não são tocadas.
+        """
+        fees = {}
+        if "price_sale" not in columns:
+            return fees
+        price = columns["price_sale"]
+        if "commission_rate" not in columns and "category" in columns:
+            fees["commission_rate"] = self.referral_rate(columns["category"], price)
+        if "fba_fee" not in columns and all(name in columns for name in DIMENSION_COLUMNS):
+            fees["fba_fee"] = self.fba_fee(*(columns[name] for name in DIMENSION_COLUMNS))
+        if "fixed_fee" not in columns:
+            fees["fixed_fee"] = self.fixed_fee(price)
+        return fees
+
+
+@memoize(maxsize=8)
+def _load_path(path, mtime):
+    with open(path, encoding="utf-8") as fh:
+        return RateCard(json.load(fh))
+
+
+def load_rate_card(source=None):
+    """Tabela compilada: None = AMAZON_BR; caminho de JSON; ou dict no mesmo formato."""
+    if source is None:
+        return _default_card()
+    if isinstance(source, dict):
+        return RateCard(source)
+    path = os.fspath(source)
+    return _load_path(path, os.path.getmtime(path))
+
+
+@memoize(maxsize=1)
+def _default_card():
+    return RateCard(AMAZON_BR)
@@ -0,0 +1,538 @@
+# -----------------------------------------------------------------------------
+# FIGURAS PLOTLY (CONSTRUÇÃO MEMOIZADA)
+# -----------------------------------------------------------------------------
+# Cada figura é construída a partir da tupla de parâmetros de
+# calculate_financials e guardada em cache LRU: reruns com os mesmos insumos
+# reaproveitam o objeto já montado. Rosca e cascata recebem o dict de métricas
+# já calculado (no modo de dinheiro da sessão) e ficam no cache do grafo do
+# produto (product_graph.py). As figuras devolvidas são compartilhadas,
+# então não devem ser alteradas depois de construídas. O timer fica por baixo
+# do cache: "figure.*" mede só as construções, não os acertos. O Plotly só é
+# importado quando uma figura é construída.
+
+import numpy as np
+
+from analysis import scenario_rows
+from engine import INPUT_LABELS
+from instrument import timed
+from memo import memoize
+
+# Paleta de Cores Amazon Pro
+COLOR_DARK_BLUE = "#232f3e"
+COLOR_ORANGE = "#ff9900"
+COLOR_LIGHT_GREY = "#f0f2f6"
+COLOR_SUCCESS = "#2ecc71"
+COLOR_DANGER = "#e74c3c"
+COLOR_WARNING = "#f1c40f"
+COLOR_TEXT = "#111111"
+
+# Faixas da nota do diagnóstico (velocímetro e histograma do catálogo)
+SCORE_CRITICAL = 60
+SCORE_WARNING = 85
+
+
+@timed("figure.donut")
+def donut_figure(metrics):
+    import plotly.graph_objects as go
+
+    # Donut Chart with better colors
+    labels = ['CMV (Produto+Frete)', 'Comissão Amazon', 'Logística FBA', 'Impostos', 'Marketing (Ads)', 'Outros (Dev/Arm)']
+    values = [
+        metrics['cogs_total'],
+        metrics['val_comm'] + metrics['val_fixed'],
+        metrics['val_fba'],
+        metrics['val_tax'],
+        metrics['val_ads'],
+        metrics['val_returns'] + metrics['val_storage'] + metrics['val_misc']
+    ]
+    colors = ['#2c3e50', '#f39c12', '#e67e22', '#e74c3c', '#3498db', '#95a5a6']
+
+    fig_donut = go.Figure(data=[go.Pie(labels=labels, values=values, hole=.6, marker=dict(colors=colors))])
+    fig_donut.update_layout(
+        margin=dict(t=20, b=20, l=20, r=20),
+        height=350,
+        showlegend=True,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.1, xanchor="center", x=0.5)
+    )
+    fig_donut.update_traces(textposition='outside', textinfo='percent+label')
+    return fig_donut
+
+
+@timed("figure.waterfall")
+def waterfall_figure(metrics):
+    import plotly.graph_objects as go
+
+    fig_waterfall = go.Figure(go.Waterfall(
+        name = "20", orientation = "v",
+        measure = ["relative", "relative", "relative", "relative", "relative", "relative", "relative", "relative", "total"],
+        x = ["Preço Venda", "Impostos", "Comissão Amazon", "Taxa FBA", "CMV (Produto)", "Ads (TACOS)", "Armazenagem", "Perdas/Dev", "LUCRO LÍQUIDO"],
+        textposition = "outside",
+        text = [f"R${metrics['gross_revenue']:.2f}", f"-{metrics['val_tax']:.2f}", f"-{metrics['val_comm']+metrics['val_fixed']:.2f}",
+                f"-{metrics['val_fba']:.2f}", f"-{metrics['cogs_total']:.2f}", f"-{metrics['val_ads']:.2f}",
+                f"-{metrics['val_storage']:.2f}", f"-{metrics['val_returns']:.2f}", f"R${metrics['net_profit']:.2f}"],
+        y = [metrics['gross_revenue'], -metrics['val_tax'], -(metrics['val_comm']+metrics['val_fixed']),
+             -metrics['val_fba'], -metrics['cogs_total'], -metrics['val_ads'],
+             -metrics['val_storage'], -metrics['val_returns'], metrics['net_profit']],
+        connector = {"line":{"color":"rgb(63, 63, 63)"}},
+        decreasing = {"marker":{"color":COLOR_DANGER}},
+        increasing = {"marker":{"color":COLOR_SUCCESS}},
+        totals = {"marker":{"color":COLOR_ORANGE}}
+    ))
+
+    fig_waterfall.update_layout(
+        title = "DRE Visual (Cascata)",
+        showlegend = False,
+        height=550,
+        waterfallgap = 0.3
+    )
+    return fig_waterfall
+
+
+@memoize(maxsize=64)
+@timed("figure.scenario_table")
+def scenario_table_figure(params, money_mode="float"):
+    import plotly.graph_objects as go
+
+    rows = scenario_rows(params, money_mode)
+    columns = list(rows[0])
+
+    # Tabela Profissional usando Plotly (Substitui o st.dataframe com style que estava quebrando)
+    fig_table = go.Figure(data=[go.Table(
+        header=dict(values=columns,
+                    fill_color=COLOR_DARK_BLUE,
+                    font=dict(color='white', size=14),
+                    align='left',
+                    height=40),
+        cells=dict(values=[[row[k] for row in rows] for k in columns],
+                   fill_color=[[COLOR_LIGHT_GREY if i % 2 == 0 else 'white' for i in range(len(rows))]],
+                   align='left',
+                   font=dict(color=[COLOR_TEXT], size=13),
+                   height=30)
+    )])
+
+    fig_table.update_layout(
+        margin=dict(l=0, r=0, t=0, b=0),
+        height=200
+    )
+    return fig_table
+
+
+@memoize(maxsize=64)
+@timed("figure.gauge")
+def gauge_figure(score):
+    import plotly.graph_objects as go
+
+    fig_gauge = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = score,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        gauge = {
+            'axis': {'range': [0, 100]},
+            'bar': {'color': COLOR_ORANGE},
+            'steps': [
+                {'range': [0, SCORE_CRITICAL], 'color': "#ffe0e0"},
+                {'range': [SCORE_CRITICAL, SCORE_WARNING], 'color': "#fff3cd"},
+                {'range': [SCORE_WARNING, 100], 'color': "#e0f7fa"}]
+        }
+    ))
+    fig_gauge.update_layout(height=180, margin=dict(t=30, b=30, l=30, r=30))
+    return fig_gauge
+
+
+@timed("figure.montecarlo")
+def montecarlo_figure(result, display_bins=128):
+    import plotly.graph_objects as go
+
+    # O histograma fino da simulação é reagrupado para ~128 barras: o
+    # payload não depende do número de sorteios
+    counts = result["counts"]
+    group = max(1, len(counts) // display_bins)
+    usable = len(counts) - len(counts) % group
+    counts = counts[:usable].reshape(-1, group).sum(axis=1)
+    edges = result["edges"][:usable + 1:group]
+    centers = (edges[:-1] + edges[1:]) / 2
+    share = counts / result["n_samples"] * 100
+
+    fig_mc = go.Figure(go.Bar(
+        x=centers, y=share, width=edges[1] - edges[0],
+        marker=dict(color=[COLOR_DANGER if c < 0 else COLOR_SUCCESS for c in centers]),
+        hovertemplate="Lucro ≈ R$ %{x:.2f}<br>%{y:.2f}% das amostras<extra></extra>"
+    ))
+
+    # Faixas de percentil e VaR como linhas verticais
+    pct = result["percentiles"]
+    lines = [
+        (result["var"], f"VaR {100 - result['alpha'] * 100:.0f}%", COLOR_DANGER),
+        (pct[5], "P5", "#7f8c8d"),
+        (pct[50], "Mediana", COLOR_DARK_BLUE),
+        (pct[95], "P95", "#7f8c8d"),
+    ]
+    for x, label, color in lines:
+        fig_mc.add_vline(x=x, line=dict(color=color, dash="dash"), annotation_text=label, annotation_position="top")
+    fig_mc.add_vrect(x0=pct[25], x1=pct[75], fillcolor=COLOR_ORANGE, opacity=0.12, line_width=0)
+
+    fig_mc.update_layout(
+        title="Distribuição do Lucro Líquido Unitário",
+        xaxis_title="Lucro Líquido (R$)",
+        yaxis_title="% das amostras",
+        showlegend=False,
+        bargap=0,
+        height=420
+    )
+    return fig_mc
+
+
+@timed("figure.profit_curve")
+def profit_curve_figure(grid, profit_curve, best_price, current_price, max_points=600):
+    import plotly.graph_objects as go
+
+    # A grade tem 10k+ pontos; para o navegador basta uma amostra regular
+    step = max(1, len(grid) // max_points)
+    fig_curve = go.Figure(go.Scatter(
+        x=grid[::step], y=profit_curve[::step], mode="lines",
+        line=dict(color=COLOR_DARK_BLUE, width=3),
+        hovertemplate="Preço R$ %{x:.2f}<br>Lucro total R$ %{y:,.2f}<extra></extra>"
+    ))
+    fig_curve.add_vline(x=best_price, line=dict(color=COLOR_SUCCESS, dash="dash"), annotation_text="Ótimo", annotation_position="top")
+    fig_curve.add_vline(x=current_price, line=dict(color=COLOR_ORANGE, dash="dot"), annotation_text="Atual", annotation_position="bottom")
+    fig_curve.add_hline(y=0, line=dict(color="#999", width=1))
+    fig_curve.update_layout(
+        title="Lucro Total x Preço",
+        xaxis_title="Preço de Venda (R$)",
+        yaxis_title="Lucro Total (R$)",
+        showlegend=False,
+        height=380
+    )
+    return fig_curve
+
+
+@timed("figure.tornado")
+def tornado_figure(base, rows, bump, metric_label):
+    import plotly.graph_objects as go
+
+    # Maior swing no topo: o eixo y do Plotly cresce de baixo para cima
+    rows = rows[::-1]
+    labels = [INPUT_LABELS[name] for name, *_ in rows]
+    fig_tornado = go.Figure()
+    fig_tornado.add_trace(go.Bar(
+        y=labels, x=[low - base for _, low, *_ in rows], base=base, orientation="h",
+        name=f"-{bump * 100:.0f}%", marker=dict(color=COLOR_DARK_BLUE),
+        hovertemplate="%{y} -" + f"{bump * 100:.0f}%" + "<br>" + metric_label + ": %{x:.2f}<extra></extra>"
+    ))
+    fig_tornado.add_trace(go.Bar(
+        y=labels, x=[high - base for _, _, high, *_ in rows], base=base, orientation="h",
+        name=f"+{bump * 100:.0f}%", marker=dict(color=COLOR_ORANGE),
+        hovertemplate="%{y} +" + f"{bump * 100:.0f}%" + "<br>" + metric_label + ": %{x:.2f}<extra></extra>"
+    ))
+    fig_tornado.add_vline(x=base, line=dict(color="#999", width=1))
+    fig_tornado.update_layout(
+        title=f"Tornado: {metric_label} com ±{bump * 100:.0f}% em cada entrada",
+        xaxis_title=metric_label,
+        barmode="overlay",
+        height=460,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.25, xanchor="center", x=0.5)
+    )
+    return fig_tornado
+
+
+@timed("figure.heatmap")
+def heatmap_figure(x_values, y_values, z, x_label, y_label, metric_label):
+    import plotly.graph_objects as go
+
+    fig_heat = go.Figure(go.Heatmap(
+        x=x_values, y=y_values, z=z,
+        colorscale=[[0, COLOR_DANGER], [0.5, "#ffffff"], [1, COLOR_SUCCESS]], zmid=0,
+        colorbar=dict(title=metric_label),
+        hovertemplate=f"{x_label}: %{{x:.2f}}<br>{y_label}: %{{y:.2f}}<br>{metric_label}: %{{z:.2f}}<extra></extra>"
+    ))
+    fig_heat.update_layout(
+        title=f"{metric_label}: {x_label} x {y_label}",
+        xaxis_title=x_label,
+        yaxis_title=y_label,
+        height=460
+    )
+    return fig_heat
+
+
+@timed("figure.cashflow")
+def cashflow_figure(dates, cumulative_cash, stock, payback_date=None):
+    import plotly.graph_objects as go
+
+    fig_cash = go.Figure()
+    fig_cash.add_trace(go.Scatter(
+        x=dates, y=stock, name="Estoque (un.)", yaxis="y2", fill="tozeroy", mode="none",
+        fillcolor="rgba(35, 47, 62, 0.12)",
+        hovertemplate="%{x|%d/%m/%Y}<br>Estoque: %{y:,.0f} un.<extra></extra>"
+    ))
+    fig_cash.add_trace(go.Scatter(
+        x=dates, y=cumulative_cash, name="Caixa Acumulado", mode="lines",
+        line=dict(color=COLOR_ORANGE, width=3),
+        hovertemplate="%{x|%d/%m/%Y}<br>Caixa: R$ %{y:,.2f}<extra></extra>"
+    ))
+    fig_cash.add_hline(y=0, line=dict(color="#999", width=1))
+    if payback_date is not None:
+        fig_cash.add_vline(x=payback_date, line=dict(color=COLOR_SUCCESS, dash="dash"))
+        fig_cash.add_annotation(x=payback_date, y=1, yref="paper", text="Payback", showarrow=False, yanchor="bottom")
+    fig_cash.update_layout(
+        title="Caixa Acumulado x Estoque",
+        yaxis=dict(title="Caixa Acumulado (R$)"),
+        yaxis2=dict(title="Estoque (un.)", overlaying="y", side="right", showgrid=False, rangemode="tozero"),
+        height=420,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.25, xanchor="center", x=0.5)
+    )
+    return fig_cash
+
+
+# -----------------------------------------------------------------------------
+# FIGURAS DO CATÁLOGO (MILHARES A MILHÕES DE SKUs)
+# -----------------------------------------------------------------------------
+# O JSON de uma figura cresce com o número de pontos. Até WEBGL_MIN_POINTS
+# SKUs o scatter é SVG comum, com o SKU no hover; até SCATTER_MAX_POINTS vira
+# Scattergl (WebGL) em float32, sem rótulos; acima disso os pontos viram uma
+# grade de densidade calculada no servidor, e só os SKUs fora da faixa
+# P0,5–P99,5 (até OUTLIER_MAX_POINTS) seguem como pontos. Histograma e
+# comparativo têm tamanho fixo. Assim nenhuma figura do catálogo passa de
+# CATALOG_PAYLOAD_BUDGET bytes, com qualquer número de SKUs.
+
+CATALOG_PAYLOAD_BUDGET = 1_000_000
+WEBGL_MIN_POINTS = 2_000
+SCATTER_MAX_POINTS = 50_000
+OUTLIER_MAX_POINTS = 5_000
+DENSITY_BINS = 150
+PROFIT_BINS = 120
+
+# Faixa percentual usada na grade de densidade e no histograma
+_CLIP_PERCENTILES = (0.5, 99.5)
+
+# Fatias do preço no comparativo de SKUs: rótulo -> métricas somadas
+PRICE_COMPONENTS = (
+    ("Impostos", ("val_tax",)),
+    ("Comissão Amazon", ("val_comm", "val_fixed")),
+    ("Taxa FBA", ("val_fba",)),
+    ("CMV (Produto)", ("cogs_total",)),
+    ("Ads (TACOS)", ("val_ads",)),
+    ("Armazenagem", ("val_storage",)),
+    ("Perdas/Dev", ("val_returns",)),
+    ("Outros", ("val_misc",)),
+)
+_COMPONENT_COLORS = ('#e74c3c', '#f39c12', '#e67e22', '#2c3e50', '#3498db', '#95a5a6', '#7f8c8d', '#bdc3c7')
+
+
+def _clip_range(values):
+    # A faixa é só para o desenho: uma amostra regular de até ~200k basta
+    low, high = np.percentile(values[::max(1, len(values) // 200_000)], _CLIP_PERCENTILES)
+    if high <= low:
+        low, high = low - 1.0, high + 1.0
+    return float(low), float(high)
+
+
+def _density_counts(x, y, x_range, y_range, bins):
+    # Mesmo resultado de np.histogram2d (bordas fechadas à direita), ~7x mais rápido
+    fx = (x - x_range[0]) * (bins / (x_range[1] - x_range[0]))
+    fy = (y - y_range[0]) * (bins / (y_range[1] - y_range[0]))
+    inside = (fx >= 0) & (fx <= bins) & (fy >= 0) & (fy <= bins)
+    ix = np.minimum(fx[inside].astype(np.intp), bins - 1)
+    iy = np.minimum(fy[inside].astype(np.intp), bins - 1)
+    counts = np.bincount(iy * bins + ix, minlength=bins * bins).reshape(bins, bins)
+    return counts, ~inside
+
+
+def _log_ticks(max_count):
+    decades = 10 ** np.arange(int(np.log10(max(max_count, 1))) + 1)
+    return dict(tickvals=np.log10(decades).tolist(), ticktext=[f"{d:,}" for d in decades])
+
+
+@timed("figure.catalog_scatter")
+def catalog_scatter_figure(margin, roi, labels=None):
+    """Margem líquida x ROI de todos os SKUs (pontos, WebGL ou densidade, conforme o tamanho)."""
+    import plotly.graph_objects as go
+
+    margin = np.asarray(margin, dtype=np.float64)
+    roi = np.asarray(roi, dtype=np.float64)
+    finite = np.isfinite(margin) & np.isfinite(roi)
+    if not finite.all():
+        margin, roi = margin[finite], roi[finite]
+        labels = None if labels is None else np.asarray(labels)[finite]
+    n = len(margin)
+    hover = "Margem %{x:.1f}%<br>ROI %{y:.1f}%<extra></extra>"
+
+    fig_scatter = go.Figure()
+    if n <= WEBGL_MIN_POINTS:
+        fig_scatter.add_trace(go.Scatter(
+            x=margin, y=roi, mode="markers", text=None if labels is None else [str(v) for v in labels],
+            marker=dict(color=COLOR_DARK_BLUE, size=7, opacity=0.7),
+            hovertemplate=("%{text}<br>" if labels is not None else "") + hover
+        ))
+        title = f"Margem x ROI ({n:,} SKUs)"
+    elif n <= SCATTER_MAX_POINTS:
+        fig_scatter.add_trace(go.Scattergl(
+            x=margin.astype(np.float32), y=roi.astype(np.float32), mode="markers",
+            marker=dict(color=COLOR_DARK_BLUE, size=4, opacity=0.5), hovertemplate=hover
+        ))
+        title = f"Margem x ROI ({n:,} SKUs, WebGL)"
+    else:
+        x_range, y_range = _clip_range(margin), _clip_range(roi)
+        counts, outside = _density_counts(margin, roi, x_range, y_range, DENSITY_BINS)
+        counts = counts.astype(np.float32)
+        x_edges = np.linspace(*x_range, DENSITY_BINS + 1)
+        y_edges = np.linspace(*y_range, DENSITY_BINS + 1)
+        with np.errstate(divide="ignore"):
+            z = np.where(counts > 0, np.log10(counts), np.nan).astype(np.float32)
+        fig_scatter.add_trace(go.Heatmap(
+            x=((x_edges[:-1] + x_edges[1:]) / 2).astype(np.float32),
+            y=((y_edges[:-1] + y_edges[1:]) / 2).astype(np.float32),
+            z=z, customdata=counts, zmin=0,
+            colorscale=[[0, "#dfe6ee"], [0.5, "#5d7fa3"], [1, COLOR_DARK_BLUE]],
+            colorbar=dict(title="SKUs", **_log_ticks(counts.max())),
+            hovertemplate="Margem ≈ %{x:.1f}%<br>ROI ≈ %{y:.1f}%<br>%{customdata:,.0f} SKUs<extra></extra>"
+        ))
+        # Fora da faixa da grade: amostra regular dos pontos extremos
+        outside = np.flatnonzero(outside)
+        outside = outside[::max(1, -(-len(outside) // OUTLIER_MAX_POINTS))]
+        if len(outside):
+            fig_scatter.add_trace(go.Scattergl(
+                x=margin[outside].astype(np.float32), y=roi[outside].astype(np.float32), mode="markers",
+                marker=dict(color=COLOR_ORANGE, size=4, opacity=0.6), hovertemplate=hover
+            ))
+        title = f"Margem x ROI ({n:,} SKUs, densidade)"
+
+    fig_scatter.add_vline(x=0, line=dict(color="#999", width=1))
+    fig_scatter.add_hline(y=0, line=dict(color="#999", width=1))
+    fig_scatter.update_layout(
+        title=title,
+        xaxis_title="Margem Líquida (%)",
+        yaxis_title="ROI (%)",
+        showlegend=False,
+        height=460
+    )
+    return fig_scatter
+
+
+@timed("figure.catalog_profit")
+def catalog_profit_figure(net_profit, bins=PROFIT_BINS):
+    """Histograma do lucro líquido unitário dos SKUs (caudas somadas às barras das pontas)."""
+    import plotly.graph_objects as go
+
+    profit = np.asarray(net_profit, dtype=np.float64)
+    profit = profit[np.isfinite(profit)]
+    low, high = _clip_range(profit)
+    counts, edges = np.histogram(np.clip(profit, low, high), bins=bins, range=(low, high))
+    centers = (edges[:-1] + edges[1:]) / 2
+    losses = int(np.count_nonzero(profit < 0))
+
+    fig_profit = go.Figure(go.Bar(
+        x=centers, y=counts, width=edges[1] - edges[0],
+        marker=dict(color=[COLOR_DANGER if c < 0 else COLOR_SUCCESS for c in centers]),
+        hovertemplate="Lucro ≈ R$ %{x:.2f}<br>%{y:,} SKUs<extra></extra>"
+    ))
+    fig_profit.add_vline(x=float(np.median(profit)), line=dict(color=COLOR_DARK_BLUE, dash="dash"),
+                         annotation_text="Mediana", annotation_position="top")
+    fig_profit.update_layout(
+        title=f"Lucro Líquido por SKU — {losses:,} de {len(profit):,} no prejuízo ({losses / max(len(profit), 1):.1%})",
+        xaxis_title="Lucro Líquido Unitário (R$)",
+        yaxis_title="SKUs",
+        showlegend=False,
+        bargap=0,
+        height=420
+    )
+    return fig_profit
+
+
+@timed("figure.catalog_score")
+def catalog_score_figure(score, max_score=100, bin_width=5):
+    """Histograma da nota do diagnóstico por SKU, com as barras nas cores do velocímetro."""
+    import plotly.graph_objects as go
+
+    score = np.asarray(score, dtype=np.float64)
+    edges = np.arange(0, max_score + bin_width, bin_width, dtype=np.float64)
+    # A última faixa inclui a nota máxima (np.histogram fecha a última barra)
+    counts, edges = np.histogram(np.clip(score, 0, max_score), bins=edges)
+    centers = (edges[:-1] + edges[1:]) / 2
+    colors = [COLOR_DANGER if c < SCORE_CRITICAL else COLOR_WARNING if c < SCORE_WARNING else COLOR_SUCCESS for c in centers]
+    critical = int(np.count_nonzero(score < SCORE_CRITICAL))
+
+    fig_score = go.Figure(go.Bar(
+        x=centers, y=counts, width=bin_width, marker=dict(color=colors),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate="Nota %{customdata[0]:.0f}–%{customdata[1]:.0f}<br>%{y:,} SKUs<extra></extra>"
+    ))
+    fig_score.update_layout(
+        title=f"Nota do Diagnóstico por SKU — {critical:,} de {len(score):,} abaixo de {SCORE_CRITICAL} ({critical / max(len(score), 1):.1%})",
+        xaxis_title="Nota",
+        yaxis_title="SKUs",
+        xaxis=dict(range=[0, max_score]),
+        showlegend=False,
+        bargap=0.05,
+        height=380
+    )
+    return fig_score
+
+
+@timed("figure.catalog_waterfall")
+def catalog_waterfall_figure(labels, results):
+    """Cascata de cada SKU lado a lado: custos e lucro em % do preço, uma barra por SKU.
+
+    `results` tem as métricas de METRIC_COLUMNS (arrays alinhados com `labels`).
+    """
+    import plotly.graph_objects as go
+
+    revenue = np.asarray(results["gross_revenue"], dtype=np.float64)
+    scale = np.divide(100.0, revenue, out=np.zeros_like(revenue), where=revenue > 0)
+    # Maior lucro no topo: o eixo y do Plotly cresce de baixo para cima
+    labels = [str(label) for label in labels][::-1]
+
+    fig_cmp = go.Figure()
+    for (label, columns), color in zip(PRICE_COMPONENTS, _COMPONENT_COLORS):
+        share = sum(np.asarray(results[col], dtype=np.float64) for col in columns) * scale
+        fig_cmp.add_trace(go.Bar(
+            y=labels, x=share[::-1], name=label, orientation="h", marker=dict(color=color),
+            hovertemplate="%{y}<br>" + label + ": %{x:.1f}% do preço<extra></extra>"
+        ))
+    profit_share = np.asarray(results["net_profit"], dtype=np.float64) * scale
+    fig_cmp.add_trace(go.Bar(
+        y=labels, x=profit_share[::-1], name="Lucro Líquido", orientation="h",
+        marker=dict(color=[COLOR_SUCCESS if v >= 0 else COLOR_DANGER for v in profit_share[::-1]]),
+        hovertemplate="%{y}<br>Lucro: %{x:.1f}% do preço<extra></extra>"
+    ))
+    fig_cmp.add_vline(x=0, line=dict(color="#999", width=1))
+    fig_cmp.update_layout(
+        title="Composição do Preço por SKU (% do preço de venda)",
+        xaxis_title="% do Preço de Venda",
+        barmode="relative",
+        height=max(360, 28 * len(labels) + 160),
+        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
+    )
+    return fig_cmp
+
+
+@timed("figure.marketplace_heatmap")
+def marketplace_heatmap_figure(labels, profiles, net_profit, best=None):
+    """Lucro líquido (R$) de cada SKU em cada marketplace, com o melhor de cada linha marcado.
+
+    `net_profit` tem formato (SKUs, marketplaces), alinhado com `labels` e `profiles`.
+    """
+    import plotly.graph_objects as go
+
+    profit = np.asarray(net_profit, dtype=np.float64)
+    if best is None:
+        best = np.argmax(profit, axis=1)
+    # Primeiro SKU no topo: o eixo y do Plotly cresce de baixo para cima
+    labels = [str(label) for label in labels][::-1]
+    profit = profit[::-1]
+    text = np.char.mod("%.2f", profit).astype(object)
+    rows = np.arange(len(labels))
+    text[rows, np.asarray(best)[::-1]] = ["★ " + value for value in text[rows, np.asarray(best)[::-1]]]
+
+    fig_mkt = go.Figure(go.Heatmap(
+        x=list(profiles), y=labels, z=profit, text=text, texttemplate="%{text}",
+        colorscale=[[0, COLOR_DANGER], [0.5, "#ffffff"], [1, COLOR_SUCCESS]], zmid=0,
+        colorbar=dict(title="R$"),
+        hovertemplate="%{y}<br>%{x}: R$ %{z:.2f}<extra></extra>"
+    ))
+    fig_mkt.update_layout(
+        title="Lucro Líquido Unitário por SKU e Marketplace (R$, ★ = melhor)",
+        xaxis=dict(side="top", type="category"),
+        yaxis=dict(type="category"),
+        height=max(360, 26 * len(labels) + 160)
+    )
+    return fig_mkt
@@ -0,0 +1,124 @@
+# -----------------------------------------------------------------------------
+# GRAFO DE DEPENDÊNCIAS (RECÁLCULO INCREMENTAL)
+# -----------------------------------------------------------------------------
+# Cada valor derivado é um nó que declara de quais entradas ou outros nós
+# depende. Quando uma entrada muda, só os nós a jusante dela são marcados como
+# sujos; na leitura, um nó sujo é recalculado (depois das suas dependências) e
+# um nó limpo devolve o valor guardado. Nós que ninguém lê neste rerun (p.ex.
+# de uma seção fechada) ficam sujos até serem pedidos.
+
+import time
+from collections import defaultdict
+
+import instrument
+
+
+def _unchanged(old, value):
+    if old is None or type(old) is not type(value):
+        return False
+    if isinstance(value, float) and value != value:
+        # NaN != NaN: um campo que continua vazio não é mudança
+        return old != old
+    return old == value
+
+
+class DependencyGraph:
+    """Entradas + nós derivados, com invalidação a jusante e tempo por nó."""
+
+    def __init__(self):
+        self._inputs = {}
+        self._funcs = {}
+        self._deps = {}
+        self._dependents = defaultdict(list)
+        self._values = {}
+        self._dirty = set()
+        self._stats = {}
+
+    def add_inputs(self, *names):
+        for name in names:
+            self._inputs.setdefault(name, None)
+
+    def add_node(self, name, deps, func):
+        """Declara `name` = func(*valores de deps); deps são entradas ou nós já declarados."""
+        unknown = [dep for dep in deps if dep not in self._inputs and dep not in self._funcs]
+        if unknown:
+            raise ValueError(f"Nó '{name}' depende de nomes não declarados: {', '.join(unknown)}")
+        self._funcs[name] = func
+        self._deps[name] = tuple(deps)
+        for dep in deps:
+            self._dependents[dep].append(name)
+        self._dirty.add(name)
+        self._stats[name] = {"computes": 0, "hits": 0, "last_ms": 0.0, "total_ms": 0.0, "status": "idle"}
+
+    def node(self, *deps):
+        """Decorator: o nome do nó é o nome da função."""
+        def decorator(func):
+            self.add_node(func.__name__, deps, func)
+            return func
+        return decorator
+
+    def set_inputs(self, **values):
+        """Atualiza entradas; invalida só o que depende das que mudaram. Devolve as entradas alteradas."""
+        changed = []
+        for name, value in values.items():
+            if name not in self._inputs:
+                raise KeyError(f"Entrada desconhecida: {name}")
+            if not _unchanged(self._inputs[name], value):
+                self._inputs[name] = value
+                changed.append(name)
+        stack = [dependent for name in changed for dependent in self._dependents[name]]
+        while stack:
+            name = stack.pop()
+            if name not in self._dirty:
+                self._dirty.add(name)
+                stack.extend(self._dependents[name])
+        return changed
+
+    def get(self, name):
+        if name in self._inputs:
+            return self._inputs[name]
+        stats = self._stats[name]
+        if name not in self._dirty:
+            instrument.count("graph.hits")
+            stats["hits"] += 1
+            if stats["status"] == "idle":
+                stats["status"] = "hit"
+            return self._values[name]
+
+        # Dependências primeiro: o tempo medido é só o do próprio nó
+        args = [self.get(dep) for dep in self._deps[name]]
+        start = time.perf_counter()
+        value = self._funcs[name](*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        instrument.record(f"node.{name}", elapsed / 1000)
+        instrument.count("graph.computes")
+        self._values[name] = value
+        self._dirty.discard(name)
+        stats["computes"] += 1
+        stats["last_ms"] = elapsed
+        stats["total_ms"] += elapsed
+        stats["status"] = "computed"
+        return value
+
+    def begin_run(self):
+        """Zera o status por rerun (recalculado / reaproveitado / não usado)."""
+        for stats in self._stats.values():
+            stats["status"] = "idle"
+
+    def downstream(self, name):
+        """Nós invalidados por uma mudança em `name` (entrada ou nó)."""
+        seen = set()
+        stack = list(self._dependents[name])
+        while stack:
+            node = stack.pop()
+            if node not in seen:
+                seen.add(node)
+                stack.extend(self._dependents[node])
+        return [node for node in self._funcs if node in seen]
+
+    def report(self):
+        """Lista de dicts por nó: dependências, status neste rerun, tempos e contagens."""
+        return [
+            {"node": name, "deps": ", ".join(self._deps[name]), "dirty": name in self._dirty, **self._stats[name]}
+            for name in self._funcs
+        ]
@@ -0,0 +1,205 @@
+# -----------------------------------------------------------------------------
+# INSTRUMENTAÇÃO (TIMERS E CONTADORES DO CAMINHO QUENTE)
+# -----------------------------------------------------------------------------
+# Timers e contadores por etapa (widgets, nós do grafo, construção das
+# figuras, serialização para o navegador), agregados no processo e também
+# por rerun (por thread de script). Exporta em JSON ou no formato texto do
+# Prometheus.
+#
+# Desligada (padrão, ou FBA_INSTRUMENT=0), cada ponto instrumentado custa uma
+# leitura do estado da thread: `timer` devolve um contexto nulo compartilhado
+# e `timed` chama a função original direto. `set_enabled` muda o padrão do
+# processo; `begin_run(enabled)` liga ou desliga só o rerun da thread atual
+# (cada sessão do app escolhe a sua, sem afetar as outras).
+
+import functools
+import os
+import threading
+import time
+
+_enabled = os.environ.get("FBA_INSTRUMENT", "0") == "1"
+_lock = threading.Lock()
+
+
+class _Local(threading.local):
+    # Padrões de classe: ler um atributo ausente não passa por AttributeError
+    run = None
+    enabled = None  # None: segue o padrão do processo
+
+
+_local = _Local()
+
+# nome -> [contagem, total_s, mín_s, máx_s, último_s]
+_TIMERS = {}
+# nome -> total
+_COUNTERS = {}
+
+
+def is_enabled():
+    """Ligada na thread atual: escolha do rerun (begin_run) ou o padrão do processo."""
+    enabled = _local.enabled
+    return _enabled if enabled is None else enabled
+
+
+def set_enabled(flag):
+    """Padrão do processo, para threads sem escolha própria em begin_run."""
+    global _enabled
+    _enabled = bool(flag)
+
+
+def record(name, seconds):
+    """Registra uma duração (em segundos) para `name`."""
+    enabled = _local.enabled
+    if not (_enabled if enabled is None else enabled):
+        return
+    with _lock:
+        stat = _TIMERS.get(name)
+        if stat is None:
+            _TIMERS[name] = [1, seconds, seconds, seconds, seconds]
+        else:
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = min(stat[2], seconds)
+            stat[3] = max(stat[3], seconds)
+            stat[4] = seconds
+    run = _local.run
+    if run is not None:
+        run[name] = run.get(name, 0.0) + seconds
+
+
+def count(name, n=1):
+    enabled = _local.enabled
+    if not (_enabled if enabled is None else enabled):
+        return
+    with _lock:
+        _COUNTERS[name] = _COUNTERS.get(name, 0) + n
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Timer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name):
+    """Contexto que mede o bloco: `with timer("figure.donut"): ...`."""
+    enabled = _local.enabled
+    if not (_enabled if enabled is None else enabled):
+        return _NULL_TIMER
+    return _Timer(name)
+
+
+def start():
+    """Marca de início para trechos que não cabem num `with` (None se desligada)."""
+    return time.perf_counter() if is_enabled() else None
+
+
+def stop(name, started):
+    if started is not None:
+        record(name, time.perf_counter() - started)
+
+
+def timed(name):
+    """Decorator que mede cada chamada da função sob `name`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            enabled = _local.enabled
+            if not (_enabled if enabled is None else enabled):
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def begin_run(enabled=None):
+    """Começa o registro por rerun da thread atual (lido por last_run).
+
+    `enabled` liga/desliga a instrumentação só nesta thread; None segue o
+    padrão do processo (set_enabled).
+    """
+    _local.run = {}
+    _local.enabled = None if enabled is None else bool(enabled)
+
+
+def last_run():
+    """Etapa -> segundos acumulados no rerun atual desta thread."""
+    return dict(_local.run or {})
+
+
+def reset():
+    with _lock:
+        _TIMERS.clear()
+        _COUNTERS.clear()
+
+
+def snapshot():
+    """Estado agregado do processo: timers (contagem, total, média, mín, máx, último) e contadores."""
+    with _lock:
+        timers = {
+            name: {"count": n, "total_s": total, "mean_s": total / n, "min_s": lo, "max_s": hi, "last_s": last}
+            for name, (n, total, lo, hi, last) in sorted(_TIMERS.items())
+        }
+        counters = dict(sorted(_COUNTERS.items()))
+    return {"enabled": is_enabled(), "timers": timers, "counters": counters}
+
+
+def to_json(indent=2):
+    import json
+
+    return json.dumps(snapshot(), indent=indent)
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(prefix="fba"):
+    """Métricas no formato de exposição em texto do Prometheus."""
+    snap = snapshot()
+    lines = [
+        f"# HELP {prefix}_stage_seconds Tempo gasto por etapa.",
+        f"# TYPE {prefix}_stage_seconds summary",
+    ]
+    for name, stat in snap["timers"].items():
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{_label(name)}"}} {stat["total_s"]:.9f}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{_label(name)}"}} {stat["count"]}')
+    lines += [
+        f"# HELP {prefix}_stage_seconds_max Maior duração observada por etapa.",
+        f"# TYPE {prefix}_stage_seconds_max gauge",
+    ]
+    for name, stat in snap["timers"].items():
+        lines.append(f'{prefix}_stage_seconds_max{{stage="{_label(name)}"}} {stat["max_s"]:.9f}')
+    lines += [
+        f"# HELP {prefix}_events_total Contadores de eventos.",
+        f"# TYPE {prefix}_events_total counter",
+    ]
+    for name, value in snap["counters"].items():
+        lines.append(f'{prefix}_events_total{{event="{_label(name)}"}} {value}')
+    return "\n".join(lines) + "\n"
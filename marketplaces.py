@@ -0,0 +1,312 @@
+# -----------------------------------------------------------------------------
+# COMPARATIVO MULTI-MARKETPLACE / MULTIMOEDA
+# -----------------------------------------------------------------------------
+# Um perfil de marketplace reúne a tabela de tarifas (formato de fees.py), a
+# moeda de venda e o regime de imposto. Custos do catálogo estão na moeda
+# base (BRL); o preço em cada marketplace é o preço do catálogo convertido
+# pelo câmbio (vezes `price_factor`), e as tarifas da tabela, na moeda do
+# marketplace, voltam para a base pelo mesmo câmbio.
+#
+# Por bloco do arquivo, as tarifas de cada perfil saem da sua tabela (um
+# laço curto sobre os perfis, cada consulta vetorizada nos SKUs) e o lucro
+# de todas as combinações é um único broadcasting no motor: entradas do SKU
+# num eixo, imposto e câmbio do perfil no outro, resultado SKUs x perfis.
+#
+# Comissão e FBA vêm da tabela do perfil quando o arquivo tem `category` e
+# as dimensões; sem elas, valem as colunas do arquivo para todos os perfis.
+# Taxa fixa e imposto são sempre os do perfil (tax_rate e fixed_fee do
+# arquivo são ignorados).
+#
+# Câmbio: JSON {"base": "BRL", "rates": {"USD": 5.40, ...}} (1 USD = R$5,40)
+# ou CSV com as colunas currency,rate. Perfis: JSON {"profiles": [...]} com
+# os campos de MARKETPLACES.
+
+import csv
+import io
+import json
+import os
+
+import numpy as np
+
+from catalog import CHUNK_ROWS, iter_catalog_columns
+from engine import calculate_financials_batch, calculate_financials_exact_batch
+from fees import AMAZON_BR, DIMENSION_COLUMNS, load_rate_card
+
+# Câmbio de referência (moeda -> BRL). Atualize com um arquivo próprio.
+FX_REFERENCE = {"base": "BRL", "date": "2026-10-01", "rates": {"BRL": 1.0, "USD": 5.40, "MXN": 0.29}}
+
+# Tabelas ilustrativas no formato de fees.AMAZON_BR, na moeda de cada site.
+# Confira as tarifas vigentes no Seller Central de cada marketplace.
+AMAZON_MX = {
+    "name": "Amazon.com.mx (referência)",
+    "referral": {
+        "default": "Outros",
+        "min_fee": 10.00,
+        "categories": {
+            "Eletrônicos": [[0, 0.08]], "Computadores": [[0, 0.08]], "Celulares": [[0, 0.08]],
+            "Moda": [[0, 0.17]], "Beleza": [[0, 0.12]], "Outros": [[0, 0.15]],
+        },
+    },
+    "fixed_fee": [[0, 0.0]],
+    "fba": {
+        "volumetric_divisor": 5000,
+        "tiers": [
+            {"name": "Padrão", "max_dims_cm": [45, 35, 20], "max_weight_kg": 9,
+             "weights_kg": [0.5, 1, 2, 5, 9], "fees": [62.0, 68.0, 78.0, 98.0, 130.0], "extra_per_kg": 8.0},
+            {"name": "Grande", "weights_kg": [10, 30], "fees": [170.0, 320.0], "extra_per_kg": 10.0},
+        ],
+    },
+}
+AMAZON_US = {
+    "name": "Amazon.com (referência)",
+    "referral": {
+        "default": "Outros",
+        "min_fee": 0.30,
+        "categories": {
+            "Eletrônicos": [[0, 0.08]], "Computadores": [[0, 0.08]], "Celulares": [[0, 0.08]],
+            "Moda": [[0, 0.17]], "Beleza": [[0, 0.08], [10, 0.15]], "Outros": [[0, 0.15]],
+        },
+    },
+    "fixed_fee": [[0, 0.0]],
+    "fba": {
+        "volumetric_divisor": 5000,
+        "tiers": [
+            {"name": "Small standard", "max_dims_cm": [38, 30, 1.9], "max_weight_kg": 0.45, "volumetric": False,
+             "weights_kg": [0.11, 0.23, 0.34, 0.45], "fees": [3.22, 3.40, 3.58, 3.77]},
+            {"name": "Large standard", "max_dims_cm": [45, 35, 20], "max_weight_kg": 9,
+             "weights_kg": [0.45, 0.9, 1.36, 9], "fees": [4.75, 5.40, 6.10, 9.50], "extra_per_kg": 0.35},
+            {"name": "Oversize", "weights_kg": [30], "fees": [26.0], "extra_per_kg": 0.90},
+        ],
+    },
+}
+
+# Perfis padrão. tax_rate é a fração do preço (mesma convenção do motor);
+# os regimes brasileiros são referências, ajuste à sua apuração.
+MARKETPLACES = {
+    "profiles": [
+        {"id": "BR-SN", "name": "Amazon.com.br · Simples Nacional", "currency": "BRL", "tax_rate": 0.06,
+         "rate_card": AMAZON_BR},
+        # PIS 0,65% + COFINS 3% + IRPJ 1,2% + CSLL 1,08% + ICMS interestadual 12%
+        {"id": "BR-LP", "name": "Amazon.com.br · Lucro Presumido", "currency": "BRL", "tax_rate": 0.1793,
+         "rate_card": AMAZON_BR},
+        # Exportação: sem PIS/COFINS/ICMS sobre a receita
+        {"id": "MX", "name": "Amazon.com.mx · Exportação", "currency": "MXN", "tax_rate": 0.0, "rate_card": AMAZON_MX},
+        {"id": "US", "name": "Amazon.com · Exportação", "currency": "USD", "tax_rate": 0.0, "rate_card": AMAZON_US},
+    ],
+}
+
+
+class Marketplace:
+    """Perfil compilado: tabela de tarifas, moeda, imposto e fator de preço."""
+
+    def __init__(self, spec):
+        try:
+            # Guardado para a chave do cache em disco, como em RateCard
+            self.spec = spec
+            self.id = str(spec["id"])
+            self.name = str(spec.get("name", self.id))
+            self.currency = str(spec["currency"]).upper()
+            self.tax_rate = float(spec["tax_rate"])
+            self.price_factor = float(spec.get("price_factor", 1.0))
+            card = spec.get("rate_card")
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"Perfil de marketplace inválido: {exc!r}") from None
+        self.card = load_rate_card(card)
+
+
+def load_profiles(source=None):
+    """Perfis compilados: None = MARKETPLACES; caminho de JSON; dict {"profiles": [...]}; ou lista de perfis."""
+    if source is None:
+        source = MARKETPLACES
+    elif not isinstance(source, (dict, list)):
+        with open(os.fspath(source), encoding="utf-8") as fh:
+            source = json.load(fh)
+    specs = source["profiles"] if isinstance(source, dict) else source
+    profiles = [spec if isinstance(spec, Marketplace) else Marketplace(spec) for spec in specs]
+    if not profiles:
+        raise ValueError("Nenhum perfil de marketplace informado.")
+    ids = [profile.id for profile in profiles]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Perfis de marketplace com id repetido.")
+    return profiles
+
+
+def _read_fx(fh, name):
+    if os.path.splitext(str(name))[1].lower() == ".json":
+        return json.load(fh)
+    return {"base": "BRL", "rates": {row["currency"]: row["rate"] for row in csv.DictReader(fh)}}
+
+
+def load_fx(source=None):
+    """Câmbio {"base", "date", "rates"}: None = FX_REFERENCE; dict; caminho ou arquivo aberto de JSON ou CSV (currency,rate)."""
+    if source is None:
+        source = FX_REFERENCE
+    if isinstance(source, dict):
+        fx = source
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8", newline="") as fh:
+            fx = _read_fx(fh, source)
+    else:
+        # Arquivo aberto ou UploadedFile do Streamlit: formato pela extensão do nome
+        text = source.read()
+        fx = _read_fx(io.StringIO(text.decode("utf-8-sig") if isinstance(text, bytes) else text), getattr(source, "name", ""))
+    try:
+        base = str(fx.get("base", "BRL")).upper()
+        rates = {str(currency).strip().upper(): float(rate) for currency, rate in fx["rates"].items()}
+    except (KeyError, TypeError, ValueError, AttributeError) as exc:
+        raise ValueError(f"Arquivo de câmbio inválido: {exc!r}") from None
+    rates[base] = 1.0
+    if any(not rate > 0 for rate in rates.values()):
+        raise ValueError("Câmbio deve ser positivo.")
+    return {"base": base, "date": fx.get("date"), "rates": rates}
+
+
+def fx_rates(profiles, fx):
+    """Câmbio de cada perfil para a moeda base, na ordem dos perfis."""
+    missing = sorted({p.currency for p in profiles} - set(fx["rates"]))
+    if missing:
+        raise ValueError(f"Sem câmbio para {', '.join(missing)} no arquivo de câmbio.")
+    return np.array([fx["rates"][p.currency] for p in profiles], dtype=np.float64)
+
+
+def _profile_fees(profile, columns, price_local, categories=None):
+    # Comissão (fração), FBA e taxa fixa (moeda do perfil) de um perfil para o bloco.
+    # `categories` = (códigos, nomes distintos) de pd.factorize sobre `category`
+    card = profile.card
+    if categories is not None:
+        codes, uniques = categories
+        # Código -1 (categoria ausente) cai no último item: a categoria padrão da tabela
+        ids = card.category_ids(np.append(uniques, None))[codes]
+        commission = card.referral_rate(None, price_local, ids=ids)
+    elif "category" in columns:
+        commission = card.referral_rate(columns["category"], price_local)
+    else:
+        commission = np.broadcast_to(columns["commission_rate"], price_local.shape)
+    if all(name in columns for name in DIMENSION_COLUMNS):
+        fba = card.fba_fee(*(columns[name] for name in DIMENSION_COLUMNS))
+    else:
+        fba = None
+    return commission, fba, card.fixed_fee(price_local)
+
+
+def evaluate_chunk(columns, profiles, rates, exact=False):
+    """Métricas (n SKUs x M perfis) de um bloco de colunas do catálogo, na moeda base."""
+    # Cálculo em (M, n): o eixo dos SKUs, longo e contíguo, fica no laço
+    # interno do NumPy; o resultado sai transposto, sem cópia
+    m, n = len(profiles), len(columns["price_sale"])
+    factor = np.array([p.price_factor for p in profiles])[:, None]
+    price_local = columns["price_sale"][None, :] / rates[:, None] * factor
+    commission = np.empty((m, n))
+    fba_fee = np.empty((m, n))
+    fixed_fee = np.empty((m, n))
+    categories = None
+    if "category" in columns:
+        import pandas as pd
+
+        # Categorias fatoradas uma vez por bloco: cada perfil só mapeia os nomes distintos
+        codes, uniques = pd.factorize(columns["category"])
+        categories = (codes, np.asarray(uniques, dtype=object))
+    for j, profile in enumerate(profiles):
+        commission[j], fba, fixed_fee[j] = _profile_fees(profile, columns, price_local[j], categories)
+        # Tarifas da tabela estão na moeda do marketplace; a do arquivo, na base
+        fba_fee[j] = columns["fba_fee"] if fba is None else fba * rates[j]
+    fixed_fee *= rates[:, None]
+
+    # Entradas do SKU em (1, n), do perfil em (M, 1): o motor devolve (M, n)
+    inputs = {name: values[None, :] for name, values in columns.items() if values.dtype != object}
+    inputs.update(
+        price_sale=price_local * rates[:, None],
+        tax_rate=np.array([p.tax_rate for p in profiles])[:, None],
+        commission_rate=commission,
+        fba_fee=fba_fee,
+        fixed_fee=fixed_fee,
+    )
+    engine = calculate_financials_exact_batch if exact else calculate_financials_batch
+    return {name: values.T for name, values in engine(inputs).items()}
+
+
+def iter_marketplace_results(source, profiles=None, fx=None, fmt=None, chunk_rows=CHUNK_ROWS, exact=False):
+    """Gera, por bloco, (sku, product_name, métricas n x M) para os perfis pedidos."""
+    profiles = load_profiles(profiles)
+    rates = fx_rates(profiles, load_fx(fx))
+    for sku, name, columns in iter_catalog_columns(source, fmt=fmt, chunk_rows=chunk_rows):
+        if "price_sale" not in columns:
+            raise ValueError("Colunas obrigatórias ausentes: price_sale")
+        if "category" not in columns and "commission_rate" not in columns:
+            raise ValueError("Informe category ou commission_rate para calcular a comissão de cada marketplace.")
+        if "fba_fee" not in columns and not all(col in columns for col in DIMENSION_COLUMNS):
+            raise ValueError("Informe fba_fee ou as dimensões e o peso para calcular a tarifa FBA de cada marketplace.")
+        yield sku, name, evaluate_chunk(columns, profiles, rates, exact)
+
+
+def _best(net_profit):
+    # Melhor perfil de cada SKU e a vantagem sobre o segundo, sem ordenar a matriz.
+    # NaN (preço ou tarifa ausente) não concorre: argmax pararia no primeiro NaN.
+    # Linha toda NaN fica com o perfil 0 e vantagem NaN; com um só perfil válido, vantagem NaN.
+    filled = np.where(np.isnan(net_profit), -np.inf, net_profit)
+    best = np.argmax(filled, axis=1)
+    top = np.take_along_axis(filled, best[:, None], axis=1)[:, 0]
+    second = np.partition(filled, -2, axis=1)[:, -2] if net_profit.shape[1] > 1 else top
+    valid = np.isfinite(second)
+    gap = np.where(valid, top - np.where(valid, second, 0.0), np.nan)
+    return best, gap
+
+
+def compare_marketplaces(source, profiles=None, fx=None, fmt=None, chunk_rows=CHUNK_ROWS, exact=False):
+    """Matriz SKUs x marketplaces do catálogo inteiro e o melhor marketplace de cada SKU.
+
+    Devolve um dict com skus, names, profiles (ids), profile_names,
+    currencies, fx (câmbio de cada perfil), base (moeda dos valores),
+    net_profit e margin_net (n x M), best (índice do perfil de maior lucro,
+    ignorando NaN) e best_gap (lucro do melhor menos o do segundo melhor; NaN
+    se menos de dois perfis têm lucro).
+    """
+    profiles = load_profiles(profiles)
+    fx = load_fx(fx)
+    skus, names, profit, margin = [], [], [], []
+    for sku, name, result in iter_marketplace_results(source, profiles, fx, fmt, chunk_rows, exact):
+        skus.append(sku)
+        names.append(name)
+        profit.append(result["net_profit"])
+        margin.append(result["margin_net"])
+    if not skus:
+        raise ValueError("Catálogo vazio: nenhuma linha encontrada no arquivo.")
+
+    net_profit = np.concatenate(profit)
+    best, best_gap = _best(net_profit)
+    return {
+        "skus": np.concatenate(skus),
+        "names": np.concatenate(names),
+        "profiles": [p.id for p in profiles],
+        "profile_names": [p.name for p in profiles],
+        "currencies": [p.currency for p in profiles],
+        "fx": fx_rates(profiles, fx),
+        "base": fx["base"],
+        "net_profit": net_profit,
+        "margin_net": np.concatenate(margin),
+        "best": best,
+        "best_gap": best_gap,
+    }
+
+
+def marketplace_frame(result):
+    """DataFrame largo: sku, product_name, net_profit[<id>], margin_net[<id>], best_marketplace e best_gap."""
+    import pandas as pd
+
+    frame = {"sku": result["skus"], "product_name": result["names"]}
+    for metric in ("net_profit", "margin_net"):
+        for j, profile in enumerate(result["profiles"]):
+            frame[f"{metric}[{profile}]"] = result[metric][:, j]
+    frame["best_marketplace"] = np.asarray(result["profiles"], dtype=object)[result["best"]]
+    frame["best_gap"] = result["best_gap"]
+    return pd.DataFrame(frame)
+
+
+def iter_marketplace_frames(source, profiles=None, fx=None, fmt=None, chunk_rows=CHUNK_ROWS, exact=False):
+    """Gera, bloco a bloco, os DataFrames de marketplace_frame (para exportar catálogos de qualquer tamanho)."""
+    profiles = load_profiles(profiles)
+    ids = [p.id for p in profiles]
+    for sku, name, result in iter_marketplace_results(source, profiles, fx, fmt, chunk_rows, exact):
+        best, best_gap = _best(result["net_profit"])
+        yield marketplace_frame({"skus": sku, "names": name, "profiles": ids, "net_profit": result["net_profit"],
+                                 "margin_net": result["margin_net"], "best": best, "best_gap": best_gap})
@@ -0,0 +1,47 @@
+# -----------------------------------------------------------------------------
+# CAMADA DE MEMOIZAÇÃO (CACHE LRU COM ESTATÍSTICAS)
+# -----------------------------------------------------------------------------
+# O Streamlit reexecuta o app.py inteiro a cada interação. As funções caras
+# (cálculo financeiro, matrizes de cenário, figuras Plotly) ficam em módulos
+# importados e são decoradas com `memoize`: o cache vive no processo, sobrevive
+# aos reruns e só recalcula quando a tupla de parâmetros muda.
+
+import functools
+
+# nome -> função memoizada (para o painel de hit/miss)
+_REGISTRY = {}
+
+
+def memoize(maxsize=256):
+    """Decorator LRU limitado a `maxsize` entradas, registrado para estatísticas.
+
+    Os argumentos precisam ser hashable (floats, tuplas). Os resultados são
+    compartilhados entre reruns e sessões: trate-os como somente leitura.
+    """
+    def decorator(func):
+        cached = functools.lru_cache(maxsize=maxsize)(func)
+        _REGISTRY[f"{func.__module__}.{func.__qualname__}"] = cached
+        return cached
+    return decorator
+
+
+def cache_stats():
+    """Lista de dicts com hits, misses, ocupação e taxa de acerto por função."""
+    stats = []
+    for name, func in _REGISTRY.items():
+        info = func.cache_info()
+        calls = info.hits + info.misses
+        stats.append({
+            "function": name,
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hit_rate": info.hits / calls if calls else 0.0,
+        })
+    return stats
+
+
+def clear_caches():
+    for func in _REGISTRY.values():
+        func.cache_clear()
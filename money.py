@@ -0,0 +1,108 @@
+# -----------------------------------------------------------------------------
+# DINHEIRO EM CENTAVOS (INT64) COM ARREDONDAMENTO DEFINIDO
+# -----------------------------------------------------------------------------
+# Em float, R$ 0,10 não existe exatamente: somar o lucro de milhares de SKUs
+# (ou multiplicar pelo lote) deixa resíduos de centavo que aparecem nas
+# conciliações. Aqui valores em reais viram int64 em centavos e taxas viram
+# inteiros em milionésimos (RATE_SCALE), de modo que "preço x taxa" é um
+# produto inteiro exato e só a divisão final por RATE_SCALE arredonda, no
+# modo escolhido para cada componente. Tudo em arrays NumPy, sem Decimal.
+#
+# Modos (mesma semântica das constantes ROUND_* do módulo decimal):
+#   half_up    metade se afasta do zero (2,5 -> 3; -2,5 -> -3)
+#   half_even  metade vai para o par (2,5 -> 2; 3,5 -> 4), ABNT NBR 5891
+#   down / up  em direção a / para longe do zero
+#   floor / ceiling   para baixo / para cima
+
+import numpy as np
+
+CENTS = 100
+
+# Taxas com até 4 casas em % (0,1234% = 0.001234) são representadas sem perda
+RATE_SCALE = 1_000_000
+
+ROUNDING_MODES = ("half_up", "half_even", "down", "up", "floor", "ceiling")
+
+# Casas usadas para limpar o ruído do float antes de arredondar (129.9 * 100
+# = 12989.999999999998): abaixo disso, a entrada não tinha informação real
+_SNAP_DECIMALS = 6
+
+
+def _check_rounding(rounding):
+    if rounding not in ROUNDING_MODES:
+        raise ValueError(f"Arredondamento desconhecido '{rounding}' (use {', '.join(ROUNDING_MODES)}).")
+
+
+def divide_rounded(numerator, denominator, rounding="half_up"):
+    """numerator / denominator em inteiros, arredondado no modo pedido (denominador > 0)."""
+    _check_rounding(rounding)
+    numerator = np.asarray(numerator, dtype=np.int64)
+    if rounding == "half_up":
+        # Caminho curto (o modo mais usado): |n| + d//2 pelo piso, com o sinal de volta
+        quotient = (np.abs(numerator) + np.asarray(denominator) // 2) // denominator
+        return np.where(numerator < 0, -quotient, quotient)
+    # Divisão pelo piso: resto sempre em [0, denominador)
+    quotient, remainder = np.divmod(numerator, denominator)
+    if rounding == "floor":
+        return quotient
+    inexact = remainder != 0
+    if rounding == "ceiling":
+        return quotient + inexact
+    if rounding == "down":
+        return quotient + (inexact & (numerator < 0))
+    if rounding == "up":
+        return quotient + (inexact & (numerator > 0))
+    twice = 2 * remainder
+    return quotient + ((twice > denominator) | ((twice == denominator) & (quotient % 2 == 1)))
+
+
+def _check_finite(values, name):
+    # NaN/inf viram lixo no cast para int64 (-9223372036854775808): falha aqui,
+    # apontando a coluna, em vez de propagar um valor absurdo
+    finite = np.isfinite(values)
+    if not finite.all():
+        bad = int(finite.size - np.count_nonzero(finite))
+        where = f" em '{name}'" if name else ""
+        raise ValueError(f"Valor ausente ou infinito{where} ({bad} linha(s)): o modo em centavos exige números finitos.")
+
+
+def _round_float(values, rounding, name=None):
+    # Arredondamento de floats já escalados (centavos, milionésimos)
+    _check_rounding(rounding)
+    values = np.asarray(values, dtype=np.float64)
+    _check_finite(values, name)
+    nearest = np.rint(values)
+    # Caso comum (preços já em centavos): todos inteiros, a menos do ruído
+    if np.all(np.abs(values - nearest) < 0.5 * 10.0 ** -_SNAP_DECIMALS):
+        return nearest.astype(np.int64)
+    values = np.round(values, _SNAP_DECIMALS)
+    if rounding == "half_even":
+        return np.rint(values).astype(np.int64)
+    if rounding == "half_up":
+        return (np.sign(values) * np.floor(np.abs(values) + 0.5)).astype(np.int64)
+    func = {"down": np.trunc, "up": lambda v: np.sign(v) * np.ceil(np.abs(v)),
+            "floor": np.floor, "ceiling": np.ceil}[rounding]
+    return func(values).astype(np.int64)
+
+
+def to_cents(reais, rounding="half_up", name=None):
+    """Reais (float ou array) -> centavos int64; frações de centavo seguem `rounding`.
+
+    NaN/inf levantam ValueError (com `name`, se dado, na mensagem).
+    """
+    return _round_float(np.asarray(reais, dtype=np.float64) * CENTS, rounding, name)
+
+
+def to_rate_units(rates, name=None):
+    """Taxas em fração (0.16) -> inteiros em milionésimos (160000); NaN/inf levantam ValueError."""
+    return _round_float(np.asarray(rates, dtype=np.float64) * RATE_SCALE, "half_even", name)
+
+
+def apply_rate(cents, rate_units, rounding="half_up"):
+    """Centavos x taxa, exato até a divisão final, arredondado para centavos."""
+    return divide_rounded(np.asarray(cents, dtype=np.int64) * rate_units, RATE_SCALE, rounding)
+
+
+def from_cents(cents):
+    """Centavos -> reais em float (o float mais próximo do valor com 2 casas)."""
+    return np.asarray(cents, dtype=np.int64) / CENTS
@@ -0,0 +1,228 @@
+# -----------------------------------------------------------------------------
+# SIMULAÇÃO MONTE CARLO DO LUCRO UNITÁRIO
+# -----------------------------------------------------------------------------
+# Sorteia preço, custo do produto, TACOS e taxa de devolução a partir de
+# distribuições configuráveis e passa cada bloco de amostras pelo motor
+# vetorizado. As amostras são processadas em blocos de tamanho fixo e
+# resumidas num histograma fino (contagens + somas por faixa), então a
+# memória não cresce com o número de sorteios (10M+ cabem no mesmo espaço).
+
+import numpy as np
+
+from engine import net_profit_batch
+
+# Entradas que podem receber distribuição; as demais ficam fixas no valor base
+SIMULATED_INPUTS = ("price_sale", "cost_product", "tacos_target", "return_rate")
+
+# Entradas que são frações (limitadas a [0, 1]); as outras são valores em R$ (>= 0)
+RATE_INPUTS = ("tax_rate", "commission_rate", "tacos_target", "return_rate")
+
+# distribuição -> parâmetros obrigatórios
+DISTRIBUTIONS = {
+    "fixed": ("value",),
+    "normal": ("mean", "std"),
+    "uniform": ("low", "high"),
+    "triangular": ("low", "mode", "high"),
+}
+
+# Distribuição e dispersão relativa padrão de cada entrada simulada
+DEFAULT_SPREADS = {
+    "price_sale": ("normal", 0.05),
+    "cost_product": ("triangular", 0.10),
+    "tacos_target": ("normal", 0.20),
+    "return_rate": ("uniform", 0.50),
+}
+
+CHUNK_SAMPLES = 1 << 18
+HIST_BINS = 4096
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def draw(rng, spec, size):
+    """Amostra `size` valores conforme `spec` ({"dist": ..., parâmetros})."""
+    dist = spec["dist"]
+    if dist not in DISTRIBUTIONS:
+        raise ValueError(f"Distribuição desconhecida: {dist}. Use uma de {', '.join(DISTRIBUTIONS)}.")
+    missing = [name for name in DISTRIBUTIONS[dist] if name not in spec]
+    if missing:
+        raise ValueError(f"Distribuição '{dist}' sem parâmetros: {', '.join(missing)}")
+
+    if dist == "fixed":
+        return np.full(size, float(spec["value"]))
+    if dist == "normal":
+        return rng.normal(spec["mean"], spec["std"], size)
+    if dist == "uniform":
+        return rng.uniform(spec["low"], spec["high"], size)
+    return rng.triangular(spec["low"], spec["mode"], spec["high"], size)
+
+
+def spec_around(dist, value, spread):
+    """Spec centrado em `value` com dispersão relativa `spread` (0.1 = ±10%)."""
+    if dist == "normal":
+        return {"dist": "normal", "mean": value, "std": abs(value) * spread}
+    if dist == "uniform":
+        return {"dist": "uniform", "low": value * (1 - spread), "high": value * (1 + spread)}
+    if dist == "triangular":
+        return {"dist": "triangular", "low": value * (1 - spread), "mode": value, "high": value * (1 + spread)}
+    return {"dist": "fixed", "value": value}
+
+
+def sample_inputs(rng, base, distributions, size):
+    """Entradas de um bloco: `base` com as colunas de `distributions` sorteadas."""
+    inputs = dict(base)
+    for name, spec in distributions.items():
+        values = draw(rng, spec, size)
+        # Cortes físicos: taxas entre 0 e 100%, valores monetários não negativos
+        if name in RATE_INPUTS:
+            np.clip(values, 0.0, 1.0, out=values)
+        else:
+            np.maximum(values, 0.0, out=values)
+        inputs[name] = values
+    return inputs
+
+
+def simulate_profit(base, distributions, n_samples=1_000_000, seed=None,
+                    chunk_size=CHUNK_SAMPLES, bins=HIST_BINS, alpha=0.05):
+    """Distribuição do lucro líquido unitário por Monte Carlo.
+
+    `base` tem os valores de INPUT_COLUMNS (sem `fixed_fee`, a taxa fixa segue
+    a regra < R$79 em cada preço sorteado). `distributions` mapeia entradas de
+    SIMULATED_INPUTS para specs aceitos por `draw`. Retorna estatísticas
+    (média, desvio, P(prejuízo), VaR/CVaR ao nível `alpha`, percentis) e o
+    histograma (`edges`, `counts`) do lucro.
+    """
+    if n_samples <= 0:
+        raise ValueError("n_samples deve ser positivo.")
+    unknown = set(distributions) - set(SIMULATED_INPUTS)
+    if unknown:
+        raise ValueError(f"Entradas sem suporte a distribuição: {', '.join(sorted(unknown))}")
+
+    rng = np.random.default_rng(seed)
+    acc = None
+    done = 0
+    while done < n_samples:
+        size = min(chunk_size, n_samples - done)
+        profit = sample_profit(rng, base, distributions, size)
+        if acc is None:
+            # Faixa do histograma e deslocamento dos momentos vêm do 1º bloco
+            acc = Accumulator(histogram_edges(profit, bins), float(profit.mean()))
+        acc.add(profit)
+        done += size
+
+    return acc.summary(alpha)
+
+
+def sample_profit(rng, base, distributions, size):
+    """Lucro líquido de `size` sorteios (um bloco)."""
+    return net_profit_batch(sample_inputs(rng, base, distributions, size))
+
+
+def histogram_edges(pilot, bins=HIST_BINS):
+    # Faixa a partir de um bloco piloto, com folga de 50% da amplitude de
+    # cada lado; valores fora dela caem nas faixas das pontas
+    lo, hi = float(pilot.min()), float(pilot.max())
+    pad = max(hi - lo, 1e-9) * 0.5
+    return np.linspace(lo - pad, hi + pad, bins + 1)
+
+
+class Accumulator:
+    """Resumo em streaming: histograma fino com somas por faixa e momentos.
+
+    Acumuladores com as mesmas `edges` e `shift` podem ser combinados via
+    `to_row`/`merge_row`, o que permite simular blocos em processos separados.
+    """
+
+    # Campos escalares do estado, na ordem usada por to_row/from_row
+    _SCALARS = ("n", "sum", "sumsq", "losses", "min", "max")
+
+    def __init__(self, edges, shift=0.0):
+        bins = len(edges) - 1
+        self.edges = edges
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.sums = np.zeros(bins)
+        self.shift = shift
+        self.n = 0
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self.losses = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    @staticmethod
+    def row_size(bins):
+        return 2 * bins + len(Accumulator._SCALARS)
+
+    def to_row(self, out):
+        """Escreve o estado num vetor float64 (p.ex. uma linha em memória compartilhada)."""
+        bins = len(self.counts)
+        out[:bins] = self.counts
+        out[bins:2 * bins] = self.sums
+        out[2 * bins:] = [getattr(self, name) for name in self._SCALARS]
+
+    def merge_row(self, row):
+        bins = len(self.counts)
+        self.counts += row[:bins].astype(np.int64)
+        self.sums += row[bins:2 * bins]
+        n, total, sumsq, losses, lo, hi = row[2 * bins:]
+        self.n += int(n)
+        self.sum += total
+        self.sumsq += sumsq
+        self.losses += int(losses)
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+
+    def add(self, values):
+        bins = len(self.counts)
+        width = self.edges[1] - self.edges[0]
+        idx = ((values - self.edges[0]) / width).astype(np.int64)
+        np.clip(idx, 0, bins - 1, out=idx)
+        self.counts += np.bincount(idx, minlength=bins)
+        self.sums += np.bincount(idx, weights=values, minlength=bins)
+
+        centered = values - self.shift
+        self.n += len(values)
+        self.sum += float(centered.sum())
+        self.sumsq += float(centered @ centered)
+        self.losses += int(np.count_nonzero(values < 0))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def quantile(self, q):
+        # Interpolação linear dentro da faixa que contém o quantil
+        cum = np.cumsum(self.counts)
+        target = q * self.n
+        i = int(np.searchsorted(cum, target, side="left"))
+        i = min(i, len(self.counts) - 1)
+        before = cum[i - 1] if i > 0 else 0
+        frac = (target - before) / self.counts[i] if self.counts[i] else 0.0
+        value = self.edges[i] + frac * (self.edges[i + 1] - self.edges[i])
+        return float(min(max(value, self.min), self.max))
+
+    def tail_mean(self, q):
+        # Média dos piores q% (CVaR): faixas inteiras abaixo do quantil + fração da faixa de corte
+        cum = np.cumsum(self.counts)
+        target = q * self.n
+        i = min(int(np.searchsorted(cum, target, side="left")), len(self.counts) - 1)
+        before = cum[i - 1] if i > 0 else 0
+        total = self.sums[:i].sum()
+        if self.counts[i]:
+            total += self.sums[i] * (target - before) / self.counts[i]
+        return float(total / target) if target > 0 else self.min
+
+    def summary(self, alpha):
+        mean = self.shift + self.sum / self.n
+        var = max(self.sumsq / self.n - (self.sum / self.n) ** 2, 0.0)
+        return {
+            "n_samples": self.n,
+            "mean": mean,
+            "std": var ** 0.5,
+            "min": self.min,
+            "max": self.max,
+            "p_loss": self.losses / self.n,
+            "alpha": alpha,
+            "var": self.quantile(alpha),
+            "cvar": self.tail_mean(alpha),
+            "percentiles": {p: self.quantile(p / 100) for p in PERCENTILES},
+            "edges": self.edges,
+            "counts": self.counts,
+        }
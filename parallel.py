@@ -0,0 +1,272 @@
+# -----------------------------------------------------------------------------
+# EXECUÇÃO PARALELA (POOL DE PROCESSOS + MEMÓRIA COMPARTILHADA)
+# -----------------------------------------------------------------------------
+# Divide simulações em tarefas independentes (blocos de amostras de um SKU, ou
+# faixas de SKUs de um catálogo) e distribui entre processos. Entradas e
+# resultados ficam em blocos de memória compartilhada: cada tarefa escreve a
+# sua linha direto no array de saída e nada é serializado de volta.
+#
+# O ranking de sensibilidade do catálogo usa as mesmas faixas de SKUs. A
+# matriz de cenários e a grade 2-D de um produto são uma chamada vetorizada de
+# poucos milhares de células e ficam no processo principal: o IPC custaria
+# mais que o cálculo.
+#
+# Cada tarefa tem o seu próprio fluxo de números aleatórios, derivado de
+# (semente, índice da tarefa/SKU) por SeedSequence. O resultado depende só da
+# semente e da divisão em blocos, nunca do número de processos.
+
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+from engine import INPUT_COLUMNS, net_profit_batch
+from fees import load_rate_card
+from montecarlo import (
+    CHUNK_SAMPLES, HIST_BINS, Accumulator, histogram_edges, sample_inputs, sample_profit, spec_around,
+)
+from sensitivity import SKU_BLOCK, tornado
+from shared import DEFAULT_WORKERS  # FBA_WORKERS ou a contagem de CPUs
+
+BLOCK_SAMPLES = 1_000_000
+SKUS_PER_TASK = 16
+
+# Estatísticas por SKU devolvidas por simulate_catalog (colunas do array)
+CATALOG_STATS = ("mean", "std", "p_loss", "var", "cvar", "p5", "p50", "p95")
+
+# workers -> executor reaproveitado entre chamadas (subir processos "spawn" custa caro)
+_POOLS = {}
+# Sessões e tarefas de fundo (shared.py) pedem pools de threads diferentes
+_POOLS_LOCK = threading.Lock()
+
+
+def _pool(workers):
+    with _POOLS_LOCK:
+        if workers not in _POOLS:
+            # "spawn": o servidor do Streamlit tem threads, e fork com threads é inseguro
+            _POOLS[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+        return _POOLS[workers]
+
+
+def shutdown_pools():
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            pool.shutdown(cancel_futures=True)
+        _POOLS.clear()
+
+
+def _run_tasks(func, tasks, workers):
+    # workers == 1 roda no próprio processo: mesma divisão, sem custo de IPC
+    if workers <= 1:
+        for task in tasks:
+            func(*task)
+        return
+    futures = [_pool(workers).submit(func, *task) for task in tasks]
+    _, pending = wait(futures, return_when=FIRST_EXCEPTION)
+    if pending:
+        # Uma tarefa falhou: cancela as que ainda estão na fila e espera as que
+        # já rodam, que ainda escrevem nos blocos que o chamador libera no finally
+        for future in pending:
+            future.cancel()
+        wait(pending)
+    for future in futures:
+        if not future.cancelled():
+            future.result()
+
+
+def _rng(entropy, key):
+    return np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(key,)))
+
+
+class _SharedArray:
+    """Array NumPy sobre um bloco de memória compartilhada (criado ou anexado)."""
+
+    def __init__(self, shape, name=None):
+        size = int(np.prod(shape)) * 8
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(size, 8))
+            self.owner = True
+        else:
+            # Processos "spawn" herdam o resource_tracker do pai: anexar não
+            # transfere a posse, só o dono chama unlink
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.array = np.ndarray(shape, dtype=np.float64, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        del self.array
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# --- Um SKU, muitos blocos de amostras ---------------------------------------
+
+def _profit_block_task(out_name, out_shape, row, entropy, base, distributions, edges, shift, size, chunk_size):
+    out = _SharedArray(out_shape, out_name)
+    try:
+        rng = _rng(entropy, row + 1)
+        acc = Accumulator(edges, shift)
+        done = 0
+        while done < size:
+            n = min(chunk_size, size - done)
+            acc.add(sample_profit(rng, base, distributions, n))
+            done += n
+        acc.to_row(out.array[row])
+    finally:
+        out.close()
+
+
+def simulate_profit_parallel(base, distributions, n_samples=10_000_000, seed=None, workers=DEFAULT_WORKERS,
+                             block_samples=BLOCK_SAMPLES, chunk_size=CHUNK_SAMPLES, bins=HIST_BINS, alpha=0.05):
+    """Como montecarlo.simulate_profit, com os sorteios divididos em blocos entre processos.
+
+    Um bloco piloto (fluxo próprio) fixa a faixa do histograma; cada bloco
+    escreve contagens, somas e momentos numa linha do array compartilhado e
+    o processo principal soma as linhas.
+    """
+    if n_samples <= 0:
+        raise ValueError("n_samples deve ser positivo.")
+    entropy = np.random.SeedSequence(seed).entropy
+    # Fluxo 0 é do piloto; o bloco i usa o fluxo i + 1
+    pilot = sample_profit(_rng(entropy, 0), base, distributions, min(chunk_size, n_samples))
+    edges = histogram_edges(pilot, bins)
+    shift = float(pilot.mean())
+
+    sizes = [min(block_samples, n_samples - start) for start in range(0, n_samples, block_samples)]
+    shape = (len(sizes), Accumulator.row_size(bins))
+    out = _SharedArray(shape)
+    try:
+        tasks = [
+            (out.name, shape, row, entropy, base, distributions, edges, shift, size, chunk_size)
+            for row, size in enumerate(sizes)
+        ]
+        _run_tasks(_profit_block_task, tasks, workers)
+        rows = out.array.copy()
+    finally:
+        out.close()
+
+    acc = Accumulator(edges, shift)
+    for row in rows:
+        acc.merge_row(row)
+    return acc.summary(alpha)
+
+
+# --- Catálogo: muitos SKUs, N sorteios cada ----------------------------------
+
+def _catalog_task(in_name, in_shape, out_name, out_shape, start, stop, entropy, spreads, n_samples, alpha, rate_card):
+    inputs = _SharedArray(in_shape, in_name)
+    out = _SharedArray(out_shape, out_name)
+    card = load_rate_card(rate_card)
+    try:
+        for i in range(start, stop):
+            # Última coluna: 1 onde a taxa fixa do SKU veio das faixas da tabela
+            *row, from_rule = inputs.array[i]
+            base = dict(zip(INPUT_COLUMNS, row))
+            # Distribuições centradas nos valores do próprio SKU
+            distributions = {name: spec_around(dist, base[name], spread) for name, (dist, spread) in spreads.items()}
+            sampled = sample_inputs(_rng(entropy, i), base, distributions, n_samples)
+            if from_rule and "price_sale" in distributions:
+                # Taxa fixa pelas faixas da tabela em cada preço sorteado, como em montecarlo.simulate_profit
+                sampled["fixed_fee"] = card.fixed_fee(sampled["price_sale"])
+            profit = net_profit_batch(sampled)
+            var, p5, p50, p95 = np.quantile(profit, [alpha, 0.05, 0.50, 0.95])
+            tail = profit[profit <= var]
+            out.array[i] = (
+                profit.mean(), profit.std(), np.count_nonzero(profit < 0) / n_samples,
+                var, tail.mean() if len(tail) else var, p5, p50, p95,
+            )
+    finally:
+        inputs.close()
+        out.close()
+
+
+def simulate_catalog(inputs, spreads, n_samples=100_000, seed=None, workers=DEFAULT_WORKERS,
+                     skus_per_task=SKUS_PER_TASK, alpha=0.05, fee_rule=None, rate_card=None):
+    """Monte Carlo por SKU para um catálogo inteiro.
+
+    `inputs` é um mapping de arrays com INPUT_COLUMNS (p.ex. Catalog.inputs);
+    `spreads` mapeia entradas simuladas para (distribuição, dispersão relativa).
+    `fee_rule` (bool por SKU, p.ex. Catalog.fee_rule, ou um bool para todos)
+    marca os SKUs cuja taxa fixa veio das faixas de `rate_card` (None =
+    AMAZON_BR; dict ou caminho, como em fees.load_rate_card): neles a taxa é
+    recalculada em cada preço sorteado; nos demais fica a taxa do SKU.
+    Retorna um dict coluna -> array com CATALOG_STATS, um valor por SKU.
+    """
+    columns = [np.asarray(inputs[name], dtype=np.float64) for name in INPUT_COLUMNS]
+    from_rule = np.broadcast_to(np.asarray(bool(fee_rule) if fee_rule is None else fee_rule, dtype=np.float64),
+                                columns[0].shape)
+    matrix = np.column_stack([*columns, from_rule])
+    n_skus = len(matrix)
+    entropy = np.random.SeedSequence(seed).entropy
+
+    shared_in = _SharedArray(matrix.shape)
+    shared_out = _SharedArray((n_skus, len(CATALOG_STATS)))
+    try:
+        shared_in.array[:] = matrix
+        tasks = [
+            (shared_in.name, matrix.shape, shared_out.name, shared_out.array.shape,
+             start, min(start + skus_per_task, n_skus), entropy, spreads, n_samples, alpha, rate_card)
+            for start in range(0, n_skus, skus_per_task)
+        ]
+        _run_tasks(_catalog_task, tasks, workers)
+        # Cópia local (memcpy), não pickling: o bloco compartilhado é liberado em seguida
+        stats = shared_out.array.copy()
+    finally:
+        shared_in.close()
+        shared_out.close()
+    return {name: stats[:, j] for j, name in enumerate(CATALOG_STATS)}
+
+
+# --- Catálogo: ranking de sensibilidade (tornado por SKU) --------------------
+
+def _rank_task(in_name, in_shape, out_name, out_shape, row, start, stop, bump, metric):
+    inputs = _SharedArray(in_shape, in_name)
+    out = _SharedArray(out_shape, out_name)
+    try:
+        block = {name: inputs.array[start:stop, j] for j, name in enumerate(INPUT_COLUMNS)}
+        swing = tornado(block, bump, metric)["swing"]
+        k = len(INPUT_COLUMNS)
+        # Linha da tarefa: soma dos swings por entrada | contagem de "maior motor"
+        out.array[row, :k] = swing.sum(axis=0)
+        out.array[row, k:] = np.bincount(swing.argmax(axis=1), minlength=k)
+    finally:
+        inputs.close()
+        out.close()
+
+
+def rank_inputs_parallel(inputs, bump=0.10, metric="net_profit", workers=DEFAULT_WORKERS, skus_per_task=SKU_BLOCK):
+    """Como sensitivity.rank_inputs, com os blocos de SKUs divididos entre processos.
+
+    `inputs` é um mapping de arrays com INPUT_COLUMNS (p.ex. Catalog.inputs).
+    Cada bloco escreve a soma dos swings e as contagens numa linha do array
+    compartilhado; o processo principal soma as linhas.
+    """
+    matrix = np.column_stack([np.asarray(inputs[name], dtype=np.float64) for name in INPUT_COLUMNS])
+    n_skus = len(matrix)
+    k = len(INPUT_COLUMNS)
+    starts = range(0, n_skus, skus_per_task)
+
+    shared_in = _SharedArray(matrix.shape)
+    shared_out = _SharedArray((len(starts), 2 * k))
+    try:
+        shared_in.array[:] = matrix
+        tasks = [
+            (shared_in.name, matrix.shape, shared_out.name, shared_out.array.shape,
+             row, start, min(start + skus_per_task, n_skus), bump, metric)
+            for row, start in enumerate(starts)
+        ]
+        _run_tasks(_rank_task, tasks, workers)
+        # Soma na ordem dos blocos: mesmo resultado de rank_inputs, bit a bit
+        totals = np.zeros(2 * k)
+        for row in shared_out.array:
+            totals += row
+    finally:
+        shared_in.close()
+        shared_out.close()
+    return {"mean_swing": totals[:k] / max(n_skus, 1), "top_driver_count": totals[k:].astype(np.int64)}
@@ -0,0 +1,219 @@
+# -----------------------------------------------------------------------------
+# PRECIFICAÇÃO REVERSA (PREÇO PARA MARGEM ALVO)
+# -----------------------------------------------------------------------------
+# Resolve, em uma chamada vetorizada, o preço mínimo que atinge cada margem
+# líquida alvo para cada SKU (SKUs x margens), e encaixa o resultado no menor
+# preço psicológico (.90 / .99 / .97) que ainda cumpre a meta.
+#
+# Margem líquida em função do preço: m(p) = 1 - v - F / p, com v = soma das
+# taxas percentuais e F = custos por unidade. É crescente em p, então o preço
+# mínimo é F / (1 - v - m). A regra da taxa fixa (R$5,00 abaixo de R$79) faz F
+# saltar no limiar, e o preço certo depende de que lado do limiar ele cai.
+
+import numpy as np
+
+from engine import (
+    INPUT_COLUMNS, LOW_PRICE_FIXED_FEE, LOW_PRICE_THRESHOLD, calculate_financials_batch, net_profit_batch,
+)
+
+PSYCHOLOGICAL_ENDINGS = (0.90, 0.99, 0.97)
+
+# Tolerância na checagem da margem dos preços psicológicos (pontos percentuais)
+_MARGIN_TOL = 1e-9
+
+
+def _columns(inputs):
+    # Cada entrada ganha um eixo extra no fim, para cruzar com o eixo das margens
+    cols = {}
+    for name in INPUT_COLUMNS:
+        if name in inputs:
+            cols[name] = np.asarray(inputs[name], dtype=np.float64)[..., np.newaxis]
+    cols.setdefault("misc_costs", np.zeros(1))
+    # O preço é a incógnita; a taxa fixa é opcional (regra < R$79)
+    missing = [name for name in INPUT_COLUMNS if name not in cols and name not in ("price_sale", "fixed_fee")]
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(missing)}")
+    return cols
+
+
+def required_price(inputs, target_margins):
+    """Preço mínimo para cada margem alvo (em %, como `margin_net`).
+
+    `inputs` é um mapping/DataFrame com INPUT_COLUMNS (escalares ou arrays de
+    SKUs). Sem `fixed_fee`, a taxa fixa segue a regra < R$79 no próprio preço
+    resolvido; com `fixed_fee`, ela é tratada como constante. Retorna array
+    (..., n_margens), com NaN onde a margem é inatingível (custos variáveis +
+    margem >= 100%).
+    """
+    cols = _columns(inputs)
+    margins = np.asarray(target_margins, dtype=np.float64) / 100
+
+    var_rates = cols["tax_rate"] + cols["commission_rate"] + cols["tacos_target"] + cols["return_rate"]
+    unit_costs = (cols["cost_product"] + cols["cost_inbound"] + cols["cost_prep"]
+                  + cols["fba_fee"] + cols["storage_fee"] + cols["misc_costs"])
+    denominator = 1 - var_rates - margins
+    feasible = denominator > 0
+    safe_den = np.where(feasible, denominator, 1.0)
+
+    if "fixed_fee" in cols:
+        price = (unit_costs + cols["fixed_fee"]) / safe_den
+    else:
+        # Abaixo do limiar paga a taxa; acima, não. Se nenhum dos lados
+        # fecha (preço com taxa >= R$79, preço sem taxa < R$79), o próprio
+        # limiar é o menor preço que atinge a margem.
+        with_fee = (unit_costs + LOW_PRICE_FIXED_FEE) / safe_den
+        without_fee = unit_costs / safe_den
+        price = np.where(
+            with_fee < LOW_PRICE_THRESHOLD, with_fee,
+            np.where(without_fee >= LOW_PRICE_THRESHOLD, without_fee, LOW_PRICE_THRESHOLD),
+        )
+
+    return np.where(feasible, price, np.nan)
+
+
+def solve_target_prices(inputs, target_margins, endings=PSYCHOLOGICAL_ENDINGS):
+    """Preço matemático e preço psicológico para SKUs x margens alvo.
+
+    Para cada final em `endings` o candidato é o primeiro preço com aquele
+    final que não fica abaixo do preço matemático; todos os candidatos são
+    avaliados pelo motor vetorizado numa única chamada. Retorna um dict com:
+
+    - price: preço matemático (..., n_margens)
+    - candidates / candidate_profit / candidate_margin: (..., n_margens, n_finais)
+    - psych_price / psych_ending / psych_profit / psych_margin: o menor
+      candidato que cumpre a meta (NaN quando a meta é inatingível)
+    """
+    price = required_price(inputs, target_margins)
+    margins = np.broadcast_to(np.asarray(target_margins, dtype=np.float64), price.shape)
+    endings = np.asarray(endings, dtype=np.float64)
+
+    # Candidatos: inteiro do preço + final; sobe R$1 se ficou abaixo do preço
+    base = np.floor(np.nan_to_num(price))[..., np.newaxis]
+    candidates = base + endings
+    candidates = np.where(candidates < price[..., np.newaxis], candidates + 1.0, candidates)
+
+    # Mesmas entradas do SKU para todos os candidatos (eixos margem x final)
+    cols = {name: np.asarray(inputs[name], dtype=np.float64)[..., np.newaxis, np.newaxis]
+            for name in INPUT_COLUMNS if name in inputs}
+    cols["price_sale"] = candidates
+    result = calculate_financials_batch(cols)
+    candidate_profit = result["net_profit"]
+    candidate_margin = result["margin_net"]
+
+    # Menor candidato que cumpre a meta
+    meets = (candidate_margin >= margins[..., np.newaxis] - _MARGIN_TOL) & ~np.isnan(price)[..., np.newaxis]
+    ranked = np.where(meets, candidates, np.inf)
+    best = np.argmin(ranked, axis=-1)[..., np.newaxis]
+    found = np.take_along_axis(meets, best, axis=-1)[..., 0]
+
+    def pick(values):
+        return np.where(found, np.take_along_axis(values, best, axis=-1)[..., 0], np.nan)
+
+    return {
+        "price": price,
+        "candidates": candidates,
+        "candidate_profit": candidate_profit,
+        "candidate_margin": candidate_margin,
+        "psych_price": pick(candidates),
+        "psych_ending": np.where(found, endings[best[..., 0]], np.nan),
+        "psych_profit": pick(candidate_profit),
+        "psych_margin": pick(candidate_margin),
+    }
+
+
+# -----------------------------------------------------------------------------
+# PREÇO ÓTIMO COM CURVA DE DEMANDA (ELASTICIDADE)
+# -----------------------------------------------------------------------------
+# Demanda de elasticidade constante: q(p) = scale * p ** elasticity. O lucro
+# total em cada preço da grade é q(p) * lucro_unitário(p), com o lucro
+# unitário vindo do motor vetorizado (incluindo a regra da taxa fixa). A grade
+# de todos os SKUs de um bloco é avaliada numa única matriz SKUs x preços.
+
+GRID_POINTS = 10_000
+
+# Limite de elementos (SKUs x pontos) avaliados por vez
+_GRID_BLOCK = 2_000_000
+
+
+def constant_elasticity_demand(ref_price, ref_units, elasticity):
+    """Curva que passa por (ref_price, ref_units) com a elasticidade dada (negativa)."""
+    ref_price = np.asarray(ref_price, dtype=np.float64)
+    elasticity = np.asarray(elasticity, dtype=np.float64)
+    return {"scale": np.asarray(ref_units, dtype=np.float64) / ref_price ** elasticity, "elasticity": elasticity}
+
+
+def fit_demand(prices, units):
+    """Ajusta log(q) = log(scale) + e * log(p) por mínimos quadrados, por SKU.
+
+    `prices` e `units` são arrays (n_skus, n_observações) ou 1-D para um SKU;
+    observações NaN ou não positivas são ignoradas. SKUs com menos de dois
+    preços distintos recebem NaN.
+    """
+    prices = np.atleast_2d(np.asarray(prices, dtype=np.float64))
+    units = np.atleast_2d(np.asarray(units, dtype=np.float64))
+    valid = (prices > 0) & (units > 0)
+    x = np.log(np.where(valid, prices, 1.0))
+    y = np.log(np.where(valid, units, 1.0))
+
+    count = valid.sum(axis=1)
+    safe_count = np.maximum(count, 1)
+    x_mean = np.where(valid, x, 0).sum(axis=1) / safe_count
+    y_mean = np.where(valid, y, 0).sum(axis=1) / safe_count
+    dx = np.where(valid, x - x_mean[:, None], 0)
+    dy = np.where(valid, y - y_mean[:, None], 0)
+    sxx = (dx * dx).sum(axis=1)
+    ok = (count >= 2) & (sxx > 0)
+    elasticity = np.where(ok, (dx * dy).sum(axis=1) / np.where(ok, sxx, 1.0), np.nan)
+    scale = np.where(ok, np.exp(y_mean - elasticity * x_mean), np.nan)
+    return {"scale": scale, "elasticity": elasticity}
+
+
+def optimize_price(inputs, demand, price_range=(0.5, 2.0), n_grid=GRID_POINTS, return_curves=False):
+    """Preço que maximiza o lucro total para cada SKU, por busca em grade.
+
+    `inputs` segue INPUT_COLUMNS (price_sale é o preço de referência: a grade
+    vai de price_range[0] a price_range[1] vezes ele); sem `fixed_fee`, a
+    regra < R$79 é aplicada a cada preço da grade. `demand` vem de
+    constant_elasticity_demand ou fit_demand. Retorna arrays por SKU
+    (best_price, best_units, best_unit_profit, best_profit) e, com
+    `return_curves`, a grade e o lucro total (n_skus, n_grid).
+    """
+    ref_price = np.atleast_1d(np.asarray(inputs["price_sale"], dtype=np.float64))
+    scale = np.asarray(demand["scale"], dtype=np.float64)
+    elasticity = np.asarray(demand["elasticity"], dtype=np.float64)
+    n_skus = np.broadcast_shapes(ref_price.shape, scale.shape, elasticity.shape)[0]
+    ref_price = np.broadcast_to(ref_price, (n_skus,))
+    scale = np.broadcast_to(scale, (n_skus,))
+    elasticity = np.broadcast_to(elasticity, (n_skus,))
+    steps = np.linspace(price_range[0], price_range[1], n_grid)
+
+    other = {}
+    for name in INPUT_COLUMNS:
+        if name in inputs and name != "price_sale":
+            other[name] = np.broadcast_to(np.asarray(inputs[name], dtype=np.float64), (n_skus,))
+
+    out = {name: np.empty(n_skus) for name in ("best_price", "best_units", "best_unit_profit", "best_profit")}
+    if return_curves:
+        out["grid"] = np.empty((n_skus, n_grid))
+        out["profit_curve"] = np.empty((n_skus, n_grid))
+
+    block = max(1, _GRID_BLOCK // n_grid)
+    for start in range(0, n_skus, block):
+        sl = slice(start, min(start + block, n_skus))
+        grid = ref_price[sl, None] * steps
+        cols = {name: values[sl, None] for name, values in other.items()}
+        cols["price_sale"] = grid
+        unit_profit = net_profit_batch(cols)
+        units = scale[sl, None] * grid ** elasticity[sl, None]
+        total = units * unit_profit
+
+        best = np.nanargmax(np.where(np.isnan(total), -np.inf, total), axis=1)[:, None]
+        out["best_price"][sl] = np.take_along_axis(grid, best, axis=1)[:, 0]
+        out["best_units"][sl] = np.take_along_axis(units, best, axis=1)[:, 0]
+        out["best_unit_profit"][sl] = np.take_along_axis(unit_profit, best, axis=1)[:, 0]
+        out["best_profit"][sl] = np.take_along_axis(total, best, axis=1)[:, 0]
+        if return_curves:
+            out["grid"][sl] = grid
+            out["profit_curve"][sl] = total
+
+    return out
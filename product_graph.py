@@ -0,0 +1,109 @@
+# -----------------------------------------------------------------------------
+# GRAFO DO PRODUTO (VALORES DERIVADOS DA BARRA LATERAL)
+# -----------------------------------------------------------------------------
+# Declara os valores que o app deriva dos parâmetros do produto: métricas,
+# componentes do preço reverso, diagnóstico, dados dos gráficos e as análises
+# pesadas das seções. Um grafo por sessão: mudar só o preço de venda, por
+# exemplo, não recalcula o preço reverso da margem alvo (que não depende
+# dele), e os nós das seções fechadas só rodam quando forem abertas.
+
+from analysis import cash_projection, diagnose, price_optimum, reverse_price, tornado_rows
+from engine import INPUT_COLUMNS, calculate_financials_cached, calculate_financials_exact_cached
+from export import export_bytes
+from figures import donut_figure, gauge_figure, scenario_table_figure, waterfall_figure
+from graph import DependencyGraph
+
+# Entradas além dos 12 parâmetros: ajustes das seções
+SECTION_INPUTS = (
+    "fee_rule", "target_margin_percent", "lote_qty", "demand_spec", "price_range",
+    "sens_bump", "sens_metric", "cash_settings", "diagnosis_rules", "money_mode",
+)
+
+# Parâmetros usados pelo preço reverso: todos menos o próprio preço
+REVERSE_INPUTS = INPUT_COLUMNS[1:]
+
+
+def build_product_graph():
+    graph = DependencyGraph()
+    graph.add_inputs(*INPUT_COLUMNS, *SECTION_INPUTS)
+
+    @graph.node(*INPUT_COLUMNS)
+    def params(*values):
+        return values
+
+    @graph.node("params", "money_mode")
+    def metrics(params, money_mode):
+        # "cents": cada componente arredondado ao centavo (engine.calculate_financials_cents)
+        if money_mode == "cents":
+            return calculate_financials_exact_cached(*params)
+        return calculate_financials_cached(*params)
+
+    @graph.node("tax_rate", "commission_rate", "tacos_target", "return_rate")
+    def var_rates(tax_rate, commission_rate, tacos_target, return_rate):
+        return tax_rate + commission_rate + tacos_target + return_rate
+
+    @graph.node("cost_product", "cost_inbound", "cost_prep", "fba_fee", "storage_fee", "fixed_fee", "misc_costs")
+    def total_fixed_costs(*costs):
+        return sum(costs)
+
+    @graph.node(*REVERSE_INPUTS, "target_margin_percent", "fee_rule")
+    def reverse(*values):
+        *rest, target_margin_percent, fee_rule = values
+        # O preço é a incógnita: fica fora da chave (e do cache) do solver
+        return reverse_price((0.0, *rest), target_margin_percent, fee_rule=fee_rule)
+
+    @graph.node("params", "diagnosis_rules", "money_mode")
+    def diagnosis(params, diagnosis_rules, money_mode):
+        return diagnose(params, diagnosis_rules, money_mode)
+
+    @graph.node("metrics", "lote_qty", "money_mode")
+    def lot_projection(metrics, lote_qty, money_mode):
+        if money_mode == "cents":
+            # Centavos inteiros x lote: total exato, sem resíduo do float
+            return {
+                name: round(metrics[key] * 100) * int(lote_qty) / 100
+                for name, key in (("total_inv", "cogs_total"), ("total_profit", "net_profit"), ("total_rev", "gross_revenue"))
+            }
+        return {
+            "total_inv": metrics['cogs_total'] * lote_qty,
+            "total_profit": metrics['net_profit'] * lote_qty,
+            "total_rev": metrics['gross_revenue'] * lote_qty,
+        }
+
+    @graph.node("metrics")
+    def report_csv(metrics):
+        import pandas as pd
+
+        return export_bytes([pd.DataFrame([metrics])], "csv")
+
+    @graph.node("metrics")
+    def donut_chart(metrics):
+        return donut_figure(metrics)
+
+    @graph.node("metrics")
+    def waterfall_chart(metrics):
+        return waterfall_figure(metrics)
+
+    # Os cenários pessimista / otimista mudam preço e custo: recalculados no
+    # mesmo modo de dinheiro das métricas
+    @graph.node("params", "money_mode")
+    def scenario_table(params, money_mode):
+        return scenario_table_figure(params, money_mode)
+
+    @graph.node("diagnosis")
+    def gauge_chart(diagnosis):
+        return gauge_figure(diagnosis[0])
+
+    @graph.node("params", "demand_spec", "price_range", "fee_rule")
+    def optimum(params, demand_spec, price_range, fee_rule):
+        return price_optimum(params, demand_spec, price_range, fee_rule=fee_rule)
+
+    @graph.node("params", "sens_bump", "sens_metric", "fee_rule")
+    def tornado(params, sens_bump, sens_metric, fee_rule):
+        return tornado_rows(params, sens_bump, sens_metric, fee_rule=fee_rule)
+
+    @graph.node("params", "cash_settings", "fee_rule")
+    def cash_flow(params, cash_settings, fee_rule):
+        return cash_projection(params, *cash_settings, fee_rule=fee_rule)
+
+    return graph
@@ -0,0 +1,88 @@
+# -----------------------------------------------------------------------------
+# ANÁLISE DE SENSIBILIDADE (TORNADO E GRADE 2-D)
+# -----------------------------------------------------------------------------
+# Em vez de 24 chamadas (12 entradas x para cima/para baixo), monta um eixo
+# extra de perturbações — base + 2 por entrada — e avalia tudo numa única
+# chamada do motor vetorizado: (n_skus, 25) cenários de uma vez. A grade 2-D
+# segue a mesma ideia com dois eixos de valores cruzados por broadcasting.
+
+import numpy as np
+
+from engine import INPUT_COLUMNS, calculate_financials_batch, default_fixed_fee, net_profit_batch
+
+# Bloco de SKUs por chamada ao motor no ranking de catálogo (x 25 cenários);
+# também é a tarefa de parallel.rank_inputs_parallel
+SKU_BLOCK = 40_000
+
+
+def _metric(cols, metric):
+    if metric == "net_profit":
+        return net_profit_batch(cols)
+    return calculate_financials_batch(cols)[metric]
+
+
+def _resolved(inputs):
+    # Taxa fixa explícita (regra < R$79 no preço base) para poder ser perturbada
+    cols = {name: np.asarray(inputs[name], dtype=np.float64) for name in INPUT_COLUMNS if name in inputs}
+    cols.setdefault("fixed_fee", default_fixed_fee(cols["price_sale"]))
+    cols.setdefault("misc_costs", np.zeros_like(cols["price_sale"]))
+    return cols
+
+
+def tornado(inputs, bump=0.10, metric="net_profit"):
+    """Efeito de variar cada entrada em ±`bump` (0.10 = ±10%) sobre `metric`.
+
+    `inputs` tem INPUT_COLUMNS como escalares (um produto) ou arrays (SKUs).
+    Retorna base (...,), low/high (..., 12) com a métrica após reduzir/aumentar
+    cada entrada, swing = |high - low| e elasticity = variação % da métrica
+    por 1% de variação da entrada (NaN quando a base é zero).
+    """
+    cols = _resolved(inputs)
+    k = len(INPUT_COLUMNS)
+
+    # Eixo de perturbações: 0 = base, 1 + 2i = entrada i para baixo, 2 + 2i = para cima
+    factors = np.ones((1 + 2 * k, k))
+    factors[1 + 2 * np.arange(k), np.arange(k)] = 1 - bump
+    factors[2 + 2 * np.arange(k), np.arange(k)] = 1 + bump
+    perturbed = {name: cols[name][..., np.newaxis] * factors[:, j] for j, name in enumerate(INPUT_COLUMNS)}
+
+    values = _metric(perturbed, metric)
+    base = values[..., 0]
+    low = values[..., 1::2]
+    high = values[..., 2::2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        elasticity = (high - low) / (2 * bump) / base[..., np.newaxis]
+    elasticity = np.where(base[..., np.newaxis] != 0, elasticity, np.nan)
+
+    return {"base": base, "low": low, "high": high, "swing": np.abs(high - low), "elasticity": elasticity}
+
+
+def grid_2d(inputs, x_name, y_name, x_values, y_values, metric="net_profit"):
+    """`metric` para todas as combinações de x_values x y_values (demais entradas fixas).
+
+    Retorna matriz (len(y_values), len(x_values)) para um único produto.
+    """
+    cols = _resolved(inputs)
+    cols[x_name] = np.asarray(x_values, dtype=np.float64)[np.newaxis, :]
+    cols[y_name] = np.asarray(y_values, dtype=np.float64)[:, np.newaxis]
+    if "price_sale" in (x_name, y_name) and "fixed_fee" not in (*inputs, x_name, y_name):
+        # Preço é eixo da grade: a regra < R$79 vale em cada preço, não no preço base
+        cols["fixed_fee"] = default_fixed_fee(cols["price_sale"])
+    return _metric(cols, metric)
+
+
+def rank_inputs(inputs, bump=0.10, metric="net_profit"):
+    """Ranking das entradas que mais movem `metric` no catálogo inteiro.
+
+    Retorna, por entrada (na ordem de INPUT_COLUMNS): swing médio entre SKUs
+    e em quantos SKUs ela é o maior motor da métrica.
+    """
+    n_skus = len(np.asarray(inputs["price_sale"]))
+    mean_swing = np.zeros(len(INPUT_COLUMNS))
+    top_driver = np.zeros(len(INPUT_COLUMNS), dtype=np.int64)
+    for start in range(0, n_skus, SKU_BLOCK):
+        block = {name: np.asarray(values)[start:start + SKU_BLOCK] for name, values in inputs.items()}
+        swing = tornado(block, bump, metric)["swing"]
+        mean_swing += swing.sum(axis=0)
+        top_driver += np.bincount(swing.argmax(axis=1), minlength=len(INPUT_COLUMNS))
+    return {"mean_swing": mean_swing / max(n_skus, 1), "top_driver_count": top_driver}
@@ -0,0 +1,118 @@
+# -----------------------------------------------------------------------------
+# ESTADO COMPARTILHADO ENTRE SESSÕES + TAREFAS EM SEGUNDO PLANO
+# -----------------------------------------------------------------------------
+# No servidor compartilhado, cada sessão do Streamlit carregava a sua cópia do
+# catálogo. Aqui um catálogo existe uma vez por processo: sessões que abrem o
+# mesmo conteúdo (mesma chave do cache em disco) recebem o mesmo objeto, com
+# arrays somente leitura. O registro guarda referências fracas (o catálogo sai
+# da memória quando nenhuma sessão o usa) mais os últimos SHARED_KEEP
+# carregados, para reaberturas rápidas.
+#
+# Simulações longas vão para um pool de threads de fundo: o script da sessão
+# só submete e acompanha, e tarefas idênticas (mesma chave) pedidas por
+# sessões diferentes viram uma só. O trabalho pesado roda em NumPy ou no pool
+# de processos de parallel.py, que liberam o GIL.
+#
+# Variáveis de ambiente: FBA_JOB_THREADS (padrão 2), FBA_SHARED_KEEP (padrão 2)
+# e FBA_WORKERS (processos de parallel.py; padrão: todos os núcleos).
+
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+SHARED_KEEP = int(os.environ.get("FBA_SHARED_KEEP", 2))
+JOB_THREADS = int(os.environ.get("FBA_JOB_THREADS", 2))
+# Aqui, e não em parallel.py, para a barra lateral não importar o pool de processos
+DEFAULT_WORKERS = int(os.environ.get("FBA_WORKERS", os.cpu_count() or 1))
+
+# Tarefas concluídas guardadas para as sessões buscarem o resultado
+_DONE_KEEP = 64
+
+
+class SharedRegistry:
+    """Chave -> objeto carregado uma vez por processo e devolvido a todas as sessões."""
+
+    def __init__(self, keep=SHARED_KEEP):
+        self.keep = keep
+        self._values = weakref.WeakValueDictionary()
+        self._recent = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, load):
+        """Objeto de `key`; na falta, `load()` roda uma vez só, mesmo com sessões simultâneas."""
+        with self._lock:
+            value = self._values.get(key)
+            if value is None:
+                key_lock = self._loading.setdefault(key, threading.Lock())
+        if value is None:
+            # As demais sessões esperam a primeira terminar e recebem o mesmo objeto
+            with key_lock:
+                value = self._values.get(key)
+                if value is None:
+                    value = load()
+                    self._values[key] = value
+            with self._lock:
+                self._loading.pop(key, None)
+        with self._lock:
+            self._recent[key] = value
+            self._recent.move_to_end(key)
+            while len(self._recent) > self.keep:
+                self._recent.popitem(last=False)
+        return value
+
+    def items(self):
+        with self._lock:
+            return list(self._values.items())
+
+
+class BackgroundJobs:
+    """Pool de threads com deduplicação por chave: uma execução por chave em andamento."""
+
+    def __init__(self, threads=JOB_THREADS):
+        self.threads = max(threads, 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="fba-job")
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key, func):
+        with self._lock:
+            future = self._futures.get(key)
+            # Falhou antes: tenta de novo; em andamento ou pronto: reaproveita
+            if future is None or (future.done() and future.exception() is not None):
+                future = self._executor.submit(func)
+                self._futures[key] = future
+            self._futures.move_to_end(key)
+            done = [name for name, item in self._futures.items() if item.done()]
+            for name in done[:max(len(done) - _DONE_KEEP, 0)]:
+                del self._futures[name]
+        return future
+
+    def future(self, key):
+        with self._lock:
+            return self._futures.get(key)
+
+    def stats(self):
+        with self._lock:
+            futures = list(self._futures.values())
+        running = sum(future.running() for future in futures)
+        pending = sum(not future.done() for future in futures)
+        return {"threads": self.threads, "running": running, "queued": pending - running,
+                "done": len(futures) - pending}
+
+
+catalogs = SharedRegistry()
+
+_jobs = None
+_jobs_lock = threading.Lock()
+
+
+def background_jobs():
+    """Pool de fundo do processo (criado na primeira chamada)."""
+    global _jobs
+    with _jobs_lock:
+        if _jobs is None:
+            _jobs = BackgroundJobs()
+        return _jobs
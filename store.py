@@ -0,0 +1,336 @@
+# -----------------------------------------------------------------------------
+# CACHE EM DISCO ENDEREÇADO POR CONTEÚDO
+# -----------------------------------------------------------------------------
+# O cache LRU de memo.py vive no processo e some a cada reinício; o cache do
+# Streamlit some com a sessão. Aqui os resultados caros (catálogo carregado,
+# Monte Carlo, risco e motores do catálogo) vão para o disco, compartilhados
+# entre sessões, usuários e reinícios do servidor.
+#
+# A chave é um hash (BLAKE2b) do namespace, de ENGINE_VERSION e de todos os
+# parâmetros, arrays inclusive: mudou qualquer entrada ou a versão das
+# fórmulas, muda a chave. Cada entrada é um diretório com meta.json (a
+# estrutura do resultado) e um .npy por array, aberto via memory-map na
+# leitura. Colunas de texto (SKUs, nomes) são gravadas em tamanho variável:
+# offsets int64 + bytes UTF-8 + máscara de ausentes. A escrita é atômica (diretório temporário + rename), então dois
+# processos podem gravar a mesma chave ao mesmo tempo. Acima de
+# FBA_CACHE_MAX_MB, as entradas usadas há mais tempo são removidas.
+#
+# Variáveis de ambiente: FBA_CACHE_DIR (padrão ~/.cache/fba-dashboard),
+# FBA_CACHE_MAX_MB (padrão 1024) e FBA_CACHE=0 para desligar.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+import instrument
+from engine import ENGINE_VERSION
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "fba-dashboard")
+DEFAULT_MAX_MB = 1024
+
+_META = "meta.json"
+
+
+# -----------------------------------------------------------------------------
+# CHAVE
+# -----------------------------------------------------------------------------
+
+def _feed(h, value):
+    # Cada valor leva um marcador de tipo: (1, "1") e ("1",) não colidem
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            h.update(b"O" + repr(value.shape).encode())
+            h.update("\x1f".join(map(str, value.tolist())).encode())
+        else:
+            array = np.ascontiguousarray(value)
+            h.update(b"A" + array.dtype.str.encode() + repr(array.shape).encode())
+            h.update(memoryview(array).cast("B"))
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        h.update(b"B%d:" % len(value))
+        h.update(value)
+    elif isinstance(value, dict):
+        h.update(b"D%d:" % len(value))
+        for key in sorted(value, key=repr):
+            _feed(h, key)
+            _feed(h, value[key])
+    elif isinstance(value, (list, tuple)):
+        h.update(b"L%d:" % len(value))
+        for item in value:
+            _feed(h, item)
+    elif isinstance(value, str):
+        encoded = value.encode()
+        h.update(b"S%d:" % len(encoded))
+        h.update(encoded)
+    else:
+        # Números, bool e None: repr é exato para float
+        h.update(b"V" + repr(value.item() if isinstance(value, np.generic) else value).encode() + b";")
+
+
+def content_key(namespace, *parts):
+    """Hash hexadecimal de namespace + ENGINE_VERSION + parâmetros."""
+    h = hashlib.blake2b(digest_size=20)
+    _feed(h, (namespace, ENGINE_VERSION, parts))
+    return h.hexdigest()
+
+
+def file_digest(source, block_size=1 << 20):
+    """Hash do conteúdo de um caminho, buffer ou arquivo aberto (seekable)."""
+    h = hashlib.blake2b(digest_size=20)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            while block := f.read(block_size):
+                h.update(block)
+    elif hasattr(source, "getbuffer"):
+        h.update(source.getbuffer())
+    else:
+        position = source.tell()
+        while block := source.read(block_size):
+            h.update(block if isinstance(block, bytes) else block.encode())
+        source.seek(position)
+    return h.hexdigest()
+
+
+# -----------------------------------------------------------------------------
+# SERIALIZAÇÃO (meta.json + um .npy por array)
+# -----------------------------------------------------------------------------
+
+def _is_missing(item):
+    return item is None or (isinstance(item, float) and item != item)
+
+
+def _add_array(arrays, array):
+    name = f"a{len(arrays)}.npy"
+    arrays[name] = array
+    return name
+
+
+def _encode_strings(value, arrays):
+    # Texto em tamanho variável: "<U{maior}" multiplicaria o maior nome pelo
+    # número de linhas e gravaria None/NaN como "None"/"nan"
+    items = value.reshape(-1).tolist()
+    missing = np.fromiter((_is_missing(item) for item in items), dtype=bool, count=len(items))
+    encoded = [b"" if gone else str(item).encode() for item, gone in zip(items, missing)]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return {"__strings__": {
+        "shape": list(value.shape),
+        "offsets": _add_array(arrays, offsets),
+        "data": _add_array(arrays, np.frombuffer(b"".join(encoded), dtype=np.uint8)),
+        "missing": _add_array(arrays, missing),
+    }}
+
+
+def _decode_strings(spec, path):
+    offsets, data, missing = (np.load(os.path.join(path, spec[part]), allow_pickle=False)
+                              for part in ("offsets", "data", "missing"))
+    raw = data.tobytes()
+    text = raw.decode()
+    bounds = offsets.tolist()
+    if len(text) == len(raw):
+        # Só ASCII: offsets em bytes valem como índices do texto
+        items = [text[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+    else:
+        items = [raw[start:stop].decode() for start, stop in zip(bounds[:-1], bounds[1:])]
+    result = np.empty(len(items), dtype=object)
+    result[:] = items
+    result[missing] = None
+    return result.reshape(spec["shape"])
+
+
+def _encode(value, arrays):
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return _encode_strings(value, arrays)
+        return {"__array__": _add_array(arrays, value)}
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {"__dict__": {key: _encode(item, arrays) for key, item in value.items()}}
+        return {"__items__": [[_encode(key, arrays), _encode(item, arrays)] for key, item in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return {"__tuple__" if isinstance(value, tuple) else "__list__": [_encode(item, arrays) for item in value]}
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f"Tipo não suportado no cache em disco: {type(value).__name__}")
+
+
+def _decode(value, path):
+    if not isinstance(value, dict):
+        return value
+    if "__array__" in value:
+        # view: ndarray comum (não np.memmap) sobre as mesmas páginas mapeadas
+        return np.load(os.path.join(path, value["__array__"]), mmap_mode="r", allow_pickle=False).view(np.ndarray)
+    if "__strings__" in value:
+        return _decode_strings(value["__strings__"], path)
+    if "__dict__" in value:
+        return {key: _decode(item, path) for key, item in value["__dict__"].items()}
+    if "__items__" in value:
+        return {_decode(key, path): _decode(item, path) for key, item in value["__items__"]}
+    if "__tuple__" in value:
+        return tuple(_decode(item, path) for item in value["__tuple__"])
+    return [_decode(item, path) for item in value["__list__"]]
+
+
+# -----------------------------------------------------------------------------
+# CACHE
+# -----------------------------------------------------------------------------
+
+class DiskCache:
+    """Cache chave -> resultado (dicts/tuplas de arrays e escalares) em `root`.
+
+    Arrays numéricos voltam como memory-maps somente leitura e arrays de
+    objetos como arrays de str (None nos ausentes): trate os resultados como
+    imutáveis, como os de memo.memoize.
+    """
+
+    def __init__(self, root=DEFAULT_DIR, max_bytes=DEFAULT_MAX_MB << 20):
+        self.root = os.fspath(root)
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def key(self, namespace, *parts):
+        return content_key(namespace, *parts)
+
+    def get(self, key):
+        """Resultado guardado em `key`, ou None."""
+        path = self._path(key)
+        try:
+            with open(os.path.join(path, _META), encoding="utf-8") as f:
+                value = _decode(json.load(f), path)
+            # mtime = último uso: é a ordem da remoção por tamanho
+            os.utime(os.path.join(path, _META))
+        except (OSError, ValueError):
+            # Ausente, removida por outro processo no meio da leitura ou corrompida
+            self.misses += 1
+            instrument.count("store.misses")
+            return None
+        self.hits += 1
+        instrument.count("store.hits")
+        return value
+
+    def put(self, key, value):
+        """Grava `value` em `key` (atômico) e remove as entradas mais antigas se passar do limite."""
+        with instrument.timer("store.put"):
+            arrays = {}
+            meta = _encode(value, arrays)
+            os.makedirs(self.root, exist_ok=True)
+            tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+            try:
+                for name, array in arrays.items():
+                    np.save(os.path.join(tmp, name), array, allow_pickle=False)
+                with open(os.path.join(tmp, _META), "w", encoding="utf-8") as f:
+                    json.dump(meta, f)
+                path = self._path(key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                try:
+                    os.rename(tmp, path)
+                except OSError:
+                    # Outro processo gravou a mesma chave antes: o conteúdo é o mesmo
+                    shutil.rmtree(tmp, ignore_errors=True)
+            except BaseException:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+        self.evict()
+
+    def get_or_compute(self, key, compute):
+        """get(key) ou, na falta, compute() gravado em `key`."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _entries(self):
+        # (último uso, bytes, caminho) de cada entrada
+        entries = []
+        for shard in _scandir(self.root):
+            if not shard.is_dir() or shard.name.startswith(".tmp-"):
+                continue
+            for entry in _scandir(shard.path):
+                try:
+                    used = os.stat(os.path.join(entry.path, _META)).st_mtime
+                    size = sum(item.stat().st_size for item in os.scandir(entry.path))
+                except OSError:
+                    continue
+                entries.append((used, size, entry.path))
+        return entries
+
+    def evict(self):
+        """Remove as entradas usadas há mais tempo até caber em max_bytes. Devolve quantas saíram."""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                removed += 1
+        instrument.count("store.evictions", removed)
+        return removed
+
+    def clear(self):
+        """Apaga todas as entradas (e temporários órfãos)."""
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            "root": self.root,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def _scandir(path):
+    try:
+        return list(os.scandir(path))
+    except OSError:
+        return []
+
+
+class _NullCache(DiskCache):
+    """FBA_CACHE=0: mesma interface, nada é lido nem gravado."""
+
+    def get(self, key):
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        pass
+
+    def stats(self):
+        return {"root": "", "entries": 0, "bytes": 0, "max_bytes": 0, "hits": 0, "misses": self.misses}
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    """Cache do processo, configurado pelas variáveis de ambiente na primeira chamada."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            if os.environ.get("FBA_CACHE", "1") == "0":
+                _default = _NullCache(root="", max_bytes=0)
+            else:
+                max_mb = float(os.environ.get("FBA_CACHE_MAX_MB", DEFAULT_MAX_MB))
+                _default = DiskCache(os.environ.get("FBA_CACHE_DIR", DEFAULT_DIR), int(max_mb * (1 << 20)))
+        return _default
@@ -0,0 +1,114 @@
+# Realizado do settlement lido em blocos: mesmos totais de uma leitura única.
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actuals import NO_SKU, _partials, load_actuals  # noqa: E402
+
+HEADER = ("settlement-id", "settlement-start-date", "transaction-type", "order-id", "amount-type",
+          "amount-description", "amount", "posted-date", "sku", "quantity-purchased")
+
+# (transaction-type, amount-type, amount-description) -> medida esperada
+LINE_TYPES = {
+    ("Order", "ItemPrice", "Principal"): "revenue",
+    ("Order", "ItemPrice", "Shipping"): "revenue",
+    ("Order", "ItemFees", "Commission"): "referral_fee",
+    ("Order", "ItemFees", "FBAPerUnitFulfillmentFee"): "fba_fee",
+    ("Refund", "ItemPrice", "Principal"): "refunds",
+}
+SKUS = ("A-1", "B-2", "C-3")
+MONTHS = ("2024-01", "2024-02")
+
+
+def settlement_rows(seed=0):
+    rng = np.random.default_rng(seed)
+    # Linha de resumo do período: sem transaction-type
+    rows = [["1", "2024-01-01", "", "", "", "", "12345.67", "", "", ""]]
+    for order in range(240):
+        sku = SKUS[rng.integers(len(SKUS))]
+        date = f"{MONTHS[rng.integers(len(MONTHS))]}-{rng.integers(1, 28):02d}T10:00:00+00:00"
+        qty = int(rng.integers(1, 4))
+        price = round(float(rng.uniform(30, 200)) * qty, 2)
+        lines = [("Order", "ItemPrice", "Principal", price, qty),
+                 ("Order", "ItemPrice", "Shipping", 9.90, qty),
+                 ("Order", "ItemFees", "Commission", -round(price * 0.15, 2), ""),
+                 ("Order", "ItemFees", "FBAPerUnitFulfillmentFee", -round(12.45 * qty, 2), "")]
+        if order % 7 == 0:
+            lines.append(("Refund", "ItemPrice", "Principal", -price, qty))
+        rows += [["1", "", t, f"O-{order}", a, d, f"{amount:.2f}", date, sku, str(q)] for t, a, d, amount, q in lines]
+    # Ads e armazenagem sem SKU; março só tem custos (nenhuma venda)
+    rows += [
+        ["1", "", "ServiceFee", "", "Cost of Advertising", "TransactionTotalAmount", "-300.00", "2024-01-31T10:00:00+00:00", "", ""],
+        ["1", "", "other-transaction", "", "other-transaction", "Storage Fee", "-80.00", "2024-02-15T10:00:00+00:00", "", ""],
+        ["1", "", "ServiceFee", "", "Cost of Advertising", "TransactionTotalAmount", "-55.00", "2024-03-05T10:00:00+00:00", "", ""],
+    ]
+    return rows
+
+
+@pytest.fixture
+def settlement(tmp_path):
+    path = tmp_path / "settlement.txt"
+    rows = settlement_rows()
+    path.write_text("\n".join("\t".join(row) for row in [HEADER, *rows]) + "\n", encoding="utf-8")
+    return path, rows
+
+
+def single_pass(rows):
+    # Uma leitura só, sem blocos: groupby direto por (SKU, mês, medida)
+    frame = pd.DataFrame([row for row in rows[1:] if row[8]], columns=HEADER)
+    frame["measure"] = [LINE_TYPES[key] for key in zip(frame["transaction-type"], frame["amount-type"], frame["amount-description"])]
+    frame["month"] = frame["posted-date"].str[:7]
+    amount = frame["amount"].astype(float)
+    frame["value"] = np.where(frame["measure"] == "revenue", amount, -amount)
+    return frame.groupby(["sku", "month", "measure"])["value"].sum().unstack(fill_value=0.0), frame
+
+
+def test_blocks_add_up_to_a_single_pass_groupby(settlement):
+    path, rows = settlement
+    assert len(list(_partials(str(path), "settlement", 4096, ".", False))) > 3
+
+    actuals = load_actuals(str(path), block_bytes=4096, allocate=False)
+    expected, _ = single_pass(rows)
+    for measure in expected.columns:
+        got = actuals.loc[expected.index, measure]
+        np.testing.assert_allclose(got.to_numpy(), expected[measure].to_numpy(), rtol=1e-12, err_msg=measure)
+
+    one_block = load_actuals(str(path), block_bytes=1 << 20, allocate=False)
+    pd.testing.assert_frame_equal(actuals.sort_index(), one_block.sort_index())
+
+
+def test_units_come_from_principal_lines(settlement):
+    path, rows = settlement
+    actuals = load_actuals(str(path), block_bytes=4096, allocate=False)
+    _, frame = single_pass(rows)
+    principal = frame[frame["amount-description"] == "Principal"]
+    quantity = principal["quantity-purchased"].astype(int)
+    sold = quantity[principal["transaction-type"] == "Order"].groupby([principal["sku"], principal["month"]]).sum()
+    returned = quantity[principal["transaction-type"] == "Refund"].groupby([principal["sku"], principal["month"]]).sum()
+
+    # Linhas de frete também trazem quantity-purchased e não contam
+    np.testing.assert_array_equal(actuals.loc[sold.index, "units"].to_numpy(), sold.to_numpy())
+    np.testing.assert_array_equal(actuals.loc[returned.index, "units_returned"].to_numpy(), returned.to_numpy())
+
+
+def test_shared_costs_are_allocated_by_revenue_and_kept_without_revenue(settlement):
+    path, _ = settlement
+    actuals = load_actuals(str(path), block_bytes=4096)
+    months = actuals.index.get_level_values("month")
+    skus = actuals.index.get_level_values("sku")
+
+    january = actuals[(months == "2024-01") & (skus != NO_SKU)]
+    assert january["ad_spend"].sum() == pytest.approx(300.0)
+    np.testing.assert_allclose(january["ad_spend"], 300.0 * january["revenue"] / january["revenue"].sum())
+    february = actuals[(months == "2024-02") & (skus != NO_SKU)]
+    assert february["storage_fee"].sum() == pytest.approx(80.0)
+
+    # Março não tem receita: o anúncio fica na linha sem SKU
+    assert actuals.loc[(NO_SKU, "2024-03"), "ad_spend"] == pytest.approx(55.0)
+    assert NO_SKU not in skus[months != "2024-03"]
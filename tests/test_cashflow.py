@@ -0,0 +1,58 @@
+# Fluxo de caixa por lote: reposição chega após o lead time, repasses e armazenagem do Q4.
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cashflow import Q4_STORAGE_MULTIPLIER, project_cashflow  # noqa: E402
+from engine import INPUT_COLUMNS, calculate_financials_batch  # noqa: E402
+
+INPUTS = dict(zip(INPUT_COLUMNS, (100.0, 30.0, 2.0, 1.0, 0.06, 0.15, 15.0, 0.5, 0.08, 0.02, 0.0, 0.0)))
+
+
+def test_lead_time_below_one_day_is_rejected():
+    with pytest.raises(ValueError, match="Lead time"):
+        project_cashflow(INPUTS, 100, 10, lead_time_days=0, horizon_days=30, start_date="2025-01-01")
+    with pytest.raises(ValueError, match="Lead time"):
+        project_cashflow(INPUTS, [100, 100], 10, lead_time_days=[5, 0], horizon_days=30, start_date="2025-01-01")
+
+
+@pytest.mark.parametrize("lead_time, order_days", [(1, [8, 18, 28]), (5, [4, 14, 24])])
+def test_restock_lands_after_the_lead_time(lead_time, order_days):
+    # 10 por dia, lote de 100, sem estoque de segurança: pede quando sobra o consumo do lead time
+    result = project_cashflow(INPUTS, 100, 10, lead_time_days=lead_time, horizon_days=30, start_date="2025-01-01",
+                              safety_days=0)
+    unit_cost = INPUTS["cost_product"] + INPUTS["cost_inbound"] + INPUTS["cost_prep"]
+    purchases = result["purchases"][0]
+    assert np.flatnonzero(purchases).tolist() == [0, *order_days]
+    assert purchases.sum() == pytest.approx(4 * 100 * unit_cost)
+
+    stock = result["stock"][0]
+    arrivals = np.flatnonzero(np.diff(stock) > 0) + 1
+    assert arrivals.tolist() == [t + lead_time for t in order_days]
+    # Cada lote chega quando o anterior acaba: vende todo dia e nada se perde
+    assert (result["units_sold"][0] == 10).all()
+    assert result["units_sold"].sum() + result["ending_units"][0] == 400
+
+
+def test_every_sale_is_settled_by_the_last_period():
+    result = project_cashflow(INPUTS, 1_000, 3, horizon_days=45, start_date="2025-01-01", restock=False)
+    unit = calculate_financials_batch(INPUTS)
+    per_unit = (unit["gross_revenue"] - unit["val_tax"] - unit["val_comm"] - unit["val_fixed"] - unit["val_fba"]
+                - unit["val_returns"] - unit["val_misc"])
+    assert result["settlement"].sum() == pytest.approx(result["units_sold"].sum() * per_unit)
+    paid = np.flatnonzero(result["settlement"][0])
+    np.testing.assert_array_equal(paid, [13, 27, 41, 44])
+
+
+def test_storage_is_charged_monthly_with_the_q4_peak():
+    # Sem vendas: 100 unidades paradas de setembro a outubro
+    result = project_cashflow(INPUTS, 100, 0, horizon_days=61, start_date="2025-09-01", restock=False)
+    storage = result["storage"][0]
+    assert np.flatnonzero(storage).tolist() == [29, 60]
+    assert storage[29] == pytest.approx(100 * 0.5)
+    assert storage[60] == pytest.approx(100 * 0.5 * 31 / 30 * Q4_STORAGE_MULTIPLIER)
@@ -0,0 +1,78 @@
+# Diagnóstico por regras: o conjunto padrão reproduz as heurísticas if/elif originais.
+
+import copy
+import itertools
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diagnosis import TOP_SELLERS_BR, RuleSet, load_rules  # noqa: E402
+
+
+def baseline_diagnose(metrics, price_sale):
+    # Heurísticas do app antes do conjunto de regras (analysis.diagnose original)
+    score = 100
+    warnings = []
+    successes = []
+    if metrics['margin_net'] < 10:
+        score -= 25
+        warnings.append(("CRÍTICO", "Margem líquida perigosamente baixa (<10%). Qualquer aumento no custo de ads vai gerar prejuízo."))
+    elif metrics['margin_net'] < 15:
+        score -= 10
+        warnings.append(("ATENÇÃO", "Margem abaixo de 15%. Volume de vendas precisa ser muito alto para compensar."))
+    else:
+        successes.append("Margem Líquida saudável (>15%).")
+    if metrics['roi'] < 30:
+        score -= 25
+        warnings.append(("BAIXO GIRO", "ROI < 30%. O risco de capital empatado é alto. Tente negociar custo ou aumentar preço."))
+    else:
+        successes.append("ROI excelente para Private Label (>30%).")
+    if metrics['break_even'] > (price_sale * 0.85):
+        score -= 15
+        warnings.append(("FRAGILIDADE", "Seu Break-even está muito próximo do preço atual. Você tem pouca margem para fazer promoções."))
+    return score, tuple(warnings), tuple(successes)
+
+
+def test_default_rules_match_the_baseline_heuristics():
+    margins = [-50.0, 0.0, 9.99, 10.0, 10.01, 14.99, 15.0, 15.01, 40.0, math.nan]
+    rois = [-100.0, 0.0, 29.99, 30.0, 30.01, 250.0, math.nan]
+    ratios = [0.5, 0.8499, 0.85, 0.8501, 1.2, math.nan]
+    price = 100.0
+    grid = list(itertools.product(margins, rois, ratios))
+    columns = {
+        "margin_net": np.array([m for m, _, _ in grid]),
+        "roi": np.array([r for _, r, _ in grid]),
+        "break_even": np.array([b * price for _, _, b in grid]),
+        "price_sale": np.full(len(grid), price),
+    }
+
+    rules = load_rules()
+    result = rules.evaluate(columns)
+    for i, (margin, roi, ratio) in enumerate(grid):
+        score, warnings, successes = baseline_diagnose({"margin_net": margin, "roi": roi, "break_even": ratio * price}, price)
+        assert result["score"][i] == score, (margin, roi, ratio)
+        assert rules.findings(result["hits"][:, i]) == (warnings, successes), (margin, roi, ratio)
+
+
+def test_rule_sets_compare_by_content():
+    same = copy.deepcopy(TOP_SELLERS_BR)
+    same["name"] = "Outra cópia"
+    for rule in same["rules"]:
+        rule["threshold"] = float(rule["threshold"])
+        rule["penalty"] = np.int64(rule["penalty"])
+    default = load_rules()
+    assert RuleSet(same) == default
+    assert hash(RuleSet(same)) == hash(default)
+    assert {RuleSet(same): "cache"}[default] == "cache"
+
+    changed = copy.deepcopy(TOP_SELLERS_BR)
+    changed["rules"][0]["threshold"] = 12
+    assert RuleSet(changed) != default
+    reworded = copy.deepcopy(TOP_SELLERS_BR)
+    reworded["rules"][2]["success"] = "ROI ótimo."
+    assert RuleSet(reworded) != default
+    assert default != TOP_SELLERS_BR
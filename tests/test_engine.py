@@ -0,0 +1,106 @@
+# Paridade do motor vetorizado com o caminho escalar (calculate_financials).
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import (  # noqa: E402
+    BREAK_EVEN_SENTINEL,
+    INPUT_COLUMNS,
+    METRIC_COLUMNS,
+    calculate_financials,
+    calculate_financials_batch,
+)
+
+
+def random_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "price_sale": rng.uniform(-20, 400, n),
+        "cost_product": rng.uniform(-5, 150, n),
+        "cost_inbound": rng.uniform(0, 10, n),
+        "cost_prep": rng.uniform(0, 5, n),
+        "tax_rate": rng.uniform(0, 0.3, n),
+        "commission_rate": rng.uniform(0, 0.3, n),
+        "fba_fee": rng.uniform(0, 40, n),
+        "storage_fee": rng.uniform(0, 3, n),
+        "tacos_target": rng.uniform(0, 0.5, n),
+        "return_rate": rng.uniform(0, 0.2, n),
+        "fixed_fee": rng.choice([0.0, 5.0], n),
+        "misc_costs": rng.uniform(0, 4, n),
+    }
+
+
+def scalar_rows(inputs):
+    n = len(inputs["price_sale"])
+    rows = [calculate_financials(*(float(inputs[name][i]) for name in INPUT_COLUMNS)) for i in range(n)]
+    return {metric: np.array([row[metric] for row in rows]) for metric in METRIC_COLUMNS}
+
+
+def assert_parity(inputs):
+    batch = calculate_financials_batch(inputs)
+    scalar = scalar_rows(inputs)
+    for metric in METRIC_COLUMNS:
+        np.testing.assert_allclose(batch[metric], scalar[metric], rtol=1e-12, atol=1e-9, err_msg=metric)
+
+
+def test_batch_matches_scalar_on_random_rows():
+    assert_parity(random_inputs(20_000))
+
+
+@pytest.mark.parametrize("price", [0.0, -10.0])
+def test_zero_and_negative_price(price):
+    inputs = random_inputs(50, seed=1)
+    inputs["price_sale"][:] = price
+    assert_parity(inputs)
+    batch = calculate_financials_batch(inputs)
+    assert np.all(batch["margin_net"] == 0)
+
+
+@pytest.mark.parametrize("cost", [0.0, -3.0])
+def test_zero_and_negative_cogs(cost):
+    inputs = random_inputs(50, seed=2)
+    inputs["cost_product"][:] = cost
+    inputs["cost_inbound"][:] = 0.0
+    inputs["cost_prep"][:] = 0.0
+    assert_parity(inputs)
+    batch = calculate_financials_batch(inputs)
+    assert np.all(batch["roi"] == 0)
+    assert np.all(batch["markup"] == 0)
+
+
+def test_break_even_sentinel():
+    inputs = random_inputs(50, seed=3)
+    # Taxas variáveis somando 100% ou mais: denominador <= 0
+    inputs["tax_rate"][:25] = 0.5
+    inputs["commission_rate"][:25] = 0.5
+    inputs["tax_rate"][25:] = 0.6
+    assert_parity(inputs)
+    batch = calculate_financials_batch(inputs)
+    assert np.all(batch["break_even"][:25] == BREAK_EVEN_SENTINEL)
+
+
+def test_scalar_broadcast_inputs():
+    inputs = random_inputs(10, seed=4)
+    inputs["tax_rate"] = 0.06
+    batch = calculate_financials_batch(inputs)
+    expanded = {name: np.broadcast_to(values, (10,)) for name, values in inputs.items()}
+    scalar = scalar_rows(expanded)
+    np.testing.assert_allclose(batch["net_profit"], scalar["net_profit"], rtol=1e-12, atol=1e-9)
+
+
+def test_cents_mode_rejects_non_finite_inputs():
+    from engine import calculate_financials_cents
+
+    inputs = random_inputs(10, seed=5)
+    inputs["fba_fee"][3] = np.nan
+    with pytest.raises(ValueError, match="fba_fee"):
+        calculate_financials_cents(inputs)
+    inputs["fba_fee"][3] = 10.0
+    inputs["tax_rate"][7] = np.inf
+    with pytest.raises(ValueError, match="tax_rate"):
+        calculate_financials_cents(inputs)
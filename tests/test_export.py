@@ -0,0 +1,48 @@
+# Exportação em blocos: o esquema do arquivo não depende do primeiro bloco.
+
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export import export_bytes  # noqa: E402
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def chunks():
+    # 1º bloco: nomes vazios (tipo null se inferido), SKUs e lucro inteiros
+    first = pd.DataFrame({"sku": [1, 2], "product_name": [None, None], "net_profit": np.array([1, 2])})
+    second = pd.DataFrame({"sku": ["A-3", "B-4"], "product_name": ["Caneca", "Café"], "net_profit": [1.5, np.nan]})
+    return [first, second]
+
+
+def test_parquet_schema_is_declared_up_front():
+    table = pq.read_table(io.BytesIO(export_bytes(chunks(), "parquet")))
+    assert [str(field.type) for field in table.schema] == ["large_string", "large_string", "double"]
+    frame = table.to_pandas()
+    assert frame["sku"].tolist() == ["1", "2", "A-3", "B-4"]
+    assert frame["product_name"].tolist()[2:] == ["Caneca", "Café"]
+    assert frame["net_profit"].tolist()[:3] == [1.0, 2.0, 1.5]
+
+
+def test_csv_accepts_later_blocks_with_other_inferred_types():
+    lines = export_bytes(chunks(), "csv").decode().splitlines()
+    assert lines[0] == '"sku","product_name","net_profit"'
+    assert lines[4] == '"B-4","Café",'
+
+
+def test_single_product_report_is_one_block_of_the_pipeline():
+    from engine import INPUT_COLUMNS, calculate_financials
+    from product_graph import build_product_graph
+
+    params = (129.90, 35.0, 1.5, 1.0, 0.06, 0.16, 14.5, 0.5, 0.10, 0.03, 0.0, 0.0)
+    graph = build_product_graph()
+    graph.set_inputs(**dict(zip(INPUT_COLUMNS, params)), money_mode="float")
+    metrics = calculate_financials(*params)
+    assert graph.get("report_csv") == export_bytes([pd.DataFrame([metrics])], "csv")
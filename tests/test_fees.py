@@ -0,0 +1,134 @@
+# Tabela de tarifas vetorizada contra uma consulta escalar, faixa a faixa, nos limites exatos.
+
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fees import AMAZON_BR, load_rate_card  # noqa: E402
+
+# Faixas de categorias diferentes que não coincidem: a união dos limites não pode vazar entre grupos
+CUSTOM = {
+    **AMAZON_BR,
+    "referral": {
+        "default": "Outros",
+        "min_fee": 2.00,
+        "categories": {
+            "Casa": [[0, 0.10], [50, 0.20]],
+            "Livros": [[0, 0.30], [100, 0.05], [250, 0.08]],
+            "Outros": [[0, 0.15]],
+        },
+    },
+    "fixed_fee": [[0, 6.0], [30, 4.0], [79, 0.0]],
+}
+
+
+def reference_referral(spec, category, price):
+    referral = spec["referral"]
+    names = {name.casefold(): name for name in referral["categories"]}
+    key = str(category).strip().casefold() if isinstance(category, str) else None
+    bands = referral["categories"][names.get(key, referral["default"])]
+    rate = [value for bound, value in bands if bound <= price][-1]
+    min_fee = referral.get("min_fee", 0.0)
+    return max(rate, min_fee / price) if price > 0 and min_fee > 0 else rate
+
+
+def reference_fixed_fee(spec, price):
+    return [value for bound, value in spec["fixed_fee"] if bound <= price][-1]
+
+
+def reference_fba_fee(spec, dims, weight):
+    fba = spec["fba"]
+    tiers = fba["tiers"]
+    dims = sorted(dims, reverse=True)
+    for i, tier in enumerate(tiers):
+        last = i == len(tiers) - 1
+        max_dims = sorted(tier.get("max_dims_cm") or [math.inf] * 3, reverse=True)
+        if last or (all(d <= m for d, m in zip(dims, max_dims)) and weight <= tier.get("max_weight_kg", math.inf)):
+            break
+    volume = dims[0] * dims[1] * dims[2] / fba.get("volumetric_divisor", 6000)
+    billable = max(weight, volume) if tier.get("volumetric", True) else weight
+    for bound, fee in zip(tier["weights_kg"], tier["fees"]):
+        if billable <= bound:
+            return fee
+    excess = math.ceil(billable - tier["weights_kg"][-1])
+    return tier["fees"][-1] + excess * tier.get("extra_per_kg", 0.0)
+
+
+def edges(bounds):
+    # Cada limite, um centavo abaixo e um acima
+    return sorted({max(b + d, 0.01) for b in bounds for d in (-0.01, 0.0, 0.01)})
+
+
+@pytest.mark.parametrize("spec", [AMAZON_BR, CUSTOM], ids=["amazon_br", "custom"])
+def test_referral_and_fixed_fee_match_scalar_lookup_at_band_edges(spec):
+    card = load_rate_card(spec)
+    bounds = [b for bands in spec["referral"]["categories"].values() for b, _ in bands]
+    bounds += [b for b, _ in spec["fixed_fee"]]
+    # Abaixo de min_fee / comissão a tarifa mínima manda
+    bounds += [spec["referral"]["min_fee"] / 0.15, 1.0, 5.0]
+    prices = edges(bounds)
+    categories = [*spec["referral"]["categories"], "  casa ", "LIVROS", "Inexistente", None]
+
+    cats = np.array([c for c in categories for _ in prices], dtype=object)
+    grid = np.array([p for _ in categories for p in prices])
+    expected = [reference_referral(spec, c, p) for c, p in zip(cats, grid)]
+    np.testing.assert_allclose(card.referral_rate(cats, grid), expected, rtol=0, atol=1e-15)
+    np.testing.assert_array_equal(card.fixed_fee(prices), [reference_fixed_fee(spec, p) for p in prices])
+
+
+def test_referral_band_and_min_fee_by_hand():
+    card = load_rate_card()
+    rates = card.referral_rate(["Acessórios de Eletrônicos"] * 3 + ["Outros"], [99.99, 100.0, 100.01, 5.0])
+    # Exatamente R$100 já é a faixa de 10%; R$5 x 15% = R$0,75 < R$1,00 de tarifa mínima
+    np.testing.assert_allclose(rates, [0.15, 0.10, 0.10, 1.00 / 5.0])
+    np.testing.assert_array_equal(card.fixed_fee([78.99, 79.0]), [5.0, 0.0])
+
+
+def test_unknown_and_missing_categories_fall_back_to_the_default():
+    card = load_rate_card(CUSTOM)
+    ids = card.category_ids(np.array(["Inexistente", None, np.nan, " CASA ", "Outros"], dtype=object))
+    default = card.categories.index("Outros")
+    np.testing.assert_array_equal(ids, [default, default, default, card.categories.index("Casa"), default])
+
+
+def test_fba_fee_matches_scalar_lookup_at_tier_edges():
+    card = load_rate_card()
+    cases = []
+    for tier in AMAZON_BR["fba"]["tiers"]:
+        max_dims = tier.get("max_dims_cm")
+        shapes = [[10, 10, 1]]
+        if max_dims:
+            # Exatamente no limite, um pouco acima em cada dimensão e girado
+            shapes += [max_dims, max_dims[::-1], *([d + (0.01 if j == i else 0) for j, d in enumerate(max_dims)]
+                                                   for i in range(3))]
+        for dims in shapes:
+            for weight in edges([*tier["weights_kg"], tier.get("max_weight_kg", 40)]):
+                cases.append((*dims, weight))
+    # Bem acima da última faixa de peso: R$/kg excedente
+    cases += [(100, 60, 60, 1.0), (120, 80, 80, 45.3), (30, 20, 10, 31.2)]
+
+    length, width, height, weight = (np.array(col, dtype=np.float64) for col in zip(*cases))
+    expected = [reference_fba_fee(AMAZON_BR, case[:3], case[3]) for case in cases]
+    np.testing.assert_allclose(card.fba_fee(length, width, height, weight), expected, rtol=0, atol=1e-12)
+
+
+def test_fba_fee_by_hand():
+    card = load_rate_card()
+    fees = card.fba_fee(
+        [33, 33, 45, 100, 30],
+        [23, 23, 34, 60, 20],
+        [2.5, 2.51, 26, 60, 10],
+        [0.5, 0.5, 1.0, 1.0, 31.2],
+    )
+    np.testing.assert_allclose(fees, [
+        11.45,                       # envelope no limite, sem peso cúbico
+        13.45,                       # 2,51 cm: padrão, até 0,5 kg
+        26.45,                       # padrão: peso cúbico 6,63 kg -> até 7 kg
+        78.45 + 30 * 2.50,           # grande: cúbico 60 kg, 30 kg acima da última faixa
+        90.00 + 2 * 3.00,            # volumoso pelo peso: 1,2 kg excedente conta 2 kg
+    ])
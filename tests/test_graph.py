@@ -0,0 +1,92 @@
+# Grafo de dependências: só os nós a jusante de uma entrada alterada recalculam.
+
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import INPUT_COLUMNS  # noqa: E402
+from graph import DependencyGraph  # noqa: E402
+from product_graph import build_product_graph  # noqa: E402
+
+PARAMS = dict(zip(INPUT_COLUMNS, (129.90, 41.37, 2.13, 1.11, 0.06, 0.15, 18.45, 0.33, 0.08, 0.02, 0.0, 0.0)))
+
+
+def computes(graph):
+    return {row["node"]: row["computes"] for row in graph.report()}
+
+
+def counting_graph():
+    calls = {"total": 0, "double": 0}
+    graph = DependencyGraph()
+    graph.add_inputs("a", "b")
+
+    @graph.node("a", "b")
+    def total(a, b):
+        calls["total"] += 1
+        return a + b
+
+    @graph.node("total")
+    def double(total):
+        calls["double"] += 1
+        return 2 * total
+
+    return graph, calls
+
+
+def test_only_downstream_nodes_recompute():
+    graph, calls = counting_graph()
+    graph.set_inputs(a=1.0, b=2.0)
+    assert graph.get("double") == 6.0
+    assert graph.set_inputs(a=1.0, b=2.0) == []
+    assert graph.get("double") == 6.0
+    assert calls == {"total": 1, "double": 1}
+
+    assert graph.set_inputs(b=3.0) == ["b"]
+    assert graph.get("double") == 8.0
+    assert calls == {"total": 2, "double": 2}
+
+
+def test_nan_input_left_unchanged_does_not_recompute():
+    graph, calls = counting_graph()
+    graph.set_inputs(a=math.nan, b=2.0)
+    assert math.isnan(graph.get("double"))
+    assert graph.set_inputs(a=float("nan")) == []
+    graph.get("double")
+    assert calls == {"total": 1, "double": 1}
+
+    # Sair e voltar ao NaN continuam sendo mudanças
+    assert graph.set_inputs(a=1.0) == ["a"]
+    assert graph.get("double") == 6.0
+    assert graph.set_inputs(a=math.nan) == ["a"]
+    graph.get("double")
+    assert calls == {"total": 3, "double": 3}
+
+
+def test_changing_price_keeps_the_reverse_price_cached():
+    graph = build_product_graph()
+    graph.set_inputs(**PARAMS, fee_rule=True, target_margin_percent=20.0, money_mode="float")
+    first = graph.get("reverse")
+    graph.get("metrics")
+
+    graph.set_inputs(price_sale=99.90)
+    assert graph.get("reverse") is first
+    assert graph.get("metrics")["gross_revenue"] == 99.90
+    counts = computes(graph)
+    assert counts["reverse"] == 1
+    assert counts["metrics"] == 2
+
+
+def test_nodes_of_closed_sections_never_run():
+    graph = build_product_graph()
+    graph.set_inputs(**PARAMS, fee_rule=True, money_mode="float", lote_qty=100)
+    for name in ("metrics", "lot_projection", "donut_chart", "waterfall_chart"):
+        graph.get(name)
+    graph.set_inputs(price_sale=139.90, lote_qty=200)
+    graph.get("lot_projection")
+
+    counts = computes(graph)
+    for section in ("reverse", "optimum", "tornado", "cash_flow", "scenario_table", "diagnosis", "gauge_chart"):
+        assert counts[section] == 0, section
+    assert counts["lot_projection"] == 2
@@ -0,0 +1,33 @@
+# Instrumentação: a escolha de um rerun vale só para a própria thread.
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instrument  # noqa: E402
+
+
+def test_begin_run_flag_is_per_thread():
+    was_enabled = instrument.is_enabled()
+    instrument.set_enabled(False)
+    instrument.reset()
+    seen = {}
+
+    def session(name, enabled):
+        instrument.begin_run(enabled)
+        instrument.record(f"test.{name}", 0.001)
+        seen[name] = (instrument.is_enabled(), instrument.last_run())
+
+    threads = [threading.Thread(target=session, args=args) for args in (("on", True), ("off", False), ("default", None))]
+    for thread in threads:
+        thread.start()
+        thread.join()
+
+    assert seen["on"] == (True, {"test.on": 0.001})
+    assert seen["off"] == (False, {})
+    assert seen["default"] == (False, {})
+    assert set(instrument.snapshot()["timers"]) == {"test.on"}
+    instrument.reset()
+    instrument.set_enabled(was_enabled)
@@ -0,0 +1,68 @@
+# Comparativo de marketplaces: perfil brasileiro igual ao catálogo, câmbio nas tarifas e melhor perfil.
+
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import iter_catalog_results  # noqa: E402
+from marketplaces import AMAZON_US, MARKETPLACES, _best, compare_marketplaces, evaluate_chunk, load_profiles  # noqa: E402
+
+# S0 à mão (Casa, 12%; 30x20x10 cm e 1,5 kg -> Padrão, peso cúbico 1,0 kg, faturável 1,5 kg -> R$16,45):
+#   199,90 - 6% 11,994 - comissão 23,988 - FBA 16,45 - armazenagem 0,60 - ads 7% 13,993
+#          - CMV 58,50 - devoluções 2% 3,998 = 70,377
+# S1 fica abaixo de R$79 (taxa fixa de R$5); S2 tem categoria desconhecida (Outros, 15%).
+CATALOG_CSV = """sku,product_name,price_sale,cost_product,cost_inbound,cost_prep,tax_rate,storage_fee,tacos_target,return_rate,misc_costs,category,length_cm,width_cm,height_cm,weight_kg
+S0,Organizador,199.90,55.00,2.50,1.00,0.06,0.60,0.07,0.02,0.00,Casa,30,20,10,1.5
+S1,Pincel,59.90,12.00,1.00,0.50,0.06,0.20,0.08,0.01,0.30,Beleza,20,5,3,0.1
+S2,Kit,129.97,40.00,3.00,1.20,0.06,0.90,0.05,0.03,0.00,Sem categoria,44,30,25,8.2
+"""
+
+
+def br_sn():
+    return [profile for profile in MARKETPLACES["profiles"] if profile["id"] == "BR-SN"]
+
+
+def test_br_simples_nacional_reproduces_the_catalog_with_amazon_br():
+    result = compare_marketplaces(io.StringIO(CATALOG_CSV), br_sn(), fmt="csv")
+    catalog = pd.concat(iter_catalog_results(io.StringIO(CATALOG_CSV), fmt="csv"))
+
+    assert result["net_profit"][0, 0] == pytest.approx(70.377, abs=1e-9)
+    np.testing.assert_allclose(result["net_profit"][:, 0], catalog["net_profit"], rtol=1e-12)
+    np.testing.assert_allclose(result["margin_net"][:, 0], catalog["margin_net"], rtol=1e-12)
+    assert catalog["fixed_fee"].tolist() == [0.0, 5.0, 0.0]
+
+
+def test_local_currency_fees_are_converted_back_at_the_fx_rate():
+    profiles = load_profiles([{"id": "US", "currency": "USD", "tax_rate": 0.0, "rate_card": AMAZON_US}])
+    columns = {
+        "price_sale": np.array([40.0]), "cost_product": np.array([10.0]),
+        "category": np.array(["Beleza"], dtype=object),
+        "length_cm": np.array([30.0]), "width_cm": np.array([20.0]), "height_cm": np.array([1.5]), "weight_kg": np.array([0.3]),
+    }
+    for name in ("cost_inbound", "cost_prep", "storage_fee", "tacos_target", "return_rate", "misc_costs"):
+        columns[name] = np.zeros(1)
+    result = evaluate_chunk(columns, profiles, np.array([5.0]))
+
+    # R$40 = US$8: Beleza abaixo de US$10 paga 8%; Small standard até 0,34 kg = US$3,58 = R$17,90
+    assert result["val_comm"][0, 0] == pytest.approx(3.20)
+    assert result["val_fba"][0, 0] == pytest.approx(17.90)
+    assert result["net_profit"][0, 0] == pytest.approx(40.0 - 10.0 - 3.20 - 17.90)
+
+
+def test_best_ignores_nan_profits():
+    profit = np.array([
+        [np.nan, 10.0, 4.0],
+        [3.0, np.nan, 7.5],
+        [np.nan, np.nan, 2.0],
+        [np.nan, np.nan, np.nan],
+        [1.0, 5.0, 2.0],
+    ])
+    best, gap = _best(profit)
+    np.testing.assert_array_equal(best, [1, 2, 2, 0, 1])
+    np.testing.assert_allclose(gap, [6.0, 4.5, np.nan, np.nan, 3.0])
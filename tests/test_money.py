@@ -0,0 +1,89 @@
+# Modo centavos: cada componente arredondado ao centavo no seu modo, somas exatas.
+
+import os
+import sys
+from decimal import ROUND_CEILING, ROUND_HALF_EVEN, ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import COMPONENT_ROUNDING, INPUT_COLUMNS, calculate_financials_cents  # noqa: E402
+from money import to_cents  # noqa: E402
+from product_graph import build_product_graph  # noqa: E402
+
+DECIMAL_MODES = {"half_up": ROUND_HALF_UP, "half_even": ROUND_HALF_EVEN, "ceiling": ROUND_CEILING}
+RATE_COMPONENTS = {"val_tax": "tax_rate", "val_comm": "commission_rate", "val_ads": "tacos_target", "val_returns": "return_rate"}
+COST_COMPONENTS = ("val_fixed", "val_fba", "val_storage", "cogs_total", "val_returns", "val_misc", "val_tax", "val_comm", "val_ads")
+
+
+def random_skus(n, seed=0):
+    # Preços em centavos e taxas com até 4 casas em %: valores que o modo representa sem perda
+    rng = np.random.default_rng(seed)
+    inputs = {name: rng.integers(0, 5_000, n) / 100 for name in INPUT_COLUMNS}
+    inputs["price_sale"] = rng.integers(100, 50_000, n) / 100
+    for name in RATE_COMPONENTS.values():
+        inputs[name] = rng.integers(0, 250_000, n) / 1_000_000
+    return inputs
+
+
+def cents(value, mode):
+    return int((value * 100).quantize(Decimal(1), rounding=DECIMAL_MODES[mode]))
+
+
+def test_each_rate_component_is_rounded_to_the_centavo_in_its_mode():
+    inputs = random_skus(2_000)
+    result = calculate_financials_cents(inputs)
+    for i in range(2_000):
+        price = Decimal(str(inputs["price_sale"][i]))
+        for component, rate in RATE_COMPONENTS.items():
+            expected = cents(price * Decimal(str(inputs[rate][i])), COMPONENT_ROUNDING[component])
+            assert result[component][i] == expected, (component, i)
+
+
+def test_ties_follow_each_component_mode():
+    # R$10,10 x 5% = 50,5 centavos: imposto vai para o par, anúncios arredondam para cima
+    inputs = {name: 0.0 for name in INPUT_COLUMNS}
+    inputs.update(price_sale=10.10, tax_rate=0.05, tacos_target=0.05, commission_rate=0.15, cost_product=4.0)
+    result = calculate_financials_cents(inputs)
+    assert (int(result["val_tax"][()]), int(result["val_ads"][()]), int(result["val_comm"][()])) == (50, 51, 152)
+    overridden = calculate_financials_cents(inputs, rounding={"val_tax": "half_up"})
+    assert int(overridden["val_tax"][()]) == 51
+
+
+def test_inputs_with_fractions_of_a_centavo_are_rounded_half_up():
+    np.testing.assert_array_equal(to_cents([10.105, 0.125, 129.9, -2.345]), [1011, 13, 12990, -235])
+    np.testing.assert_array_equal(to_cents([0.125, 0.135], "half_even"), [12, 14])
+
+
+def test_total_costs_is_the_sum_of_the_rounded_parts():
+    inputs = random_skus(5_000, seed=1)
+    result = calculate_financials_cents(inputs)
+    parts = sum(result[name] for name in COST_COMPONENTS)
+    np.testing.assert_array_equal(result["total_costs"], parts)
+    np.testing.assert_array_equal(result["net_profit"], result["gross_revenue"] - parts)
+    assert result["total_costs"].dtype == np.int64
+
+
+def test_break_even_rounds_up_to_the_centavo():
+    inputs = random_skus(500, seed=2)
+    result = calculate_financials_cents(inputs)
+    for i in range(500):
+        rates = sum(Decimal(str(inputs[rate][i])) for rate in RATE_COMPONENTS.values())
+        fixed = Decimal(int(result["cogs_total"][i] + result["val_fixed"][i] + result["val_fba"][i]
+                            + result["val_storage"][i] + result["val_misc"][i])) / 100
+        assert result["break_even"][i] == cents(fixed / (1 - rates), "ceiling")
+
+
+@pytest.mark.parametrize("lote_qty", [1, 3, 7, 1_000, 123_457])
+def test_cents_lot_projection_is_exact(lote_qty):
+    params = dict(zip(INPUT_COLUMNS, (129.90, 41.37, 2.13, 1.11, 0.0725, 0.15, 18.45, 0.33, 0.08, 0.02, 0.0, 0.17)))
+    graph = build_product_graph()
+    graph.set_inputs(**params, money_mode="cents", lote_qty=lote_qty)
+    lot = graph.get("lot_projection")
+
+    result = calculate_financials_cents(params)
+    for name, key in (("total_inv", "cogs_total"), ("total_profit", "net_profit"), ("total_rev", "gross_revenue")):
+        exact = Decimal(int(result[key][()]) * lote_qty) / 100
+        assert lot[name] == float(exact), name
@@ -0,0 +1,107 @@
+# Execução paralela: resultados independem do número de processos.
+
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import INPUT_COLUMNS, default_fixed_fee, net_profit_batch  # noqa: E402
+from fees import AMAZON_BR, load_rate_card  # noqa: E402
+from montecarlo import DEFAULT_SPREADS, sample_inputs, spec_around  # noqa: E402
+from parallel import (  # noqa: E402
+    _rng, _run_tasks, _SharedArray, rank_inputs_parallel, shutdown_pools, simulate_catalog,
+)
+from sensitivity import rank_inputs  # noqa: E402
+
+
+def catalog_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    inputs = {name: np.zeros(n) for name in INPUT_COLUMNS}
+    inputs["price_sale"] = rng.uniform(40, 300, n)
+    inputs["cost_product"] = inputs["price_sale"] * rng.uniform(0.15, 0.45, n)
+    inputs["tax_rate"][:] = 0.06
+    inputs["commission_rate"][:] = 0.15
+    inputs["fba_fee"][:] = 15.0
+    inputs["tacos_target"][:] = 0.08
+    inputs["return_rate"][:] = 0.02
+    inputs["fixed_fee"] = default_fixed_fee(inputs["price_sale"])
+    return inputs
+
+
+def test_rank_inputs_parallel_matches_serial():
+    inputs = catalog_inputs(1_000)
+    serial = rank_inputs(inputs, 0.1)
+    try:
+        for workers in (1, 2):
+            result = rank_inputs_parallel(inputs, 0.1, workers=workers, skus_per_task=300)
+            np.testing.assert_allclose(result["mean_swing"], serial["mean_swing"], rtol=1e-12)
+            np.testing.assert_array_equal(result["top_driver_count"], serial["top_driver_count"])
+    finally:
+        shutdown_pools()
+
+
+def expected_mean(inputs, i, seed, fixed_fee=None):
+    entropy = np.random.SeedSequence(seed).entropy
+    base = {name: inputs[name][i] for name in INPUT_COLUMNS}
+    distributions = {name: spec_around(dist, base[name], spread) for name, (dist, spread) in DEFAULT_SPREADS.items()}
+    sampled = sample_inputs(_rng(entropy, i), base, distributions, 5_000)
+    if fixed_fee is not None:
+        sampled["fixed_fee"] = fixed_fee(sampled["price_sale"])
+    return net_profit_batch(sampled).mean()
+
+
+def test_simulate_catalog_applies_fee_rule_only_to_rule_based_skus():
+    # Preço perto de R$79: parte dos sorteios cai abaixo e paga a taxa fixa
+    inputs = catalog_inputs(3, seed=1)
+    inputs["price_sale"][:] = 80.0
+    inputs["fixed_fee"][:] = 0.0
+    # SKU 1 trouxe fixed_fee no arquivo: fica com a taxa dele
+    fee_rule = np.array([True, False, True])
+    stats = simulate_catalog(inputs, DEFAULT_SPREADS, n_samples=5_000, seed=7, workers=1, fee_rule=fee_rule)
+
+    assert np.isclose(stats["mean"][0], expected_mean(inputs, 0, 7, default_fixed_fee))
+    assert np.isclose(stats["mean"][1], expected_mean(inputs, 1, 7))
+    assert np.isclose(stats["mean"][2], expected_mean(inputs, 2, 7, default_fixed_fee))
+
+    constant = simulate_catalog(inputs, DEFAULT_SPREADS, n_samples=5_000, seed=7, workers=1)
+    assert constant["mean"][0] > stats["mean"][0]
+    assert constant["mean"][1] == stats["mean"][1]
+
+
+def test_simulate_catalog_uses_the_rate_card_bands():
+    inputs = catalog_inputs(2, seed=2)
+    inputs["price_sale"][:] = 120.0
+    card = {**AMAZON_BR, "fixed_fee": [[0, 8.0], [150, 0.0]]}
+    stats = simulate_catalog(inputs, DEFAULT_SPREADS, n_samples=5_000, seed=3, workers=1, fee_rule=True, rate_card=card)
+    rule = load_rate_card(card).fixed_fee
+    for i in range(2):
+        assert np.isclose(stats["mean"][i], expected_mean(inputs, i, 3, rule))
+
+
+def slow_or_failing_task(out_name, out_shape, row, fail):
+    if fail:
+        raise ValueError("falhou")
+    time.sleep(0.5)
+    out = _SharedArray(out_shape, out_name)
+    try:
+        out.array[row] = 1.0
+    finally:
+        out.close()
+
+
+def test_failed_task_waits_for_running_siblings():
+    out = _SharedArray((2,))
+    try:
+        out.array[:] = 0.0
+        tasks = [(out.name, (2,), 0, True), (out.name, (2,), 1, False)]
+        with pytest.raises(ValueError):
+            _run_tasks(slow_or_failing_task, tasks, workers=2)
+        # A tarefa irmã terminou antes do erro chegar ao chamador
+        assert out.array[1] == 1.0
+    finally:
+        out.close()
+        shutdown_pools()
@@ -0,0 +1,74 @@
+# Precificação reversa: preço mínimo ao redor de R$79 e encaixe nos preços psicológicos.
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import (  # noqa: E402
+    INPUT_COLUMNS, LOW_PRICE_FIXED_FEE, LOW_PRICE_THRESHOLD, calculate_financials_batch,
+)
+from pricing import required_price, solve_target_prices  # noqa: E402
+
+# Taxas percentuais somam 31%: com margem de 20%, preço = custos / 0,49
+RATES = {"tax_rate": 0.06, "commission_rate": 0.15, "tacos_target": 0.08, "return_rate": 0.02}
+DENOMINATOR = 0.49
+
+
+def sku(cost_product, fixed_fee=None):
+    inputs = {name: 0.0 for name in INPUT_COLUMNS if name not in ("price_sale", "fixed_fee")}
+    inputs.update(RATES, cost_product=cost_product)
+    if fixed_fee is not None:
+        inputs["fixed_fee"] = fixed_fee
+    return inputs
+
+
+def margin_at(inputs, price):
+    return float(calculate_financials_batch({**inputs, "price_sale": price})["margin_net"])
+
+
+@pytest.mark.parametrize("price, ending, psych_price", [
+    (42.50, 0.90, 42.90),
+    (42.95, 0.97, 42.97),
+    (42.98, 0.99, 42.99),
+])
+def test_snaps_to_each_psychological_ending(price, ending, psych_price):
+    result = solve_target_prices(sku(price * DENOMINATOR, fixed_fee=0.0), [20.0])
+    assert result["price"][0] == pytest.approx(price)
+    assert result["psych_ending"][0] == pytest.approx(ending)
+    assert result["psych_price"][0] == pytest.approx(psych_price)
+    assert result["psych_margin"][0] >= 20.0 - 1e-9
+
+
+def test_ending_below_the_price_bumps_one_real():
+    # 42,97 < 42,98: o candidato .97 sobe para 43,97; .90 também sobe
+    result = solve_target_prices(sku(42.98 * DENOMINATOR, fixed_fee=0.0), [20.0])
+    np.testing.assert_allclose(result["candidates"][0], [43.90, 42.99, 43.97])
+
+
+def test_required_price_just_below_threshold_pays_the_fixed_fee():
+    inputs = sku(78.50 * DENOMINATOR - LOW_PRICE_FIXED_FEE)
+    price = required_price(inputs, [20.0])[0]
+    assert price == pytest.approx(78.50)
+    assert price < LOW_PRICE_THRESHOLD
+    assert margin_at(inputs, price) == pytest.approx(20.0)
+
+
+def test_required_price_just_above_threshold_skips_the_fixed_fee():
+    inputs = sku(79.50 * DENOMINATOR)
+    price = required_price(inputs, [20.0])[0]
+    assert price == pytest.approx(79.50)
+    assert margin_at(inputs, price) == pytest.approx(20.0)
+
+
+def test_fixed_fee_makes_the_lower_price_infeasible():
+    # Sem a taxa bastaria R$76; com os R$5 o preço passaria de R$79: o limiar é o mínimo
+    inputs = sku(76.00 * DENOMINATOR)
+    assert (76.00 * DENOMINATOR + LOW_PRICE_FIXED_FEE) / DENOMINATOR >= LOW_PRICE_THRESHOLD
+    price = required_price(inputs, [20.0])[0]
+    assert price == LOW_PRICE_THRESHOLD
+    assert margin_at(inputs, price) >= 20.0
+    assert margin_at(inputs, LOW_PRICE_THRESHOLD - 0.01) < 20.0
@@ -0,0 +1,32 @@
+# Grade 2-D: taxa fixa pela regra < R$79 em cada preço do eixo.
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import INPUT_COLUMNS, calculate_financials, default_fixed_fee  # noqa: E402
+from sensitivity import grid_2d  # noqa: E402
+
+BASE = dict(zip(INPUT_COLUMNS, (129.90, 35.0, 1.5, 1.0, 0.06, 0.16, 14.5, 0.5, 0.10, 0.03, 0.0, 0.0)))
+
+
+def test_grid_applies_fee_rule_per_price():
+    inputs = {name: value for name, value in BASE.items() if name != "fixed_fee"}
+    prices = np.array([49.9, 78.9, 79.0, 129.9])
+    costs = np.array([20.0, 35.0])
+    grid = grid_2d(inputs, "price_sale", "cost_product", prices, costs)
+    for i, cost in enumerate(costs):
+        for j, price in enumerate(prices):
+            params = {**BASE, "price_sale": price, "cost_product": cost, "fixed_fee": float(default_fixed_fee(price))}
+            expected = calculate_financials(*(params[name] for name in INPUT_COLUMNS))["net_profit"]
+            assert np.isclose(grid[i, j], expected)
+
+
+def test_grid_keeps_explicit_fixed_fee():
+    prices = np.array([49.9, 129.9])
+    grid = grid_2d(BASE, "price_sale", "cost_product", prices, [35.0])
+    expected = [calculate_financials(*({**BASE, "price_sale": p}[name] for name in INPUT_COLUMNS))["net_profit"] for p in prices]
+    np.testing.assert_allclose(grid[0], expected)
@@ -0,0 +1,58 @@
+# Catálogo compartilhado entre sessões: memos preenchidos uma vez, mesmo com leituras simultâneas.
+
+import os
+import sys
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import RANK_COLUMNS, Catalog  # noqa: E402
+from engine import INPUT_COLUMNS, calculate_financials_batch  # noqa: E402
+from shared import SharedRegistry  # noqa: E402
+
+SESSIONS = 16
+
+
+def shared_catalog(n=50_000, seed=0):
+    rng = np.random.default_rng(seed)
+    inputs = {name: np.full(n, value) for name, value in zip(INPUT_COLUMNS, (0.0, 0.0, 2.0, 1.0, 0.06, 0.15, 15.0, 0.5, 0.08, 0.02, 0.0, 0.0))}
+    inputs["price_sale"] = rng.uniform(40, 300, n)
+    inputs["cost_product"] = inputs["price_sale"] * rng.uniform(0.15, 0.45, n)
+    result = calculate_financials_batch(inputs)
+    skus = np.arange(n).astype(str).astype(object)
+    catalog = Catalog(skus, skus, inputs, {name: result[name] for name in RANK_COLUMNS})
+    return SharedRegistry().get_or_load("catalogo", catalog.freeze)
+
+
+def concurrently(func):
+    # Todas as "sessões" começam juntas
+    barrier = threading.Barrier(SESSIONS)
+    results = [None] * SESSIONS
+
+    def session(i):
+        barrier.wait()
+        results[i] = func()
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(SESSIONS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_sessions_share_one_order():
+    catalog = shared_catalog()
+    orders = concurrently(lambda: catalog.order("margin_net", ascending=True))
+    assert all(order is orders[0] for order in orders)
+    assert not orders[0].flags.writeable
+    np.testing.assert_array_equal(orders[0], np.argsort(catalog.metrics["margin_net"], kind="stable"))
+
+
+def test_concurrent_sessions_share_one_set_of_totals():
+    catalog = shared_catalog()
+    totals = concurrently(lambda: catalog.metric_totals(chunk_rows=5_000))
+    assert all(total is totals[0] for total in totals)
+    assert np.isclose(totals[0]["net_profit"], np.sum(catalog.metrics["net_profit"]))
@@ -0,0 +1,35 @@
+# Cache em disco: ida e volta de arrays numéricos e de texto.
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from store import DiskCache  # noqa: E402
+
+
+def test_round_trip_numeric_and_text(tmp_path):
+    cache = DiskCache(tmp_path)
+    names = np.array(["Caneca", None, "Café ☕", float("nan"), "", "x" * 500], dtype=object)
+    value = {"names": names, "price": np.arange(6, dtype=np.float64), "meta": ("csv", 6)}
+    key = cache.key("test", names)
+    cache.put(key, value)
+
+    loaded = cache.get(key)
+    assert loaded["names"].dtype == object
+    assert loaded["names"].tolist() == ["Caneca", None, "Café ☕", None, "", "x" * 500]
+    np.testing.assert_array_equal(loaded["price"], value["price"])
+    assert loaded["meta"] == ("csv", 6)
+
+
+def test_text_is_stored_variable_length(tmp_path):
+    cache = DiskCache(tmp_path)
+    names = np.array(["a"] * 10_000 + ["x" * 1_000], dtype=object)
+    key = cache.key("test", names)
+    cache.put(key, {"names": names})
+    stored = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(tmp_path) for f in files)
+    # Largura fixa seria 10.001 x 1.000 caracteres x 4 bytes
+    assert stored < 200_000
+    assert cache.get(key)["names"][-1] == "x" * 1_000